@@ -0,0 +1,64 @@
+#    Copyright 2018 - 2020 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Binary output throughput: line-based read vs bulk read (`binary_output=True`).
+
+Random data (newlines in random places) is prepared once and printed by `cat` several times.
+
+Usage: python benchmarks/bench_binary_output.py [--size-mb 1024] [--block-mb 64]
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import argparse
+import os
+import tempfile
+import time
+import typing
+
+# Package Implementation
+import exec_helpers
+
+
+def measure(runner: exec_helpers.Subprocess, command: str, size: int, **kwargs: typing.Any) -> float:
+    """Execute command and get throughput in MB/s."""
+    started = time.perf_counter()
+    result = runner.execute(command, **kwargs)
+    spent = time.perf_counter() - started
+    assert len(result.stdout_bin) == size, f"{len(result.stdout_bin)} != {size}"
+    return size / spent / 1024 / 1024
+
+
+def main() -> None:
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=1024, help="total output size in MiB")
+    parser.add_argument("--block-mb", type=int, default=64, help="random data block size in MiB")
+    args = parser.parse_args()
+
+    repeats = max(args.size_mb // args.block_mb, 1)
+    size = repeats * args.block_mb * 1024 * 1024
+    runner = exec_helpers.Subprocess()
+    with tempfile.NamedTemporaryFile() as block:
+        block.write(os.urandom(args.block_mb * 1024 * 1024))
+        block.flush()
+        command = " ".join(["cat"] + [block.name] * repeats)
+        print(f"Output: {size / 1024 / 1024:.0f} MiB of random binary data")
+        print(f"binary_output=True:  {measure(runner, command, size, binary_output=True):8.1f} MB/s")
+        print(f"line-based (default): {measure(runner, command, size):8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#    Copyright 2018 - 2020 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Environment preparation micro-benchmark: deepcopy + merge per call vs cached environment.
+
+Usage: python benchmarks/bench_env_cache.py [--vars 200] [--calls 10000] [--spawn 300]
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import argparse
+import copy
+import os
+import subprocess  # nosec  # Expected usage
+import timeit
+import typing
+
+# Package Implementation
+import exec_helpers
+from exec_helpers import _subprocess_helpers
+
+
+def prepare_uncached(env_patch: typing.Mapping[str, str]) -> typing.Dict[str, str]:
+    """Environment preparation as it was done before cache."""
+    env = dict(copy.deepcopy(os.environ))
+    env.update(env_patch)
+    return env
+
+
+def main() -> None:
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vars", type=int, default=200, help="extra environment variables")
+    parser.add_argument("--calls", type=int, default=10000, help="environment preparations")
+    parser.add_argument("--spawn", type=int, default=300, help="processes to spawn")
+    args = parser.parse_args()
+
+    for idx in range(args.vars):
+        os.environ[f"EXEC_HELPERS_BENCH_{idx}"] = "x" * 64
+    env_patch = {"LC_ALL": "C"}
+    cache = _subprocess_helpers.EnvCache()
+
+    print(f"Environment size: {len(os.environ)} variables")
+    uncached = timeit.timeit(lambda: prepare_uncached(env_patch), number=args.calls)
+    cached = timeit.timeit(lambda: cache.get(None, env_patch), number=args.calls)
+    print(f"prepare env x{args.calls}: deepcopy {uncached:.3f}s, cached {cached:.3f}s ({uncached / cached:.1f}x)")
+
+    def spawn(env: typing.Mapping[str, str]) -> None:
+        subprocess.run(["true"], env=env, check=True)  # nosec  # Expected usage
+
+    uncached = timeit.timeit(lambda: spawn(prepare_uncached(env_patch)), number=args.spawn)
+    cached = timeit.timeit(lambda: spawn(cache.get(None, env_patch)), number=args.spawn)  # type: ignore
+    print(f"prepare env + spawn x{args.spawn}: deepcopy {uncached:.3f}s, cached {cached:.3f}s")
+
+    runner = exec_helpers.Subprocess()
+    helper = timeit.timeit(lambda: runner.execute("true", env_patch=env_patch), number=args.spawn)
+    print(f"Subprocess.execute(env_patch=...) x{args.spawn}: {helper:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#    Copyright 2018 - 2020 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Noisy neighbor benchmark: latency of service loop while CPU-bound commands are running.
+
+Commands are started by Subprocess without scheduling controls and with `nice` (and `cpu_affinity` if requested).
+
+Usage: python benchmarks/bench_noisy_neighbor.py [--burners 4] [--duration 3] [--nice 19] [--cpus 0]
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import argparse
+import concurrent.futures
+import statistics
+import time
+import typing
+
+# Package Implementation
+import exec_helpers
+
+BURN_COMMAND = "i=0; while true; do i=$((i+1)); done"
+
+
+def service_loop(duration: float, period: float = 0.005) -> typing.List[float]:
+    """Sleep periodically and collect wake-up delays in milliseconds."""
+    delays: typing.List[float] = []
+    stop = time.monotonic() + duration
+    while time.monotonic() < stop:
+        started = time.monotonic()
+        time.sleep(period)
+        sum(range(2000))  # small piece of work per tick
+        delays.append((time.monotonic() - started - period) * 1000)
+    return delays
+
+
+def run(burners: int, duration: float, **scheduling: typing.Any) -> typing.List[float]:
+    """Run service loop with CPU burners executed in background."""
+    runner = exec_helpers.Subprocess()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=burners) as pool:
+        futures = [
+            pool.submit(runner.execute, BURN_COMMAND, timeout=duration + 0.5, **scheduling) for _ in range(burners)
+        ]
+        time.sleep(0.2)  # Let burners start
+        delays = service_loop(duration)
+        for future in futures:
+            try:
+                future.result()
+            except exec_helpers.ExecHelperTimeoutError:
+                pass
+    return delays
+
+
+def report(name: str, delays: typing.List[float]) -> None:
+    """Print latency percentiles."""
+    ordered = sorted(delays)
+    p50 = statistics.median(ordered)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(f"{name:<28} ticks={len(ordered):5d} p50={p50:7.3f}ms p99={p99:8.3f}ms max={ordered[-1]:8.3f}ms")
+
+
+def main() -> None:
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--burners", type=int, default=4, help="CPU-bound commands running in parallel")
+    parser.add_argument("--duration", type=float, default=3, help="measurement duration in seconds")
+    parser.add_argument("--nice", type=int, default=19, help="niceness increment for commands")
+    parser.add_argument("--cpus", type=int, nargs="*", default=None, help="CPU affinity for commands")
+    args = parser.parse_args()
+
+    report("idle", service_loop(args.duration))
+    report("burners", run(args.burners, args.duration))
+    scheduling: typing.Dict[str, typing.Any] = {"nice": args.nice}
+    if args.cpus:
+        scheduling["cpu_affinity"] = args.cpus
+    report(f"burners {scheduling}", run(args.burners, args.duration, **scheduling))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#    Copyright 2018 - 2020 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Spawn latency of `Subprocess.execute("true")` in big multithreaded process: fork vs spawn helper.
+
+Current process allocates (and touches) memory and starts idle threads before measurement.
+
+Usage: python benchmarks/bench_spawn_helper.py [--count 1000] [--memory-mb 2048] [--threads 32]
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import argparse
+import statistics
+import threading
+import time
+import typing
+
+# Package Implementation
+import exec_helpers
+
+
+def measure(runner: exec_helpers.Subprocess, count: int) -> typing.List[float]:
+    """Measure latency of calls.
+
+    :param runner: helper to use
+    :type runner: exec_helpers.Subprocess
+    :param count: amount of calls
+    :type count: int
+    :return: latencies in seconds
+    :rtype: typing.List[float]
+    """
+    runner.execute("true")  # Warm up: helper start is not measured
+    latencies: typing.List[float] = []
+    for _ in range(count):
+        started = time.perf_counter()
+        runner.execute("true")
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def report(name: str, latencies: typing.List[float]) -> None:
+    """Print statistics.
+
+    :param name: measurement name
+    :type name: str
+    :param latencies: latencies in seconds
+    :type latencies: typing.List[float]
+    """
+    ordered = sorted(latencies)
+    print(
+        f"{name:<12} mean {statistics.mean(latencies) * 1000:6.2f}ms  "
+        f"p50 {ordered[len(ordered) // 2] * 1000:6.2f}ms  "
+        f"p99 {ordered[int(len(ordered) * 0.99)] * 1000:6.2f}ms  "
+        f"max {ordered[-1] * 1000:6.2f}ms"
+    )
+
+
+def main() -> None:
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=1000, help="amount of calls per mode")
+    parser.add_argument("--memory-mb", type=int, default=2048, help="memory to allocate in current process")
+    parser.add_argument("--threads", type=int, default=32, help="idle threads to start in current process")
+    args = parser.parse_args()
+
+    ballast = bytearray(b"\x01" * (args.memory_mb * 1024 * 1024))
+    stop = threading.Event()
+    threads = [threading.Thread(target=stop.wait, daemon=True) for _ in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    print(f"Parent: {len(ballast) // 1024 // 1024} MiB allocated, {args.threads} idle threads")
+
+    runner = exec_helpers.Subprocess()
+    report("fork", measure(runner, args.count))
+    runner = exec_helpers.Subprocess(spawn_helper=True)
+    try:
+        report("spawn helper", measure(runner, args.count))
+    finally:
+        runner.close()
+        stop.set()
+
+
+if __name__ == "__main__":
+    main()
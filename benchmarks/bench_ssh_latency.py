@@ -0,0 +1,157 @@
+#    Copyright 2018 - 2020 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Per-call latency of `SSHClient.execute("true")` against local test SSH server.
+
+Server is started in-process (paramiko server mode on 127.0.0.1, commands are executed by local shell),
+so network latency is excluded and the result is the overhead of command execution by helper.
+
+Usage: python benchmarks/bench_ssh_latency.py [--count 1000]
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import argparse
+import socket
+import statistics
+import subprocess  # nosec  # Expected usage
+import threading
+import time
+import typing
+
+# External Dependencies
+import paramiko
+
+# Package Implementation
+import exec_helpers
+
+USERNAME = "bench"
+PASSWORD = "bench"
+
+
+class TestServer(paramiko.ServerInterface):
+    """SSH server interface: password authentication, commands are executed by local shell."""
+
+    def check_auth_password(self, username: str, password: str) -> int:
+        """Accept benchmark credentials."""
+        if (username, password) == (USERNAME, PASSWORD):
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def get_allowed_auths(self, username: str) -> str:
+        """Only password authentication is supported."""
+        return "password"
+
+    def check_channel_request(self, kind: str, chanid: int) -> int:
+        """Allow sessions only."""
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_exec_request(self, channel: paramiko.Channel, command: bytes) -> bool:
+        """Execute command in background thread."""
+        threading.Thread(target=run_command, args=(channel, command), daemon=True).start()
+        return True
+
+
+def run_command(channel: paramiko.Channel, command: bytes) -> None:
+    """Execute command and send output, EOF and exit status like OpenSSH server.
+
+    Channel is closed by client: close sent from this thread may outrun the reply to the exec request.
+
+    :param channel: session channel
+    :type channel: paramiko.Channel
+    :param command: command to execute
+    :type command: bytes
+    """
+    proc = subprocess.run(  # nosec  # Expected usage
+        command, shell=True, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False
+    )
+    channel.sendall(proc.stdout)
+    channel.sendall_stderr(proc.stderr)
+    channel.shutdown_write()
+    channel.send_exit_status(proc.returncode)
+
+
+def start_server(server: typing.Callable[[], paramiko.ServerInterface] = TestServer) -> int:
+    """Start test SSH server on localhost.
+
+    :param server: server interface factory (called for each connection)
+    :type server: typing.Callable[[], paramiko.ServerInterface]
+    :return: listening port
+    :rtype: int
+    """
+    host_key = paramiko.RSAKey.generate(2048)
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(16)
+
+    def serve() -> None:
+        """Accept connections."""
+        while True:
+            sock, _ = listener.accept()
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)  # As OpenSSH server does
+            transport = paramiko.Transport(sock)
+            transport.add_server_key(host_key)
+            transport.start_server(server=server())
+
+    threading.Thread(target=serve, daemon=True).start()
+    return listener.getsockname()[1]  # type: ignore
+
+
+def measure(ssh: exec_helpers.SSHClient, count: int) -> typing.List[float]:
+    """Measure latency of calls.
+
+    :param ssh: connected helper
+    :type ssh: exec_helpers.SSHClient
+    :param count: amount of calls
+    :type count: int
+    :return: latencies in seconds
+    :rtype: typing.List[float]
+    """
+    latencies: typing.List[float] = []
+    for _ in range(count):
+        started = time.perf_counter()
+        ssh.execute("true")
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def main() -> None:
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=1000, help="amount of calls")
+    args = parser.parse_args()
+
+    port = start_server()
+    ssh = exec_helpers.SSHClient(
+        host="127.0.0.1", port=port, auth=exec_helpers.SSHAuth(username=USERNAME, password=PASSWORD), keepalive=False
+    )
+    ssh.execute("true")  # Warm up
+    latencies = measure(ssh, args.count)
+    ssh.close()
+
+    ordered = sorted(latencies)
+    print(
+        f"{args.count} calls: total {sum(latencies):7.2f}s  "
+        f"mean {statistics.mean(latencies) * 1000:6.2f}ms  "
+        f"p50 {ordered[len(ordered) // 2] * 1000:6.2f}ms  "
+        f"p99 {ordered[int(len(ordered) * 0.99)] * 1000:6.2f}ms  "
+        f"max {ordered[-1] * 1000:6.2f}ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#    Copyright 2018 - 2020 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Throughput of small commands: `SSHClient.execute` vs persistent shell `SSHClient.session()` over slow link.
+
+Server is started in-process (see bench_ssh_latency.py), connection goes through local TCP relay
+delaying data in both directions by half of RTT (bandwidth is not limited).
+
+Usage: python benchmarks/bench_ssh_session.py [--count 100] [--rtt 0.05]
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import argparse
+import os
+import queue
+import socket
+import subprocess  # nosec  # Expected usage
+import threading
+import time
+import typing
+
+# External Dependencies
+import paramiko
+from bench_ssh_latency import PASSWORD
+from bench_ssh_latency import USERNAME
+from bench_ssh_latency import TestServer
+from bench_ssh_latency import start_server
+
+# Package Implementation
+import exec_helpers
+
+
+class StreamingServer(TestServer):
+    """Commands are executed with STDIN and output streamed: persistent shell is supported."""
+
+    def check_channel_exec_request(self, channel: paramiko.Channel, command: bytes) -> bool:
+        """Execute command in background thread."""
+        threading.Thread(target=run_streaming, args=(channel, command), daemon=True).start()
+        return True
+
+
+def pump(read: typing.Callable[[], bytes], write: typing.Callable[[bytes], typing.Any]) -> None:
+    """Copy data until EOF.
+
+    :param read: read chunk (empty on EOF)
+    :type read: typing.Callable[[], bytes]
+    :param write: write chunk
+    :type write: typing.Callable[[bytes], typing.Any]
+    """
+    try:
+        for chunk in iter(read, b""):
+            write(chunk)
+    except OSError:
+        pass
+
+
+def run_streaming(channel: paramiko.Channel, command: bytes) -> None:
+    """Execute command with STDIN received from channel and output sent as produced.
+
+    :param channel: session channel
+    :type channel: paramiko.Channel
+    :param command: command to execute
+    :type command: bytes
+    """
+    proc = subprocess.Popen(  # nosec  # Expected usage
+        command, shell=True, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0
+    )
+
+    def feed() -> None:
+        """Send STDIN, stop command on channel close."""
+        pump(lambda: channel.recv(65536), proc.stdin.write)  # type: ignore
+        proc.kill()
+
+    def reader(stream: typing.IO[bytes]) -> typing.Callable[[], bytes]:
+        """Read available data from process pipe."""
+        return lambda: os.read(stream.fileno(), 65536)
+
+    threading.Thread(target=feed, daemon=True).start()
+    stderr_reader = reader(proc.stderr)  # type: ignore
+    stderr = threading.Thread(target=pump, args=(stderr_reader, channel.sendall_stderr), daemon=True)
+    stderr.start()
+    pump(reader(proc.stdout), channel.sendall)  # type: ignore
+    stderr.join()
+    code: int = proc.wait()
+    try:
+        channel.shutdown_write()
+        channel.send_exit_status(code if code >= 0 else 128 - code)
+    except (OSError, EOFError):  # Closed by client
+        pass
+
+
+def delayed_copy(src: socket.socket, dst: socket.socket, delay: float) -> None:
+    """Copy data from socket to socket with delay, keeping order.
+
+    :param src: source socket
+    :type src: socket.socket
+    :param dst: destination socket
+    :type dst: socket.socket
+    :param delay: one way delay in seconds
+    :type delay: float
+    """
+    chunks: queue.SimpleQueue[typing.Tuple[float, bytes]] = queue.SimpleQueue()
+
+    def send() -> None:
+        """Send chunks when due."""
+        while True:
+            due, chunk = chunks.get()
+            time.sleep(max(due - time.monotonic(), 0))
+            if not chunk:
+                dst.shutdown(socket.SHUT_WR)
+                return
+            dst.sendall(chunk)
+
+    threading.Thread(target=send, daemon=True).start()
+    pump(lambda: src.recv(65536), lambda chunk: chunks.put((time.monotonic() + delay, chunk)))
+    chunks.put((time.monotonic() + delay, b""))
+
+
+def start_relay(port: int, rtt: float) -> int:
+    """Start TCP relay to local port with round trip delay.
+
+    :param port: destination port on localhost
+    :type port: int
+    :param rtt: round trip time in seconds
+    :type rtt: float
+    :return: listening port
+    :rtype: int
+    """
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(16)
+
+    def serve() -> None:
+        """Accept connections and relay them."""
+        while True:
+            client, _ = listener.accept()
+            server = socket.create_connection(("127.0.0.1", port))
+            for sock in (client, server):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=delayed_copy, args=(client, server, rtt / 2), daemon=True).start()
+            threading.Thread(target=delayed_copy, args=(server, client, rtt / 2), daemon=True).start()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return listener.getsockname()[1]  # type: ignore
+
+
+def measure(run: typing.Callable[[str], exec_helpers.ExecResult], count: int) -> float:
+    """Measure throughput of calls.
+
+    :param run: command executor
+    :type run: typing.Callable[[str], exec_helpers.ExecResult]
+    :param count: amount of calls
+    :type count: int
+    :return: commands per second
+    :rtype: float
+    """
+    run("true")  # Warm up
+    started = time.perf_counter()
+    for _ in range(count):
+        run("true")
+    return count / (time.perf_counter() - started)
+
+
+def main() -> None:
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=100, help="amount of calls")
+    parser.add_argument("--rtt", type=float, default=0.05, help="simulated round trip time in seconds")
+    args = parser.parse_args()
+
+    port = start_relay(start_server(StreamingServer), args.rtt)
+    ssh = exec_helpers.SSHClient(
+        host="127.0.0.1", port=port, auth=exec_helpers.SSHAuth(username=USERNAME, password=PASSWORD), keepalive=False
+    )
+    execute = measure(ssh.execute, args.count)
+    with ssh.session() as session:
+        persistent = measure(session.execute, args.count)
+    ssh.close()
+
+    print(f"RTT {args.rtt * 1000:.0f}ms, {args.count} calls of 'true':")
+    print(f"  execute:   {execute:7.2f} commands/s")
+    print(f"  session(): {persistent:7.2f} commands/s ({persistent / execute:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#    Copyright 2018 - 2020 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""STDIN regression benchmark: pipe data much larger than pipe buffer through `cat`.
+
+STDIN is written concurrently with output reading: without it both sides are blocked until timeout.
+Sync (selector and reader threads) and asyncio helpers are measured.
+
+Usage: python benchmarks/bench_stdin_pipe.py [--size-mb 100] [--timeout 120]
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import argparse
+import asyncio
+import time
+import typing
+from unittest import mock
+
+# Package Implementation
+import exec_helpers
+from exec_helpers import async_api
+
+
+def measure(runner: exec_helpers.Subprocess, data: bytes, timeout: float, **kwargs: typing.Any) -> float:
+    """Pipe data through cat.
+
+    :param runner: helper to use
+    :type runner: exec_helpers.Subprocess
+    :param data: STDIN data
+    :type data: bytes
+    :param timeout: command timeout
+    :type timeout: float
+    :param kwargs: additional execute arguments
+    :type kwargs: typing.Any
+    :return: execution time in seconds
+    :rtype: float
+    """
+    started = time.perf_counter()
+    result = runner.execute("cat", stdin=data, timeout=timeout, **kwargs)
+    spent = time.perf_counter() - started
+    assert len(result.stdout_bin) == len(data), f"{len(result.stdout_bin)} != {len(data)}"
+    return spent
+
+
+async def ameasure(data: bytes, timeout: float, **kwargs: typing.Any) -> float:
+    """Pipe data through cat using asyncio helper.
+
+    :param data: STDIN data
+    :type data: bytes
+    :param timeout: command timeout
+    :type timeout: float
+    :param kwargs: additional execute arguments
+    :type kwargs: typing.Any
+    :return: execution time in seconds
+    :rtype: float
+    """
+    started = time.perf_counter()
+    result = await async_api.Subprocess().execute("cat", stdin=data, timeout=timeout, **kwargs)
+    spent = time.perf_counter() - started
+    assert len(result.stdout_bin) == len(data), f"{len(result.stdout_bin)} != {len(data)}"
+    return spent
+
+
+def main() -> None:
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=100, help="STDIN size in MiB")
+    parser.add_argument("--timeout", type=float, default=120, help="timeout per command")
+    args = parser.parse_args()
+
+    data = b"x" * 1023 + b"\n"
+    data *= args.size_mb * 1024
+    size_mb = len(data) / 1024 / 1024
+
+    def print_result(name: str, spent: float) -> None:
+        """Print throughput."""
+        print(f"{name:<22} {spent:6.2f}s  {size_mb / spent:8.1f} MB/s")
+
+    print(f"STDIN: {size_mb:.0f} MiB")
+    runner = exec_helpers.Subprocess()
+    print_result("selector", measure(runner, data, args.timeout))
+    print_result("selector, binary", measure(runner, data, args.timeout, binary_output=True))
+    with mock.patch("exec_helpers._subprocess_helpers.selectable_pipes", return_value=False):
+        print_result("threads", measure(runner, data, args.timeout))
+    print_result("asyncio", asyncio.run(ameasure(data, args.timeout)))
+    print_result("asyncio, binary", asyncio.run(ameasure(data, args.timeout, binary_output=True)))
+
+
+if __name__ == "__main__":
+    main()
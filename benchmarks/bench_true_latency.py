@@ -0,0 +1,86 @@
+#    Copyright 2018 - 2020 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Per-call latency of `Subprocess.execute("true")`.
+
+Both output reading paths are measured: selector in the calling thread (real pipes)
+and reader threads (used for non-selectable streams).
+
+Usage: python benchmarks/bench_true_latency.py [--count 10000]
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import argparse
+import statistics
+import time
+import typing
+from unittest import mock
+
+# Package Implementation
+import exec_helpers
+from exec_helpers import _subprocess_helpers
+
+
+def measure(runner: exec_helpers.Subprocess, count: int) -> typing.List[float]:
+    """Measure latency of calls.
+
+    :param runner: helper to use
+    :type runner: exec_helpers.Subprocess
+    :param count: amount of calls
+    :type count: int
+    :return: latencies in seconds
+    :rtype: typing.List[float]
+    """
+    latencies: typing.List[float] = []
+    for _ in range(count):
+        started = time.perf_counter()
+        runner.execute("true")
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def report(name: str, latencies: typing.List[float]) -> None:
+    """Print statistics.
+
+    :param name: measurement name
+    :type name: str
+    :param latencies: latencies in seconds
+    :type latencies: typing.List[float]
+    """
+    ordered = sorted(latencies)
+    print(
+        f"{name:<10} total {sum(latencies):7.2f}s  "
+        f"mean {statistics.mean(latencies) * 1000:6.2f}ms  "
+        f"p50 {ordered[len(ordered) // 2] * 1000:6.2f}ms  "
+        f"p99 {ordered[int(len(ordered) * 0.99)] * 1000:6.2f}ms  "
+        f"max {ordered[-1] * 1000:6.2f}ms"
+    )
+
+
+def main() -> None:
+    """Run benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=10000, help="amount of calls per reading path")
+    args = parser.parse_args()
+
+    runner = exec_helpers.Subprocess()
+    report("selector", measure(runner, args.count))
+    with mock.patch.object(_subprocess_helpers, "selectable_pipes", return_value=False):
+        report("threads", measure(runner, args.count))
+
+
+if __name__ == "__main__":
+    main()
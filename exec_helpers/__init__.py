@@ -22,6 +22,7 @@ from ._ssh_helpers import HostsSSHConfigs
 from ._ssh_helpers import SSHConfig
 from .api import ExecHelper
 from .api import mask_command
+from .connection_pool import SSHConnectionPool
 from .exceptions import CalledProcessError
 from .exceptions import ExecCalledProcessError
 from .exceptions import ExecHelperError
@@ -30,7 +31,11 @@ from .exceptions import ExecHelperTimeoutError
 from .exceptions import ParallelCallExceptions
 from .exceptions import ParallelCallProcessError
 from .exec_result import ExecResult
+from .exec_result import PipelineResult
+from .exec_result import ResourceUsage
+from .executor import HelperExecutor
 from .proc_enums import ExitCodes
+from .result_cache import ResultCache
 from .ssh import SSHClient
 from .ssh_auth import SSHAuth
 from .subprocess import Subprocess  # nosec  # Expected
@@ -58,6 +63,11 @@ __all__ = (
     "Subprocess",
     "ExitCodes",
     "ExecResult",
+    "PipelineResult",
+    "ResourceUsage",
+    "ResultCache",
+    "HelperExecutor",
+    "SSHConnectionPool",
     "async_api",
 )
 
@@ -0,0 +1,388 @@
+#    Copyright 2018 - 2020 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Delivery of command output to user callbacks while command is running.
+
+Callbacks are called from the output reader or, if queue size is set, from the dedicated thread.
+Queue is bounded: if consumer is slow, reader waits for free slot and stops reading pipes,
+so command is throttled by pipe buffer instead of unbounded memory growth.
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import asyncio
+import contextlib
+import logging
+import queue
+import threading
+import time
+import typing
+
+__all__ = ("OutputCallbackT", "OutputCallbacks")
+
+OutputCallbackT = typing.Optional[typing.Callable[[bytes], typing.Any]]
+_ItemT = typing.Tuple[OutputCallbackT, OutputCallbackT, bytes, typing.Sequence[bytes]]
+
+_STOP = None
+
+
+class OutputCallbacks:
+    """Dispatcher of command output to user callbacks.
+
+    .. versionadded:: 7.1.0
+    """
+
+    __slots__ = (
+        "__on_stdout_line",
+        "__on_stderr_line",
+        "__on_stdout_chunk",
+        "__on_stderr_chunk",
+        "__logger",
+        "__queue",
+        "__consumer",
+        "__lock",
+        "__active",
+        "__active_since",
+        "__stalled",
+    )
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        *,
+        on_stdout_line: OutputCallbackT = None,
+        on_stderr_line: OutputCallbackT = None,
+        on_stdout_chunk: OutputCallbackT = None,
+        on_stderr_chunk: OutputCallbackT = None,
+        queue_size: int = 0,
+    ) -> None:
+        """Dispatcher of command output to user callbacks.
+
+        :param logger: logger for callback errors
+        :type logger: logging.Logger
+        :param on_stdout_line: callback for each STDOUT line (line end is kept)
+        :type on_stdout_line: typing.Optional[typing.Callable[[bytes], typing.Any]]
+        :param on_stderr_line: callback for each STDERR line (line end is kept)
+        :type on_stderr_line: typing.Optional[typing.Callable[[bytes], typing.Any]]
+        :param on_stdout_chunk: callback for STDOUT data as read
+        :type on_stdout_chunk: typing.Optional[typing.Callable[[bytes], typing.Any]]
+        :param on_stderr_chunk: callback for STDERR data as read
+        :type on_stderr_chunk: typing.Optional[typing.Callable[[bytes], typing.Any]]
+        :param queue_size: call callbacks from dedicated thread with queue of this size (0: call from reader)
+        :type queue_size: int
+        """
+        self.__on_stdout_line: OutputCallbackT = on_stdout_line
+        self.__on_stderr_line: OutputCallbackT = on_stderr_line
+        self.__on_stdout_chunk: OutputCallbackT = on_stdout_chunk
+        self.__on_stderr_chunk: OutputCallbackT = on_stderr_chunk
+        self.__logger: logging.Logger = logger
+        self.__queue: typing.Optional[queue.Queue[typing.Optional[_ItemT]]] = None
+        self.__consumer: typing.Optional[threading.Thread] = None
+        self.__lock = threading.Lock()
+        self.__active: int = 0
+        self.__active_since: float = 0.0
+        self.__stalled: float = 0.0
+        if queue_size > 0:
+            self.__queue = queue.Queue(maxsize=queue_size)
+            self.__consumer = threading.Thread(target=self.__consume, name="exec-helpers-output-callbacks", daemon=True)
+            self.__consumer.start()
+
+    @classmethod
+    def create(
+        cls,
+        logger: logging.Logger,
+        *,
+        on_stdout_line: OutputCallbackT = None,
+        on_stderr_line: OutputCallbackT = None,
+        on_stdout_chunk: OutputCallbackT = None,
+        on_stderr_chunk: OutputCallbackT = None,
+        queue_size: int = 0,
+    ) -> typing.Optional[OutputCallbacks]:
+        """Create dispatcher if any callback is set.
+
+        :param logger: logger for callback errors
+        :type logger: logging.Logger
+        :param on_stdout_line: callback for each STDOUT line (line end is kept)
+        :type on_stdout_line: typing.Optional[typing.Callable[[bytes], typing.Any]]
+        :param on_stderr_line: callback for each STDERR line (line end is kept)
+        :type on_stderr_line: typing.Optional[typing.Callable[[bytes], typing.Any]]
+        :param on_stdout_chunk: callback for STDOUT data as read
+        :type on_stdout_chunk: typing.Optional[typing.Callable[[bytes], typing.Any]]
+        :param on_stderr_chunk: callback for STDERR data as read
+        :type on_stderr_chunk: typing.Optional[typing.Callable[[bytes], typing.Any]]
+        :param queue_size: call callbacks from dedicated thread with queue of this size (0: call from reader)
+        :type queue_size: int
+        :return: dispatcher or None if no callbacks set
+        :rtype: typing.Optional[OutputCallbacks]
+        """
+        if on_stdout_line is None and on_stderr_line is None and on_stdout_chunk is None and on_stderr_chunk is None:
+            return None
+        return cls(
+            logger,
+            on_stdout_line=on_stdout_line,
+            on_stderr_line=on_stderr_line,
+            on_stdout_chunk=on_stdout_chunk,
+            on_stderr_chunk=on_stderr_chunk,
+            queue_size=queue_size,
+        )
+
+    @property
+    def stall_time(self) -> float:
+        """Total time output readers spent waiting for callbacks (including running wait).
+
+        Output is not read from pipes while reader waits, so this time should not be counted as idle pipe time.
+
+        :rtype: float
+        """
+        with self.__lock:
+            if self.__active:
+                return self.__stalled + time.monotonic() - self.__active_since
+            return self.__stalled
+
+    @contextlib.contextmanager
+    def __stall(self) -> typing.Iterator[None]:
+        """Track time of reader waiting for callbacks."""
+        with self.__lock:
+            if not self.__active:
+                self.__active_since = time.monotonic()
+            self.__active += 1
+        try:
+            yield
+        finally:
+            with self.__lock:
+                self.__active -= 1
+                if not self.__active:
+                    self.__stalled += time.monotonic() - self.__active_since
+
+    def __call_safe(self, callback: typing.Callable[[bytes], typing.Any], data: bytes) -> None:
+        """Call user callback, errors are logged and do not interrupt output reading.
+
+        :param callback: user callback
+        :type callback: typing.Callable[[bytes], typing.Any]
+        :param data: output data
+        :type data: bytes
+        """
+        try:
+            callback(data)
+        except Exception:  # pylint: disable=broad-except
+            self.__logger.exception(f"Output callback {callback!r} failed")
+
+    def __deliver(self, item: _ItemT) -> None:
+        """Call callbacks for output data.
+
+        :param item: chunk callback, line callback, chunk and lines
+        :type item: typing.Tuple
+        """
+        on_chunk, on_line, chunk, lines = item
+        if on_chunk is not None and chunk:
+            self.__call_safe(on_chunk, chunk)
+        if on_line is not None:
+            for line in lines:
+                self.__call_safe(on_line, line)
+
+    def __consume(self) -> None:
+        """Dedicated thread: call callbacks for queued output."""
+        while True:
+            item: typing.Optional[_ItemT] = self.__queue.get()  # type: ignore
+            if item is _STOP:
+                return
+            self.__deliver(item)  # type: ignore
+
+    def __submit(self, item: _ItemT) -> None:
+        """Deliver output: directly or via queue (blocks while queue is full).
+
+        :param item: chunk callback, line callback, chunk and lines
+        :type item: typing.Tuple
+        """
+        if item[0] is None and item[1] is None:
+            return
+        with self.__stall():
+            if self.__queue is None:
+                self.__deliver(item)
+            else:
+                self.__queue.put(item)
+
+    async def __asubmit(self, item: _ItemT) -> None:
+        """Deliver output without blocking event loop while queue is full.
+
+        :param item: chunk callback, line callback, chunk and lines
+        :type item: typing.Tuple
+        """
+        if item[0] is None and item[1] is None:
+            return
+        if self.__queue is None:
+            with self.__stall():
+                self.__deliver(item)
+            return
+        try:
+            self.__queue.put_nowait(item)
+        except queue.Full:
+            with self.__stall():
+                await asyncio.get_event_loop().run_in_executor(None, self.__queue.put, item)
+
+    def feed_stdout(self, chunk: bytes, lines: typing.Sequence[bytes]) -> None:
+        """Deliver STDOUT data.
+
+        :param chunk: data as read (empty on EOF)
+        :type chunk: bytes
+        :param lines: lines completed by data
+        :type lines: typing.Sequence[bytes]
+        """
+        self.__submit((self.__on_stdout_chunk, self.__on_stdout_line, chunk, lines))
+
+    def feed_stderr(self, chunk: bytes, lines: typing.Sequence[bytes]) -> None:
+        """Deliver STDERR data.
+
+        :param chunk: data as read (empty on EOF)
+        :type chunk: bytes
+        :param lines: lines completed by data
+        :type lines: typing.Sequence[bytes]
+        """
+        self.__submit((self.__on_stderr_chunk, self.__on_stderr_line, chunk, lines))
+
+    def feed_stdout_chunk(self, chunk: bytes) -> None:
+        """Deliver STDOUT data read in bulk mode (not split to lines).
+
+        :param chunk: data as read
+        :type chunk: bytes
+        """
+        self.__submit((self.__on_stdout_chunk, None, chunk, ()))
+
+    def feed_stderr_chunk(self, chunk: bytes) -> None:
+        """Deliver STDERR data read in bulk mode (not split to lines).
+
+        :param chunk: data as read
+        :type chunk: bytes
+        """
+        self.__submit((self.__on_stderr_chunk, None, chunk, ()))
+
+    async def afeed_stdout_chunk(self, chunk: bytes) -> None:
+        """Deliver STDOUT data read in bulk mode (not split to lines) without blocking event loop.
+
+        :param chunk: data as read
+        :type chunk: bytes
+        """
+        await self.__asubmit((self.__on_stdout_chunk, None, chunk, ()))
+
+    async def afeed_stderr_chunk(self, chunk: bytes) -> None:
+        """Deliver STDERR data read in bulk mode (not split to lines) without blocking event loop.
+
+        :param chunk: data as read
+        :type chunk: bytes
+        """
+        await self.__asubmit((self.__on_stderr_chunk, None, chunk, ()))
+
+    @staticmethod
+    def __iter_lines(
+        src: typing.Iterable[bytes], feed: typing.Callable[[bytes, typing.Sequence[bytes]], None]
+    ) -> typing.Iterator[bytes]:
+        """Iterate over lines and deliver each one.
+
+        :param src: lines source
+        :type src: typing.Iterable[bytes]
+        :param feed: delivery method
+        :type feed: typing.Callable[[bytes, typing.Sequence[bytes]], None]
+        :return: lines from source
+        :rtype: typing.Iterator[bytes]
+        """
+        for line in src:
+            feed(line, (line,))
+            yield line
+
+    def iter_stdout(self, src: typing.Optional[typing.Iterable[bytes]]) -> typing.Optional[typing.Iterable[bytes]]:
+        """Wrap STDOUT lines source: each line is delivered to callbacks on read.
+
+        :param src: STDOUT lines source
+        :type src: typing.Optional[typing.Iterable[bytes]]
+        :return: wrapped source (source itself if nothing to wrap)
+        :rtype: typing.Optional[typing.Iterable[bytes]]
+        """
+        if not src or (self.__on_stdout_chunk is None and self.__on_stdout_line is None):
+            return src
+        return self.__iter_lines(src, self.feed_stdout)
+
+    def iter_stderr(self, src: typing.Optional[typing.Iterable[bytes]]) -> typing.Optional[typing.Iterable[bytes]]:
+        """Wrap STDERR lines source: each line is delivered to callbacks on read.
+
+        :param src: STDERR lines source
+        :type src: typing.Optional[typing.Iterable[bytes]]
+        :return: wrapped source (source itself if nothing to wrap)
+        :rtype: typing.Optional[typing.Iterable[bytes]]
+        """
+        if not src or (self.__on_stderr_chunk is None and self.__on_stderr_line is None):
+            return src
+        return self.__iter_lines(src, self.feed_stderr)
+
+    async def __aiter_lines(
+        self,
+        src: typing.AsyncIterable[bytes],
+        on_chunk: OutputCallbackT,
+        on_line: OutputCallbackT,
+    ) -> typing.AsyncIterator[bytes]:
+        """Iterate over lines and deliver each one.
+
+        :param src: lines source
+        :type src: typing.AsyncIterable[bytes]
+        :param on_chunk: chunk callback
+        :type on_chunk: typing.Optional[typing.Callable[[bytes], typing.Any]]
+        :param on_line: line callback
+        :type on_line: typing.Optional[typing.Callable[[bytes], typing.Any]]
+        :return: lines from source
+        :rtype: typing.AsyncIterator[bytes]
+        """
+        async for line in src:
+            await self.__asubmit((on_chunk, on_line, line, (line,)))
+            yield line
+
+    def aiter_stdout(
+        self, src: typing.Optional[typing.AsyncIterable[bytes]]
+    ) -> typing.Optional[typing.AsyncIterable[bytes]]:
+        """Wrap asynchronous STDOUT lines source: each line is delivered to callbacks on read.
+
+        :param src: STDOUT lines source
+        :type src: typing.Optional[typing.AsyncIterable[bytes]]
+        :return: wrapped source (source itself if nothing to wrap)
+        :rtype: typing.Optional[typing.AsyncIterable[bytes]]
+        """
+        if not src or (self.__on_stdout_chunk is None and self.__on_stdout_line is None):
+            return src
+        return self.__aiter_lines(src, self.__on_stdout_chunk, self.__on_stdout_line)
+
+    def aiter_stderr(
+        self, src: typing.Optional[typing.AsyncIterable[bytes]]
+    ) -> typing.Optional[typing.AsyncIterable[bytes]]:
+        """Wrap asynchronous STDERR lines source: each line is delivered to callbacks on read.
+
+        :param src: STDERR lines source
+        :type src: typing.Optional[typing.AsyncIterable[bytes]]
+        :return: wrapped source (source itself if nothing to wrap)
+        :rtype: typing.Optional[typing.AsyncIterable[bytes]]
+        """
+        if not src or (self.__on_stderr_chunk is None and self.__on_stderr_line is None):
+            return src
+        return self.__aiter_lines(src, self.__on_stderr_chunk, self.__on_stderr_line)
+
+    def close(self) -> None:
+        """Wait for delivery of queued output."""
+        if self.__consumer is None:
+            return
+        self.__queue.put(_STOP)  # type: ignore
+        self.__consumer.join()
+        self.__consumer = None
+
+    async def aclose(self) -> None:
+        """Wait for delivery of queued output without blocking event loop."""
+        if self.__consumer is not None:
+            await asyncio.get_event_loop().run_in_executor(None, self.close)
@@ -0,0 +1,218 @@
+#    Copyright 2018 - 2020 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Commands framing for execution by persistent shell.
+
+Each command is executed in a subshell (`exit`, `cd` and syntax errors do not affect the shell),
+after it the shell prints sentinel with exit code to STDOUT and sentinel to STDERR.
+Output between sentinels belongs to the command.
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import io
+import re
+import shlex
+import typing
+import uuid
+
+__all__ = ("FramedCommand",)
+
+
+class FramedCommand:
+    """Command wrapped by sentinels for execution in persistent POSIX shell.
+
+    .. versionadded:: 7.1.0
+    """
+
+    __slots__ = (
+        "__command",
+        "__sentinel",
+        "__stdout",
+        "__stderr",
+        "__stdout_re",
+        "__stderr_marker",
+        "__stdout_done",
+        "__stderr_done",
+        "__exit_code",
+        "__stdout_rest",
+        "__stderr_rest",
+    )
+
+    def __init__(self, command: str) -> None:
+        """Command wrapped by sentinels for execution in persistent POSIX shell.
+
+        :param command: command to execute
+        :type command: str
+        """
+        self.__command: str = command
+        self.__sentinel: bytes = f"__exec_helpers_{uuid.uuid4().hex}__".encode("ascii")
+        self.__stdout = bytearray()
+        self.__stderr = bytearray()
+        self.__stdout_re: typing.Pattern[bytes] = re.compile(b"\n" + self.__sentinel + rb" (-?\d+)\n")
+        self.__stderr_marker: bytes = b"\n" + self.__sentinel + b"\n"
+        self.__stdout_done: bool = False
+        self.__stderr_done: bool = False
+        self.__exit_code: typing.Optional[int] = None
+        self.__stdout_rest: bytes = b""
+        self.__stderr_rest: bytes = b""
+
+    @property
+    def command(self) -> str:
+        """Wrapped command.
+
+        :return: command
+        :rtype: str
+        """
+        return self.__command
+
+    def script(
+        self,
+        *,
+        cwd: typing.Optional[str] = None,
+        stdin: str = "/dev/null",
+        open_stdout: bool = True,
+        open_stderr: bool = True,
+        stop_unless: typing.Optional[typing.Iterable[int]] = None,
+    ) -> bytes:
+        """Get shell script for command execution with framing.
+
+        :param cwd: change directory before execution (inside subshell)
+        :type cwd: typing.Optional[str]
+        :param stdin: STDIN redirection source for command
+        :type stdin: str
+        :param open_stdout: keep command STDOUT (else redirect to /dev/null)
+        :type open_stdout: bool
+        :param open_stderr: keep command STDERR (else redirect to /dev/null)
+        :type open_stderr: bool
+        :param stop_unless: exit shell after frame if command exit code is not one of these (None: never)
+        :type stop_unless: typing.Optional[typing.Iterable[int]]
+        :return: script to send to the shell STDIN
+        :rtype: bytes
+        """
+        chdir: str = f"cd -- {shlex.quote(cwd)} || exit; " if cwd is not None else ""
+        redirects: str = f"<{shlex.quote(stdin)}"
+        if not open_stdout:
+            redirects += " >/dev/null"
+        if not open_stderr:
+            redirects += " 2>/dev/null"
+        sentinel: str = self.__sentinel.decode("ascii")
+        if stop_unless is None:
+            return (
+                f"( {chdir}eval {shlex.quote(self.__command)}\n) {redirects}\n"
+                f"printf '\\n%s %d\\n' '{sentinel}' \"$?\"\n"
+                f"printf '\\n%s\\n' '{sentinel}' >&2\n"
+            ).encode("utf-8")
+        allowed: str = "|".join(str(int(code)) for code in stop_unless) or "''"
+        return (  # Exit code is kept in positional parameters: shell variables namespace is not polluted
+            f"( {chdir}eval {shlex.quote(self.__command)}\n) {redirects}\n"
+            f'set -- "$?"\n'
+            f"printf '\\n%s %d\\n' '{sentinel}' \"$1\"\n"
+            f"printf '\\n%s\\n' '{sentinel}' >&2\n"
+            f'case "$1" in {allowed}) ;; *) exit "$1" ;; esac\n'
+        ).encode("utf-8")
+
+    def feed_stdout(self, chunk: bytes) -> bool:
+        """Add data read from shell STDOUT.
+
+        :param chunk: data read from shell STDOUT
+        :type chunk: bytes
+        :return: command STDOUT is complete
+        :rtype: bool
+        """
+        if self.__stdout_done:
+            return True
+        start: int = max(len(self.__stdout) - len(self.__sentinel) - 32, 0)
+        self.__stdout += chunk
+        match = self.__stdout_re.search(self.__stdout, start)
+        if match is not None:
+            self.__exit_code = int(match.group(1))
+            self.__stdout_rest = bytes(self.__stdout[match.end() :])  # noqa: E203
+            del self.__stdout[match.start() :]  # noqa: E203
+            self.__stdout_done = True
+        return self.__stdout_done
+
+    def feed_stderr(self, chunk: bytes) -> bool:
+        """Add data read from shell STDERR.
+
+        :param chunk: data read from shell STDERR
+        :type chunk: bytes
+        :return: command STDERR is complete
+        :rtype: bool
+        """
+        if self.__stderr_done:
+            return True
+        start: int = max(len(self.__stderr) - len(self.__stderr_marker), 0)
+        self.__stderr += chunk
+        idx: int = self.__stderr.find(self.__stderr_marker, start)
+        if idx >= 0:
+            self.__stderr_rest = bytes(self.__stderr[idx + len(self.__stderr_marker) :])  # noqa: E203
+            del self.__stderr[idx:]
+            self.__stderr_done = True
+        return self.__stderr_done
+
+    @property
+    def done(self) -> bool:
+        """Both STDOUT and STDERR frames are received.
+
+        :return: command output is complete
+        :rtype: bool
+        """
+        return self.__stdout_done and self.__stderr_done
+
+    @property
+    def exit_code(self) -> typing.Optional[int]:
+        """Command exit code received from shell.
+
+        :return: exit code (None if not received)
+        :rtype: typing.Optional[int]
+        """
+        return self.__exit_code
+
+    @property
+    def stdout_rest(self) -> bytes:
+        """STDOUT data received after the frame end (belongs to the next command in batch).
+
+        :return: data after STDOUT sentinel
+        :rtype: bytes
+        """
+        return self.__stdout_rest
+
+    @property
+    def stderr_rest(self) -> bytes:
+        """STDERR data received after the frame end (belongs to the next command in batch).
+
+        :return: data after STDERR sentinel
+        :rtype: bytes
+        """
+        return self.__stderr_rest
+
+    @property
+    def stdout_lines(self) -> typing.List[bytes]:
+        """Command STDOUT lines received.
+
+        :return: STDOUT lines (line ends are kept)
+        :rtype: typing.List[bytes]
+        """
+        return list(io.BytesIO(self.__stdout))
+
+    @property
+    def stderr_lines(self) -> typing.List[bytes]:
+        """Command STDERR lines received.
+
+        :return: STDERR lines (line ends are kept)
+        :rtype: typing.List[bytes]
+        """
+        return list(io.BytesIO(self.__stderr))
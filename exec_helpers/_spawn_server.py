@@ -0,0 +1,223 @@
+#    Copyright 2018 - 2020 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Spawn server: small single-threaded process spawning commands on request.
+
+Server is started as script (only standard library is imported) with connected UNIX socket file descriptor as argument.
+Requests and replies are pickled messages with length prefix, pipe file descriptors are passed by `SCM_RIGHTS`.
+
+Server is the parent of spawned commands: it reaps them and reports exit status and resource usage.
+Server exits when the socket is closed by client, spawned commands continue execution.
+
+.. versionadded:: 7.1.0
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import array
+import os
+import pickle  # nosec  # Both sides are own processes connected by socketpair
+import selectors
+import signal
+import socket
+import struct
+import subprocess  # nosec  # Expected usage
+import sys
+import typing
+
+__all__ = ("send_message", "recv_message", "serve")
+
+_HEADER = struct.Struct("!I")
+# Maximum amount of file descriptors in the single message: stdin, stdout, stderr
+_MAX_FDS: int = 3
+
+
+def send_message(sock: socket.socket, message: typing.Any, fds: typing.Sequence[int] = ()) -> None:
+    """Send message with file descriptors.
+
+    Caller should prevent concurrent sending to the same socket.
+
+    :param sock: connected UNIX stream socket
+    :type sock: socket.socket
+    :param message: picklable message
+    :type message: typing.Any
+    :param fds: file descriptors to pass (duplicated in the receiver)
+    :type fds: typing.Sequence[int]
+    """
+    payload: bytes = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    data: bytes = _HEADER.pack(len(payload)) + payload
+    if fds:
+        sent: int = sock.sendmsg((data,), ((socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array("i", fds)),))
+        data = data[sent:]
+    sock.sendall(data)
+
+
+def _recv_exact(sock: socket.socket, size: int, fds: typing.List[int]) -> bytes:
+    """Receive exact amount of bytes collecting passed file descriptors.
+
+    :param sock: connected UNIX stream socket
+    :type sock: socket.socket
+    :param size: amount of bytes to receive
+    :type size: int
+    :param fds: list to store received file descriptors
+    :type fds: typing.List[int]
+    :return: received data
+    :rtype: bytes
+    :raises EOFError: connection closed
+    """
+    data = bytearray()
+    while len(data) < size:
+        chunk, ancdata, _, _ = sock.recvmsg(size - len(data), socket.CMSG_SPACE(_MAX_FDS * array.array("i").itemsize))
+        for level, kind, cmsg_data in ancdata:
+            if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                received = array.array("i")
+                received.frombytes(cmsg_data[: len(cmsg_data) - (len(cmsg_data) % received.itemsize)])
+                fds.extend(received)
+        if not chunk:
+            for fd in fds:
+                os.close(fd)
+            raise EOFError("Connection closed")
+        data += chunk
+    return bytes(data)
+
+
+def recv_message(sock: socket.socket) -> typing.Tuple[typing.Any, typing.List[int]]:
+    """Receive message with file descriptors.
+
+    :param sock: connected UNIX stream socket
+    :type sock: socket.socket
+    :return: message and received file descriptors (should be closed by caller)
+    :rtype: typing.Tuple[typing.Any, typing.List[int]]
+    :raises EOFError: connection closed
+    """
+    fds: typing.List[int] = []
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size, fds))
+    payload: bytes = _recv_exact(sock, size, fds)
+    return pickle.loads(payload), fds  # nosec  # Own process is the only peer
+
+
+def _spawn(
+    sock: socket.socket,
+    processes: typing.Dict[int, subprocess.Popen[bytes]],  # pylint: disable=unsubscriptable-object
+    request_id: int,
+    command: str,
+    cwd: typing.Optional[typing.Union[str, bytes]],
+    env: typing.Optional[typing.Mapping[typing.Any, typing.Any]],
+    open_stdout: bool,
+    open_stderr: bool,
+) -> None:
+    """Spawn command and send its PID and pipes to the client.
+
+    :param sock: client connection
+    :type sock: socket.socket
+    :param processes: running processes by PID
+    :type processes: typing.Dict[int, subprocess.Popen[bytes]]
+    :param request_id: request identifier for reply
+    :type request_id: int
+    :param command: shell command
+    :type command: str
+    :param cwd: working directory
+    :type cwd: typing.Optional[typing.Union[str, bytes]]
+    :param env: environment (None: inherit)
+    :type env: typing.Optional[typing.Mapping[typing.Any, typing.Any]]
+    :param open_stdout: open STDOUT pipe
+    :type open_stdout: bool
+    :param open_stderr: open STDERR pipe
+    :type open_stderr: bool
+    """
+    try:
+        process: subprocess.Popen[bytes] = subprocess.Popen(  # pylint: disable=unsubscriptable-object
+            args=[command],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE if open_stdout else subprocess.DEVNULL,
+            stderr=subprocess.PIPE if open_stderr else subprocess.DEVNULL,
+            shell=True,
+            cwd=cwd,
+            env=env,
+            start_new_session=True,
+        )
+    except (OSError, ValueError) as exc:
+        send_message(sock, ("error", request_id, exc))
+        return
+    processes[process.pid] = process
+    streams = [stream for stream in (process.stdin, process.stdout, process.stderr) if stream is not None]
+    try:
+        send_message(sock, ("spawned", request_id, process.pid), [stream.fileno() for stream in streams])
+    finally:
+        for stream in streams:
+            stream.close()
+
+
+def _reap(
+    sock: socket.socket,
+    processes: typing.Dict[int, subprocess.Popen[bytes]],  # pylint: disable=unsubscriptable-object
+) -> None:
+    """Reap exited processes and send exit status and resource usage to the client.
+
+    :param sock: client connection
+    :type sock: socket.socket
+    :param processes: running processes by PID
+    :type processes: typing.Dict[int, subprocess.Popen[bytes]]
+    """
+    for pid, process in tuple(processes.items()):
+        try:
+            reaped, status, usage = os.wait4(pid, os.WNOHANG)
+        except ChildProcessError:  # pragma: no cover
+            reaped, status, usage = pid, 0, None
+        if reaped == 0:
+            continue
+        process.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+        del processes[pid]
+        send_message(sock, ("exit", pid, process.returncode, usage))
+
+
+def serve(sock: socket.socket) -> None:
+    """Process spawn requests until connection close.
+
+    :param sock: client connection
+    :type sock: socket.socket
+    """
+    processes: typing.Dict[int, subprocess.Popen[bytes]] = {}  # pylint: disable=unsubscriptable-object
+    wakeup_read, wakeup_write = os.pipe()
+    os.set_blocking(wakeup_write, False)
+    signal.set_wakeup_fd(wakeup_write)
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+
+    with selectors.DefaultSelector() as selector:
+        selector.register(sock, selectors.EVENT_READ)
+        selector.register(wakeup_read, selectors.EVENT_READ)
+        while True:
+            for key, _ in selector.select():
+                if key.fileobj is not sock:
+                    os.read(wakeup_read, 4096)
+                    continue
+                try:
+                    request, fds = recv_message(sock)
+                except (EOFError, ConnectionError):
+                    return
+                for fd in fds:  # pragma: no cover  # Client never sends descriptors
+                    os.close(fd)
+                _spawn(sock, processes, *request)
+            _reap(sock, processes)
+
+
+def main() -> None:
+    """Run server on socket passed by file descriptor number."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    serve(socket.socket(fileno=int(sys.argv[1])))
+
+
+if __name__ == "__main__":
+    main()
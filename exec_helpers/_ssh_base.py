@@ -19,27 +19,36 @@
 from __future__ import annotations
 
 # Standard Library
+import asyncio
 import concurrent.futures
+import contextlib
 import copy
 import datetime
+import functools
 import getpass
+import heapq
 import logging
 import pathlib
+import queue
+import selectors
 import shlex
+import socket
 import stat
+import threading
 import time
 import typing
+import weakref
 
 # External Dependencies
 import paramiko
 import tenacity
-import threaded
 
 # Package Implementation
 from exec_helpers import api
 from exec_helpers import constants
 from exec_helpers import exceptions
 from exec_helpers import exec_result
+from exec_helpers import executor as executor_mod
 from exec_helpers import proc_enums
 from exec_helpers import ssh_auth
 from exec_helpers.api import CalledProcessErrorSubClassT
@@ -49,18 +58,20 @@ from exec_helpers.api import ExpectedExitCodesT
 from exec_helpers.api import LogMaskReT
 from exec_helpers.api import OptionalStdinT
 from exec_helpers.api import OptionalTimeoutT
+from exec_helpers.connection_pool import ConnectionKey
+from exec_helpers.connection_pool import SharedJumpHosts
+from exec_helpers.connection_pool import SSHConnectionPool
 from exec_helpers.proc_enums import ExitCodeT
 
 # Local Implementation
 from . import _log_templates
+from . import _shell_framing
 from . import _ssh_helpers
+from . import _subprocess_helpers
+from ._output_callbacks import OutputCallbacks
 from ._ssh_helpers import SSHConfigsDictT
 
-if typing.TYPE_CHECKING:
-    # Standard Library
-    import socket
-
-__all__ = ("SSHClientBase", "SshExecuteAsyncResult", "SupportPathT")
+__all__ = ("SSHClientBase", "SshExecuteAsyncResult", "SupportPathT", "ExecuteOnIterator", "SSHShellSession")
 
 KeepAlivePeriodT = typing.Union[int, bool]
 SupportPathT = typing.Union[str, pathlib.PurePath]
@@ -73,9 +84,13 @@ _OptionalSSHConfigArgT = typing.Union[
     None,
 ]
 _SSHConnChainT = typing.List[typing.Tuple[_ssh_helpers.SSHConfig, ssh_auth.SSHAuth]]
+_SSHRouteT = typing.Tuple[typing.Tuple[_ssh_helpers.SSHConfig, ssh_auth.SSHAuth], ...]
 _OptSSHAuthT = typing.Optional[ssh_auth.SSHAuth]
 _RType = typing.TypeVar("_RType")
 
+# Exit status is received right after EOF, but is not signalled by channel file descriptor
+_EXIT_STATUS_POLL_PERIOD: float = 0.01
+
 
 class RetryOnExceptions(tenacity.retry_if_exception):  # type: ignore
     """Advanced retry on exceptions.
@@ -192,6 +207,1200 @@ class _KeepAliveContext(typing.ContextManager[None]):
         self.__ssh.keepalive_period = self.__keepalive_period
 
 
+class _SessionLimiter:
+    """Limit of simultaneously open sessions (channels) over single connection.
+
+    Server limit (`MaxSessions`) is not announced: limit is reduced to amount of open sessions on refusal.
+    Slot is released on channel close by helper or on channel garbage collection.
+    """
+
+    __slots__ = ("__cond", "__limit", "__active", "__held")
+
+    def __init__(self, limit: typing.Optional[int]) -> None:
+        """Limit of simultaneously open sessions (channels) over single connection.
+
+        :param limit: maximum amount of open sessions (None: not limited)
+        :type limit: typing.Optional[int]
+        """
+        self.__cond = threading.Condition(threading.Lock())
+        self.__limit: typing.Optional[int] = limit
+        self.__active: int = 0
+        self.__held: typing.Dict[int, weakref.finalize] = {}
+
+    @property
+    def limit(self) -> typing.Optional[int]:
+        """Maximum amount of open sessions.
+
+        :rtype: typing.Optional[int]
+        """
+        return self.__limit
+
+    @property
+    def active(self) -> int:
+        """Amount of open sessions.
+
+        :rtype: int
+        """
+        return self.__active
+
+    def acquire(self) -> None:
+        """Wait for free slot."""
+        with self.__cond:
+            while self.__limit is not None and self.__active >= self.__limit:
+                self.__cond.wait()
+            self.__active += 1
+
+    def __release(self) -> None:
+        """Release slot."""
+        with self.__cond:
+            self.__active -= 1
+            self.__cond.notify()
+
+    def __drop(self, key: int) -> None:
+        """Release slot of garbage collected channel.
+
+        :param key: channel id
+        :type key: int
+        """
+        self.__held.pop(key, None)
+        self.__release()
+
+    def track(self, chan: paramiko.Channel) -> None:
+        """Bind acquired slot to opened channel.
+
+        :param chan: opened channel
+        :type chan: paramiko.Channel
+        """
+        if id(chan) in self.__held:  # Slot is already bound to this channel
+            self.__release()
+            return
+        self.__held[id(chan)] = weakref.finalize(chan, self.__drop, id(chan))
+
+    def release(self, chan: typing.Optional[paramiko.Channel] = None) -> None:
+        """Release slot of closed channel or not opened channel.
+
+        :param chan: closed channel (None: channel open failed)
+        :type chan: typing.Optional[paramiko.Channel]
+        """
+        if chan is None:
+            self.__release()
+            return
+        finalizer: typing.Optional[weakref.finalize] = self.__held.get(id(chan), None)
+        if finalizer is not None:
+            finalizer()
+
+    def refused(self) -> bool:
+        """Reduce limit after session open refusal by server (slot of refused session is released).
+
+        :return: other sessions are open: session can be opened after their close
+        :rtype: bool
+        """
+        with self.__cond:
+            self.__active -= 1
+            self.__limit = max(self.__active, 1)
+            self.__cond.notify()
+            return self.__active > 0
+
+
+class _ChannelReader:
+    """Non-blocking reader of command output from session channel.
+
+    Channel file descriptor (`paramiko.Channel.fileno()`) is readable while any output is buffered
+    and forever after EOF or close, so reader is driven by selector: no sleep and poll.
+    """
+
+    __slots__ = (
+        "channel",
+        "__result",
+        "__logger",
+        "__verbose",
+        "__callbacks",
+        "__binary",
+        "__open",
+        "__buffers",
+        "__max_output",
+        "__stored",
+    )
+
+    def __init__(
+        self,
+        channel: paramiko.Channel,
+        result: exec_result.ExecResult,
+        logger: logging.Logger,
+        *,
+        open_stdout: bool = True,
+        open_stderr: bool = True,
+        verbose: bool = False,
+        output_callbacks: typing.Optional[OutputCallbacks] = None,
+        binary_output: bool = False,
+        max_output: typing.Optional[int] = None,
+    ) -> None:
+        """Non-blocking reader of command output from session channel.
+
+        :param channel: session channel with started command
+        :type channel: paramiko.Channel
+        :param result: execution result to store output
+        :type result: ExecResult
+        :param logger: logger for output lines
+        :type logger: logging.Logger
+        :param open_stdout: store STDOUT (not stored output is read and dropped: remote side is not blocked)
+        :type open_stdout: bool
+        :param open_stderr: store STDERR (not stored output is read and dropped: remote side is not blocked)
+        :type open_stderr: bool
+        :param verbose: produce log.info records for STDOUT/STDERR
+        :type verbose: bool
+        :param output_callbacks: user callbacks for output
+        :type output_callbacks: typing.Optional[OutputCallbacks]
+        :param binary_output: store output by chunks without splitting to lines and logging
+        :type binary_output: bool
+        :param max_output: maximum amount of bytes to store from both streams (the rest is read and dropped)
+        :type max_output: typing.Optional[int]
+        """
+        self.channel: paramiko.Channel = channel
+        self.__result: exec_result.ExecResult = result
+        self.__logger: logging.Logger = logger
+        self.__verbose: bool = verbose
+        self.__callbacks: typing.Optional[OutputCallbacks] = output_callbacks
+        self.__binary: bool = binary_output
+        self.__open: typing.Tuple[bool, bool] = (open_stdout, open_stderr)
+        self.__buffers: typing.Tuple[_subprocess_helpers.LineBuffer, _subprocess_helpers.LineBuffer] = (
+            _subprocess_helpers.LineBuffer(),
+            _subprocess_helpers.LineBuffer(),
+        )
+        self.__max_output: typing.Optional[int] = max_output
+        self.__stored: int = 0
+
+    def __feed(self, chunk: bytes, index: int) -> None:
+        """Process chunk of output.
+
+        :param chunk: data read from channel
+        :type chunk: bytes
+        :param index: 0 for STDOUT, 1 for STDERR
+        :type index: int
+        """
+        if not self.__open[index]:
+            return
+        if self.__max_output is not None:
+            if self.__stored >= self.__max_output:
+                return
+            if self.__stored + len(chunk) > self.__max_output:
+                chunk = chunk[: self.__max_output - self.__stored]
+                self.__logger.warning(
+                    f"Output limit ({self.__max_output} bytes) reached: the rest of output is dropped"
+                )
+            self.__stored += len(chunk)
+        if self.__binary:
+            (self.__result.append_stdout, self.__result.append_stderr)[index](chunk)
+            if self.__callbacks is not None:
+                (self.__callbacks.feed_stdout_chunk, self.__callbacks.feed_stderr_chunk)[index](chunk)
+            return
+        lines: typing.List[bytes] = self.__buffers[index].feed(chunk)
+        self.__handle_lines(chunk, lines, index)
+
+    def __handle_lines(self, chunk: bytes, lines: typing.List[bytes], index: int) -> None:
+        """Log lines and deliver them to callbacks.
+
+        :param chunk: data read from channel (empty on EOF)
+        :type chunk: bytes
+        :param lines: lines completed by data
+        :type lines: typing.List[bytes]
+        :param index: 0 for STDOUT, 1 for STDERR
+        :type index: int
+        """
+        # pylint: disable=protected-access
+        exec_result.ExecResult._poll_stream(lines, log=self.__logger, verbose=self.__verbose)
+        # pylint: enable=protected-access
+        if self.__callbacks is not None and (chunk or lines):
+            (self.__callbacks.feed_stdout, self.__callbacks.feed_stderr)[index](chunk, lines)
+
+    def drain(self) -> bool:
+        """Read all output available without blocking.
+
+        :return: EOF received or channel closed: no more output expected
+        :rtype: bool
+        """
+        done: bool = self.channel.eof_received or self.channel.closed  # Checked before read: no output lost
+        while self.channel.recv_ready():
+            self.__feed(self.channel.recv(constants.READ_CHUNK_SIZE), 0)
+        while self.channel.recv_stderr_ready():
+            self.__feed(self.channel.recv_stderr(constants.READ_CHUNK_SIZE), 1)
+        return done
+
+    def finish(self) -> None:
+        """Store lines read to result (not terminated last lines included)."""
+        for index, buffer in enumerate(self.__buffers):
+            if self.__open[index]:
+                self.__handle_lines(b"", buffer.flush(), index)
+        self.__result.read_stdout(src=self.__buffers[0].lines)
+        self.__result.read_stderr(src=self.__buffers[1].lines)
+
+
+class _RemoteCall(typing.NamedTuple):
+    """Command started on remote: output is read by reactor."""
+
+    remote: SSHClientBase
+    channel: paramiko.Channel
+    result: exec_result.ExecResult
+    reader: _ChannelReader
+
+
+class _Reactor:
+    """Single thread multiplexer of output and exit statuses of command executed on many remotes.
+
+    Channels are opened and commands are started by pool of limited size (channel open waits for server reply),
+    output of all started channels is read by selector over `paramiko.Channel.fileno()` in the calling thread,
+    so amount of threads does not depend on amount of remotes.
+    """
+
+    __slots__ = (
+        "__command",
+        "__timeout",
+        "__per_host_timeout",
+        "__max_parallel",
+        "__stdin",
+        "__log_mask_re",
+        "__open_stdout",
+        "__open_stderr",
+        "__verbose",
+        "__max_output",
+        "__kwargs",
+        "__started",
+        "__wakeup",
+        "__lock",
+    )
+
+    def __init__(
+        self,
+        command: str,
+        timeout: OptionalTimeoutT,
+        *,
+        per_host_timeout: OptionalTimeoutT = None,
+        max_parallel: typing.Optional[int] = None,
+        stdin: OptionalStdinT = None,
+        log_mask_re: LogMaskReT = None,
+        open_stdout: bool = True,
+        open_stderr: bool = True,
+        verbose: bool = False,
+        max_output: typing.Optional[int] = None,
+        **kwargs: typing.Any,
+    ) -> None:
+        """Single thread multiplexer of output and exit statuses of command executed on many remotes.
+
+        :param command: command for execution
+        :type command: str
+        :param timeout: timeout for all remotes (started and finished)
+        :type timeout: typing.Union[int, float, None]
+        :param per_host_timeout: timeout for each remote since command start on it
+        :type per_host_timeout: typing.Union[int, float, None]
+        :param max_parallel: maximum amount of remotes executing command at once (None: all)
+        :type max_parallel: typing.Optional[int]
+        :param stdin: pass STDIN text to the process
+        :type stdin: typing.Union[bytes, str, bytearray, None]
+        :param log_mask_re: regex lookup rule to mask command for logger.
+        :type log_mask_re: typing.Optional[str]
+        :param open_stdout: open STDOUT stream for read
+        :type open_stdout: bool
+        :param open_stderr: open STDERR stream for read
+        :type open_stderr: bool
+        :param verbose: produce verbose log record on command call
+        :type verbose: bool
+        :param max_output: maximum amount of output bytes to store per remote (the rest is read and dropped)
+        :type max_output: typing.Optional[int]
+        :param kwargs: additional parameters for execute_async call.
+        :type kwargs: typing.Any
+        """
+        self.__command: str = command
+        self.__timeout: OptionalTimeoutT = timeout
+        self.__per_host_timeout: OptionalTimeoutT = per_host_timeout
+        self.__max_parallel: typing.Optional[int] = max_parallel
+        self.__stdin: OptionalStdinT = stdin
+        self.__log_mask_re: LogMaskReT = log_mask_re
+        self.__open_stdout: bool = open_stdout
+        self.__open_stderr: bool = open_stderr
+        self.__verbose: bool = verbose
+        self.__max_output: typing.Optional[int] = max_output
+        self.__kwargs: typing.Dict[str, typing.Any] = kwargs
+        self.__started: queue.SimpleQueue[
+            typing.Tuple[SSHClientBase, concurrent.futures.Future[typing.Union[_RemoteCall, exec_result.ExecResult]]]
+        ] = queue.SimpleQueue()
+        self.__wakeup: typing.Optional[typing.Tuple[socket.socket, socket.socket]] = None
+        self.__lock = threading.Lock()
+
+    def __start(
+        self,
+        remote: SSHClientBase,
+        deadline: typing.Optional[float],
+    ) -> typing.Union[_RemoteCall, exec_result.ExecResult]:
+        """Start command on remote (pool thread).
+
+        :param remote: SSH connection instance
+        :type remote: SSHClientBase
+        :param deadline: time.monotonic() value to stop waiting for not selectable interface
+        :type deadline: typing.Optional[float]
+        :return: started call or result of channel-like interface without file descriptor (read by this thread)
+        :rtype: typing.Union[_RemoteCall, ExecResult]
+        :raises ExecHelperTimeoutError: timeout reached while reading not selectable interface
+        """
+        # pylint: disable=protected-access
+        cmd_for_log: str = remote._mask_command(cmd=self.__command, log_mask_re=self.__log_mask_re)
+        remote._log_command_execute(
+            command=self.__command,
+            log_mask_re=self.__log_mask_re,
+            log_level=logging.INFO if self.__verbose else logging.DEBUG,
+            **self.__kwargs,
+        )
+        async_result: SshExecuteAsyncResult = remote._execute_async(
+            self.__command,
+            stdin=self.__stdin,
+            log_mask_re=self.__log_mask_re,
+            open_stdout=self.__open_stdout,
+            open_stderr=self.__open_stderr,
+            **self.__kwargs,
+        )
+        chan: paramiko.Channel = async_result.interface
+        result = exec_result.ExecResult(cmd=cmd_for_log, stdin=self.__stdin, started=async_result.started)
+
+        if isinstance(chan, paramiko.Channel):
+            reader = _ChannelReader(
+                chan,
+                result,
+                remote.logger,
+                open_stdout=async_result.stdout is not None,
+                open_stderr=async_result.stderr is not None,
+                verbose=self.__verbose,
+                max_output=self.__max_output,
+            )
+            return _RemoteCall(remote=remote, channel=chan, result=result, reader=reader)
+
+        try:
+            chan.status_event.wait(_subprocess_helpers.remaining_time(deadline))
+            result.read_stdout(src=async_result.stdout)
+            result.read_stderr(src=async_result.stderr)
+            if not chan.status_event.is_set():
+                raise self.__timed_out(remote, result)
+            result.exit_code = chan.exit_status
+        finally:
+            remote._close_session(chan)
+        # pylint: enable=protected-access
+        return result
+
+    def __on_started(
+        self,
+        remote: SSHClientBase,
+        future: concurrent.futures.Future[typing.Union[_RemoteCall, exec_result.ExecResult]],
+    ) -> None:
+        """Pass started call to the reactor thread.
+
+        :param remote: SSH connection instance
+        :type remote: SSHClientBase
+        :param future: start task
+        :type future: concurrent.futures.Future[typing.Union[_RemoteCall, ExecResult]]
+        """
+        self.__started.put((remote, future))
+        with self.__lock:
+            if self.__wakeup is not None:
+                with contextlib.suppress(OSError):  # Wakeup is already pending
+                    self.__wakeup[1].send(b"\0")
+
+    @staticmethod
+    def __discard(future: concurrent.futures.Future[typing.Union[_RemoteCall, exec_result.ExecResult]]) -> None:
+        """Close channel of call started when reactor is not waiting for it anymore.
+
+        :param future: start task
+        :type future: concurrent.futures.Future[typing.Union[_RemoteCall, ExecResult]]
+        """
+        if future.cancelled() or future.exception() is not None:
+            return
+        started: typing.Union[_RemoteCall, exec_result.ExecResult] = future.result()
+        if isinstance(started, _RemoteCall):
+            started.remote._close_session(started.channel)  # pylint: disable=protected-access
+
+    def __timed_out(
+        self,
+        remote: SSHClientBase,
+        result: typing.Optional[exec_result.ExecResult] = None,
+        timeout: OptionalTimeoutT = None,
+    ) -> exceptions.ExecHelperTimeoutError:
+        """Get timeout exception for not finished remote.
+
+        :param remote: SSH connection instance
+        :type remote: SSHClientBase
+        :param result: result with output received before timeout (None: command is not started)
+        :type result: typing.Optional[ExecResult]
+        :param timeout: reached timeout (None: per host timeout if set, else timeout for all remotes)
+        :type timeout: typing.Union[int, float, None]
+        :return: timeout exception
+        :rtype: ExecHelperTimeoutError
+        """
+        if timeout is None:
+            timeout = self.__per_host_timeout if self.__per_host_timeout is not None else self.__timeout
+        if result is None:
+            # pylint: disable=protected-access
+            cmd_for_log: str = remote._mask_command(cmd=self.__command, log_mask_re=self.__log_mask_re)
+            # pylint: enable=protected-access
+            result = exec_result.ExecResult(cmd=cmd_for_log, stdin=self.__stdin)
+        result.set_timestamp()
+        remote.logger.debug(_log_templates.CMD_WAIT_ERROR.format(result=result, timeout=timeout))
+        return exceptions.ExecHelperTimeoutError(result=result, timeout=timeout)  # type: ignore
+
+    def __stop(
+        self,
+        remote: SSHClientBase,
+        timeout: OptionalTimeoutT,
+        selector: selectors.BaseSelector,
+        starting: typing.Dict[SSHClientBase, concurrent.futures.Future[typing.Any]],
+        running: typing.Dict[SSHClientBase, _RemoteCall],
+        closing: typing.Dict[SSHClientBase, _RemoteCall],
+    ) -> exceptions.ExecHelperTimeoutError:
+        """Stop command on remote on timeout.
+
+        :param remote: SSH connection instance
+        :type remote: SSHClientBase
+        :param timeout: reached timeout
+        :type timeout: typing.Union[int, float, None]
+        :param selector: reactor selector
+        :type selector: selectors.BaseSelector
+        :param starting: start tasks not accepted yet
+        :type starting: typing.Dict[SSHClientBase, concurrent.futures.Future[typing.Any]]
+        :param running: started calls
+        :type running: typing.Dict[SSHClientBase, _RemoteCall]
+        :param closing: calls with EOF received and exit status is not received yet
+        :type closing: typing.Dict[SSHClientBase, _RemoteCall]
+        :return: timeout exception
+        :rtype: ExecHelperTimeoutError
+        """
+        future: typing.Optional[concurrent.futures.Future[typing.Any]] = starting.pop(remote, None)
+        if future is not None:
+            future.cancel()
+            future.add_done_callback(self.__discard)
+            return self.__timed_out(remote, timeout=timeout)
+        call: typing.Optional[_RemoteCall] = running.pop(remote, None)
+        if call is not None:
+            selector.unregister(call.channel)
+        else:
+            call = closing.pop(remote)
+        call.reader.drain()
+        call.reader.finish()
+        remote._close_session(call.channel)  # pylint: disable=protected-access
+        return self.__timed_out(remote, call.result, timeout)
+
+    @staticmethod
+    def __complete(remote: SSHClientBase, call: _RemoteCall) -> exec_result.ExecResult:
+        """Store output and exit status of finished call and close its channel.
+
+        :param remote: SSH connection instance
+        :type remote: SSHClientBase
+        :param call: call with exit status received
+        :type call: _RemoteCall
+        :return: execution result
+        :rtype: ExecResult
+        """
+        call.reader.finish()
+        call.result.exit_code = call.channel.exit_status
+        remote._close_session(call.channel)  # pylint: disable=protected-access
+        return call.result
+
+    def __accept(
+        self,
+        selector: selectors.BaseSelector,
+        starting: typing.Dict[SSHClientBase, concurrent.futures.Future[typing.Any]],
+        running: typing.Dict[SSHClientBase, _RemoteCall],
+    ) -> typing.Iterator[typing.Tuple[SSHClientBase, typing.Union[exec_result.ExecResult, Exception]]]:
+        """Register started calls for reading, yield results of failed starts.
+
+        :param selector: reactor selector
+        :type selector: selectors.BaseSelector
+        :param starting: start tasks not accepted yet
+        :type starting: typing.Dict[SSHClientBase, concurrent.futures.Future[typing.Any]]
+        :param running: started calls
+        :type running: typing.Dict[SSHClientBase, _RemoteCall]
+        :return: generator of (remote, result or exception)
+        :rtype: typing.Iterator[typing.Tuple[SSHClientBase, typing.Union[ExecResult, Exception]]]
+        """
+        while not self.__started.empty():
+            remote, future = self.__started.get_nowait()
+            if starting.pop(remote, None) is None:  # Already reported
+                continue
+            try:
+                started: typing.Union[_RemoteCall, exec_result.ExecResult] = future.result()
+            except Exception as e:
+                yield remote, e
+                continue
+            if isinstance(started, exec_result.ExecResult):
+                yield remote, started
+                continue
+            running[remote] = started
+            selector.register(started.channel, selectors.EVENT_READ, started)
+
+    def run(
+        self,
+        remotes: typing.Iterable[SSHClientBase],
+    ) -> typing.Generator[typing.Tuple[SSHClientBase, typing.Union[exec_result.ExecResult, Exception]], None, None]:
+        """Execute command on remotes and yield results as soon as received.
+
+        Results are yielded for each distinct remote: execution result or exception (including timeout).
+        Remotes are taken from iterable only when command can be started on them (`max_parallel`).
+        Commands still running on generator close are stopped (channels are closed).
+
+        :param remotes: connections to execute on
+        :type remotes: typing.Iterable[SSHClientBase]
+        :return: generator of (remote, result or exception)
+        :rtype: typing.Generator[typing.Tuple[SSHClientBase, typing.Union[ExecResult, Exception]], None, None]
+        """
+        deadline: typing.Optional[float] = None
+        if self.__timeout is not None:
+            deadline = time.monotonic() + self.__timeout
+        pending: typing.Iterator[SSHClientBase] = iter(remotes)
+        seen: typing.Set[SSHClientBase] = set()
+        active: typing.Set[SSHClientBase] = set()  # Remotes taken from iterable and not reported yet
+        expiry: typing.List[typing.Tuple[float, int, SSHClientBase]] = []  # Heap of per host deadlines
+        starting: typing.Dict[SSHClientBase, concurrent.futures.Future[typing.Any]] = {}
+        running: typing.Dict[SSHClientBase, _RemoteCall] = {}
+        closing: typing.Dict[SSHClientBase, _RemoteCall] = {}  # EOF received, exit status is not received yet
+        draining: typing.Dict[SSHClientBase, float] = {}  # Exit status received before EOF: end of output read
+        executor = executor_mod.HelperExecutor(
+            max_workers=min(self.__max_parallel or constants.SSH_START_WORKERS, constants.SSH_START_WORKERS),
+            thread_name_prefix=f"{self.__class__.__name__}.start",
+        )
+        wakeup_r, wakeup_w = socket.socketpair()
+        wakeup_r.setblocking(False)
+        wakeup_w.setblocking(False)
+        with self.__lock:
+            self.__wakeup = (wakeup_r, wakeup_w)
+
+        def start_next() -> None:
+            """Start command on next remotes while amount of running commands is less than limit."""
+            while self.__max_parallel is None or len(active) < self.__max_parallel:
+                remote: typing.Optional[SSHClientBase] = next(pending, None)
+                if remote is None:
+                    return
+                if remote in seen:
+                    continue
+                seen.add(remote)
+                active.add(remote)
+                host_deadline: typing.Optional[float] = deadline
+                if self.__per_host_timeout is not None:
+                    host_deadline = time.monotonic() + self.__per_host_timeout
+                    if deadline is not None:
+                        host_deadline = min(host_deadline, deadline)
+                    heapq.heappush(expiry, (host_deadline, len(seen), remote))
+                future = starting[remote] = executor.submit(self.__start, remote, host_deadline)
+                future.add_done_callback(functools.partial(self.__on_started, remote))
+
+        try:
+            with selectors.DefaultSelector() as selector:
+                selector.register(wakeup_r, selectors.EVENT_READ, None)
+                start_next()
+
+                while active:
+                    now: float = time.monotonic()
+                    if deadline is not None and now >= deadline:
+                        break
+                    while expiry and expiry[0][0] <= now:
+                        remote: SSHClientBase = heapq.heappop(expiry)[2]
+                        if remote in active:
+                            active.remove(remote)
+                            yield remote, self.__stop(
+                                remote, self.__per_host_timeout, selector, starting, running, closing
+                            )
+                    start_next()
+                    if not active:  # All remaining remotes reached per host timeout
+                        break
+
+                    wake_at: typing.List[float] = [point for point in (deadline,) if point is not None]
+                    if expiry:
+                        wake_at.append(expiry[0][0])
+                    select_timeout: typing.Optional[float] = max(min(wake_at) - now, 0) if wake_at else None
+                    if running or closing:  # Exit status has no file descriptor notification: poll for short period
+                        select_timeout = min(_EXIT_STATUS_POLL_PERIOD, select_timeout or _EXIT_STATUS_POLL_PERIOD)
+
+                    for key, _ in selector.select(select_timeout):
+                        if key.data is None:
+                            with contextlib.suppress(OSError):
+                                while wakeup_r.recv(4096):
+                                    pass
+                            continue
+                        call: _RemoteCall = key.data
+                        if call.reader.drain():
+                            selector.unregister(call.channel)
+                            closing[call.remote] = running.pop(call.remote)
+
+                    for remote, result in self.__accept(selector, starting, running):
+                        active.remove(remote)
+                        yield remote, result
+
+                    for remote, call in tuple(closing.items()):
+                        if not call.channel.status_event.is_set():
+                            continue
+                        del closing[remote]
+                        draining.pop(remote, None)
+                        active.remove(remote)
+                        yield remote, self.__complete(remote, call)
+
+                    # EOF can be delayed by background jobs holding output open: read limited time after exit status
+                    for remote, call in tuple(running.items()):
+                        if not call.channel.status_event.is_set():
+                            continue
+                        if time.monotonic() < draining.setdefault(remote, time.monotonic() + remote.drain_timeout):
+                            continue
+                        del running[remote], draining[remote]
+                        selector.unregister(call.channel)
+                        active.remove(remote)
+                        call.reader.drain()
+                        yield remote, self.__complete(remote, call)
+
+                    start_next()
+
+                # Deadline for all remotes reached (or nothing is left)
+                for remote, result in self.__accept(selector, starting, running):
+                    active.remove(remote)
+                    yield remote, result
+                while active:
+                    remote = active.pop()
+                    yield remote, self.__stop(remote, self.__timeout, selector, starting, running, closing)
+                for remote in pending:
+                    if remote not in seen:
+                        seen.add(remote)
+                        yield remote, self.__timed_out(remote, timeout=self.__timeout)
+        finally:
+            with self.__lock:
+                self.__wakeup = None
+            for future in starting.values():
+                future.cancel()
+                future.add_done_callback(self.__discard)
+            for calls in (running, closing):
+                for call in calls.values():
+                    call.remote._close_session(call.channel)  # pylint: disable=protected-access
+            executor.shutdown(wait=False)
+            wakeup_r.close()
+            wakeup_w.close()
+
+
+class ExecuteOnIterator:
+    """Results of command executed on many remotes in order of completion: `(remote, ExecResult or exception)`.
+
+    Iterable synchronously and asynchronously (`async for`: results are awaited in default executor thread).
+    Iteration stop (`close()`, `aclose()` or context manager exit) stops running commands (channels are closed)
+    and commands are not started on remotes not processed yet.
+
+    .. versionadded:: 7.1.0
+    """
+
+    __slots__ = ("__results", "__expected", "__fail_fast", "__errors", "__closed", "__lock")
+
+    def __init__(
+        self,
+        results: typing.Generator[
+            typing.Tuple[SSHClientBase, typing.Union[exec_result.ExecResult, Exception]], None, None
+        ],
+        expected: typing.Sequence[ExitCodeT],
+        fail_fast: typing.Optional[int] = None,
+    ) -> None:
+        """Results of command executed on many remotes in order of completion.
+
+        :param results: reactor results generator
+        :type results: typing.Generator[typing.Tuple[SSHClientBase, typing.Union[ExecResult, Exception]], None, None]
+        :param expected: expected return codes
+        :type expected: typing.Sequence[typing.Union[int, proc_enums.ExitCodes]]
+        :param fail_fast: stop after this amount of errors (exceptions or unexpected exit codes)
+        :type fail_fast: typing.Optional[int]
+        """
+        self.__results = results
+        self.__expected: typing.Sequence[ExitCodeT] = expected
+        self.__fail_fast: typing.Optional[int] = fail_fast
+        self.__errors: int = 0
+        self.__closed: bool = False
+        self.__lock = threading.RLock()  # Generator is not re-entrant: `next` and `close` are serialized
+
+    @property
+    def errors(self) -> int:
+        """Amount of received errors: exceptions and unexpected exit codes.
+
+        :rtype: int
+        """
+        return self.__errors
+
+    @property
+    def failed_fast(self) -> bool:
+        """Iteration is stopped by errors limit.
+
+        :rtype: bool
+        """
+        return self.__fail_fast is not None and self.__errors >= self.__fail_fast
+
+    def __iter__(self) -> ExecuteOnIterator:
+        """Iterate over results in order of completion.
+
+        :return: self
+        :rtype: ExecuteOnIterator
+        """
+        return self
+
+    def __next__(self) -> typing.Tuple[SSHClientBase, typing.Union[exec_result.ExecResult, Exception]]:
+        """Wait for the next finished remote.
+
+        :return: remote and its execution result or exception (including timeout)
+        :rtype: typing.Tuple[SSHClientBase, typing.Union[ExecResult, Exception]]
+        :raises StopIteration: all remotes are processed or iteration is stopped
+        """
+        try:
+            with self.__lock:
+                if self.__closed:
+                    raise StopIteration
+                remote, result = next(self.__results)
+        finally:
+            if self.__closed:  # Closed while waiting for result: close is deferred until generator step is done
+                self.close()
+        if isinstance(result, Exception) or result.exit_code not in self.__expected:
+            self.__errors += 1
+            if self.failed_fast:
+                self.close()
+        return remote, result
+
+    def __aiter__(self) -> ExecuteOnIterator:
+        """Iterate over results in order of completion from asyncio code.
+
+        :return: self
+        :rtype: ExecuteOnIterator
+        """
+        return self
+
+    async def __anext__(self) -> typing.Tuple[SSHClientBase, typing.Union[exec_result.ExecResult, Exception]]:
+        """Wait for the next finished remote without blocking event loop.
+
+        :return: remote and its execution result or exception (including timeout)
+        :rtype: typing.Tuple[SSHClientBase, typing.Union[ExecResult, Exception]]
+        :raises StopAsyncIteration: all remotes are processed or iteration is stopped
+        """
+        item: typing.Optional[
+            typing.Tuple[SSHClientBase, typing.Union[exec_result.ExecResult, Exception]]
+        ] = await asyncio.get_running_loop().run_in_executor(None, next, self, None)
+        if item is None:
+            raise StopAsyncIteration
+        return item
+
+    def close(self) -> None:
+        """Stop iteration: close channels of running commands, do not start not started.
+
+        If result is awaited by other thread (cancelled `async for` included), channels are closed
+        when it is received.
+        """
+        self.__closed = True
+        if not self.__lock.acquire(blocking=False):  # Generator is executing: closed by `__next__` after step
+            return
+        try:
+            self.__results.close()
+        finally:
+            self.__lock.release()
+
+    async def aclose(self) -> None:
+        """Stop iteration from asyncio code."""
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    def __enter__(self) -> ExecuteOnIterator:
+        """Context manager usage: iteration is stopped on exit.
+
+        :return: self
+        :rtype: ExecuteOnIterator
+        """
+        return self
+
+    def __exit__(self, exc_type: typing.Any, exc_val: typing.Any, exc_tb: typing.Any) -> None:
+        """Stop iteration on context manager exit."""
+        self.close()
+
+
+class SSHShellSession:
+    """Persistent remote shell executing commands one by one over single session channel.
+
+    Commands are framed by sentinels (exit code on STDOUT, end marker on STDERR), so command execution costs
+    sending of script and receiving of output only: no channel open and exec request round trips.
+    Each command is executed in subshell: `exit`, `cd` and syntax errors do not affect the shell.
+    Shell is started on first command and restarted if it died or was stopped on timeout (channel is closed).
+
+    .. note:: Commands STDIN is /dev/null: sudo password is not entered, passwordless sudo is required in sudo mode.
+
+    .. versionadded:: 7.1.0
+    """
+
+    __slots__ = ("__client", "__lock", "__channel")
+
+    def __init__(self, client: SSHClientBase) -> None:
+        """Persistent remote shell executing commands one by one over single session channel.
+
+        :param client: SSH connection for session
+        :type client: SSHClientBase
+        """
+        self.__client: SSHClientBase = client
+        self.__lock = threading.Lock()
+        self.__channel: typing.Optional[paramiko.Channel] = None
+
+    def __repr__(self) -> str:
+        """Representation for debug purposes.
+
+        :return: session description
+        :rtype: str
+        """
+        return f"<{self.__class__.__name__}({self.__client}) started={self.__channel is not None}>"
+
+    def __start(self) -> paramiko.Channel:
+        """Get running shell, start new one if required (lock should be acquired).
+
+        :return: session channel with running shell
+        :rtype: paramiko.Channel
+        """
+        chan: typing.Optional[paramiko.Channel] = self.__channel
+        if chan is not None and not (chan.closed or chan.eof_received or chan.exit_status_ready()):
+            return chan
+        self.__stop()
+        # pylint: disable=protected-access
+        chan = self.__client._open_session()
+        try:
+            chan.exec_command("/bin/sh")
+        except BaseException:
+            self.__client._close_session(chan)
+            raise
+        # pylint: enable=protected-access
+        self.__channel = chan
+        return chan
+
+    def __stop(self) -> None:
+        """Stop shell if started: channel is closed (lock should be acquired)."""
+        chan, self.__channel = self.__channel, None
+        if chan is not None:
+            self.__client._close_session(chan)  # pylint: disable=protected-access
+
+    @staticmethod
+    def __read(
+        chan: paramiko.Channel,
+        frame: _shell_framing.FramedCommand,
+        deadline: typing.Optional[float],
+    ) -> typing.Optional[bool]:
+        """Read command output from shell.
+
+        :param chan: session channel with running shell
+        :type chan: paramiko.Channel
+        :param frame: executed command
+        :type frame: FramedCommand
+        :param deadline: time.monotonic() value to stop reading at
+        :type deadline: typing.Optional[float]
+        :return: True if output is complete, False on timeout, None if shell closed output (died)
+        :rtype: typing.Optional[bool]
+        """
+        with selectors.DefaultSelector() as selector:
+            selector.register(chan, selectors.EVENT_READ)
+            while True:
+                closed: bool = chan.eof_received or chan.closed  # Checked before read: no output lost
+                while chan.recv_ready():
+                    frame.feed_stdout(chan.recv(constants.READ_CHUNK_SIZE))
+                while chan.recv_stderr_ready():
+                    frame.feed_stderr(chan.recv_stderr(constants.READ_CHUNK_SIZE))
+                if frame.done:
+                    return True
+                if closed:
+                    return None
+                remaining: typing.Optional[float] = _subprocess_helpers.remaining_time(deadline)
+                if remaining == 0:
+                    return False
+                selector.select(remaining)
+
+    def execute(
+        self,
+        command: CommandT,
+        verbose: bool = False,
+        timeout: OptionalTimeoutT = constants.DEFAULT_TIMEOUT,
+        *,
+        log_mask_re: LogMaskReT = None,
+        open_stdout: bool = True,
+        open_stderr: bool = True,
+        chroot_path: typing.Optional[str] = None,
+        cwd: typing.Optional[str] = None,
+    ) -> exec_result.ExecResult:
+        """Execute command by persistent shell and wait for return code.
+
+        :param command: Command for execution
+        :type command: typing.Union[str, typing.Iterable[str]]
+        :param verbose: Produce log.info records for command call and output
+        :type verbose: bool
+        :param timeout: Timeout for command execution (shell is stopped on timeout).
+        :type timeout: typing.Union[int, float, None]
+        :param log_mask_re: regex lookup rule to mask command for logger.
+                            all MATCHED groups will be replaced by '<*masked*>'
+        :type log_mask_re: typing.Optional[str]
+        :param open_stdout: open STDOUT stream for read
+        :type open_stdout: bool
+        :param open_stderr: open STDERR stream for read
+        :type open_stderr: bool
+        :param chroot_path: chroot path override
+        :type chroot_path: typing.Optional[str]
+        :param cwd: change directory before command execution (None: shell working directory)
+        :type cwd: typing.Optional[str]
+        :return: Execution result
+        :rtype: ExecResult
+        :raises ExecHelperTimeoutError: Timeout exceeded
+        """
+        client: SSHClientBase = self.__client
+        log_level: int = logging.INFO if verbose else logging.DEBUG
+        cmd: str = client._cmd_to_string(command)
+        # pylint: disable=protected-access
+        client._log_command_execute(command=cmd, log_mask_re=log_mask_re, log_level=log_level, chroot_path=chroot_path)
+        frame = _shell_framing.FramedCommand(client._prepare_command(cmd=cmd, chroot_path=chroot_path))
+        result = exec_result.ExecResult(
+            cmd=client._mask_command(cmd=cmd, log_mask_re=log_mask_re),
+            started=datetime.datetime.utcnow(),
+        )
+        # pylint: enable=protected-access
+        deadline: typing.Optional[float] = None if timeout is None else time.monotonic() + timeout
+        with self.__lock:
+            chan: paramiko.Channel = self.__start()
+            chan.sendall(frame.script(cwd=cwd, open_stdout=open_stdout, open_stderr=open_stderr))
+            state: typing.Optional[bool] = self.__read(chan, frame, deadline)
+            exit_code: typing.Optional[int] = frame.exit_code
+            if state is None and chan.status_event.wait(_subprocess_helpers.remaining_time(deadline)):
+                exit_code = chan.exit_status  # Shell died: report its exit status
+            if not state:
+                self.__stop()
+
+        result.read_stdout(src=frame.stdout_lines, log=client.logger, verbose=verbose)
+        result.read_stderr(src=frame.stderr_lines, log=client.logger, verbose=verbose)
+        if state is False:
+            result.set_timestamp()
+            client.logger.debug(_log_templates.CMD_WAIT_ERROR.format(result=result, timeout=timeout))
+            raise exceptions.ExecHelperTimeoutError(result=result, timeout=timeout)  # type: ignore
+        result.exit_code = proc_enums.INVALID if exit_code is None else exit_code
+        client.logger.log(level=log_level, msg=f"Command {result.cmd!r} exit code: {result.exit_code!s}")
+        return result
+
+    def check_call(
+        self,
+        command: CommandT,
+        verbose: bool = False,
+        timeout: OptionalTimeoutT = constants.DEFAULT_TIMEOUT,
+        error_info: ErrorInfoT = None,
+        expected: ExpectedExitCodesT = (proc_enums.EXPECTED,),
+        raise_on_err: bool = True,
+        *,
+        exception_class: CalledProcessErrorSubClassT = exceptions.CalledProcessError,
+        **kwargs: typing.Any,
+    ) -> exec_result.ExecResult:
+        """Execute command by persistent shell and check for return code.
+
+        :param command: Command for execution
+        :type command: typing.Union[str, typing.Iterable[str]]
+        :param verbose: Produce log.info records for command call and output
+        :type verbose: bool
+        :param timeout: Timeout for command execution (shell is stopped on timeout).
+        :type timeout: typing.Union[int, float, None]
+        :param error_info: Text for error details, if fail happens
+        :type error_info: typing.Optional[str]
+        :param expected: expected return codes (0 by default)
+        :type expected: typing.Iterable[typing.Union[int, proc_enums.ExitCodes]]
+        :param raise_on_err: Raise exception on unexpected return code
+        :type raise_on_err: bool
+        :param exception_class: Exception class for errors. Subclass of CalledProcessError is mandatory.
+        :type exception_class: typing.Type[exceptions.CalledProcessError]
+        :param kwargs: additional parameters for execute call.
+        :type kwargs: typing.Any
+        :return: Execution result
+        :rtype: ExecResult
+        :raises ExecHelperTimeoutError: Timeout exceeded
+        :raises CalledProcessError: Unexpected exit code
+        """
+        result: exec_result.ExecResult = self.execute(command, verbose=verbose, timeout=timeout, **kwargs)
+        return self.__client._handle_exit_code(  # pylint: disable=protected-access
+            result=result,
+            error_info=error_info,
+            expected_codes=proc_enums.exit_codes_to_enums(expected),
+            raise_on_err=raise_on_err,
+            exception_class=exception_class,
+        )
+
+    def close(self) -> None:
+        """Stop shell: it will be started again on next command."""
+        with self.__lock:
+            self.__stop()
+
+    def __enter__(self) -> SSHShellSession:
+        """Context manager usage: shell is stopped on exit.
+
+        :return: self
+        :rtype: SSHShellSession
+        """
+        return self
+
+    def __exit__(self, exc_type: typing.Any, exc_val: typing.Any, exc_tb: typing.Any) -> None:
+        """Stop shell on context manager exit."""
+        self.close()
+
+
+class _BatchReader:
+    """Splitter of single shell output to frames of commands executed one by one."""
+
+    __slots__ = ("__frames", "__stdout_idx", "__stderr_idx")
+
+    def __init__(self, frames: typing.Sequence[_shell_framing.FramedCommand]) -> None:
+        """Splitter of single shell output to frames of commands executed one by one.
+
+        :param frames: commands in order of execution
+        :type frames: typing.Sequence[FramedCommand]
+        """
+        self.__frames: typing.Sequence[_shell_framing.FramedCommand] = frames
+        self.__stdout_idx: int = 0
+        self.__stderr_idx: int = 0
+
+    @property
+    def completed(self) -> int:
+        """Amount of commands with complete STDOUT and STDERR frames.
+
+        :rtype: int
+        """
+        return min(self.__stdout_idx, self.__stderr_idx)
+
+    def feed_stdout(self, chunk: bytes) -> None:
+        """Add data read from shell STDOUT: data after frame end belongs to the next command.
+
+        :param chunk: data read from shell STDOUT
+        :type chunk: bytes
+        """
+        while chunk and self.__stdout_idx < len(self.__frames):
+            frame: _shell_framing.FramedCommand = self.__frames[self.__stdout_idx]
+            if not frame.feed_stdout(chunk):
+                return
+            chunk = frame.stdout_rest
+            self.__stdout_idx += 1
+
+    def feed_stderr(self, chunk: bytes) -> None:
+        """Add data read from shell STDERR: data after frame end belongs to the next command.
+
+        :param chunk: data read from shell STDERR
+        :type chunk: bytes
+        """
+        while chunk and self.__stderr_idx < len(self.__frames):
+            frame: _shell_framing.FramedCommand = self.__frames[self.__stderr_idx]
+            if not frame.feed_stderr(chunk):
+                return
+            chunk = frame.stderr_rest
+            self.__stderr_idx += 1
+
+
+class _JumpedSSHClient(paramiko.SSHClient):
+    """SSH connection through shared jump host: reference to jump host connection is released on close."""
+
+    def __init__(self, jump_hosts: SharedJumpHosts, route: _SSHRouteT) -> None:
+        """SSH connection through shared jump host.
+
+        :param jump_hosts: registry of shared jump host connections
+        :type jump_hosts: SharedJumpHosts
+        :param route: jump host route
+        :type route: typing.Tuple[typing.Tuple[SSHConfig, ssh_auth.SSHAuth], ...]
+        """
+        super().__init__()
+        self.__jump: typing.Optional[typing.Tuple[SharedJumpHosts, _SSHRouteT]] = (jump_hosts, route)
+        self.__jump_lock = threading.Lock()
+
+    def close(self) -> None:
+        """Close connection and release jump host (once)."""
+        try:
+            super().close()
+        finally:
+            with self.__jump_lock:
+                jump, self.__jump = self.__jump, None
+            if jump is not None:
+                jump[0].release(jump[1])
+
+
+def _connect_route(
+    route: _SSHRouteT,
+    jump_hosts: SharedJumpHosts,
+    timeout: OptionalTimeoutT = None,
+) -> paramiko.SSHClient:
+    """Connect to the last host of route: jump hosts connections are shared with other routes through them.
+
+    :param route: SSHConfig - SSHAuth pairs in order of connection
+    :type route: typing.Tuple[typing.Tuple[SSHConfig, ssh_auth.SSHAuth], ...]
+    :param jump_hosts: registry of shared jump host connections
+    :type jump_hosts: SharedJumpHosts
+    :param timeout: timeout for TCP connect, SSH banner and authentication of each host (None: paramiko defaults)
+    :type timeout: typing.Union[int, float, None]
+    :return: paramiko ssh connection object
+    :rtype: paramiko.SSHClient
+    :raises ValueError: ProxyCommand found in connection chain after first host reached
+    :raises RuntimeError: Unexpected state
+    :raises ConnectionError: Can not get SSH transport
+    """
+    config, auth = route[-1]
+    if len(route) == 1:  # start has another logic
+        client: paramiko.SSHClient = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        if config.proxycommand:
+            auth.connect(
+                client,
+                hostname=config.hostname,
+                port=config.port or 22,
+                sock=paramiko.ProxyCommand(config.proxycommand),
+                timeout=timeout,
+            )
+        else:
+            auth.connect(client, hostname=config.hostname, port=config.port or 22, timeout=timeout)
+        return client
+
+    if not config.proxyjump:
+        if config.proxycommand:
+            raise ValueError(f"ProxyCommand found in connection chain after first host reached!\n{config}")
+        raise RuntimeError("Unexpected state: Final host by configuration, but requested host is not reached")
+
+    jump_route: _SSHRouteT = route[:-1]
+    jump: paramiko.SSHClient = jump_hosts.acquire(
+        jump_route, functools.partial(_connect_route, jump_route, jump_hosts, timeout)
+    )
+    try:
+        transport: typing.Optional[paramiko.Transport] = jump.get_transport()
+        if transport is None:
+            raise ConnectionError("Can not get SSH transport")
+        sock: paramiko.Channel = transport.open_channel(
+            kind="direct-tcpip",
+            dest_addr=(config.hostname, config.port or 22),
+            src_addr=(config.proxyjump, 0),
+        )
+        client = _JumpedSSHClient(jump_hosts, jump_route)
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+    except BaseException:
+        jump_hosts.release(jump_route)
+        raise
+    try:
+        auth.connect(client, hostname=config.hostname, port=config.port or 22, sock=sock, timeout=timeout)
+    except BaseException:
+        client.close()  # Jump host is released
+        raise
+    return client
+
+
+def _close_connected(future: concurrent.futures.Future[SSHClientBase]) -> None:
+    """Close connection established when nobody is waiting for it anymore.
+
+    :param future: connect task
+    :type future: concurrent.futures.Future[SSHClientBase]
+    """
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+class _ProxyChannel(typing.NamedTuple):
+    """Channel through proxy connection opened on demand: not required if connection is taken from pool."""
+
+    proxy: SSHClientBase
+    port: typing.Optional[int]
+    ssh_config: _ssh_helpers.SSHConfig
+
+    def open(self) -> paramiko.Channel:
+        """Open channel through proxy connection.
+
+        :return: ssh channel for usage as socket for new connection over it
+        :rtype: paramiko.Channel
+        """
+        return self.proxy._get_proxy_channel(port=self.port, ssh_config=self.ssh_config)
+
+
 class SSHClientBase(api.ExecHelper):
     """SSH Client helper.
 
@@ -222,6 +1431,18 @@ class SSHClientBase(api.ExecHelper):
     :type sock: typing.Optional[typing.Union[paramiko.ProxyCommand, paramiko.Channel, socket.socket]]
     :param keepalive: keepalive period
     :type keepalive: typing.Union[int, bool]
+    :param executor: executor for output reading threads or its factory (None: dedicated `HelperExecutor`)
+    :type executor: typing.Union[concurrent.futures.Executor, typing.Callable[[], concurrent.futures.Executor], None]
+    :param connection_pool: take connection from pool and return it on close instead of disconnect
+    :type connection_pool: typing.Optional[SSHConnectionPool]
+    :param max_sessions: maximum amount of simultaneously running commands (None: not limited)
+    :type max_sessions: typing.Optional[int]
+    :param connect_timeout: timeout for TCP connect, SSH banner and authentication (None: paramiko defaults)
+    :type connect_timeout: typing.Union[int, float, None]
+    :param drain_timeout: maximum time to read output after exit status if channel EOF is delayed by background jobs
+    :type drain_timeout: typing.Union[int, float]
+    :param connect_retries: amount of connection retries on SSH errors (authentication errors are not retried)
+    :type connect_retries: int
 
     .. note:: auth has priority over username/password/private_keys
     .. note::
@@ -238,6 +1459,12 @@ class SSHClientBase(api.ExecHelper):
     .. versionchanged:: 6.0.0 private_keys is deprecated
     .. versionchanged:: 7.0.0 private_keys is removed
     .. versionchanged:: 7.0.0 keepalive_mode is removed
+    .. versionchanged:: 7.1.0 executor
+    .. versionchanged:: 7.1.0 connection_pool
+    .. versionchanged:: 7.1.0 max_sessions
+    .. versionchanged:: 7.1.0 connect_timeout
+    .. versionchanged:: 7.1.0 drain_timeout
+    .. versionchanged:: 7.1.0 connect_retries
     """
 
     __slots__ = (
@@ -252,6 +1479,12 @@ class SSHClientBase(api.ExecHelper):
         "__ssh_config",
         "__sock",
         "__conn_chain",
+        "__connection_pool",
+        "__pool_key",
+        "__sessions",
+        "__connect_timeout",
+        "__connect_retries",
+        "drain_timeout",
     )
 
     def __hash__(self) -> int:
@@ -273,8 +1506,16 @@ class SSHClientBase(api.ExecHelper):
         verbose: bool = True,
         ssh_config: _OptionalSSHConfigArgT = None,
         ssh_auth_map: _OptionalSSHAuthMapT = None,
-        sock: typing.Optional[typing.Union[paramiko.ProxyCommand, paramiko.Channel, socket.socket]] = None,
+        sock: typing.Optional[
+            typing.Union[paramiko.ProxyCommand, paramiko.Channel, socket.socket, _ProxyChannel]
+        ] = None,
         keepalive: KeepAlivePeriodT = 1,
+        executor: executor_mod.ExecutorArgT = None,
+        connection_pool: typing.Optional[SSHConnectionPool] = None,
+        max_sessions: typing.Optional[int] = constants.DEFAULT_SSH_MAX_SESSIONS,
+        connect_timeout: OptionalTimeoutT = None,
+        drain_timeout: typing.Union[int, float] = constants.DEFAULT_DRAIN_TIMEOUT,
+        connect_retries: int = constants.DEFAULT_SSH_CONNECT_RETRIES,
     ) -> None:
         """Main SSH Client helper."""
         # Init ssh config. It's main source for connection parameters
@@ -303,9 +1544,13 @@ class SSHClientBase(api.ExecHelper):
         self.__keepalive_period: int = int(keepalive)
         self.__verbose: bool = verbose
         self.__sock = sock
+        self.__connect_timeout: OptionalTimeoutT = connect_timeout
+        self.__connect_retries: int = connect_retries
+        self.drain_timeout: typing.Union[int, float] = drain_timeout
 
         self.__ssh: paramiko.SSHClient
         self.__sftp: typing.Optional[paramiko.SFTPClient] = None
+        self.__sessions = _SessionLimiter(max_sessions)
 
         # Rebuild SSHAuth object if required.
         # Priority: auth > credentials > auth mapping
@@ -327,7 +1572,8 @@ class SSHClientBase(api.ExecHelper):
         super().__init__(
             logger=logging.getLogger(f"{mod_name}.{self.__class__.__name__}").getChild(
                 f"({log_username}@{host}:{self.port})"
-            )
+            ),
+            executor=executor,
         )
 
         # Update config for target host: merge with data from credentials and parameters.
@@ -340,6 +1586,18 @@ class SSHClientBase(api.ExecHelper):
         else:
             self.__conn_chain = []
 
+        # Pooled connections are interchangeable only if the whole route is known: own socket is not pooled
+        self.__connection_pool: typing.Optional[SSHConnectionPool] = connection_pool
+        self.__pool_key: typing.Optional[ConnectionKey] = None
+        if connection_pool is not None:
+            route: typing.Optional[typing.Hashable] = None
+            if sock is None:
+                route = tuple(self.__conn_chain)
+            elif isinstance(sock, _ProxyChannel):
+                route = sock.proxy.__pool_key
+            if route is not None:
+                self.__pool_key = ConnectionKey(hostname=self.hostname, port=self.port, auth=self.auth, proxy=route)
+
         self.__connect()
 
     def __rebuild_ssh_config(self) -> None:
@@ -391,19 +1649,49 @@ class SSHClientBase(api.ExecHelper):
     def hostname(self) -> str:
         """Connected remote host name.
 
-        :return: remote hostname
-        :rtype: str
+        :return: remote hostname
+        :rtype: str
+        """
+        return self.__hostname
+
+    @property
+    def port(self) -> int:
+        """Connected remote port number.
+
+        :return: remote port
+        :rtype: int
+        """
+        return self.__port
+
+    @property
+    def connection_pool(self) -> typing.Optional[SSHConnectionPool]:
+        """Pool of connections used by client.
+
+        :rtype: typing.Optional[SSHConnectionPool]
+
+        .. versionadded:: 7.1.0
+        """
+        return self.__connection_pool
+
+    @property
+    def max_sessions(self) -> typing.Optional[int]:
+        """Maximum amount of simultaneously running commands (reduced on session refusal by server).
+
+        :rtype: typing.Optional[int]
+
+        .. versionadded:: 7.1.0
         """
-        return self.__hostname
+        return self.__sessions.limit
 
     @property
-    def port(self) -> int:
-        """Connected remote port number.
+    def active_sessions(self) -> int:
+        """Amount of running commands (open session channels).
 
-        :return: remote port
         :rtype: int
+
+        .. versionadded:: 7.1.0
         """
-        return self.__port
+        return self.__sessions.active
 
     @property
     def ssh_config(self) -> _ssh_helpers.HostsSSHConfigs:
@@ -422,9 +1710,15 @@ class SSHClientBase(api.ExecHelper):
         :rtype: paramiko.Transport
         :raises ConnectionError: Can not get SSH transport (with reconnect)
         Used internally.
+
+        .. versionchanged:: 7.1.0 lock is acquired only for reconnect
         """
+        transport = self.__ssh.get_transport()
+        if transport is not None:
+            return transport
+
         with self.lock:
-            transport = self.__ssh.get_transport()
+            transport = self.__ssh.get_transport()  # Could be reconnected by another thread
             if transport is not None:
                 return transport
 
@@ -470,79 +1764,65 @@ class SSHClientBase(api.ExecHelper):
         """
         return self.__ssh
 
-    @tenacity.retry(
-        retry=RetryOnExceptions(retry_on=paramiko.SSHException, reraise=paramiko.AuthenticationException),
-        stop=tenacity.stop.stop_after_attempt(3),  # type: ignore
-        wait=tenacity.wait.wait_fixed(3),  # type: ignore
-        reraise=True,
-    )
     def __connect(self) -> None:
-        """Main method for connection open."""
+        """Main method for connection open: retried on SSH errors `connect_retries` times.
+
+        .. versionchanged:: 7.1.0 amount of retries is configurable
+        """
+        for attempt in tenacity.Retrying(
+            retry=RetryOnExceptions(retry_on=paramiko.SSHException, reraise=paramiko.AuthenticationException),
+            stop=tenacity.stop.stop_after_attempt(self.__connect_retries + 1),  # type: ignore
+            wait=tenacity.wait.wait_fixed(3),  # type: ignore
+            reraise=True,
+        ):
+            with attempt:
+                self.__connect_once()
+
+    def __connect_once(self) -> None:
+        """Open connection (single attempt)."""
         with self.lock:
-            if self.__sock is not None:
-                sock = self.__sock
-
-                self.__ssh = paramiko.SSHClient()
-                self.__ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                self.auth.connect(
-                    client=self.__ssh,
-                    hostname=self.hostname,
-                    port=self.port,
-                    log=self.__verbose,
-                    sock=sock,
-                )
+            if self.__connection_pool is not None and self.__pool_key is not None:
+                self.__ssh = self.__connection_pool.checkout(self.__pool_key, self.__open_client)
             else:
-                self.__ssh = self.__get_client()
+                self.__ssh = self.__open_client()
 
             transport: paramiko.Transport = self._ssh_transport
             transport.set_keepalive(1 if self.__keepalive_period else 0)  # send keepalive packets
+            if isinstance(transport.sock, socket.socket) and transport.sock.family in {socket.AF_INET, socket.AF_INET6}:
+                # Channel requests and replies are small: do not hold them for delayed ACK of previous ones
+                transport.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
 
-    def __get_client(self) -> paramiko.SSHClient:
-        """Connect using connection chain information.
+    def __open_client(self) -> paramiko.SSHClient:
+        """Open new connection.
 
         :return: paramiko ssh connection object
         :rtype: paramiko.SSHClient
-        :raises ValueError: ProxyCommand found in connection chain after first host reached
-        :raises RuntimeError: Unexpected state
-        :raises ConnectionError: Can not get SSH transport
         """
+        if self.__sock is None:
+            return self.__get_client()
+
+        sock = self.__sock.open() if isinstance(self.__sock, _ProxyChannel) else self.__sock
+        client: paramiko.SSHClient = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        self.auth.connect(
+            client=client,
+            hostname=self.hostname,
+            port=self.port,
+            log=self.__verbose,
+            sock=sock,
+            timeout=self.__connect_timeout,
+        )
+        return client
 
-        last_ssh_client: paramiko.SSHClient = paramiko.SSHClient()
-        last_ssh_client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-
-        config, auth = self.__conn_chain[0]
-        if config.proxycommand:
-            auth.connect(
-                last_ssh_client,
-                hostname=config.hostname,
-                port=config.port or 22,
-                sock=paramiko.ProxyCommand(config.proxycommand),
-            )
-        else:
-            auth.connect(last_ssh_client, hostname=config.hostname, port=config.port or 22)
-
-        for config, auth in self.__conn_chain[1:]:  # start has another logic, so do it out of cycle
-            ssh = paramiko.SSHClient()
-            ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-
-            if config.proxyjump:
-                transport = last_ssh_client.get_transport()
-                if transport is None:
-                    raise ConnectionError("Can not get SSH transport")
-                sock = transport.open_channel(
-                    kind="direct-tcpip",
-                    dest_addr=(config.hostname, config.port or 22),
-                    src_addr=(config.proxyjump, 0),
-                )
-                auth.connect(ssh, hostname=config.hostname, port=config.port or 22, sock=sock)
-                last_ssh_client = ssh
-                continue
+    def __get_client(self) -> paramiko.SSHClient:
+        """Connect using connection chain information.
 
-            if config.proxycommand:
-                raise ValueError(f"ProxyCommand found in connection chain after first host reached!\n{config}")
+        Jump hosts (ProxyJump) connections are shared by all clients with the same route to them.
 
-            raise RuntimeError("Unexpected state: Final host by configuration, but requested host is not reached")
-        return last_ssh_client
+        :return: paramiko ssh connection object
+        :rtype: paramiko.SSHClient
+        """
+        return _connect_route(tuple(self.__conn_chain), SharedJumpHosts.default(), self.__connect_timeout)
 
     def __connect_sftp(self) -> None:
         """SFTP connection opener."""
@@ -568,8 +1848,16 @@ class SSHClientBase(api.ExecHelper):
         raise paramiko.SSHException("SFTP connection failed")
 
     def close(self) -> None:
-        """Close SSH and SFTP sessions."""
+        """Close SSH and SFTP sessions and own executor.
+
+        .. versionchanged:: 7.1.0 pooled connection is returned to pool
+        .. versionchanged:: 7.1.0 own executor is shut down (it will be created again on next command)
+        """
+        self._close_executor()
         with self.lock:
+            if self.__connection_pool is not None and self.__pool_key is not None:
+                self.__release_to_pool(self.__connection_pool, self.__pool_key)
+                return
             # noinspection PyBroadException
             try:
                 self.__ssh.close()
@@ -583,6 +1871,25 @@ class SSHClientBase(api.ExecHelper):
                     except Exception:
                         self.logger.exception("Could not close sftp connection")
 
+    def __release_to_pool(self, pool: SSHConnectionPool, key: ConnectionKey) -> None:
+        """Close SFTP session and return connection to pool (lock should be acquired).
+
+        :param pool: connection pool
+        :type pool: SSHConnectionPool
+        :param key: connection identity
+        :type key: ConnectionKey
+        """
+        if self.__sftp is not None:
+            # noinspection PyBroadException
+            try:
+                self.__sftp.close()
+            except Exception:
+                self.logger.exception("Could not close sftp connection")
+            self.__sftp = None
+        # Not connected client: next usage takes connection from pool again
+        client, self.__ssh = self.__ssh, paramiko.SSHClient()
+        pool.checkin(key, client)
+
     def __del__(self) -> None:
         """Destructor helper: close channel and threads BEFORE closing others.
 
@@ -632,6 +1939,16 @@ class SSHClientBase(api.ExecHelper):
         """
         self.__sudo_mode = bool(mode)
 
+    def _target_identity(self) -> typing.Hashable:
+        """Identity of execution target for results caching: remote host, port, user and sudo mode.
+
+        :return: hashable identity: same for helpers executing commands in the same context
+        :rtype: typing.Hashable
+
+        .. versionadded:: 7.1.0
+        """
+        return self.__class__.__name__, self.hostname, self.port, self.auth.username, self.sudo_mode
+
     @property
     def keepalive_period(self) -> int:
         """Keepalive period for connection object.
@@ -654,9 +1971,16 @@ class SSHClientBase(api.ExecHelper):
         transport.set_keepalive(int(period))
 
     def reconnect(self) -> None:
-        """Reconnect SSH session."""
+        """Reconnect SSH session.
+
+        .. versionchanged:: 7.1.0 pooled connection is dropped instead of return to pool
+        """
         with self.lock:
-            self.close()
+            if self.__pool_key is not None:  # Connection should be renewed: do not return it to pool
+                self.__ssh.close()
+                self.__sftp = None
+            else:
+                self.close()
             self.__connect()
 
     def sudo(self, enforce: typing.Optional[bool] = None) -> _SudoContext:
@@ -749,9 +2073,99 @@ class SSHClientBase(api.ExecHelper):
         .. versionchanged:: 2.1.0 Use typed NamedTuple as result
         .. versionchanged:: 3.2.0 Expose pty options as optional keyword-only arguments
         .. versionchanged:: 4.1.0 support chroot
+        .. versionchanged:: 7.1.0 wait for free slot if `max_sessions` sessions are open
+        """
+        chan: paramiko.Channel = self._open_session()
+        try:
+            return self.__start_command(
+                chan,
+                command,
+                stdin=stdin,
+                open_stdout=open_stdout,
+                open_stderr=open_stderr,
+                chroot_path=chroot_path,
+                get_pty=get_pty,
+                width=width,
+                height=height,
+            )
+        except BaseException:
+            self._close_session(chan)
+            raise
+
+    def _open_session(self) -> paramiko.Channel:
+        """Open session channel in limits of simultaneously open sessions.
+
+        :return: opened channel
+        :rtype: paramiko.Channel
+        :raises ChannelException: session open failed
+
+        .. versionadded:: 7.1.0
+        """
+        while True:
+            self.__sessions.acquire()
+            try:
+                chan: paramiko.Channel = self._ssh_transport.open_session()
+            except paramiko.ChannelException as exc:
+                if exc.code != paramiko.common.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED:
+                    self.__sessions.release()
+                    raise
+                if not self.__sessions.refused():
+                    raise
+                self.logger.warning(f"Session is refused by server, sessions limit reduced to {self.max_sessions}")
+                continue
+            except BaseException:
+                self.__sessions.release()
+                raise
+            self.__sessions.track(chan)
+            return chan
+
+    def _close_session(self, chan: paramiko.Channel) -> None:
+        """Close session channel and release its slot in sessions limit.
+
+        :param chan: session channel
+        :type chan: paramiko.Channel
+
+        .. versionadded:: 7.1.0
         """
-        chan: paramiko.Channel = self._ssh_transport.open_session()
+        chan.close()
+        self.__sessions.release(chan)
+
+    def __start_command(
+        self,
+        chan: paramiko.Channel,
+        command: str,
+        *,
+        stdin: OptionalStdinT,
+        open_stdout: bool,
+        open_stderr: bool,
+        chroot_path: typing.Optional[str],
+        get_pty: bool,
+        width: int,
+        height: int,
+    ) -> SshExecuteAsyncResult:
+        """Start command on opened session channel.
 
+        :param chan: session channel
+        :type chan: paramiko.Channel
+        :param command: Command for execution
+        :type command: str
+        :param stdin: pass STDIN text to the process
+        :type stdin: typing.Union[bytes, str, bytearray, None]
+        :param open_stdout: open STDOUT stream for read
+        :type open_stdout: bool
+        :param open_stderr: open STDERR stream for read
+        :type open_stderr: bool
+        :param chroot_path: chroot path override
+        :type chroot_path: typing.Optional[str]
+        :param get_pty: Get PTY for connection
+        :type get_pty: bool
+        :param width: PTY width
+        :type width: int
+        :param height: PTY height
+        :type height: int
+        :return: control interface and file-like objects for STDIN/STDERR/STDOUT
+        :rtype: SshExecuteAsyncResult
+        """
         if get_pty:
             # Open PTY
             chan.get_pty(term="vt100", width=width, height=height, width_pixels=0, height_pixels=0)
@@ -808,6 +2222,8 @@ class SSHClientBase(api.ExecHelper):
         verbose: bool = False,
         log_mask_re: LogMaskReT = None,
         stdin: OptionalStdinT = None,
+        output_callbacks: typing.Optional[OutputCallbacks] = None,
+        binary_output: bool = False,
         **kwargs: typing.Any,
     ) -> exec_result.ExecResult:
         """Get exit status from channel with timeout.
@@ -825,6 +2241,10 @@ class SSHClientBase(api.ExecHelper):
         :type log_mask_re: typing.Optional[str]
         :param stdin: pass STDIN text to the process
         :type stdin: typing.Union[bytes, str, bytearray, None]
+        :param output_callbacks: user callbacks for output
+        :type output_callbacks: typing.Optional[OutputCallbacks]
+        :param binary_output: read output by fixed size chunks without splitting to lines and logging
+        :type binary_output: bool
         :param kwargs: additional parameters for call.
         :type kwargs: typing.Any
         :return: Execution result
@@ -832,26 +2252,39 @@ class SSHClientBase(api.ExecHelper):
         :raises ExecHelperTimeoutError: Timeout exceeded
 
         .. versionchanged:: 1.2.0 log_mask_re regex rule for masking cmd
+        .. versionchanged:: 7.1.0 output_callbacks
+        .. versionchanged:: 7.1.0 binary_output
+        .. versionchanged:: 7.1.0 output is read by selector on channel as soon as received, no sleep and poll
         """
 
-        def poll_streams() -> None:
-            """Poll FIFO buffers if data available."""
-            if async_result.stdout and async_result.interface.recv_ready():
+        def read_stdout() -> None:
+            """Read STDOUT and deliver it to callbacks if set."""
+            if binary_output:
+                callback = None if output_callbacks is None else output_callbacks.feed_stdout_chunk
+                result.read_stdout_chunks(src=async_result.stdout, callback=callback)
+            elif output_callbacks is None:
                 result.read_stdout(src=async_result.stdout, log=self.logger, verbose=verbose)
-            if async_result.stderr and async_result.interface.recv_stderr_ready():
-                result.read_stderr(src=async_result.stderr, log=self.logger, verbose=verbose)
+            else:
+                result.read_stdout(
+                    src=output_callbacks.iter_stdout(async_result.stdout), log=self.logger, verbose=verbose
+                )
 
-        @threaded.threadpooled
-        def poll_pipes() -> None:
-            """Polling task for FIFO buffers."""
-            while not async_result.interface.status_event.is_set():
-                time.sleep(0.1)
-                if async_result.stdout or async_result.stderr:
-                    poll_streams()
+        def read_stderr() -> None:
+            """Read STDERR and deliver it to callbacks if set."""
+            if binary_output:
+                callback = None if output_callbacks is None else output_callbacks.feed_stderr_chunk
+                result.read_stderr_chunks(src=async_result.stderr, callback=callback)
+            elif output_callbacks is None:
+                result.read_stderr(src=async_result.stderr, log=self.logger, verbose=verbose)
+            else:
+                result.read_stderr(
+                    src=output_callbacks.iter_stderr(async_result.stderr), log=self.logger, verbose=verbose
+                )
 
-            result.read_stdout(src=async_result.stdout, log=self.logger, verbose=verbose)
-            result.read_stderr(src=async_result.stderr, log=self.logger, verbose=verbose)
-            result.exit_code = async_result.interface.exit_status
+        def read_files() -> None:
+            """Read output files until EOF: channel-like interface without readiness notification."""
+            read_stdout()
+            read_stderr()
 
         # channel.status_event.wait(timeout)
         cmd_for_log: str = self._mask_command(cmd=command, log_mask_re=log_mask_re)
@@ -859,21 +2292,55 @@ class SSHClientBase(api.ExecHelper):
         # Store command with hidden data
         result = exec_result.ExecResult(cmd=cmd_for_log, stdin=stdin, started=async_result.started)
 
-        # noinspection PyNoneFunctionAssignment,PyTypeChecker
-        future: concurrent.futures.Future[None] = poll_pipes()
-
-        concurrent.futures.wait([future], timeout)
-
-        # Process closed?
-        if async_result.interface.status_event.is_set():
-            async_result.interface.close()
+        deadline: typing.Optional[float] = None if timeout is None else time.monotonic() + timeout
+        chan: paramiko.Channel = async_result.interface
+        try:
+            if isinstance(chan, paramiko.Channel):
+                reader = _ChannelReader(
+                    chan,
+                    result,
+                    self.logger,
+                    open_stdout=async_result.stdout is not None,
+                    open_stderr=async_result.stderr is not None,
+                    verbose=verbose,
+                    output_callbacks=output_callbacks,
+                    binary_output=binary_output,
+                )
+                try:
+                    with selectors.DefaultSelector() as selector:
+                        selector.register(chan, selectors.EVENT_READ)
+                        drain_deadline: typing.Optional[float] = None
+                        while not reader.drain():
+                            remaining: typing.Optional[float] = _subprocess_helpers.remaining_time(deadline)
+                            if remaining is not None and remaining <= 0:
+                                break
+                            if drain_deadline is None and chan.status_event.is_set():
+                                # EOF can be delayed by background jobs holding output open: read limited time
+                                drain_deadline = time.monotonic() + self.drain_timeout
+                            if drain_deadline is None:  # Exit status has no file descriptor notification
+                                selector.select(min(_EXIT_STATUS_POLL_PERIOD, remaining or _EXIT_STATUS_POLL_PERIOD))
+                                continue
+                            drain_remaining: float = drain_deadline - time.monotonic()
+                            if drain_remaining <= 0:
+                                break
+                            selector.select(drain_remaining if remaining is None else min(drain_remaining, remaining))
+                finally:
+                    reader.finish()
+            else:
+                # noinspection PyNoneFunctionAssignment,PyTypeChecker
+                future: concurrent.futures.Future[None] = self.executor.submit(read_files)
+                concurrent.futures.wait([future], timeout)
+
+            # Exit status is received right after EOF: no output is expected, only status message
+            chan.status_event.wait(_subprocess_helpers.remaining_time(deadline))
+            exited: bool = chan.status_event.is_set()
+        finally:
+            self._close_session(chan)
+
+        if exited:
+            result.exit_code = chan.exit_status
             return result
 
-        async_result.interface.close()
-        async_result.interface.status_event.set()
-        future.cancel()
-
-        concurrent.futures.wait([future], 0.001)
         result.set_timestamp()
 
         wait_err_msg: str = _log_templates.CMD_WAIT_ERROR.format(result=result, timeout=timeout)
@@ -1232,8 +2699,10 @@ class SSHClientBase(api.ExecHelper):
         :rtype: SSHClientBase
 
         .. note:: auth has priority over username/password
+        .. note:: if current connection is pooled, new connection uses the same pool (keyed by proxy connection)
 
         .. versionadded:: 6.0.0
+        .. versionchanged:: 7.1.0 connection pool and connect timeout are shared with proxy connection
         """
         if isinstance(ssh_config, _ssh_helpers.HostsSSHConfigs):
             parsed_ssh_config: _ssh_helpers.HostsSSHConfigs = ssh_config
@@ -1242,7 +2711,11 @@ class SSHClientBase(api.ExecHelper):
 
         hostname = parsed_ssh_config[host].hostname
 
-        sock: paramiko.Channel = self._get_proxy_channel(port=port, ssh_config=parsed_ssh_config[hostname])
+        sock: typing.Union[paramiko.Channel, _ProxyChannel]
+        if self.__pool_key is not None:  # Channel is not required if connection is taken from pool
+            sock = _ProxyChannel(proxy=self, port=port, ssh_config=parsed_ssh_config[hostname])
+        else:
+            sock = self._get_proxy_channel(port=port, ssh_config=parsed_ssh_config[hostname])
         cls: typing.Type[SSHClientBase] = self.__class__
         return cls(
             host=host,
@@ -1255,6 +2728,10 @@ class SSHClientBase(api.ExecHelper):
             sock=sock,
             ssh_auth_map=ssh_auth_map if ssh_auth_map is not None else self.__auth_mapping,
             keepalive=int(keepalive),
+            connection_pool=self.__connection_pool,
+            connect_timeout=self.__connect_timeout,
+            drain_timeout=self.drain_timeout,
+            connect_retries=self.__connect_retries,
         )
 
     def execute_through_host(
@@ -1354,6 +2831,7 @@ class SSHClientBase(api.ExecHelper):
         verbose: bool = False,
         log_mask_re: LogMaskReT = None,
         exception_class: typing.Type[exceptions.ParallelCallProcessError] = exceptions.ParallelCallProcessError,
+        max_output: typing.Optional[int] = None,
         **kwargs: typing.Any,
     ) -> typing.Dict[typing.Tuple[str, int], exec_result.ExecResult]:
         """Execute command on multiple remotes in async mode.
@@ -1381,6 +2859,8 @@ class SSHClientBase(api.ExecHelper):
         :type log_mask_re: typing.Optional[str]
         :param exception_class: Exception to raise on error. Mandatory subclass of exceptions.ParallelCallProcessError
         :type exception_class: typing.Type[exceptions.ParallelCallProcessError]
+        :param max_output: maximum amount of output bytes to store per remote (the rest is read and dropped)
+        :type max_output: typing.Optional[int]
         :param kwargs: additional parameters for execute_async call.
         :type kwargs: typing.Any
         :return: dictionary {(hostname, port): result}
@@ -1393,69 +2873,39 @@ class SSHClientBase(api.ExecHelper):
         .. versionchanged:: 3.2.0 Exception class can be substituted
         .. versionchanged:: 3.4.0 Expected is not optional, defaults os dependent
         .. versionchanged:: 4.0.0 Expose stdin and log_mask_re as optional keyword-only arguments
+        .. versionchanged:: 7.1.0 Output and exit statuses of all remotes are multiplexed by single thread
+        .. versionchanged:: 7.1.0 Stored output can be limited per remote
         """
-
-        @threaded.threadpooled
-        def get_result(remote: SSHClientBase) -> exec_result.ExecResult:
-            """Get result from remote call.
-
-            :param remote: SSH connection instance
-            :return: execution result
-            """
-            # pylint: disable=protected-access
-            cmd_for_log: str = remote._mask_command(cmd=cmd, log_mask_re=log_mask_re)
-            remote._log_command_execute(
-                command=cmd,
-                log_mask_re=log_mask_re,
-                log_level=log_level,
-                **kwargs,
-            )
-
-            async_result: SshExecuteAsyncResult = remote._execute_async(
-                cmd,
-                stdin=stdin,
-                log_mask_re=log_mask_re,
-                open_stdout=open_stdout,
-                open_stderr=open_stderr,
-                **kwargs,
-            )
-            # pylint: enable=protected-access
-
-            async_result.interface.status_event.wait(timeout)
-            exit_code = async_result.interface.recv_exit_status()
-
-            res = exec_result.ExecResult(cmd=cmd_for_log, stdin=stdin, started=async_result.started)
-            res.read_stdout(src=async_result.stdout)
-            res.read_stderr(src=async_result.stderr)
-            res.exit_code = exit_code
-
-            async_result.interface.close()
-            return res
-
         prep_expected: typing.Sequence[ExitCodeT] = proc_enums.exit_codes_to_enums(expected)
-        log_level: int = logging.INFO if verbose else logging.DEBUG
         cmd = cls._cmd_to_string(command)
 
-        futures: typing.Dict[SSHClientBase, concurrent.futures.Future[exec_result.ExecResult]] = {
-            remote: get_result(remote) for remote in set(remotes)
-        }  # Use distinct remotes
+        targets: typing.Set[SSHClientBase] = set(remotes)  # Use distinct remotes
+        reactor = _Reactor(
+            cmd,
+            timeout,
+            stdin=stdin,
+            log_mask_re=log_mask_re,
+            open_stdout=open_stdout,
+            open_stderr=open_stderr,
+            verbose=verbose,
+            max_output=max_output,
+            **kwargs,
+        )
+        completed: typing.List[typing.Tuple[SSHClientBase, typing.Union[exec_result.ExecResult, Exception]]] = list(
+            reactor.run(targets)
+        )
+
         results: typing.Dict[typing.Tuple[str, int], exec_result.ExecResult] = {}
         errors: typing.Dict[typing.Tuple[str, int], exec_result.ExecResult] = {}
         raised_exceptions: typing.Dict[typing.Tuple[str, int], Exception] = {}
 
-        _, not_done = concurrent.futures.wait(list(futures.values()), timeout=timeout)
-
-        for fut in not_done:  # pragma: no cover
-            fut.cancel()
-
-        for remote, future in futures.items():
-            try:
-                result = future.result()
-                results[(remote.hostname, remote.port)] = result
-                if result.exit_code not in prep_expected:
-                    errors[(remote.hostname, remote.port)] = result
-            except Exception as e:
-                raised_exceptions[(remote.hostname, remote.port)] = e
+        for remote, result in completed:
+            if isinstance(result, Exception):
+                raised_exceptions[(remote.hostname, remote.port)] = result
+                continue
+            results[(remote.hostname, remote.port)] = result
+            if result.exit_code not in prep_expected:
+                errors[(remote.hostname, remote.port)] = result
 
         if raised_exceptions:  # always raise
             raise exceptions.ParallelCallExceptions(
@@ -1469,6 +2919,326 @@ class SSHClientBase(api.ExecHelper):
             raise exception_class(cmd, errors, results, expected=prep_expected)
         return results
 
+    @classmethod
+    def execute_on(
+        cls,
+        remotes: typing.Iterable[SSHClientBase],
+        command: CommandT,
+        *,
+        max_parallel: typing.Optional[int] = None,
+        per_host_timeout: OptionalTimeoutT = constants.DEFAULT_TIMEOUT,
+        timeout: OptionalTimeoutT = None,
+        expected: ExpectedExitCodesT = (proc_enums.EXPECTED,),
+        fail_fast: typing.Optional[int] = None,
+        stdin: OptionalStdinT = None,
+        open_stdout: bool = True,
+        open_stderr: bool = True,
+        verbose: bool = False,
+        log_mask_re: LogMaskReT = None,
+        max_output: typing.Optional[int] = None,
+        **kwargs: typing.Any,
+    ) -> ExecuteOnIterator:
+        """Execute command on multiple remotes and get results as soon as each remote finished.
+
+        :param remotes: Connections to execute on (taken from iterable only when command can be started on them)
+        :type remotes: typing.Iterable[SSHClientBase]
+        :param command: Command for execution
+        :type command: typing.Union[str, typing.Iterable[str]]
+        :param max_parallel: maximum amount of remotes executing command at once (None: all)
+        :type max_parallel: typing.Optional[int]
+        :param per_host_timeout: Timeout for command execution on each remote since start on it.
+        :type per_host_timeout: typing.Union[int, float, None]
+        :param timeout: Timeout for execution on all remotes.
+        :type timeout: typing.Union[int, float, None]
+        :param expected: expected return codes (0 by default)
+        :type expected: typing.Iterable[typing.Union[int, proc_enums.ExitCodes]]
+        :param fail_fast: stop after this amount of errors (exceptions or unexpected exit codes): running commands
+                          are stopped (channels are closed) and commands are not started on the rest of remotes.
+        :type fail_fast: typing.Optional[int]
+        :param stdin: pass STDIN text to the process
+        :type stdin: typing.Union[bytes, str, bytearray, None]
+        :param open_stdout: open STDOUT stream for read
+        :type open_stdout: bool
+        :param open_stderr: open STDERR stream for read
+        :type open_stderr: bool
+        :param verbose: produce verbose log record on command call
+        :type verbose: bool
+        :param log_mask_re: regex lookup rule to mask command for logger.
+                            all MATCHED groups will be replaced by '<*masked*>'
+        :type log_mask_re: typing.Optional[str]
+        :param max_output: maximum amount of output bytes to store per remote (the rest is read and dropped)
+        :type max_output: typing.Optional[int]
+        :param kwargs: additional parameters for execute_async call.
+        :type kwargs: typing.Any
+        :return: iterator (sync and async) over (remote, ExecResult or exception) in order of completion
+        :rtype: ExecuteOnIterator
+
+        .. versionadded:: 7.1.0
+        """
+        reactor = _Reactor(
+            cls._cmd_to_string(command),
+            timeout,
+            per_host_timeout=per_host_timeout,
+            max_parallel=max_parallel,
+            stdin=stdin,
+            log_mask_re=log_mask_re,
+            open_stdout=open_stdout,
+            open_stderr=open_stderr,
+            verbose=verbose,
+            max_output=max_output,
+            **kwargs,
+        )
+        return ExecuteOnIterator(
+            reactor.run(remotes),
+            expected=proc_enums.exit_codes_to_enums(expected),
+            fail_fast=fail_fast,
+        )
+
+    def session(self) -> SSHShellSession:
+        """Get persistent remote shell for fast execution of many small commands.
+
+        :return: shell session over single channel of this connection (started on first command)
+        :rtype: SSHShellSession
+
+        .. versionadded:: 7.1.0
+        """
+        return SSHShellSession(self)
+
+    def execute_batch(
+        self,
+        commands: typing.Iterable[CommandT],
+        timeout: OptionalTimeoutT = constants.DEFAULT_TIMEOUT,
+        expected: ExpectedExitCodesT = (proc_enums.EXPECTED,),
+        raise_on_err: bool = True,
+        *,
+        stop_on_error: bool = False,
+        verbose: bool = False,
+        log_mask_re: typing.Union[LogMaskReT, typing.Sequence[LogMaskReT]] = None,
+        open_stdout: bool = True,
+        open_stderr: bool = True,
+        chroot_path: typing.Optional[str] = None,
+        exception_class: typing.Type[exceptions.ParallelCallProcessError] = exceptions.ParallelCallProcessError,
+    ) -> typing.List[exec_result.ExecResult]:
+        """Execute several commands one by one by single remote shell: one channel and one exec request for all.
+
+        Commands are framed by sentinels (exit code on STDOUT, end marker on STDERR) and sent as one script,
+        so each command has own output, exit code and timings (measured on receive of the frame end).
+        Each command is executed in subshell: `exit`, `cd` and syntax errors do not affect the next commands.
+
+        :param commands: Commands for execution
+        :type commands: typing.Iterable[typing.Union[str, typing.Iterable[str]]]
+        :param timeout: Timeout for all commands execution (shell is stopped on timeout).
+        :type timeout: typing.Union[int, float, None]
+        :param expected: expected return codes (0 by default)
+        :type expected: typing.Iterable[typing.Union[int, proc_enums.ExitCodes]]
+        :param raise_on_err: Raise exception on unexpected return code
+        :type raise_on_err: bool
+        :param stop_on_error: do not execute commands after the first unexpected exit code (stopped by remote shell)
+        :type stop_on_error: bool
+        :param verbose: Produce log.info records for command call and output
+        :type verbose: bool
+        :param log_mask_re: regex lookup rule to mask commands for logger or sequence of rules (one per command).
+                            all MATCHED groups will be replaced by '<*masked*>'
+        :type log_mask_re: typing.Union[str, None, typing.Sequence[typing.Optional[str]]]
+        :param open_stdout: open STDOUT stream for read
+        :type open_stdout: bool
+        :param open_stderr: open STDERR stream for read
+        :type open_stderr: bool
+        :param chroot_path: chroot path override
+        :type chroot_path: typing.Optional[str]
+        :param exception_class: Exception to raise on error. Mandatory subclass of exceptions.ParallelCallProcessError
+        :type exception_class: typing.Type[exceptions.ParallelCallProcessError]
+        :return: results of executed commands in order of commands
+        :rtype: typing.List[ExecResult]
+        :raises ValueError: amount of masking rules does not match amount of commands
+        :raises ParallelCallProcessError: Unexpected exit code at least on one command
+        :raises ParallelCallExceptions: Timeout exceeded or shell died during command execution
+
+        .. note:: Errors are collected in dictionaries with keys (masked command, command index).
+        .. note:: Commands not executed (stop on error, timeout or shell death) have no results.
+        .. note:: Commands STDIN is /dev/null: sudo password is not entered, passwordless sudo is required in sudo mode.
+        .. versionadded:: 7.1.0
+        """
+        prep_expected: typing.Sequence[ExitCodeT] = proc_enums.exit_codes_to_enums(expected)
+        cmds: typing.List[str] = [self._cmd_to_string(command) for command in commands]
+        masks: typing.List[LogMaskReT]
+        if log_mask_re is None or isinstance(log_mask_re, str):
+            masks = [log_mask_re] * len(cmds)
+        else:
+            masks = list(log_mask_re)
+            if len(masks) != len(cmds):
+                raise ValueError(f"Got {len(masks)} masking rules for {len(cmds)} commands")
+        keys: typing.List[typing.Tuple[str, int]] = [
+            (self._mask_command(cmd=cmd, log_mask_re=mask), idx) for idx, (cmd, mask) in enumerate(zip(cmds, masks))
+        ]
+        log_level: int = logging.INFO if verbose else logging.DEBUG
+        frames: typing.List[_shell_framing.FramedCommand] = []
+        for cmd, mask in zip(cmds, masks):
+            self._log_command_execute(command=cmd, log_mask_re=mask, log_level=log_level, chroot_path=chroot_path)
+            frames.append(_shell_framing.FramedCommand(self._prepare_command(cmd=cmd, chroot_path=chroot_path)))
+        if not frames:
+            return []
+        script: bytes = b"".join(
+            frame.script(
+                open_stdout=open_stdout,
+                open_stderr=open_stderr,
+                stop_unless=prep_expected if stop_on_error else None,
+            )
+            for frame in frames
+        )
+
+        results: typing.Dict[typing.Tuple[str, int], exec_result.ExecResult] = {}
+        errors: typing.Dict[typing.Tuple[str, int], exec_result.ExecResult] = {}
+        raised_exceptions: typing.Dict[typing.Tuple[str, int], Exception] = {}
+        reader = _BatchReader(frames)
+        started: datetime.datetime = datetime.datetime.utcnow()
+
+        def make_result(idx: int) -> exec_result.ExecResult:
+            """Create result of command from received frame.
+
+            :param idx: command index
+            :type idx: int
+            :return: result with output, exit code is not set
+            :rtype: ExecResult
+            """
+            result = exec_result.ExecResult(cmd=keys[idx][0], started=started)
+            result.read_stdout(src=frames[idx].stdout_lines, log=self.logger, verbose=verbose)
+            result.read_stderr(src=frames[idx].stderr_lines, log=self.logger, verbose=verbose)
+            return result
+
+        def complete(exit_code: ExitCodeT) -> exec_result.ExecResult:
+            """Store result of the next command.
+
+            :param exit_code: command exit code
+            :type exit_code: typing.Union[int, proc_enums.ExitCodes]
+            :return: command result
+            :rtype: ExecResult
+            """
+            nonlocal started
+            result: exec_result.ExecResult = make_result(len(results))
+            result.exit_code = exit_code
+            self.logger.log(level=log_level, msg=f"Command {result.cmd!r} exit code: {result.exit_code!s}")
+            started = result.timestamp  # type: ignore
+            key: typing.Tuple[str, int] = keys[len(results)]
+            results[key] = result
+            if result.exit_code not in prep_expected:
+                errors[key] = result
+            return result
+
+        deadline: typing.Optional[float] = None if timeout is None else time.monotonic() + timeout
+        chan: paramiko.Channel = self._open_session()
+        try:
+            chan.exec_command("/bin/sh")
+            chan.sendall(script)
+            chan.shutdown_write()  # Shell exits after the last command
+            with selectors.DefaultSelector() as selector:
+                selector.register(chan, selectors.EVENT_READ)
+                while True:
+                    closed: bool = chan.eof_received or chan.closed  # Checked before read: no output lost
+                    while chan.recv_ready():
+                        reader.feed_stdout(chan.recv(constants.READ_CHUNK_SIZE))
+                    while chan.recv_stderr_ready():
+                        reader.feed_stderr(chan.recv_stderr(constants.READ_CHUNK_SIZE))
+                    while len(results) < reader.completed:
+                        complete(frames[len(results)].exit_code)  # type: ignore  # Complete frame has exit code
+                    if len(results) == len(frames) or (stop_on_error and errors):
+                        break
+                    if closed:  # Shell died: report its exit status as result of running command
+                        complete(chan.recv_exit_status())
+                        break
+                    remaining: typing.Optional[float] = _subprocess_helpers.remaining_time(deadline)
+                    if remaining == 0:
+                        timed_out: exec_result.ExecResult = make_result(len(results))
+                        timed_out.set_timestamp()
+                        self.logger.debug(_log_templates.CMD_WAIT_ERROR.format(result=timed_out, timeout=timeout))
+                        raised_exceptions[keys[len(results)]] = exceptions.ExecHelperTimeoutError(
+                            result=timed_out, timeout=timeout  # type: ignore
+                        )
+                        break
+                    selector.select(remaining)
+        finally:
+            self._close_session(chan)
+
+        self._raise_batch_errors(
+            keys,
+            raised_exceptions,
+            errors,
+            results,
+            expected=prep_expected,
+            raise_on_err=raise_on_err,
+            exception_class=exception_class,
+        )
+        return list(results.values())
+
+    @classmethod
+    def connect_many(
+        cls,
+        hosts: typing.Iterable[str],
+        *,
+        max_parallel: int = constants.SSH_START_WORKERS,
+        timeout: OptionalTimeoutT = None,
+        connect_timeout: OptionalTimeoutT = constants.DEFAULT_SSH_CONNECT_TIMEOUT,
+        connect_retries: typing.Optional[int] = None,
+        **kwargs: typing.Any,
+    ) -> typing.Tuple[typing.Dict[str, SSHClientBase], typing.Dict[str, Exception]]:
+        """Connect to multiple hosts concurrently.
+
+        :param hosts: remote hostnames (or ssh config host aliases)
+        :type hosts: typing.Iterable[str]
+        :param max_parallel: maximum amount of connections established at once
+        :type max_parallel: int
+        :param timeout: Timeout for connection to all hosts (not connected in time are reported by TimeoutError).
+        :type timeout: typing.Union[int, float, None]
+        :param connect_timeout: timeout for TCP connect, SSH banner and authentication of each host
+        :type connect_timeout: typing.Union[int, float, None]
+        :param connect_retries: connection retries of each host (None: no retries if `connect_timeout` is set)
+        :type connect_retries: typing.Optional[int]
+        :param kwargs: additional parameters for client constructor (auth, port, ssh_config, ...)
+        :type kwargs: typing.Any
+        :return: connected clients and connection errors by host
+        :rtype: typing.Tuple[typing.Dict[str, SSHClientBase], typing.Dict[str, Exception]]
+
+        .. versionadded:: 7.1.0
+        """
+        targets: typing.List[str] = list(dict.fromkeys(hosts))  # Use distinct hosts, keep order
+        if connect_retries is None:  # Connect timeout bounds connection time: retries would multiply it
+            connect_retries = constants.DEFAULT_SSH_CONNECT_RETRIES if connect_timeout is None else 0
+        clients: typing.Dict[str, SSHClientBase] = {}
+        errors: typing.Dict[str, Exception] = {}
+        if not targets:
+            return clients, errors
+
+        executor = executor_mod.HelperExecutor(
+            max_workers=min(max_parallel, len(targets)),
+            thread_name_prefix=f"{cls.__name__}.connect",
+        )
+        futures: typing.Dict[concurrent.futures.Future[SSHClientBase], str] = {
+            executor.submit(
+                functools.partial(cls, host, connect_timeout=connect_timeout, connect_retries=connect_retries, **kwargs)
+            ): host
+            for host in targets
+        }
+        try:
+            _, not_done = concurrent.futures.wait(futures, timeout=timeout)
+            for future in not_done:
+                future.cancel()
+                future.add_done_callback(_close_connected)
+        finally:
+            executor.shutdown(wait=False)
+
+        for future, host in futures.items():  # In order of hosts
+            if future in not_done:
+                errors[host] = TimeoutError(f"Connection to {host} is not established in {timeout}s")
+                continue
+            exc: typing.Optional[BaseException] = future.exception()
+            if exc is None:
+                clients[host] = future.result()
+            elif isinstance(exc, Exception):
+                errors[host] = exc
+            else:  # pragma: no cover
+                raise exc
+        return clients, errors
+
     def open(self, path: SupportPathT, mode: str = "r") -> paramiko.SFTPFile:
         """Open file on remote using SFTP session.
 
@@ -17,25 +17,477 @@
 from __future__ import annotations
 
 # Standard Library
+import collections
+import concurrent.futures
 import contextlib
+import io
+import itertools
+import os
 import platform
+import selectors
+import signal
+import socket
+import subprocess  # nosec  # Expected usage
+import sys
+import threading
+import time
+import types
 import typing
 
 # External Dependencies
 import psutil  # type: ignore
 
-__all__ = ("kill_proc_tree", "subprocess_kw")
+try:
+    # Standard Library
+    import resource
+except ImportError:  # pragma: no cover  # not POSIX
+    resource = None  # type: ignore
+
+# Package Implementation
+from exec_helpers import constants
+from exec_helpers import proc_enums
+from exec_helpers.exec_result import ResourceUsage
+
+# Local Implementation
+from . import _spawn_server
+from ._shell_framing import FramedCommand
+
+__all__ = (
+    "kill_proc_tree",
+    "kill_proc_group",
+    "wait_pid",
+    "open_pidfd",
+    "wait_process",
+    "poll_process",
+    "children_rusage",
+    "rusage_delta",
+    "selectable_pipes",
+    "remaining_time",
+    "LineBuffer",
+    "ChunkReader",
+    "StdinFeeder",
+    "environ_data",
+    "EnvCache",
+    "scheduling_preexec_fn",
+    "apply_scheduling",
+    "ShellWorker",
+    "SpawnedProcess",
+    "SpawnHelper",
+    "subprocess_kw",
+)
+
+_EnvT = typing.Optional[typing.Mapping[typing.Any, typing.Any]]
+
+# Real Popen class: mocked processes are handled by own methods only
+_POPEN = subprocess.Popen
+
+# Time to wait for process exit after SIGKILL
+_KILL_WAIT_TIMEOUT: float = 5
+
+
+def open_pidfd(pid: int) -> typing.Optional[int]:
+    """Open pidfd for process if supported by interpreter and kernel.
+
+    pidfd becomes readable on process exit and can be used in selectors together with pipes.
+
+    :param pid: PID of process
+    :type pid: int
+    :return: pidfd (should be closed by caller) or None if not supported
+    :rtype: typing.Optional[int]
+    :raises ProcessLookupError: process not exists
+
+    .. versionadded:: 7.1.0
+    """
+    pidfd_open: typing.Optional[typing.Callable[[int], int]] = getattr(os, "pidfd_open", None)
+    if pidfd_open is None:  # pragma: no cover
+        return None
+    try:
+        return pidfd_open(pid)
+    except ProcessLookupError:
+        raise
+    except OSError:  # pragma: no cover  # kernel without pidfd support
+        return None
+
+
+def wait_pid(pid: int, timeout: typing.Union[int, float, None]) -> bool:
+    """Wait for process exit without reaping it.
+
+    On Linux 5.3+ pidfd is used: calling thread sleeps in selector until process exit or timeout,
+    exit status stays available for `Popen.wait` / `Popen.poll`.
+    Otherwise psutil is used as fallback.
+
+    :param pid: PID of process to wait for
+    :type pid: int
+    :param timeout: maximum time to wait
+    :type timeout: typing.Union[int, float, None]
+    :return: process exited
+    :rtype: bool
+
+    .. versionadded:: 7.1.0
+    """
+    try:
+        pidfd: typing.Optional[int] = open_pidfd(pid)
+    except ProcessLookupError:
+        return True
+    if pidfd is not None:
+        try:
+            with selectors.DefaultSelector() as selector:
+                selector.register(pidfd, selectors.EVENT_READ)
+                return bool(selector.select(timeout))
+        finally:
+            os.close(pidfd)
+    try:  # pragma: no cover
+        _, alive = psutil.wait_procs((psutil.Process(pid),), timeout=timeout)
+    except psutil.NoSuchProcess:  # pragma: no cover
+        return True
+    return not alive  # pragma: no cover
+
+
+def _rusage_from_struct(usage: typing.Any) -> ResourceUsage:
+    """Convert resource.struct_rusage to ResourceUsage.
+
+    :param usage: resource usage returned by os.wait4 or resource.getrusage
+    :type usage: resource.struct_rusage
+    :return: resource usage with max RSS in KiB
+    :rtype: ResourceUsage
+    """
+    max_rss: int = usage.ru_maxrss
+    if platform.system() == "Darwin":  # pragma: no cover
+        max_rss //= 1024  # bytes on macOS
+    return ResourceUsage(
+        user_time=usage.ru_utime,
+        system_time=usage.ru_stime,
+        max_rss=max_rss,
+        block_input=usage.ru_inblock,
+        block_output=usage.ru_oublock,
+        voluntary_switches=usage.ru_nvcsw,
+        involuntary_switches=usage.ru_nivcsw,
+    )
+
+
+def _reap(
+    process: subprocess.Popen[bytes], options: int  # pylint: disable=unsubscriptable-object
+) -> typing.Tuple[typing.Optional[int], typing.Optional[ResourceUsage]]:
+    """Reap process using os.wait4 and set Popen.returncode.
+
+    :param process: process to reap
+    :type process: subprocess.Popen[bytes]
+    :param options: os.wait4 options
+    :type options: int
+    :return: exit code (None if process is still running) and resource usage
+    :rtype: typing.Tuple[typing.Optional[int], typing.Optional[ResourceUsage]]
+    """
+    try:
+        pid, status, usage = os.wait4(process.pid, options)  # type: ignore  # pylint: disable=no-member
+    except ChildProcessError:  # pragma: no cover  # reaped by somebody else
+        return process.wait(), None
+    if pid == 0:
+        return None, None
+    if os.WIFSIGNALED(status):
+        process.returncode = -os.WTERMSIG(status)
+    else:
+        process.returncode = os.WEXITSTATUS(status)
+    return process.returncode, _rusage_from_struct(usage)
+
+
+def _collects_rusage(process: subprocess.Popen[bytes]) -> bool:  # pylint: disable=unsubscriptable-object
+    """Check, that resource usage can be collected for process.
+
+    :param process: process
+    :type process: subprocess.Popen[bytes]
+    :return: process is not reaped yet and os.wait4 is supported
+    :rtype: bool
+    """
+    return hasattr(os, "wait4") and isinstance(process, _POPEN) and process.returncode is None
+
+
+def wait_process(
+    process: subprocess.Popen[bytes],  # pylint: disable=unsubscriptable-object
+    timeout: typing.Union[int, float, None],
+) -> typing.Tuple[int, typing.Optional[ResourceUsage]]:
+    """Wait for process exit and collect its resource usage.
+
+    Process is reaped by os.wait4, so resource usage of process and its reaped descendants is received.
+    Without os.wait4 support plain Popen.wait is used and resource usage is not available.
+
+    :param process: process to wait for
+    :type process: subprocess.Popen[bytes]
+    :param timeout: maximum time to wait
+    :type timeout: typing.Union[int, float, None]
+    :return: exit code and resource usage (if collected)
+    :rtype: typing.Tuple[int, typing.Optional[ResourceUsage]]
+    :raises subprocess.TimeoutExpired: process is not exited in time
+
+    .. versionadded:: 7.1.0
+    """
+    if isinstance(process, SpawnedProcess):
+        return process.wait(timeout=timeout), process.rusage
+    if not _collects_rusage(process):
+        return process.wait(timeout=timeout), None
+
+    deadline: typing.Optional[float] = time.monotonic() + timeout if timeout is not None else None
+    try:
+        pidfd: typing.Optional[int] = open_pidfd(process.pid)
+    except ProcessLookupError:  # pragma: no cover
+        pidfd = None
+    if pidfd is not None:
+        try:
+            with selectors.DefaultSelector() as selector:
+                selector.register(pidfd, selectors.EVENT_READ)
+                if not selector.select(timeout):
+                    raise subprocess.TimeoutExpired(process.args, timeout)  # type: ignore
+        finally:
+            os.close(pidfd)
+
+    delay: float = 0.0005
+    while True:
+        exit_code, usage = _reap(process, os.WNOHANG)  # pylint: disable=no-member
+        if exit_code is not None:
+            return exit_code, usage
+        remaining: typing.Optional[float] = remaining_time(deadline)  # pragma: no cover
+        if remaining is not None and remaining <= 0:  # pragma: no cover
+            raise subprocess.TimeoutExpired(process.args, timeout)  # type: ignore
+        time.sleep(delay if remaining is None else min(delay, remaining))  # pragma: no cover
+        delay = min(delay * 2, 0.05)  # pragma: no cover
+
+
+def poll_process(
+    process: subprocess.Popen[bytes],  # pylint: disable=unsubscriptable-object
+) -> typing.Tuple[typing.Optional[int], typing.Optional[ResourceUsage]]:
+    """Check for process exit and collect its resource usage.
+
+    :param process: process to check
+    :type process: subprocess.Popen[bytes]
+    :return: exit code (None if process is still running) and resource usage (if collected)
+    :rtype: typing.Tuple[typing.Optional[int], typing.Optional[ResourceUsage]]
+
+    .. versionadded:: 7.1.0
+    """
+    if isinstance(process, SpawnedProcess):
+        return process.poll(), process.rusage
+    if not _collects_rusage(process):
+        return process.poll(), None
+    return _reap(process, os.WNOHANG)  # pylint: disable=no-member
+
+
+def children_rusage() -> typing.Optional[ResourceUsage]:
+    """Get resource usage of all reaped children of current process.
+
+    :return: resource usage (None if not supported)
+    :rtype: typing.Optional[ResourceUsage]
+
+    .. versionadded:: 7.1.0
+    """
+    if resource is None:  # pragma: no cover
+        return None
+    return _rusage_from_struct(resource.getrusage(resource.RUSAGE_CHILDREN))
+
+
+def rusage_delta(
+    before: typing.Optional[ResourceUsage],
+    after: typing.Optional[ResourceUsage],
+) -> typing.Optional[ResourceUsage]:
+    """Get resource usage of children reaped between 2 snapshots made by `children_rusage`.
+
+    Children reaped concurrently (by other threads or tasks) are accounted too.
+    Maximum RSS is not accumulated by OS, so the maximum over all reaped children is reported.
+
+    :param before: snapshot before process start
+    :type before: typing.Optional[ResourceUsage]
+    :param after: snapshot after process reaped
+    :type after: typing.Optional[ResourceUsage]
+    :return: resource usage (None if not supported)
+    :rtype: typing.Optional[ResourceUsage]
+
+    .. versionadded:: 7.1.0
+    """
+    if before is None or after is None:
+        return None
+    return ResourceUsage(
+        user_time=after.user_time - before.user_time,
+        system_time=after.system_time - before.system_time,
+        max_rss=after.max_rss,
+        block_input=after.block_input - before.block_input,
+        block_output=after.block_output - before.block_output,
+        voluntary_switches=after.voluntary_switches - before.voluntary_switches,
+        involuntary_switches=after.involuntary_switches - before.involuntary_switches,
+    )
+
+
+def kill_proc_group(pid: int, *, grace_period: typing.Union[int, float] = constants.DEFAULT_KILL_GRACE_PERIOD) -> bool:
+    """Kill process group led by process.
+
+    SIGTERM is sent to the whole group, after exit of all group members or grace period SIGKILL is sent to the group
+    to stop processes ignoring SIGTERM.
+
+    :param pid: PID of process group leader
+    :type pid: int
+    :param grace_period: time between SIGTERM and SIGKILL
+    :type grace_period: typing.Union[int, float]
+    :return: process group was handled. False if process is not leader of own group or group signals are not supported.
+    :rtype: bool
+
+    .. versionadded:: 7.1.0
+    """
+    return _kill_proc_group(pid, _descendants(pid), grace_period=grace_period)
+
+
+def _kill_proc_group(
+    pid: int,
+    descendants: typing.Iterable[psutil.Process],
+    grace_period: typing.Union[int, float] = constants.DEFAULT_KILL_GRACE_PERIOD,
+) -> bool:
+    """Kill process group led by process: grace period is given to all group members.
+
+    :param pid: PID of process group leader
+    :type pid: int
+    :param descendants: snapshot of leader descendants taken before group signals (members of group are waited for)
+    :type descendants: typing.Iterable[psutil.Process]
+    :param grace_period: time between SIGTERM and SIGKILL
+    :type grace_period: typing.Union[int, float]
+    :return: process group was handled. False if process is not leader of own group or group signals are not supported.
+    :rtype: bool
+    """
+    if not hasattr(os, "killpg"):  # pragma: no cover
+        return False
+    try:
+        if os.getpgid(pid) != pid:
+            return False  # Process escaped own group: group signal will reach foreign processes
+        members: typing.List[psutil.Process] = _group_members(descendants, pgid=pid)
+        os.killpg(pid, signal.SIGTERM)  # SIGTERM to allow cleanup
+    except ProcessLookupError:
+        return True
+    except PermissionError:  # pragma: no cover
+        return False
+
+    deadline: float = time.monotonic() + grace_period
+    wait_pid(pid, timeout=grace_period)  # Leader is waited without reaping: exit status is kept for the caller
+    _wait_exit(members, deadline)
+    with contextlib.suppress(ProcessLookupError):
+        os.killpg(pid, signal.SIGKILL)  # 2nd shot: SIGKILL for the leader and survived group members
+    wait_pid(pid, timeout=_KILL_WAIT_TIMEOUT)
+    return True
+
+
+def _descendants(pid: int) -> typing.List[psutil.Process]:
+    """Get snapshot of process descendants.
+
+    :param pid: PID of parent process
+    :type pid: int
+    :return: descendants (empty list if process is not found)
+    :rtype: typing.List[psutil.Process]
+    """
+    try:
+        return psutil.Process(pid).children(recursive=True)
+    except psutil.Error:  # pragma: no cover
+        return []
+
+
+def _stop_processes(
+    procs: typing.Iterable[psutil.Process],
+    grace_period: typing.Union[int, float] = constants.DEFAULT_KILL_GRACE_PERIOD,
+) -> None:
+    """Stop processes: SIGTERM, after grace period SIGKILL for survived ones.
+
+    :param procs: processes to stop
+    :type procs: typing.Iterable[psutil.Process]
+    :param grace_period: time between SIGTERM and SIGKILL
+    :type grace_period: typing.Union[int, float]
+    """
+    targets: typing.List[psutil.Process] = list(procs)
+    for proc in targets:
+        with contextlib.suppress(psutil.NoSuchProcess):
+            proc.terminate()  # SIGTERM to allow cleanup
+    _, alive = psutil.wait_procs(targets, timeout=grace_period)
+    for proc in alive:
+        with contextlib.suppress(psutil.NoSuchProcess):
+            proc.kill()  # 2nd shot: SIGKILL
+
+
+def _is_alive(proc: psutil.Process) -> bool:
+    """Check, that process is running (zombie is not: it waits only to be reaped by parent).
+
+    :param proc: process to check
+    :type proc: psutil.Process
+    :return: process is running
+    :rtype: bool
+    """
+    try:
+        return bool(proc.is_running() and proc.status() != psutil.STATUS_ZOMBIE)
+    except psutil.Error:
+        return False
+
+
+def _wait_exit(procs: typing.Iterable[psutil.Process], deadline: float) -> None:
+    """Wait for exit of processes, which are not children of current one (they could not be waited by pidfd).
+
+    :param procs: processes to wait for
+    :type procs: typing.Iterable[psutil.Process]
+    :param deadline: time.monotonic() value to stop waiting at
+    :type deadline: float
+    """
+    alive: typing.List[psutil.Process] = list(procs)
+    delay: float = 0.001
+    while True:
+        alive = [proc for proc in alive if _is_alive(proc)]
+        remaining: typing.Optional[float] = remaining_time(deadline)
+        if not alive or not remaining:
+            return
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 0.05)
+
+
+def _group_members(procs: typing.Iterable[psutil.Process], pgid: int) -> typing.List[psutil.Process]:
+    """Filter running processes, which are members of process group.
+
+    :param procs: processes to check
+    :type procs: typing.Iterable[psutil.Process]
+    :param pgid: process group ID
+    :type pgid: int
+    :return: running processes from group
+    :rtype: typing.List[psutil.Process]
+    """
+    members: typing.List[psutil.Process] = []
+    for proc in procs:
+        with contextlib.suppress(ProcessLookupError):
+            if _is_alive(proc) and os.getpgid(proc.pid) == pgid:
+                members.append(proc)
+    return members
+
+
+def _escaped(procs: typing.Iterable[psutil.Process], pgid: int) -> typing.List[psutil.Process]:
+    """Filter running processes, which are not members of process group (called setsid/setpgid).
+
+    :param procs: processes to check
+    :type procs: typing.Iterable[psutil.Process]
+    :param pgid: process group ID
+    :type pgid: int
+    :return: running processes from other groups
+    :rtype: typing.List[psutil.Process]
+    """
+    escaped: typing.List[psutil.Process] = []
+    for proc in procs:
+        with contextlib.suppress(ProcessLookupError):
+            if _is_alive(proc) and os.getpgid(proc.pid) != pgid:
+                escaped.append(proc)
+    return escaped
 
 
 # Adopt from:
 # https://stackoverflow.com/questions/1230669/subprocess-deleting-child-processes-in-windows
-def kill_proc_tree(pid: int, including_parent: bool = True) -> None:  # pragma: no cover
-    """Kill process tree.
+def _kill_proc_tree_psutil(
+    pid: int,
+    including_parent: bool = True,
+    grace_period: typing.Union[int, float] = constants.DEFAULT_KILL_GRACE_PERIOD,
+) -> None:  # pragma: no cover
+    """Kill process tree using psutil tree walk.
 
     :param pid: PID of parent process to kill
     :type pid: int
     :param including_parent: kill also parent process
     :type including_parent: bool
+    :param grace_period: time between SIGTERM and SIGKILL
+    :type grace_period: typing.Union[int, float]
     """
 
     def safe_stop(proc: psutil.Process, kill: bool = False) -> None:
@@ -52,19 +504,999 @@ def kill_proc_tree(pid: int, including_parent: bool = True) -> None:  # pragma:
             proc.terminate()
 
     parent = psutil.Process(pid)
-    children: typing.List[psutil.Process] = parent.children(recursive=True)
-    child: psutil.Process
-    for child in children:
-        safe_stop(child)  # SIGTERM to allow cleanup
-    _, alive = psutil.wait_procs(children, timeout=1)
-    for child in alive:
-        safe_stop(child, kill=True)  # 2nd shot: SIGKILL
+    _stop_processes(parent.children(recursive=True), grace_period=grace_period)
     if including_parent:
         safe_stop(parent)  # SIGTERM to allow cleanup
-        _, alive = psutil.wait_procs((parent,), timeout=1)
-        if alive:
+        if not wait_pid(pid, timeout=grace_period):
             safe_stop(parent, kill=True)  # 2nd shot: SIGKILL
-        parent.wait(5)
+        wait_pid(pid, timeout=_KILL_WAIT_TIMEOUT)
+
+
+def kill_proc_tree(
+    pid: int,
+    including_parent: bool = True,
+    *,
+    grace_period: typing.Union[int, float] = constants.DEFAULT_KILL_GRACE_PERIOD,
+) -> None:
+    """Kill process tree.
+
+    Processes are started as leaders of new session, so the whole tree is stopped by process group signals.
+    Descendants, which moved to other process groups (setsid/setpgid), are found by tree snapshot taken before
+    group signals and stopped separately with the same grace period.
+    psutil tree walk is used as fallback: if process escaped own group or group signals are not supported.
+
+    :param pid: PID of parent process to kill
+    :type pid: int
+    :param including_parent: kill also parent process
+    :type including_parent: bool
+    :param grace_period: time between SIGTERM and SIGKILL
+    :type grace_period: typing.Union[int, float]
+
+    .. versionchanged:: 7.1.0 process group signals instead of psutil tree walk, configurable grace period
+    """
+    if including_parent:
+        descendants: typing.List[psutil.Process] = _descendants(pid)
+        if _kill_proc_group(pid, descendants, grace_period=grace_period):
+            _stop_processes(_escaped(descendants, pgid=pid), grace_period=grace_period)
+            return
+    _kill_proc_tree_psutil(pid, including_parent=including_parent, grace_period=grace_period)
+
+
+def selectable_pipes(*streams: typing.Optional[typing.IO[bytes]]) -> bool:
+    """Check, that process streams are OS pipes, which could be polled by selector from the single thread.
+
+    :param streams: process streams (None for not opened)
+    :type streams: typing.Optional[typing.IO[bytes]]
+    :return: at least one stream is opened and all opened streams are real files on POSIX system
+    :rtype: bool
+
+    .. versionadded:: 7.1.0
+    """
+    opened = [stream for stream in streams if stream is not None]
+    return os.name == "posix" and bool(opened) and all(isinstance(stream, io.IOBase) for stream in opened)
+
+
+def remaining_time(deadline: typing.Optional[float]) -> typing.Optional[float]:
+    """Get time remaining to deadline.
+
+    :param deadline: time.monotonic() value or None for infinite wait
+    :type deadline: typing.Optional[float]
+    :return: time to deadline (not negative) or None
+    :rtype: typing.Optional[float]
+
+    .. versionadded:: 7.1.0
+    """
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0)
+
+
+def environ_data() -> typing.Mapping[typing.Any, typing.Any]:
+    """Get current process environment for comparison (without keys and values decoding if possible).
+
+    :return: current process environment (live mapping: copy it to keep snapshot)
+    :rtype: typing.Mapping[typing.Any, typing.Any]
+
+    .. versionadded:: 7.1.0
+    """
+    return getattr(os.environ, "_data", os.environ)
+
+
+class EnvCache:
+    """Cache of environments for new processes.
+
+    Merged environment is built once per `(env, env_patch)` combination and reused as read-only mapping.
+    Environments based on `os.environ` are rebuilt after `os.environ` change.
+
+    .. versionadded:: 7.1.0
+    """
+
+    __slots__ = ("__lock", "__cache", "__environ", "__environ_key", "__max_size")
+
+    def __init__(self, max_size: int = 64) -> None:
+        """Cache of environments for new processes.
+
+        :param max_size: maximum amount of cached environments
+        :type max_size: int
+        """
+        self.__lock = threading.Lock()
+        self.__cache: typing.OrderedDict[typing.Any, typing.Mapping[typing.Any, typing.Any]] = collections.OrderedDict()
+        self.__environ: typing.Optional[typing.Dict[typing.Any, typing.Any]] = None
+        self.__environ_key: typing.FrozenSet[typing.Tuple[typing.Any, typing.Any]] = frozenset()
+        self.__max_size: int = max_size
+
+    def __sync_environ(self) -> None:
+        """Compare `os.environ` with snapshot, drop environments based on it if changed (lock should be acquired)."""
+        environ: typing.Mapping[typing.Any, typing.Any] = environ_data()
+        if environ == self.__environ:
+            return
+        for cached_key in [cached_key for cached_key in self.__cache if cached_key[0] is None]:
+            del self.__cache[cached_key]
+        self.__environ = dict(environ)
+        self.__environ_key = frozenset(self.__environ.items())
+
+    @staticmethod
+    def merge(env: _EnvT, env_patch: _EnvT) -> _EnvT:
+        """Build environment for the new process without cache.
+
+        :param env: Defines the environment variables for the new process.
+        :type env: typing.Optional[typing.Mapping[typing.Union[str, bytes], typing.Union[str, bytes]]]
+        :param env_patch: Defines the environment variables to ADD for the new process.
+        :type env_patch: typing.Optional[typing.Mapping[typing.Union[str, bytes], typing.Union[str, bytes]]]
+        :return: environment for the new process (None: inherit current)
+        :rtype: typing.Optional[typing.Mapping[typing.Union[str, bytes], typing.Union[str, bytes]]]
+        """
+        if env_patch is None:
+            return env
+        new_env: typing.Dict[typing.Any, typing.Any] = dict(os.environ if env is None else env)
+        new_env.update(env_patch)
+        return new_env
+
+    def get(self, env: _EnvT, env_patch: _EnvT) -> _EnvT:
+        """Get environment for the new process.
+
+        :param env: Defines the environment variables for the new process.
+        :type env: typing.Optional[typing.Mapping[typing.Union[str, bytes], typing.Union[str, bytes]]]
+        :param env_patch: Defines the environment variables to ADD for the new process.
+        :type env_patch: typing.Optional[typing.Mapping[typing.Union[str, bytes], typing.Union[str, bytes]]]
+        :return: environment for the new process (None: inherit current)
+        :rtype: typing.Optional[typing.Mapping[typing.Union[str, bytes], typing.Union[str, bytes]]]
+        """
+        if env_patch is None:
+            return env
+        try:
+            key = (None if env is None else frozenset(env.items()), frozenset(env_patch.items()))
+        except TypeError:  # Unhashable values: could not be cached
+            return self.merge(env, env_patch)
+
+        with self.__lock:
+            if env is None:
+                self.__sync_environ()
+            cached: typing.Optional[typing.Mapping[typing.Any, typing.Any]] = self.__cache.get(key, None)
+            if cached is not None:
+                self.__cache.move_to_end(key)
+                return cached
+            new_env: typing.Mapping[typing.Any, typing.Any] = types.MappingProxyType(
+                self.merge(env, env_patch)  # type: ignore
+            )
+            self.__cache[key] = new_env
+            if len(self.__cache) > self.__max_size:
+                self.__cache.popitem(last=False)
+            return new_env
+
+    def environ_snapshot(self) -> typing.FrozenSet[typing.Tuple[typing.Any, typing.Any]]:
+        """Get current process environment as hashable snapshot.
+
+        :return: environment items (the same object is returned until `os.environ` change)
+        :rtype: typing.FrozenSet[typing.Tuple[typing.Any, typing.Any]]
+        """
+        with self.__lock:
+            self.__sync_environ()
+            return self.__environ_key
+
+    def clear(self) -> None:
+        """Drop all cached environments."""
+        with self.__lock:
+            self.__cache.clear()
+            self.__environ = None
+
+    def __len__(self) -> int:
+        """Amount of cached environments.
+
+        :return: amount of cached environments
+        :rtype: int
+        """
+        return len(self.__cache)
+
+
+class LineBuffer:
+    """Split raw chunks read from pipe to lines (line ends are kept, as on iteration over file).
+
+    .. versionadded:: 7.1.0
+    """
+
+    __slots__ = ("lines", "__tail")
+
+    def __init__(self) -> None:
+        """Split raw chunks read from pipe to lines."""
+        self.lines: typing.List[bytes] = []
+        self.__tail = bytearray()
+
+    def feed(self, chunk: bytes) -> typing.List[bytes]:
+        """Add chunk and get completed lines.
+
+        :param chunk: data read from pipe
+        :type chunk: bytes
+        :return: lines completed by chunk
+        :rtype: typing.List[bytes]
+        """
+        end: int = chunk.rfind(b"\n") + 1
+        if not end:
+            self.__tail += chunk
+            return []
+        self.__tail += chunk[:end]
+        lines: typing.List[bytes] = list(io.BytesIO(self.__tail))
+        self.__tail = bytearray(chunk[end:])
+        self.lines.extend(lines)
+        return lines
+
+    def flush(self) -> typing.List[bytes]:
+        """Get not terminated last line (EOF reached).
+
+        :return: last line if available
+        :rtype: typing.List[bytes]
+        """
+        if not self.__tail:
+            return []
+        lines: typing.List[bytes] = [bytes(self.__tail)]
+        self.__tail = bytearray()
+        self.lines.extend(lines)
+        return lines
+
+
+class ChunkReader:
+    """Read pipe by fixed size chunks into preallocated buffer without splitting to lines.
+
+    .. versionadded:: 7.1.0
+    """
+
+    __slots__ = ("__append", "__buffer")
+
+    def __init__(
+        self, append: typing.Callable[[memoryview], None], chunk_size: int = constants.READ_CHUNK_SIZE
+    ) -> None:
+        """Read pipe by fixed size chunks into preallocated buffer without splitting to lines.
+
+        :param append: target for data read
+        :type append: typing.Callable[[memoryview], None]
+        :param chunk_size: maximum size of data read at once
+        :type chunk_size: int
+        """
+        self.__append: typing.Callable[[memoryview], None] = append
+        self.__buffer: memoryview = memoryview(bytearray(chunk_size))
+
+    def read(self, fd: int) -> memoryview:
+        """Read available data and pass it to the target.
+
+        :param fd: pipe file descriptor (ready for read)
+        :type fd: int
+        :return: data read (valid until next read, empty on EOF)
+        :rtype: memoryview
+        """
+        size: int = os.readv(fd, (self.__buffer,))
+        chunk: memoryview = self.__buffer[:size]
+        if size:
+            self.__append(chunk)
+        return chunk
+
+
+class StdinFeeder:
+    """Non-blocking writer of data to the STDIN pipe by chunks.
+
+    Data is written when pipe is ready for write (selector), so process output is read concurrently
+    and process writing output before reading all input does not block both sides.
+
+    .. versionadded:: 7.1.0
+    """
+
+    __slots__ = ("__stream", "__data", "__offset", "__chunk_size")
+
+    def __init__(
+        self,
+        stream: typing.IO[bytes],
+        data: bytes,
+        chunk_size: int = constants.READ_CHUNK_SIZE,
+    ) -> None:
+        """Non-blocking writer of data to the STDIN pipe by chunks.
+
+        :param stream: STDIN pipe (switched to the non-blocking mode)
+        :type stream: typing.IO[bytes]
+        :param data: data to write
+        :type data: bytes
+        :param chunk_size: maximum size of single write
+        :type chunk_size: int
+        """
+        self.__stream: typing.IO[bytes] = stream
+        self.__data: memoryview = memoryview(data)
+        self.__offset: int = 0
+        self.__chunk_size: int = chunk_size
+        os.set_blocking(stream.fileno(), False)
+
+    @property
+    def stream(self) -> typing.IO[bytes]:
+        """STDIN pipe.
+
+        :rtype: typing.IO[bytes]
+        """
+        return self.__stream
+
+    @property
+    def done(self) -> bool:
+        """All data is written.
+
+        :rtype: bool
+        """
+        return self.__offset >= len(self.__data)
+
+    def write(self) -> bool:
+        """Write next chunk (pipe should be ready for write).
+
+        :return: all data is written
+        :rtype: bool
+        :raises OSError: pipe is closed by reader
+        """
+        with contextlib.suppress(BlockingIOError):
+            self.__offset += os.write(
+                self.__stream.fileno(), self.__data[self.__offset : self.__offset + self.__chunk_size]
+            )
+        return self.done
+
+    def close(self) -> None:
+        """Close pipe: process receives EOF."""
+        with contextlib.suppress(OSError):
+            self.__stream.close()
+
+
+class ShellWorker:
+    """Persistent POSIX shell executing framed commands one by one.
+
+    Shell is started on first usage and restarted if it died or `os.environ` changed since start
+    (shell environment is inherited on start only).
+    On timeout only running command (children of shell) is killed.
+
+    .. versionadded:: 7.1.0
+    """
+
+    __slots__ = ("__lock", "__process", "__environ")
+
+    def __init__(self) -> None:
+        """Persistent POSIX shell executing framed commands one by one."""
+        self.__lock = threading.Lock()
+        self.__process: typing.Optional[subprocess.Popen[bytes]] = None  # pylint: disable=unsubscriptable-object
+        self.__environ: typing.Dict[typing.Any, typing.Any] = {}
+
+    @property
+    def lock(self) -> threading.Lock:
+        """Lock for exclusive usage: shell executes only one command at a time.
+
+        :return: worker lock
+        :rtype: threading.Lock
+        """
+        return self.__lock
+
+    @property
+    def pid(self) -> typing.Optional[int]:
+        """PID of shell process.
+
+        :return: PID if shell is started
+        :rtype: typing.Optional[int]
+        """
+        return None if self.__process is None else self.__process.pid
+
+    def __start(self) -> subprocess.Popen[bytes]:  # pylint: disable=unsubscriptable-object
+        """Get running shell, start new one if required.
+
+        :return: shell process
+        :rtype: subprocess.Popen[bytes]
+        """
+        environ: typing.Mapping[typing.Any, typing.Any] = environ_data()
+        if self.__process is not None and self.__process.poll() is None and environ == self.__environ:
+            return self.__process
+        self.close()
+        self.__environ = dict(environ)  # Snapshot before start: change during start causes restart on next call
+        self.__process = subprocess.Popen(  # nosec  # Expected usage
+            args=["/bin/sh"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=False,
+            **subprocess_kw,
+        )
+        return self.__process
+
+    @staticmethod
+    def __read(
+        process: subprocess.Popen[bytes],  # pylint: disable=unsubscriptable-object
+        frame: FramedCommand,
+        deadline: typing.Optional[float],
+    ) -> typing.Optional[bool]:
+        """Read command output from shell.
+
+        :param process: shell process
+        :type process: subprocess.Popen[bytes]
+        :param frame: executed command
+        :type frame: FramedCommand
+        :param deadline: time.monotonic() value to stop reading at
+        :type deadline: typing.Optional[float]
+        :return: True if output is complete, False on timeout, None if shell closed output (died)
+        :rtype: typing.Optional[bool]
+        """
+        with selectors.DefaultSelector() as selector:
+            selector.register(process.stdout, selectors.EVENT_READ, frame.feed_stdout)  # type: ignore
+            selector.register(process.stderr, selectors.EVENT_READ, frame.feed_stderr)  # type: ignore
+            while not frame.done:
+                remaining: typing.Optional[float] = remaining_time(deadline)
+                if remaining == 0:
+                    return False
+                for key, _ in selector.select(remaining):
+                    chunk: bytes = os.read(key.fd, 65536)
+                    if not chunk:
+                        return None
+                    if key.data(chunk):
+                        selector.unregister(key.fileobj)
+        return True
+
+    @staticmethod
+    def __signal_children(pid: int, sig: int) -> None:
+        """Send signal to all children of process.
+
+        :param pid: parent process PID
+        :type pid: int
+        :param sig: signal to send
+        :type sig: int
+        """
+        with contextlib.suppress(psutil.NoSuchProcess):
+            for child in psutil.Process(pid).children(recursive=True):
+                with contextlib.suppress(psutil.NoSuchProcess):
+                    child.send_signal(sig)
+
+    def run(
+        self,
+        frame: FramedCommand,
+        script: bytes,
+        timeout: typing.Union[int, float, None],
+        *,
+        grace_period: typing.Union[int, float] = constants.DEFAULT_KILL_GRACE_PERIOD,
+    ) -> typing.Tuple[typing.Optional[int], bool]:
+        """Execute framed command.
+
+        Caller should hold lock.
+
+        :param frame: command to execute
+        :type frame: FramedCommand
+        :param script: framed command script
+        :type script: bytes
+        :param timeout: timeout for command execution
+        :type timeout: typing.Union[int, float, None]
+        :param grace_period: time between SIGTERM and SIGKILL on timeout
+        :type grace_period: typing.Union[int, float]
+        :return: exit code (None if command was not stopped) and timeout flag
+        :rtype: typing.Tuple[typing.Optional[int], bool]
+        """
+        process: subprocess.Popen[bytes] = self.__start()  # pylint: disable=unsubscriptable-object
+        try:
+            process.stdin.write(script)  # type: ignore
+            process.stdin.flush()  # type: ignore
+        except OSError:  # Shell died after previous command
+            self.close()
+            process = self.__start()
+            process.stdin.write(script)  # type: ignore
+            process.stdin.flush()  # type: ignore
+
+        state: typing.Optional[bool] = self.__read(
+            process, frame, None if timeout is None else time.monotonic() + timeout
+        )
+        timed_out: bool = state is False
+        if timed_out:  # Stop command only (children of shell), shell reports exit code as usual
+            self.__signal_children(process.pid, signal.SIGTERM)
+            state = self.__read(process, frame, time.monotonic() + grace_period)
+            if state is False:
+                self.__signal_children(process.pid, signal.SIGKILL)
+                state = self.__read(process, frame, time.monotonic() + _KILL_WAIT_TIMEOUT)
+            if state is False:  # Shell is stuck
+                kill_proc_tree(process.pid, grace_period=grace_period)
+                state = None
+
+        if state is None:  # Shell died
+            with contextlib.suppress(subprocess.TimeoutExpired):
+                process.wait(timeout=_KILL_WAIT_TIMEOUT)
+            exit_code: typing.Optional[int] = process.poll()
+            self.close()
+            return exit_code, timed_out
+
+        exit_code = frame.exit_code
+        if timed_out and exit_code is not None and exit_code > 128:
+            exit_code = 128 - exit_code  # Killed by signal: report as subprocess does
+        return exit_code, timed_out
+
+    def close(self) -> None:
+        """Stop shell if started."""
+        process, self.__process = self.__process, None
+        if process is None:
+            return
+        if process.poll() is None:
+            with contextlib.suppress(OSError):
+                process.stdin.close()  # type: ignore  # Shell exits on EOF
+            try:
+                process.wait(timeout=_KILL_WAIT_TIMEOUT)
+            except subprocess.TimeoutExpired:  # pragma: no cover
+                kill_proc_tree(process.pid)
+                process.wait(timeout=_KILL_WAIT_TIMEOUT)
+        for stream in (process.stdin, process.stdout, process.stderr):
+            if stream is not None and not stream.closed:
+                with contextlib.suppress(OSError):
+                    stream.close()
+
+
+class SpawnedProcess:
+    """Process spawned by spawn helper with `subprocess.Popen` compatible control interface.
+
+    Helper is the parent of process: exit status and resource usage are received from it.
+
+    .. versionadded:: 7.1.0
+    """
+
+    __slots__ = ("__args", "__pid", "__stdin", "__stdout", "__stderr", "__returncode", "__rusage", "__lost", "__event")
+
+    def __init__(
+        self,
+        args: typing.Any,
+        pid: int,
+        stdin: typing.Optional[typing.IO[bytes]],
+        stdout: typing.Optional[typing.IO[bytes]],
+        stderr: typing.Optional[typing.IO[bytes]],
+    ) -> None:
+        """Process spawned by spawn helper.
+
+        :param args: command
+        :type args: typing.Any
+        :param pid: PID of process
+        :type pid: int
+        :param stdin: STDIN pipe
+        :type stdin: typing.Optional[typing.IO[bytes]]
+        :param stdout: STDOUT pipe
+        :type stdout: typing.Optional[typing.IO[bytes]]
+        :param stderr: STDERR pipe
+        :type stderr: typing.Optional[typing.IO[bytes]]
+        """
+        self.__args: typing.Any = args
+        self.__pid: int = pid
+        self.__stdin: typing.Optional[typing.IO[bytes]] = stdin
+        self.__stdout: typing.Optional[typing.IO[bytes]] = stdout
+        self.__stderr: typing.Optional[typing.IO[bytes]] = stderr
+        self.__returncode: typing.Optional[int] = None
+        self.__rusage: typing.Optional[ResourceUsage] = None
+        self.__lost: bool = False
+        self.__event = threading.Event()  # Exit status received or helper died
+
+    @property
+    def args(self) -> typing.Any:
+        """Command.
+
+        :rtype: typing.Any
+        """
+        return self.__args
+
+    @property
+    def pid(self) -> int:
+        """PID of process.
+
+        :rtype: int
+        """
+        return self.__pid
+
+    @property
+    def stdin(self) -> typing.Optional[typing.IO[bytes]]:
+        """STDIN pipe.
+
+        :rtype: typing.Optional[typing.IO[bytes]]
+        """
+        return self.__stdin
+
+    @property
+    def stdout(self) -> typing.Optional[typing.IO[bytes]]:
+        """STDOUT pipe.
+
+        :rtype: typing.Optional[typing.IO[bytes]]
+        """
+        return self.__stdout
+
+    @property
+    def stderr(self) -> typing.Optional[typing.IO[bytes]]:
+        """STDERR pipe.
+
+        :rtype: typing.Optional[typing.IO[bytes]]
+        """
+        return self.__stderr
+
+    @property
+    def returncode(self) -> typing.Optional[int]:
+        """Exit code (negative: killed by signal), None while process is running.
+
+        If helper died before process exit, exit code is unknown and set to `proc_enums.INVALID`.
+
+        :rtype: typing.Optional[int]
+        """
+        return self.__returncode
+
+    @property
+    def rusage(self) -> typing.Optional[ResourceUsage]:
+        """Resource usage of exited process.
+
+        :rtype: typing.Optional[ResourceUsage]
+        """
+        return self.__rusage
+
+    def set_exit(self, returncode: int, rusage: typing.Optional[ResourceUsage]) -> None:
+        """Store exit status reported by helper.
+
+        :param returncode: exit code (negative: killed by signal)
+        :type returncode: int
+        :param rusage: resource usage
+        :type rusage: typing.Optional[ResourceUsage]
+        """
+        self.__rusage = rusage
+        self.__returncode = returncode
+        self.__event.set()
+
+    def set_lost(self) -> None:
+        """Helper died: process exit is detected by PID, exit status is not available."""
+        self.__lost = True
+        self.__event.set()
+
+    def __check_lost(self, timeout: typing.Union[int, float, None]) -> None:
+        """Wait for exit of process not tracked by helper anymore.
+
+        :param timeout: maximum time to wait
+        :type timeout: typing.Union[int, float, None]
+        """
+        if self.__returncode is None and self.__lost and wait_pid(self.__pid, timeout):
+            self.__returncode = int(proc_enums.INVALID)
+
+    def poll(self) -> typing.Optional[int]:
+        """Check for process exit.
+
+        :return: exit code if process exited
+        :rtype: typing.Optional[int]
+        """
+        if not self.__event.is_set() and wait_pid(self.__pid, 0):  # Exited: exit status report is on the way
+            self.__event.wait(_KILL_WAIT_TIMEOUT)
+        self.__check_lost(0)
+        return self.__returncode
+
+    def wait(self, timeout: typing.Union[int, float, None] = None) -> int:
+        """Wait for process exit.
+
+        :param timeout: maximum time to wait
+        :type timeout: typing.Union[int, float, None]
+        :return: exit code
+        :rtype: int
+        :raises TimeoutExpired: process is not exited in time
+        """
+        deadline: typing.Optional[float] = None if timeout is None else time.monotonic() + timeout
+        self.__event.wait(timeout)
+        self.__check_lost(remaining_time(deadline))
+        if self.__returncode is None:
+            raise subprocess.TimeoutExpired(self.__args, timeout)  # type: ignore
+        return self.__returncode
+
+    def send_signal(self, sig: int) -> None:
+        """Send signal to process if it is running.
+
+        :param sig: signal
+        :type sig: int
+        """
+        if self.__returncode is None:
+            with contextlib.suppress(ProcessLookupError):
+                os.kill(self.__pid, sig)
+
+    def terminate(self) -> None:
+        """Send SIGTERM to process."""
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self) -> None:
+        """Send SIGKILL to process."""
+        self.send_signal(signal.SIGKILL)
+
+    def __repr__(self) -> str:
+        """Debug string.
+
+        :return: repr for debug purposes
+        :rtype: str
+        """
+        return f"<{self.__class__.__name__}: returncode: {self.returncode} args: {self.args!r}>"
+
+
+class _SpawnRequest(typing.NamedTuple):
+    """Spawn request waiting for reply."""
+
+    future: concurrent.futures.Future[SpawnedProcess]  # pylint: disable=unsubscriptable-object
+    command: str
+    open_stdout: bool
+    open_stderr: bool
+
+
+class SpawnHelper:
+    """Small pre-started process spawning commands on request (fork server).
+
+    Commands are forked by helper, so spawn latency does not depend on size and thread count of current process.
+    Pipes are passed back via UNIX socket (`SCM_RIGHTS`), exit status and resource usage are reported by helper.
+    Helper is started on first usage and restarted if it died.
+
+    .. versionadded:: 7.1.0
+    """
+
+    __slots__ = ("__lock", "__process", "__socket", "__requests", "__processes", "__request_ids")
+
+    def __init__(self) -> None:
+        """Small pre-started process spawning commands on request.
+
+        :raises NotImplementedError: UNIX sockets are not available
+        """
+        if platform.system() == "Windows":  # pragma: no cover
+            raise NotImplementedError("Spawn helper is supported only on POSIX")
+        self.__lock = threading.Lock()
+        self.__process: typing.Optional[subprocess.Popen[bytes]] = None  # pylint: disable=unsubscriptable-object
+        self.__socket: typing.Optional[socket.socket] = None
+        self.__requests: typing.Dict[int, _SpawnRequest] = {}
+        self.__processes: typing.Dict[int, SpawnedProcess] = {}
+        self.__request_ids: typing.Iterator[int] = itertools.count()
+
+    @property
+    def pid(self) -> typing.Optional[int]:
+        """PID of helper process.
+
+        :return: PID if helper is started
+        :rtype: typing.Optional[int]
+        """
+        return None if self.__process is None else self.__process.pid
+
+    def __start(self) -> socket.socket:
+        """Get connection to running helper, start new one if required (lock should be acquired).
+
+        :return: connection to helper
+        :rtype: socket.socket
+        """
+        if self.__socket is not None:
+            return self.__socket
+        if self.__process is not None:
+            self.__process.poll()  # Reap died helper
+        sock, helper_sock = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        with helper_sock:
+            self.__process = subprocess.Popen(  # nosec  # Expected usage
+                args=[sys.executable, "-I", _spawn_server.__file__, str(helper_sock.fileno())],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                pass_fds=(helper_sock.fileno(),),
+                **subprocess_kw,
+            )
+        self.__socket = sock
+        self.__requests = {}
+        self.__processes = {}
+        threading.Thread(
+            target=self.__read,
+            args=(sock, self.__requests, self.__processes),
+            name=f"SpawnHelper-{self.__process.pid}",
+            daemon=True,
+        ).start()
+        return sock
+
+    def __read(
+        self,
+        sock: socket.socket,
+        requests: typing.Dict[int, _SpawnRequest],
+        processes: typing.Dict[int, SpawnedProcess],
+    ) -> None:
+        """Process helper replies until connection close.
+
+        :param sock: connection to helper
+        :type sock: socket.socket
+        :param requests: requests waiting for reply
+        :type requests: typing.Dict[int, _SpawnRequest]
+        :param processes: running processes by PID
+        :type processes: typing.Dict[int, SpawnedProcess]
+        """
+        try:
+            while True:
+                message, fds = _spawn_server.recv_message(sock)
+                if message[0] == "exit":
+                    _, pid, returncode, usage = message
+                    process: typing.Optional[SpawnedProcess] = processes.pop(pid, None)
+                    if process is not None:
+                        process.set_exit(returncode, None if usage is None else _rusage_from_struct(usage))
+                    continue
+                request: _SpawnRequest = requests.pop(message[1])
+                if message[0] == "error":
+                    request.future.set_exception(message[2])
+                    continue
+                pipes: typing.Iterator[int] = iter(fds)
+                process = SpawnedProcess(
+                    args=[request.command],
+                    pid=message[2],
+                    stdin=open(next(pipes), "wb"),  # pylint: disable=consider-using-with
+                    stdout=open(next(pipes), "rb") if request.open_stdout else None,  # noqa: SIM115
+                    stderr=open(next(pipes), "rb") if request.open_stderr else None,  # noqa: SIM115
+                )
+                processes[process.pid] = process
+                request.future.set_result(process)
+        except (EOFError, OSError):
+            pass
+        finally:
+            with self.__lock:
+                if self.__socket is sock:
+                    self.__socket = None
+                sock.close()
+                for request in requests.values():
+                    request.future.set_exception(ChildProcessError("Spawn helper died"))
+                for process in processes.values():
+                    process.set_lost()
+
+    def spawn(
+        self,
+        command: str,
+        *,
+        cwd: typing.Optional[typing.Union[str, bytes, os.PathLike]] = None,  # type: ignore
+        env: typing.Optional[typing.Mapping[typing.Any, typing.Any]] = None,
+        open_stdout: bool = True,
+        open_stderr: bool = True,
+    ) -> SpawnedProcess:
+        """Spawn shell command in the new session.
+
+        :param command: shell command
+        :type command: str
+        :param cwd: working directory (None: current working directory of this process)
+        :type cwd: typing.Optional[typing.Union[str, bytes, os.PathLike]]
+        :param env: environment (None: current environment of this process)
+        :type env: typing.Optional[typing.Mapping[typing.Any, typing.Any]]
+        :param open_stdout: open STDOUT pipe
+        :type open_stdout: bool
+        :param open_stderr: open STDERR pipe
+        :type open_stderr: bool
+        :return: spawned process
+        :rtype: SpawnedProcess
+        :raises OSError: impossible to start command
+        :raises ChildProcessError: helper died during request processing
+        """
+        request_id: int = next(self.__request_ids)
+        request = _SpawnRequest(
+            future=concurrent.futures.Future(), command=command, open_stdout=open_stdout, open_stderr=open_stderr
+        )
+        # Helper keeps cwd and environment of its start: always send current ones
+        message = (
+            request_id,
+            command,
+            os.getcwd() if cwd is None else cwd,
+            dict(os.environ if env is None else env),
+            open_stdout,
+            open_stderr,
+        )
+        with self.__lock:
+            try:
+                sock: socket.socket = self.__start()
+                self.__requests[request_id] = request
+                _spawn_server.send_message(sock, message)
+            except OSError:  # Helper died after previous command
+                self.__requests.pop(request_id, None)
+                self.__disconnect()
+                sock = self.__start()
+                self.__requests[request_id] = request
+                _spawn_server.send_message(sock, message)
+        return request.future.result()
+
+    def __disconnect(self) -> typing.Optional[subprocess.Popen[bytes]]:  # pylint: disable=unsubscriptable-object
+        """Close connection: helper exits on EOF (lock should be acquired).
+
+        :return: helper process
+        :rtype: typing.Optional[subprocess.Popen[bytes]]
+        """
+        sock, self.__socket = self.__socket, None
+        if sock is not None:
+            with contextlib.suppress(OSError):
+                sock.shutdown(socket.SHUT_RDWR)
+        return self.__process
+
+    def close(self) -> None:
+        """Stop helper if started. Spawned processes continue execution."""
+        with self.__lock:
+            process: typing.Optional[subprocess.Popen[bytes]] = self.__disconnect()  # pylint: disable=E1136
+            self.__process = None
+        if process is None:
+            return
+        try:
+            process.wait(timeout=_KILL_WAIT_TIMEOUT)
+        except subprocess.TimeoutExpired:  # pragma: no cover
+            process.kill()
+            process.wait(timeout=_KILL_WAIT_TIMEOUT)
+
+
+def scheduling_preexec_fn(
+    *,
+    cpu_affinity: typing.Optional[typing.Iterable[int]] = None,
+    nice: typing.Optional[int] = None,
+    rlimits: typing.Optional[typing.Mapping[int, typing.Tuple[int, int]]] = None,
+) -> typing.Optional[typing.Callable[[], None]]:
+    """Make function to apply scheduling controls in the child process before exec.
+
+    Controls are applied before the command start, so processes started by the command inherit them.
+    Function makes only plain syscalls with arguments prepared in parent: it is safe in the forked child.
+    IO priority is not set here (psutil is not safe in the forked child): it is applied by `apply_scheduling`.
+    Function is required only if any control is set: without it process spawn can use fast vfork path.
+
+    :param cpu_affinity: CPUs allowed for the process
+    :type cpu_affinity: typing.Optional[typing.Iterable[int]]
+    :param nice: niceness increment (relative to the current process niceness)
+    :type nice: typing.Optional[int]
+    :param rlimits: resource limits: resource.RLIMIT_* -> (soft, hard)
+    :type rlimits: typing.Optional[typing.Mapping[int, typing.Tuple[int, int]]]
+    :return: function for Popen(preexec_fn=...) or None if nothing to apply
+    :rtype: typing.Optional[typing.Callable[[], None]]
+    :raises NotImplementedError: scheduling controls are not supported on platform
+
+    .. versionadded:: 7.1.0
+    """
+    if cpu_affinity is None and not nice and not rlimits:
+        return None
+    if resource is None:  # pragma: no cover
+        raise NotImplementedError("Scheduling controls for spawned commands are supported only on POSIX")
+    set_affinity: typing.Optional[typing.Callable[[int, typing.Iterable[int]], None]] = getattr(
+        os, "sched_setaffinity", None
+    )
+    if cpu_affinity is not None and set_affinity is None:  # pragma: no cover
+        raise NotImplementedError("CPU affinity for spawned commands is not supported on platform")
+
+    # Arguments are prepared in parent: child does only syscalls
+    cpus: typing.Optional[typing.List[int]] = None if cpu_affinity is None else list(cpu_affinity)
+    priority: typing.Optional[int] = os.getpriority(os.PRIO_PROCESS, 0) + nice if nice else None
+    limits: typing.List[typing.Tuple[int, typing.Tuple[int, int]]] = [
+        (limit_id, (soft, hard)) for limit_id, (soft, hard) in (rlimits or {}).items()
+    ]
+    setpriority: typing.Callable[[int, int, int], None] = os.setpriority
+    setrlimit: typing.Callable[[int, typing.Tuple[int, int]], None] = resource.setrlimit
+
+    def preexec() -> None:
+        """Apply scheduling controls in the child process."""
+        if cpus is not None and set_affinity is not None:
+            set_affinity(0, cpus)
+        if priority is not None:
+            setpriority(os.PRIO_PROCESS, 0, priority)
+        for limit_id, limit in limits:
+            setrlimit(limit_id, limit)
+
+    return preexec
+
+
+def apply_scheduling(
+    pid: int,
+    *,
+    cpu_affinity: typing.Optional[typing.Iterable[int]] = None,
+    nice: typing.Optional[int] = None,
+    ionice: typing.Optional[typing.Union[int, typing.Tuple[int, int]]] = None,
+) -> None:
+    """Apply scheduling controls to the started process from the parent.
+
+    Used for IO priority (psutil is not safe in the forked child) and for commands started by spawn helper
+    (no code of this process is executed in the child).
+    Controls are applied right after spawn, so it is racy: the command starts without them
+    and processes started by the command before controls are applied are not affected.
+    Use `scheduling_preexec_fn` for CPU affinity and niceness of commands forked from this process.
+
+    :param pid: PID of started process
+    :type pid: int
+    :param cpu_affinity: CPUs allowed for the process
+    :type cpu_affinity: typing.Optional[typing.Iterable[int]]
+    :param nice: niceness increment (relative to the current process niceness)
+    :type nice: typing.Optional[int]
+    :param ionice: IO scheduling class or class and priority level (psutil.IOPRIO_CLASS_* constants)
+    :type ionice: typing.Optional[typing.Union[int, typing.Tuple[int, int]]]
+    :raises NotImplementedError: scheduling controls are not supported on platform
+
+    .. versionadded:: 7.1.0
+    """
+    if cpu_affinity is None and not nice and ionice is None:
+        return
+    if platform.system() == "Windows":  # pragma: no cover
+        raise NotImplementedError("Scheduling controls for spawned commands are supported only on POSIX")
+
+    with contextlib.suppress(ProcessLookupError, psutil.NoSuchProcess):  # Command already exited
+        if cpu_affinity is not None:
+            if hasattr(os, "sched_setaffinity"):
+                os.sched_setaffinity(pid, list(cpu_affinity))
+            else:  # pragma: no cover
+                psutil.Process(pid).cpu_affinity(list(cpu_affinity))
+        if nice:
+            os.setpriority(os.PRIO_PROCESS, pid, os.getpriority(os.PRIO_PROCESS, 0) + nice)
+        if ionice is not None:
+            psutil.Process(pid).ionice(*((ionice,) if isinstance(ionice, int) else ionice))
 
 
 # Subprocess extra arguments.
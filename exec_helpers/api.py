@@ -23,8 +23,12 @@ from __future__ import annotations
 
 # Standard Library
 import abc
+import concurrent.futures
 import datetime
+import functools
+import hashlib
 import logging
+import os
 import pathlib
 import re
 import shlex
@@ -32,10 +36,15 @@ import threading
 import typing
 
 # Package Implementation
+from exec_helpers import _log_templates
 from exec_helpers import constants
 from exec_helpers import exceptions
 from exec_helpers import exec_result
+from exec_helpers import executor as executor_mod
 from exec_helpers import proc_enums
+from exec_helpers import result_cache
+from exec_helpers._output_callbacks import OutputCallbacks
+from exec_helpers._output_callbacks import OutputCallbackT
 from exec_helpers.exec_result import OptionalStdinT
 from exec_helpers.proc_enums import ExitCodeT
 
@@ -136,6 +145,27 @@ def mask_command(text: str, rules: str) -> str:
     return "".join(masked)
 
 
+def _cache_key_value(name: str, value: typing.Any) -> typing.Hashable:
+    """Normalize call parameter for the results cache key.
+
+    :param name: parameter name
+    :type name: str
+    :param value: parameter value
+    :type value: typing.Any
+    :return: value, which is equal for the equal parameters
+    :rtype: typing.Hashable
+
+    .. versionadded:: 7.1.0
+    """
+    if value is None:
+        return None
+    if name == "cwd":
+        return os.fspath(value)
+    if name in {"env", "env_patch"}:
+        return tuple(sorted(value.items(), key=repr))
+    return repr(value)
+
+
 class ExecHelper(
     typing.Callable[..., exec_result.ExecResult],  # type: ignore
     typing.ContextManager["ExecHelper"],
@@ -148,20 +178,45 @@ class ExecHelper(
     :param log_mask_re: regex lookup rule to mask command for logger.
                         all MATCHED groups will be replaced by '<*masked*>'
     :type log_mask_re: typing.Optional[str]
+    :param executor: executor for output reading threads or its factory (None: dedicated `HelperExecutor`)
+    :type executor: typing.Union[concurrent.futures.Executor, typing.Callable[[], concurrent.futures.Executor], None]
 
     .. versionchanged:: 1.2.0 log_mask_re regex rule for masking cmd
     .. versionchanged:: 1.3.5 make API public to use as interface
     .. versionchanged:: 4.1.0 support chroot
+    .. versionchanged:: 7.1.0 executor
     """
 
-    __slots__ = ("__lock", "__logger", "log_mask_re", "__chroot_path")
-
-    def __init__(self, log_mask_re: LogMaskReT = None, *, logger: logging.Logger) -> None:
+    __slots__ = (
+        "__lock",
+        "__logger",
+        "log_mask_re",
+        "__chroot_path",
+        "__result_cache",
+        "__executor_lock",
+        "__executor",
+        "__executor_factory",
+        "__executor_owned",
+    )
+
+    def __init__(
+        self,
+        log_mask_re: LogMaskReT = None,
+        *,
+        logger: logging.Logger,
+        executor: executor_mod.ExecutorArgT = None,
+    ) -> None:
         """Global ExecHelper API."""
         self.__lock = threading.RLock()
         self.__logger: logging.Logger = logger
         self.log_mask_re: LogMaskReT = log_mask_re
         self.__chroot_path: typing.Optional[str] = None
+        self.__result_cache: result_cache.ResultCache = result_cache.ResultCache()
+        self.__executor_lock = threading.Lock()
+        self.__executor: typing.Optional[concurrent.futures.Executor] = None
+        self.__executor_factory: typing.Optional[executor_mod.ExecutorFactoryT] = None
+        self.__executor_owned: bool = False
+        self.executor = executor  # type: ignore
 
     @property
     def logger(self) -> logging.Logger:
@@ -180,6 +235,195 @@ class ExecHelper(
         """
         return self.__lock
 
+    @property
+    def result_cache(self) -> result_cache.ResultCache:
+        """Cache for results of commands executed with `cache_ttl`.
+
+        :rtype: ResultCache
+
+        .. versionadded:: 7.1.0
+        """
+        return self.__result_cache
+
+    @result_cache.setter
+    def result_cache(self, cache: result_cache.ResultCache) -> None:
+        """Cache for results of commands executed with `cache_ttl` (can be shared between helpers).
+
+        :param cache: result cache instance
+        :type cache: ResultCache
+
+        .. versionadded:: 7.1.0
+        """
+        self.__result_cache = cache
+
+    @property
+    def executor(self) -> concurrent.futures.Executor:
+        """Executor for threads reading output of commands (dedicated to helper unless shared explicitly).
+
+        Executor is created by factory on first use.
+        Default factory makes `HelperExecutor` with thread names prefixed by helper class name.
+
+        :rtype: concurrent.futures.Executor
+
+        .. versionadded:: 7.1.0
+        """
+        with self.__executor_lock:
+            if self.__executor is None:
+                if self.__executor_factory is not None:
+                    self.__executor = self.__executor_factory()
+                else:
+                    self.__executor = executor_mod.HelperExecutor(thread_name_prefix=self.__class__.__name__)
+                self.__executor_owned = True
+            return self.__executor
+
+    @executor.setter
+    def executor(self, executor: executor_mod.ExecutorArgT) -> None:
+        """Executor for threads reading output of commands.
+
+        :param executor: executor instance (not owned by helper), executor factory or None for default factory
+        :type executor: typing.Optional[typing.Union[concurrent.futures.Executor, ExecutorFactoryT]]
+
+        .. versionadded:: 7.1.0
+        """
+        self._close_executor()
+        with self.__executor_lock:
+            if isinstance(executor, concurrent.futures.Executor):
+                self.__executor, self.__executor_factory = executor, None
+                self.__executor_owned = False
+            else:
+                self.__executor, self.__executor_factory = None, executor
+
+    def _close_executor(self) -> None:
+        """Shutdown executor created by helper. It will be created again on next use.
+
+        Executor passed as instance is not owned by helper and not closed.
+
+        .. versionadded:: 7.1.0
+        """
+        with self.__executor_lock:
+            if self.__executor is None or not self.__executor_owned:
+                return
+            executor, self.__executor = self.__executor, None
+        executor.shutdown(wait=False)
+
+    def _target_identity(self) -> typing.Hashable:
+        """Identity of execution target for results caching.
+
+        :return: hashable identity: same for helpers executing commands in the same context
+        :rtype: typing.Hashable
+
+        .. versionadded:: 7.1.0
+        """
+        return self.__class__.__name__, id(self)
+
+    def _result_cache_key(
+        self,
+        command: str,
+        *,
+        log_mask_re: LogMaskReT,
+        stdin: OptionalStdinT,
+        open_stdout: bool,
+        open_stderr: bool,
+        **kwargs: typing.Any,
+    ) -> typing.Hashable:
+        """Make key for results cache.
+
+        :param command: Command for execution
+        :type command: str
+        :param log_mask_re: regex lookup rule to mask command for logger (affects result command)
+        :type log_mask_re: typing.Optional[str]
+        :param stdin: STDIN text for the process (digest is used)
+        :type stdin: typing.Union[bytes, str, bytearray, None]
+        :param open_stdout: open STDOUT stream for read
+        :type open_stdout: bool
+        :param open_stderr: open STDERR stream for read
+        :type open_stderr: bool
+        :param kwargs: additional parameters for call (cwd, env, etc.)
+        :type kwargs: typing.Any
+        :return: cache key
+        :rtype: typing.Hashable
+
+        `cwd` is used as file system path and `env`/`env_patch` as sorted items,
+        other additional parameters are used by `repr`.
+
+        .. versionadded:: 7.1.0
+        """
+        chroot_path: typing.Optional[str] = kwargs.pop("chroot_path", None)
+        if isinstance(stdin, str):
+            stdin = stdin.encode("utf-8")
+        return (
+            self._target_identity(),
+            command,
+            chroot_path if chroot_path is not None else self._chroot_path,
+            self.log_mask_re,
+            log_mask_re,
+            None if stdin is None else hashlib.sha256(stdin).hexdigest(),
+            open_stdout,
+            open_stderr,
+            tuple(sorted((name, _cache_key_value(name, value)) for name, value in kwargs.items())),
+        )
+
+    @staticmethod
+    def _raise_batch_errors(
+        keys: typing.Iterable[typing.Tuple[str, int]],
+        raised_exceptions: typing.Dict[typing.Tuple[str, int], Exception],
+        errors: typing.Dict[typing.Tuple[str, int], exec_result.ExecResult],
+        results: typing.Dict[typing.Tuple[str, int], exec_result.ExecResult],
+        *,
+        expected: typing.Sequence[ExitCodeT],
+        raise_on_err: bool,
+        exception_class: typing.Type[exceptions.ParallelCallProcessError],
+    ) -> None:
+        """Raise aggregated errors of the multiple commands execution if any.
+
+        :param keys: (masked command, command index) for all commands
+        :type keys: typing.Iterable[typing.Tuple[str, int]]
+        :param raised_exceptions: exceptions raised during commands execution
+        :type raised_exceptions: typing.Dict[typing.Tuple[str, int], Exception]
+        :param errors: results with unexpected exit codes
+        :type errors: typing.Dict[typing.Tuple[str, int], ExecResult]
+        :param results: all results
+        :type results: typing.Dict[typing.Tuple[str, int], ExecResult]
+        :param expected: expected return codes
+        :type expected: typing.Sequence[typing.Union[int, proc_enums.ExitCodes]]
+        :param raise_on_err: Raise exception on unexpected return code
+        :type raise_on_err: bool
+        :param exception_class: Exception to raise on error. Mandatory subclass of exceptions.ParallelCallProcessError
+        :type exception_class: typing.Type[exceptions.ParallelCallProcessError]
+        :raises ParallelCallExceptions: At least one exception raised during execution (including timeout)
+        :raises ParallelCallProcessError: At least one exit code is unexpected and raise_on_err enabled
+
+        .. versionadded:: 7.1.0
+        """
+        commands_str: str = "\n".join(cmd for cmd, _ in keys)
+        if raised_exceptions:  # always raise
+            exceptions_str: str = "\n\t".join(
+                f"#{idx} {cmd!r} - {exc} "
+                for (cmd, idx), exc in sorted(raised_exceptions.items(), key=lambda item: item[0][1])
+            )
+            raise exceptions.ParallelCallExceptions(
+                command=commands_str,
+                exceptions=raised_exceptions,
+                errors=errors,
+                results=results,
+                expected=expected,
+                _message=f"Commands during execution raised exceptions: \n\t{exceptions_str}",
+            )
+        if errors and raise_on_err:
+            errors_str: str = "\n\t".join(
+                f"#{idx} {cmd!r} - {result.exit_code} "
+                for (cmd, idx), result in sorted(errors.items(), key=lambda item: item[0][1])
+            )
+            raise exception_class(
+                commands_str,
+                errors,
+                results,
+                expected=expected,
+                _message=(
+                    f"Commands returned unexpected exit codes\n" f"Expected: {expected}\n" f"Got:\n" f"\t{errors_str}"
+                ),
+            )
+
     @property
     def _chroot_path(self) -> typing.Optional[str]:
         """Path for chroot if set.
@@ -399,6 +643,13 @@ class ExecHelper(
         stdin: OptionalStdinT = None,
         open_stdout: bool = True,
         open_stderr: bool = True,
+        cache_ttl: OptionalTimeoutT = None,
+        single_flight: bool = False,
+        on_stdout_line: OutputCallbackT = None,
+        on_stderr_line: OutputCallbackT = None,
+        on_stdout_chunk: OutputCallbackT = None,
+        on_stderr_chunk: OutputCallbackT = None,
+        callbacks_queue_size: int = 0,
         **kwargs: typing.Any,
     ) -> exec_result.ExecResult:
         """Execute command and wait for return code.
@@ -418,26 +669,153 @@ class ExecHelper(
         :type open_stdout: bool
         :param open_stderr: open STDERR stream for read
         :type open_stderr: bool
+        :param cache_ttl: reuse result of the same command executed in the same context during cache_ttl seconds
+        :type cache_ttl: typing.Union[int, float, None]
+        :param single_flight: attach to running execution of the same command in the same context if any
+        :type single_flight: bool
+        :param on_stdout_line: callback for each STDOUT line (bytes, line end is kept) while command is running
+        :type on_stdout_line: typing.Optional[typing.Callable[[bytes], typing.Any]]
+        :param on_stderr_line: callback for each STDERR line (bytes, line end is kept) while command is running
+        :type on_stderr_line: typing.Optional[typing.Callable[[bytes], typing.Any]]
+        :param on_stdout_chunk: callback for STDOUT data as read while command is running
+        :type on_stdout_chunk: typing.Optional[typing.Callable[[bytes], typing.Any]]
+        :param on_stderr_chunk: callback for STDERR data as read while command is running
+        :type on_stderr_chunk: typing.Optional[typing.Callable[[bytes], typing.Any]]
+        :param callbacks_queue_size: call output callbacks from dedicated thread via queue of this size.
+                                     Output reading waits while queue is full. 0: call from output reader.
+        :type callbacks_queue_size: int
         :param kwargs: additional parameters for call.
         :type kwargs: typing.Any
         :return: Execution result
         :rtype: ExecResult
         :raises ExecHelperTimeoutError: Timeout exceeded
 
+        .. note:: Commands with output callbacks are not cached and not attached to running executions.
         .. versionchanged:: 1.2.0 default timeout 1 hour
         .. versionchanged:: 2.1.0 Allow parallel calls
         .. versionchanged:: 7.0.0 Allow command as list of arguments. Command will be joined with components escaping.
+        .. versionchanged:: 7.1.0 cache_ttl
+        .. versionchanged:: 7.1.0 single_flight
+        .. versionchanged:: 7.1.0 output callbacks
         """
-        log_level: int = logging.INFO if verbose else logging.DEBUG
         cmd = self._cmd_to_string(command)
+        output_callbacks: typing.Optional[OutputCallbacks] = OutputCallbacks.create(
+            self.logger,
+            on_stdout_line=on_stdout_line,
+            on_stderr_line=on_stderr_line,
+            on_stdout_chunk=on_stdout_chunk,
+            on_stderr_chunk=on_stderr_chunk,
+            queue_size=callbacks_queue_size,
+        )
+        execute: typing.Callable[..., exec_result.ExecResult] = functools.partial(
+            self._execute_uncached,
+            cmd,
+            verbose,
+            timeout,
+            log_mask_re=log_mask_re,
+            stdin=stdin,
+            open_stdout=open_stdout,
+            open_stderr=open_stderr,
+            **kwargs,
+        )
+        if output_callbacks is not None:
+            try:
+                return execute(output_callbacks=output_callbacks)
+            finally:
+                output_callbacks.close()
+        if not cache_ttl and not single_flight:
+            return execute()
+
+        key: typing.Hashable = self._result_cache_key(
+            cmd, log_mask_re=log_mask_re, stdin=stdin, open_stdout=open_stdout, open_stderr=open_stderr, **kwargs
+        )
+        cache: result_cache.ResultCache = self.result_cache
+        if cache_ttl:
+            cached: typing.Optional[exec_result.ExecResult] = cache.get(key)
+            if cached is not None:
+                self.logger.log(
+                    level=logging.INFO if verbose else logging.DEBUG,
+                    msg=f"Command {cached.cmd!r} exit code: {cached.exit_code!s} (cached)",
+                )
+                return cached
+
+        def execute_and_cache() -> exec_result.ExecResult:
+            """Execute command and store result in cache if requested.
+
+            :return: execution result
+            :rtype: ExecResult
+            """
+            new_result: exec_result.ExecResult = execute()
+            if cache_ttl:
+                cache.put(key, new_result, ttl=cache_ttl)
+            return new_result
+
+        if single_flight:
+            started: datetime.datetime = datetime.datetime.utcnow()
+
+            def wait_timeout() -> exceptions.ExecHelperTimeoutError:
+                """Make timeout error for attached request: running identical execution is not finished in time.
+
+                :return: timeout exception with empty output
+                :rtype: ExecHelperTimeoutError
+                """
+                result: exec_result.ExecResult = exec_result.ExecResult(
+                    cmd=self._mask_command(cmd=cmd, log_mask_re=log_mask_re),
+                    started=started,
+                )
+                result.set_timestamp()
+                self.logger.debug(_log_templates.CMD_WAIT_ERROR.format(result=result, timeout=timeout))
+                return exceptions.ExecHelperTimeoutError(result=result, timeout=timeout)  # type: ignore
+
+            return cache.single_flight(key, execute_and_cache, timeout=timeout, on_timeout=wait_timeout)
+        return execute_and_cache()
+
+    def _execute_uncached(
+        self,
+        command: str,
+        verbose: bool,
+        timeout: OptionalTimeoutT,
+        *,
+        log_mask_re: LogMaskReT,
+        stdin: OptionalStdinT,
+        open_stdout: bool,
+        open_stderr: bool,
+        **kwargs: typing.Any,
+    ) -> exec_result.ExecResult:
+        """Execute command and wait for return code.
+
+        :param command: Command for execution
+        :type command: str
+        :param verbose: Produce log.info records for command call and output
+        :type verbose: bool
+        :param timeout: Timeout for command execution.
+        :type timeout: typing.Union[int, float, None]
+        :param log_mask_re: regex lookup rule to mask command for logger.
+                            all MATCHED groups will be replaced by '<*masked*>'
+        :type log_mask_re: typing.Optional[str]
+        :param stdin: pass STDIN text to the process
+        :type stdin: typing.Union[bytes, str, bytearray, None]
+        :param open_stdout: open STDOUT stream for read
+        :type open_stdout: bool
+        :param open_stderr: open STDERR stream for read
+        :type open_stderr: bool
+        :param kwargs: additional parameters for call.
+        :type kwargs: typing.Any
+        :return: Execution result
+        :rtype: ExecResult
+        :raises ExecHelperTimeoutError: Timeout exceeded
+
+        .. versionadded:: 7.1.0
+        """
+        log_level: int = logging.INFO if verbose else logging.DEBUG
         self._log_command_execute(
-            command=cmd,
+            command=command,
             log_mask_re=log_mask_re,
             log_level=log_level,
             **kwargs,
         )
         async_result: ExecuteAsyncResult = self._execute_async(
-            cmd,
+            command,
             verbose=verbose,
             log_mask_re=log_mask_re,
             stdin=stdin,
@@ -447,7 +825,7 @@ class ExecHelper(
         )
 
         result: exec_result.ExecResult = self._exec_command(
-            command=cmd,
+            command=command,
             async_result=async_result,
             timeout=timeout,
             verbose=verbose,
@@ -455,7 +833,10 @@ class ExecHelper(
             stdin=stdin,
             **kwargs,
         )
-        self.logger.log(level=log_level, msg=f"Command {result.cmd!r} exit code: {result.exit_code!s}")
+        result_msg: str = f"Command {result.cmd!r} exit code: {result.exit_code!s}"
+        if verbose and result.rusage is not None:
+            result_msg += f" ({result.rusage!s})"
+        self.logger.log(level=log_level, msg=result_msg)
         return result
 
     def __call__(
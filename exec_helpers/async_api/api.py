@@ -30,6 +30,8 @@ from exec_helpers import api
 from exec_helpers import constants
 from exec_helpers import exceptions
 from exec_helpers import proc_enums
+from exec_helpers._output_callbacks import OutputCallbacks
+from exec_helpers._output_callbacks import OutputCallbackT
 from exec_helpers.api import CalledProcessErrorSubClassT
 from exec_helpers.api import ChRootPathSetT
 from exec_helpers.api import CommandT
@@ -205,6 +207,12 @@ class ExecHelper(api.ExecHelper, typing.AsyncContextManager["ExecHelper"], metac
         stdin: OptionalStdinT = None,
         open_stdout: bool = True,
         open_stderr: bool = True,
+        cache_ttl: OptionalTimeoutT = None,
+        on_stdout_line: OutputCallbackT = None,
+        on_stderr_line: OutputCallbackT = None,
+        on_stdout_chunk: OutputCallbackT = None,
+        on_stderr_chunk: OutputCallbackT = None,
+        callbacks_queue_size: int = 0,
         **kwargs: typing.Any,
     ) -> exec_result.ExecResult:
         """Execute command and wait for return code.
@@ -224,16 +232,53 @@ class ExecHelper(api.ExecHelper, typing.AsyncContextManager["ExecHelper"], metac
         :type open_stdout: bool
         :param open_stderr: open STDERR stream for read
         :type open_stderr: bool
+        :param cache_ttl: reuse result of the same command executed in the same context during cache_ttl seconds
+        :type cache_ttl: typing.Union[int, float, None]
+        :param on_stdout_line: callback for each STDOUT line (bytes, line end is kept) while command is running
+        :type on_stdout_line: typing.Optional[typing.Callable[[bytes], typing.Any]]
+        :param on_stderr_line: callback for each STDERR line (bytes, line end is kept) while command is running
+        :type on_stderr_line: typing.Optional[typing.Callable[[bytes], typing.Any]]
+        :param on_stdout_chunk: callback for STDOUT data as read while command is running
+        :type on_stdout_chunk: typing.Optional[typing.Callable[[bytes], typing.Any]]
+        :param on_stderr_chunk: callback for STDERR data as read while command is running
+        :type on_stderr_chunk: typing.Optional[typing.Callable[[bytes], typing.Any]]
+        :param callbacks_queue_size: call output callbacks from dedicated thread via queue of this size.
+                                     Output reading waits while queue is full. 0: call from output reader.
+        :type callbacks_queue_size: int
         :param kwargs: additional parameters for call.
         :type kwargs: typing.Any
         :return: Execution result
         :rtype: ExecResult
         :raises ExecHelperTimeoutError: Timeout exceeded
 
+        .. note:: Commands with output callbacks are not cached.
         .. versionchanged:: 7.0.0 Allow command as list of arguments. Command will be joined with components escaping.
+        .. versionchanged:: 7.1.0 cache_ttl
+        .. versionchanged:: 7.1.0 output callbacks
         """
         log_level: int = logging.INFO if verbose else logging.DEBUG
         cmd = self._cmd_to_string(command)
+        output_callbacks: typing.Optional[OutputCallbacks] = OutputCallbacks.create(
+            self.logger,
+            on_stdout_line=on_stdout_line,
+            on_stderr_line=on_stderr_line,
+            on_stdout_chunk=on_stdout_chunk,
+            on_stderr_chunk=on_stderr_chunk,
+            queue_size=callbacks_queue_size,
+        )
+        if output_callbacks is not None:
+            cache_ttl = None
+            kwargs["output_callbacks"] = output_callbacks
+        key: typing.Optional[typing.Hashable] = None
+        if cache_ttl:
+            key = self._result_cache_key(
+                cmd, log_mask_re=log_mask_re, stdin=stdin, open_stdout=open_stdout, open_stderr=open_stderr, **kwargs
+            )
+            cached: typing.Optional[exec_result.ExecResult] = self.result_cache.get(key)  # type: ignore
+            if cached is not None:
+                self.logger.log(level=log_level, msg=f"Command {cached.cmd!r} exit code: {cached.exit_code!s} (cached)")
+                return cached
+
         self._log_command_execute(
             command=cmd,
             log_mask_re=log_mask_re,
@@ -241,26 +286,35 @@ class ExecHelper(api.ExecHelper, typing.AsyncContextManager["ExecHelper"], metac
             **kwargs,
         )
 
-        async_result: api.ExecuteAsyncResult = await self._execute_async(
-            cmd,
-            verbose=verbose,
-            log_mask_re=log_mask_re,
-            stdin=stdin,
-            open_stdout=open_stdout,
-            open_stderr=open_stderr,
-            **kwargs,
-        )
-
-        result: exec_result.ExecResult = await self._exec_command(
-            command=cmd,
-            async_result=async_result,
-            timeout=timeout,
-            verbose=verbose,
-            log_mask_re=log_mask_re,
-            stdin=stdin,
-            **kwargs,
-        )
-        self.logger.log(level=log_level, msg=f"Command {result.cmd!r} exit code: {result.exit_code!s}")
+        try:
+            async_result: api.ExecuteAsyncResult = await self._execute_async(
+                cmd,
+                verbose=verbose,
+                log_mask_re=log_mask_re,
+                stdin=stdin,
+                open_stdout=open_stdout,
+                open_stderr=open_stderr,
+                **kwargs,
+            )
+
+            result: exec_result.ExecResult = await self._exec_command(
+                command=cmd,
+                async_result=async_result,
+                timeout=timeout,
+                verbose=verbose,
+                log_mask_re=log_mask_re,
+                stdin=stdin,
+                **kwargs,
+            )
+        finally:
+            if output_callbacks is not None:
+                await output_callbacks.aclose()
+        result_msg: str = f"Command {result.cmd!r} exit code: {result.exit_code!s}"
+        if verbose and result.rusage is not None:
+            result_msg += f" ({result.rusage!s})"
+        self.logger.log(level=log_level, msg=result_msg)
+        if key is not None:
+            self.result_cache.put(key, result, ttl=cache_ttl)  # type: ignore
         return result
 
     async def __call__(  # type: ignore  # pylint: disable=invalid-overridden-method
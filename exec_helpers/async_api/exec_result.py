@@ -25,6 +25,7 @@ import logging
 import typing
 
 # Package Implementation
+from exec_helpers import constants
 from exec_helpers import exec_result
 
 _StreamT = typing.AsyncIterable[bytes]
@@ -84,7 +85,7 @@ class ExecResult(exec_result.ExecResult):
 
         with self.stdout_lock:
             self._stdout_str = self._stdout_brief = None
-            self._stdout += tuple(await self._poll_stream(src, log, verbose))
+            self._stdout = self.stdout + tuple(await self._poll_stream(src, log, verbose))
 
     async def read_stderr(  # type: ignore  # pylint: disable=invalid-overridden-method
         self,
@@ -111,4 +112,79 @@ class ExecResult(exec_result.ExecResult):
 
         with self.stderr_lock:
             self._stderr_str = self._stderr_brief = None
-            self._stderr += tuple(await self._poll_stream(src, log, verbose))
+            self._stderr = self.stderr + tuple(await self._poll_stream(src, log, verbose))
+
+    async def read_stdout_chunks(  # type: ignore  # pylint: disable=invalid-overridden-method
+        self,
+        src: "typing.Optional[_StreamT]" = None,
+        callback: "typing.Optional[typing.Callable[[bytes], typing.Awaitable[typing.Any]]]" = None,
+    ) -> None:
+        """Read asyncio STDOUT stream until EOF by fixed size chunks without splitting to lines.
+
+        :param src: source
+        :type src: typing.Optional[typing.AsyncIterable[bytes]]
+        :param callback: callback for each chunk read
+        :type callback: typing.Optional[typing.Callable[[bytes], typing.Awaitable[typing.Any]]]
+        :raises RuntimeError: Exit code is already received
+
+        .. versionadded:: 7.1.0
+        """
+        if not src:
+            return
+        if self.timestamp:
+            raise RuntimeError("Final exit code received.")
+        await self._aread_chunks(src, self.append_stdout, callback)
+
+    async def read_stderr_chunks(  # type: ignore  # pylint: disable=invalid-overridden-method
+        self,
+        src: "typing.Optional[_StreamT]" = None,
+        callback: "typing.Optional[typing.Callable[[bytes], typing.Awaitable[typing.Any]]]" = None,
+    ) -> None:
+        """Read asyncio STDERR stream until EOF by fixed size chunks without splitting to lines.
+
+        :param src: source
+        :type src: typing.Optional[typing.AsyncIterable[bytes]]
+        :param callback: callback for each chunk read
+        :type callback: typing.Optional[typing.Callable[[bytes], typing.Awaitable[typing.Any]]]
+        :raises RuntimeError: Exit code is already received
+
+        .. versionadded:: 7.1.0
+        """
+        if not src:
+            return
+        if self.timestamp:
+            raise RuntimeError("Final exit code received.")
+        await self._aread_chunks(src, self.append_stderr, callback)
+
+    @staticmethod
+    async def _aread_chunks(
+        src: _StreamT,
+        append: "typing.Callable[[bytes], None]",
+        callback: "typing.Optional[typing.Callable[[bytes], typing.Awaitable[typing.Any]]]" = None,
+    ) -> None:
+        """Read stream by chunks until EOF.
+
+        Streams with `read` (asyncio.StreamReader) are read by fixed size chunks, other async iterables as is.
+
+        :param src: source
+        :type src: typing.AsyncIterable[bytes]
+        :param append: target for data read
+        :type append: typing.Callable[[bytes], None]
+        :param callback: callback for each chunk read
+        :type callback: typing.Optional[typing.Callable[[bytes], typing.Awaitable[typing.Any]]]
+        """
+        read: "typing.Optional[typing.Callable[[int], typing.Awaitable[bytes]]]" = getattr(src, "read", None)
+        with contextlib.suppress(IOError):
+            if read is None:
+                async for chunk in src:
+                    append(chunk)
+                    if callback is not None:
+                        await callback(chunk)
+                return
+            while True:
+                chunk = await read(constants.READ_CHUNK_SIZE)
+                if not chunk:
+                    return
+                append(chunk)
+                if callback is not None:
+                    await callback(chunk)
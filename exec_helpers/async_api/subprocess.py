@@ -21,11 +21,12 @@ __all__ = ("Subprocess", "SubprocessExecuteAsyncResult")
 
 # Standard Library
 import asyncio
-import copy
 import datetime
 import errno
+import functools
 import logging
 import os
+import time
 import typing
 
 # Package Implementation
@@ -42,12 +43,17 @@ from exec_helpers.api import OptionalTimeoutT
 from exec_helpers.async_api import api
 from exec_helpers.async_api import exec_result
 from exec_helpers.exec_result import OptionalStdinT
+from exec_helpers.exec_result import ResourceUsage
+from exec_helpers.subprocess import CpuAffinityT
 from exec_helpers.subprocess import CwdT
 from exec_helpers.subprocess import EnvT
+from exec_helpers.subprocess import IoNiceT
+from exec_helpers.subprocess import RLimitsT
 
 # Local Implementation
 from .. import _log_templates
 from .. import _subprocess_helpers
+from .._output_callbacks import OutputCallbacks
 
 
 # noinspection PyTypeHints,PyTypeChecker
@@ -104,23 +110,99 @@ class Subprocess(api.ExecHelper):
     :type log_mask_re: typing.Optional[str]
     :param logger: logger instance to use
     :type logger: logging.Logger
+    :param kill_grace_period: time between SIGTERM and SIGKILL to the process group on timeout
+    :type kill_grace_period: typing.Union[int, float]
+    :param drain_timeout: maximum time to read output after process exit if pipes are held open by its children
+    :type drain_timeout: typing.Union[int, float]
 
     .. versionchanged:: 3.1.0 Not singleton anymore. Only lock is shared between all instances.
     .. versionchanged:: 3.2.0 Logger can be enforced.
     .. versionchanged:: 4.1.0 support chroot
     .. versionchanged:: 4.3.0 Lock is not shared anymore: allow parallel call of different instances.
+    .. versionchanged:: 7.1.0 kill_grace_period
+    .. versionchanged:: 7.1.0 drain_timeout
     """
 
-    __slots__ = ()
+    __slots__ = ("kill_grace_period", "drain_timeout", "__env_cache")
 
     def __init__(
         self,
         log_mask_re: LogMaskReT = None,
         *,
         logger: logging.Logger = logging.getLogger(__name__),  # noqa: B008
+        kill_grace_period: "typing.Union[int, float]" = constants.DEFAULT_KILL_GRACE_PERIOD,
+        drain_timeout: "typing.Union[int, float]" = constants.DEFAULT_DRAIN_TIMEOUT,
     ) -> None:
         """Subprocess helper with timeouts and lock-free FIFO."""
         super().__init__(logger=logger, log_mask_re=log_mask_re)
+        self.kill_grace_period: "typing.Union[int, float]" = kill_grace_period
+        self.drain_timeout: "typing.Union[int, float]" = drain_timeout
+        self.__env_cache = _subprocess_helpers.EnvCache()
+
+    def _target_identity(self) -> typing.Hashable:
+        """Identity of execution target for results caching: local host.
+
+        :return: hashable identity: same for helpers executing commands in the same context
+        :rtype: typing.Hashable
+
+        .. versionadded:: 7.1.0
+        """
+        return self.__class__.__name__, "localhost"
+
+    def _result_cache_key(
+        self,
+        command: str,
+        *,
+        log_mask_re: LogMaskReT,
+        stdin: OptionalStdinT,
+        open_stdout: bool,
+        open_stderr: bool,
+        **kwargs: typing.Any,
+    ) -> typing.Hashable:
+        """Make key for results cache: inherited working directory and environment are the part of key.
+
+        :param command: Command for execution
+        :type command: str
+        :param log_mask_re: regex lookup rule to mask command for logger (affects result command)
+        :type log_mask_re: typing.Optional[str]
+        :param stdin: STDIN text for the process (digest is used)
+        :type stdin: typing.Union[bytes, str, bytearray, None]
+        :param open_stdout: open STDOUT stream for read
+        :type open_stdout: bool
+        :param open_stderr: open STDERR stream for read
+        :type open_stderr: bool
+        :param kwargs: additional parameters for call (cwd, env, etc.)
+        :type kwargs: typing.Any
+        :return: cache key
+        :rtype: typing.Hashable
+
+        .. versionadded:: 7.1.0
+        """
+        return (
+            super()._result_cache_key(
+                command,
+                log_mask_re=log_mask_re,
+                stdin=stdin,
+                open_stdout=open_stdout,
+                open_stderr=open_stderr,
+                **kwargs,
+            ),
+            os.getcwd() if kwargs.get("cwd", None) is None else None,
+            self.__env_cache.environ_snapshot() if kwargs.get("env", None) is None else None,
+        )
+
+    async def _kill_proc_tree(self, pid: int) -> None:
+        """Kill process tree without event loop blocking.
+
+        :param pid: PID of parent process to kill
+        :type pid: int
+
+        .. versionadded:: 7.1.0
+        """
+        await asyncio.get_event_loop().run_in_executor(
+            None,
+            functools.partial(_subprocess_helpers.kill_proc_tree, pid, grace_period=self.kill_grace_period),
+        )
 
     async def __aenter__(self) -> "Subprocess":
         """Async context manager.
@@ -149,6 +231,9 @@ class Subprocess(api.ExecHelper):
         verbose: bool = False,
         log_mask_re: LogMaskReT = None,
         stdin: OptionalStdinT = None,
+        output_callbacks: "typing.Optional[OutputCallbacks]" = None,
+        binary_output: bool = False,
+        concurrent_stdin: bool = False,
         **kwargs: typing.Any,
     ) -> exec_result.ExecResult:
         """Get exit status from channel with timeout.
@@ -166,6 +251,12 @@ class Subprocess(api.ExecHelper):
         :type log_mask_re: typing.Optional[str]
         :param stdin: pass STDIN text to the process
         :type stdin: typing.Union[bytes, str, bytearray, None]
+        :param output_callbacks: user callbacks for output
+        :type output_callbacks: typing.Optional[OutputCallbacks]
+        :param binary_output: read output by fixed size chunks without splitting to lines and logging
+        :type binary_output: bool
+        :param concurrent_stdin: STDIN pipe is left open by `_execute_async`: write STDIN data while reading output
+        :type concurrent_stdin: bool
         :param kwargs: additional parameters for call.
         :type kwargs: typing.Any
         :return: Execution result
@@ -173,45 +264,130 @@ class Subprocess(api.ExecHelper):
         :raises OSError: exception during process kill (and not regarding to already closed process)
         :raises ExecHelperTimeoutError: Timeout exceeded
         :raises ExecHelperNoKillError: Process not dies on SIGTERM & SIGKILL
+
+        .. versionchanged:: 7.1.0 approximate resource usage is collected
+        .. versionchanged:: 7.1.0 output_callbacks
+        .. versionchanged:: 7.1.0 binary_output
+        .. versionchanged:: 7.1.0 concurrent_stdin
         """
 
         async def poll_stdout() -> None:
             """Sync stdout poll."""
-            await result.read_stdout(src=async_result.stdout, log=self.logger, verbose=verbose)
+            if binary_output:
+                callback = None if output_callbacks is None else output_callbacks.afeed_stdout_chunk
+                await result.read_stdout_chunks(src=async_result.stdout, callback=callback)
+                return
+            src = (
+                async_result.stdout if output_callbacks is None else output_callbacks.aiter_stdout(async_result.stdout)
+            )
+            await result.read_stdout(src=src, log=self.logger, verbose=verbose)
 
         async def poll_stderr() -> None:
             """Sync stderr poll."""
-            await result.read_stderr(src=async_result.stderr, log=self.logger, verbose=verbose)
+            if binary_output:
+                callback = None if output_callbacks is None else output_callbacks.afeed_stderr_chunk
+                await result.read_stderr_chunks(src=async_result.stderr, callback=callback)
+                return
+            src = (
+                async_result.stderr if output_callbacks is None else output_callbacks.aiter_stderr(async_result.stderr)
+            )
+            await result.read_stderr(src=src, log=self.logger, verbose=verbose)
 
         # Store command with hidden data
         cmd_for_log: str = self._mask_command(cmd=command, log_mask_re=log_mask_re)
 
         result = exec_result.ExecResult(cmd=cmd_for_log, stdin=stdin, started=async_result.started)
+        # Process is reaped by asyncio child watcher: only total usage of reaped children is available
+        rusage_before: typing.Optional[ResourceUsage] = _subprocess_helpers.children_rusage()
 
         stdout_task: "asyncio.Future[None]" = asyncio.ensure_future(poll_stdout())
         stderr_task: "asyncio.Future[None]" = asyncio.ensure_future(poll_stderr())
+        stdin_task: "typing.Optional[asyncio.Future[None]]" = None
+        if concurrent_stdin and stdin is not None and async_result.stdin is not None:
+            stdin_task = asyncio.ensure_future(self._write_stdin(async_result.interface, stdin))
 
         try:
             # Wait real timeout here
             exit_code: int = await asyncio.wait_for(async_result.interface.wait(), timeout=timeout)
+            result.rusage = _subprocess_helpers.rusage_delta(rusage_before, _subprocess_helpers.children_rusage())
+            # Readers are done on EOF, deadline is reached only if pipes are held open by children of process
+            drain_deadline: float = time.monotonic() + self.drain_timeout
+            stalled: float = 0.0 if output_callbacks is None else output_callbacks.stall_time
+            tasks = (stdout_task, stderr_task) if stdin_task is None else (stdout_task, stderr_task, stdin_task)
+            while (await asyncio.wait(tasks, timeout=max(drain_deadline - time.monotonic(), 0)))[1]:
+                if output_callbacks is None or output_callbacks.stall_time == stalled:
+                    break
+                # Readers were waiting for output callbacks: it is not a drain time
+                drain_deadline += output_callbacks.stall_time - stalled
+                stalled = output_callbacks.stall_time
+            if stdin_task is not None and stdin_task.done() and stdin_task.exception() is not None:
+                raise stdin_task.exception()  # type: ignore  # Process is killed by writer
             result.exit_code = exit_code
             return result
         except asyncio.TimeoutError as exc:
             # kill -9 for all subprocesses
-            _subprocess_helpers.kill_proc_tree(async_result.interface.pid)
+            await self._kill_proc_tree(async_result.interface.pid)
             exit_signal: "typing.Optional[int]" = await asyncio.wait_for(async_result.interface.wait(), timeout=0.001)
             if exit_signal is None:
                 raise exceptions.ExecHelperNoKillError(result=result, timeout=timeout) from exc  # type: ignore
+            result.rusage = _subprocess_helpers.rusage_delta(rusage_before, _subprocess_helpers.children_rusage())
             result.exit_code = exit_signal
         finally:
             stdout_task.cancel()
             stderr_task.cancel()
+            if stdin_task is not None:
+                if not stdin_task.done():
+                    stdin_task.cancel()
+                    async_result.stdin.close()  # type: ignore
+                elif not stdin_task.cancelled():
+                    stdin_task.exception()  # Error is logged by writer, process is killed
             result.set_timestamp()
 
         wait_err_msg: str = _log_templates.CMD_WAIT_ERROR.format(result=result, timeout=timeout)
         self.logger.debug(wait_err_msg)
         raise exceptions.ExecHelperTimeoutError(result=result, timeout=timeout)  # type: ignore
 
+    async def _write_stdin(self, process: asyncio.subprocess.Process, stdin: OptionalStdinT) -> None:
+        """Send data to process STDIN by chunks and close it.
+
+        :param process: process with opened STDIN pipe
+        :type process: asyncio.subprocess.Process
+        :param stdin: STDIN text to send
+        :type stdin: typing.Union[bytes, str, bytearray]
+        :raises OSError: impossible to process STDIN
+
+        .. versionadded:: 7.1.0
+        """
+        if isinstance(stdin, str):
+            stdin = stdin.encode(encoding="utf-8")
+        data: memoryview = memoryview(stdin)  # type: ignore
+        try:
+            for offset in range(0, len(data), constants.READ_CHUNK_SIZE):
+                process.stdin.write(data[offset : offset + constants.READ_CHUNK_SIZE])  # type: ignore
+                await process.stdin.drain()  # type: ignore
+        except OSError as exc:
+            if exc.errno == errno.EINVAL:
+                # bpo-19612, bpo-30418: On Windows, stdin.write() fails
+                # with EINVAL if the child process exited or if the child
+                # process is still running but closed the pipe.
+                self.logger.warning("STDIN Send failed: closed PIPE")
+            elif exc.errno in (errno.EPIPE, errno.ESHUTDOWN) or isinstance(
+                exc, (BrokenPipeError, ConnectionResetError)
+            ):
+                self.logger.warning("STDIN Send failed: broken PIPE")
+            else:
+                await self._kill_proc_tree(process.pid)
+                process.kill()
+                raise
+        try:
+            process.stdin.close()  # type: ignore
+        except OSError as exc:
+            if exc.errno in (errno.EINVAL, errno.EPIPE, errno.ESHUTDOWN):
+                pass  # PIPE already closed
+            else:
+                process.kill()
+                raise
+
     # noinspection PyMethodOverriding
     async def _execute_async(  # type: ignore  # pylint: disable=arguments-differ
         self,
@@ -224,6 +400,11 @@ class Subprocess(api.ExecHelper):
         cwd: CwdT = None,
         env: EnvT = None,
         env_patch: EnvT = None,
+        cpu_affinity: CpuAffinityT = None,
+        nice: "typing.Optional[int]" = None,
+        ionice: IoNiceT = None,
+        rlimits: RLimitsT = None,
+        concurrent_stdin: bool = False,
         **kwargs: typing.Any,
     ) -> SubprocessExecuteAsyncResult:
         """Execute command in async mode and return Popen with IO objects.
@@ -244,6 +425,16 @@ class Subprocess(api.ExecHelper):
         :type env: typing.Optional[typing.Mapping[typing.Union[str, bytes], typing.Union[str, bytes]]]
         :param env_patch: Defines the environment variables to ADD for the new process.
         :type env_patch: typing.Optional[typing.Mapping[typing.Union[str, bytes], typing.Union[str, bytes]]]
+        :param cpu_affinity: CPUs allowed for the process
+        :type cpu_affinity: typing.Optional[typing.Iterable[int]]
+        :param nice: niceness increment for the process
+        :type nice: typing.Optional[int]
+        :param ionice: IO scheduling class or class and priority level (psutil.IOPRIO_CLASS_* constants)
+        :type ionice: typing.Optional[typing.Union[int, typing.Tuple[int, int]]]
+        :param rlimits: resource limits for the process: resource.RLIMIT_* -> (soft, hard)
+        :type rlimits: typing.Optional[typing.Mapping[int, typing.Tuple[int, int]]]
+        :param concurrent_stdin: do not write STDIN data and keep pipe open: data is written by `_exec_command`
+        :type concurrent_stdin: bool
         :param kwargs: additional parameters for call.
         :type kwargs: typing.Any
         :return: Tuple with control interface and file-like objects for STDIN/STDERR/STDOUT
@@ -258,13 +449,18 @@ class Subprocess(api.ExecHelper):
                     ]
                 )
         :raises OSError: impossible to process STDIN
+        .. versionchanged:: 7.1.0 cpu_affinity, nice, ionice and rlimits
+        .. versionchanged:: 7.1.0 concurrent_stdin
         """
         started = datetime.datetime.utcnow()
 
-        if env_patch is not None:
-            # make mutable copy
-            env = dict(copy.deepcopy(os.environ) if env is None else copy.deepcopy(env))  # type: ignore
-            env.update(env_patch)  # type: ignore
+        env = self.__env_cache.get(env, env_patch)  # type: ignore
+        popen_kw: "typing.Dict[str, typing.Any]" = dict(_subprocess_helpers.subprocess_kw)
+        preexec_fn: "typing.Optional[typing.Callable[[], None]]" = _subprocess_helpers.scheduling_preexec_fn(
+            cpu_affinity=cpu_affinity, nice=nice, rlimits=rlimits
+        )
+        if preexec_fn is not None:
+            popen_kw["preexec_fn"] = preexec_fn
 
         process: asyncio.subprocess.Process = await asyncio.create_subprocess_shell(  # pylint: disable=no-member
             cmd=self._prepare_command(cmd=command, chroot_path=chroot_path),
@@ -274,40 +470,19 @@ class Subprocess(api.ExecHelper):
             cwd=cwd,
             env=env,
             universal_newlines=False,
-            **_subprocess_helpers.subprocess_kw,
+            **popen_kw,
         )
+        try:
+            _subprocess_helpers.apply_scheduling(process.pid, ionice=ionice)  # psutil is not safe in forked child
+        except BaseException:
+            await self._kill_proc_tree(process.pid)
+            await process.communicate()  # Reap process and close pipes
+            raise
 
-        if stdin is None:
+        if stdin is None or concurrent_stdin:
             process_stdin: "typing.Optional[asyncio.StreamWriter]" = process.stdin
         else:
-            if isinstance(stdin, str):
-                stdin = stdin.encode(encoding="utf-8")
-            elif isinstance(stdin, bytearray):
-                stdin = bytes(stdin)
-            try:
-                process.stdin.write(stdin)  # type: ignore
-                await process.stdin.drain()  # type: ignore
-            except OSError as exc:
-                if exc.errno == errno.EINVAL:
-                    # bpo-19612, bpo-30418: On Windows, stdin.write() fails
-                    # with EINVAL if the child process exited or if the child
-                    # process is still running but closed the pipe.
-                    self.logger.warning("STDIN Send failed: closed PIPE")
-                elif exc.errno in (errno.EPIPE, errno.ESHUTDOWN):
-                    self.logger.warning("STDIN Send failed: broken PIPE")
-                else:
-                    _subprocess_helpers.kill_proc_tree(process.pid)
-                    process.kill()
-                    raise
-            try:
-                process.stdin.close()  # type: ignore
-            except OSError as exc:
-                if exc.errno in (errno.EINVAL, errno.EPIPE, errno.ESHUTDOWN):
-                    pass  # PIPE already closed
-                else:
-                    process.kill()
-                    raise
-
+            await self._write_stdin(process, stdin)
             process_stdin = None
 
         # noinspection PyArgumentList
@@ -332,6 +507,10 @@ class Subprocess(api.ExecHelper):
         cwd: CwdT = None,
         env: EnvT = None,
         env_patch: EnvT = None,
+        cpu_affinity: CpuAffinityT = None,
+        nice: "typing.Optional[int]" = None,
+        ionice: IoNiceT = None,
+        rlimits: RLimitsT = None,
         **kwargs: typing.Any,
     ) -> exec_result.ExecResult:
         """Execute command and wait for return code.
@@ -357,6 +536,14 @@ class Subprocess(api.ExecHelper):
         :type env: typing.Optional[typing.Mapping[typing.Union[str, bytes], typing.Union[str, bytes]]]
         :param env_patch: Defines the environment variables to ADD for the new process.
         :type env_patch: typing.Optional[typing.Mapping[typing.Union[str, bytes], typing.Union[str, bytes]]]
+        :param cpu_affinity: CPUs allowed for the process
+        :type cpu_affinity: typing.Optional[typing.Iterable[int]]
+        :param nice: niceness increment for the process
+        :type nice: typing.Optional[int]
+        :param ionice: IO scheduling class or class and priority level (psutil.IOPRIO_CLASS_* constants)
+        :type ionice: typing.Optional[typing.Union[int, typing.Tuple[int, int]]]
+        :param rlimits: resource limits for the process: resource.RLIMIT_* -> (soft, hard)
+        :type rlimits: typing.Optional[typing.Mapping[int, typing.Tuple[int, int]]]
         :param kwargs: additional parameters for call.
         :type kwargs: typing.Any
         :return: Execution result
@@ -366,7 +553,11 @@ class Subprocess(api.ExecHelper):
         .. versionchanged:: 1.2.0 default timeout 1 hour
         .. versionchanged:: 2.1.0 Allow parallel calls
         .. versionchanged:: 7.0.0 Allow command as list of arguments. Command will be joined with components escaping.
+        .. versionchanged:: 7.1.0 cpu_affinity, nice, ionice and rlimits
+        .. versionchanged:: 7.1.0 STDIN is written concurrently with output reading
         """
+        if stdin is not None:
+            kwargs.setdefault("concurrent_stdin", True)
         return await super().execute(
             command=command,
             verbose=verbose,
@@ -378,6 +569,10 @@ class Subprocess(api.ExecHelper):
             cwd=cwd,
             env=env,
             env_patch=env_patch,
+            cpu_affinity=cpu_affinity,
+            nice=nice,
+            ionice=ionice,
+            rlimits=rlimits,
             **kwargs,
         )
 
@@ -458,6 +653,10 @@ class Subprocess(api.ExecHelper):
         cwd: CwdT = None,
         env: EnvT = None,
         env_patch: EnvT = None,
+        cpu_affinity: CpuAffinityT = None,
+        nice: "typing.Optional[int]" = None,
+        ionice: IoNiceT = None,
+        rlimits: RLimitsT = None,
         exception_class: CalledProcessErrorSubClassT = exceptions.CalledProcessError,
         **kwargs: typing.Any,
     ) -> exec_result.ExecResult:
@@ -490,6 +689,14 @@ class Subprocess(api.ExecHelper):
         :type env: typing.Optional[typing.Mapping[typing.Union[str, bytes], typing.Union[str, bytes]]]
         :param env_patch: Defines the environment variables to ADD for the new process.
         :type env_patch: typing.Optional[typing.Mapping[typing.Union[str, bytes], typing.Union[str, bytes]]]
+        :param cpu_affinity: CPUs allowed for the process
+        :type cpu_affinity: typing.Optional[typing.Iterable[int]]
+        :param nice: niceness increment for the process
+        :type nice: typing.Optional[int]
+        :param ionice: IO scheduling class or class and priority level (psutil.IOPRIO_CLASS_* constants)
+        :type ionice: typing.Optional[typing.Union[int, typing.Tuple[int, int]]]
+        :param rlimits: resource limits for the process: resource.RLIMIT_* -> (soft, hard)
+        :type rlimits: typing.Optional[typing.Mapping[int, typing.Tuple[int, int]]]
         :param exception_class: Exception class for errors. Subclass of CalledProcessError is mandatory.
         :type exception_class: typing.Type[exceptions.CalledProcessError]
         :param kwargs: additional parameters for call.
@@ -502,6 +709,7 @@ class Subprocess(api.ExecHelper):
         .. versionchanged:: 1.2.0 default timeout 1 hour
         .. versionchanged:: 3.2.0 Exception class can be substituted
         .. versionchanged:: 3.4.0 Expected is not optional, defaults os dependent
+        .. versionchanged:: 7.1.0 cpu_affinity, nice, ionice and rlimits
         """
         return await super().check_call(
             command=command,
@@ -517,6 +725,10 @@ class Subprocess(api.ExecHelper):
             cwd=cwd,
             env=env,
             env_patch=env_patch,
+            cpu_affinity=cpu_affinity,
+            nice=nice,
+            ionice=ionice,
+            rlimits=rlimits,
             exception_class=exception_class,
             **kwargs,
         )
@@ -0,0 +1,401 @@
+#    Copyright 2018 - 2020 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Pool of authenticated SSH connections and jump host connections shared between SSHClient instances.
+
+.. versionadded:: 7.1.0
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import collections
+import logging
+import threading
+import time
+import typing
+
+# External Dependencies
+import paramiko
+
+if typing.TYPE_CHECKING:
+    # Package Implementation
+    from exec_helpers import ssh_auth
+
+__all__ = ("SSHConnectionPool", "ConnectionKey", "SharedJumpHosts")
+
+LOGGER: logging.Logger = logging.getLogger(__name__)
+
+
+class ConnectionKey(typing.NamedTuple):
+    """Identity of SSH connection: connections with the same key are interchangeable."""
+
+    hostname: str
+    port: int
+    auth: ssh_auth.SSHAuth
+    proxy: typing.Hashable
+
+
+class _IdleConnection(typing.NamedTuple):
+    """Connection waiting for reuse."""
+
+    client: paramiko.SSHClient
+    released: float
+
+
+def _is_alive(client: paramiko.SSHClient) -> bool:
+    """Check, that connection is usable.
+
+    :param client: SSH client
+    :type client: paramiko.SSHClient
+    :return: transport is active and authenticated
+    :rtype: bool
+    """
+    transport: typing.Optional[paramiko.Transport] = client.get_transport()
+    return transport is not None and transport.is_active() and transport.is_authenticated()
+
+
+def _close(connections: typing.Iterable[paramiko.SSHClient]) -> None:
+    """Close connections outside of lock.
+
+    :param connections: connections to close
+    :type connections: typing.Iterable[paramiko.SSHClient]
+    """
+    for client in connections:
+        # noinspection PyBroadException
+        try:
+            client.close()
+        except Exception:  # pragma: no cover
+            LOGGER.debug("Could not close shared ssh connection", exc_info=True)
+
+
+class SSHConnectionPool:
+    """Thread-safe pool of idle authenticated SSH connections.
+
+    Connection is taken from pool by `SSHClient` on connect and returned on close.
+    Liveness is checked on checkout, connections idle longer than `idle_timeout` are closed,
+    amount of idle connections per host is limited by `max_per_host` (the oldest are closed first).
+
+    .. versionadded:: 7.1.0
+    """
+
+    __slots__ = (
+        "__lock",
+        "__idle",
+        "__max_per_host",
+        "__idle_timeout",
+        "__hits",
+        "__misses",
+        "__evictions",
+    )
+
+    __default: typing.Optional[SSHConnectionPool] = None
+    __default_lock = threading.Lock()
+
+    def __init__(self, max_per_host: int = 4, idle_timeout: typing.Union[int, float] = 300) -> None:
+        """Thread-safe pool of idle authenticated SSH connections.
+
+        :param max_per_host: maximum amount of idle connections per (hostname, port)
+        :type max_per_host: int
+        :param idle_timeout: time in seconds to keep idle connection
+        :type idle_timeout: typing.Union[int, float]
+        """
+        self.__lock = threading.Lock()
+        self.__idle: typing.Dict[ConnectionKey, typing.Deque[_IdleConnection]] = {}
+        self.__max_per_host: int = max_per_host
+        self.__idle_timeout: typing.Union[int, float] = idle_timeout
+        self.__hits: int = 0
+        self.__misses: int = 0
+        self.__evictions: int = 0
+
+    @classmethod
+    def default(cls) -> SSHConnectionPool:
+        """Process-wide pool instance.
+
+        :return: pool instance created on first call
+        :rtype: SSHConnectionPool
+        """
+        with cls.__default_lock:
+            if SSHConnectionPool.__default is None:
+                SSHConnectionPool.__default = SSHConnectionPool()
+            return SSHConnectionPool.__default
+
+    @property
+    def max_per_host(self) -> int:
+        """Maximum amount of idle connections per (hostname, port).
+
+        :rtype: int
+        """
+        return self.__max_per_host
+
+    @property
+    def idle_timeout(self) -> typing.Union[int, float]:
+        """Time in seconds to keep idle connection.
+
+        :rtype: typing.Union[int, float]
+        """
+        return self.__idle_timeout
+
+    @property
+    def hits(self) -> int:
+        """Amount of connections taken from pool.
+
+        :rtype: int
+        """
+        return self.__hits
+
+    @property
+    def misses(self) -> int:
+        """Amount of checkouts without live idle connection (new connection is opened).
+
+        :rtype: int
+        """
+        return self.__misses
+
+    @property
+    def evictions(self) -> int:
+        """Amount of idle connections closed: dead, expired or over limit.
+
+        :rtype: int
+        """
+        return self.__evictions
+
+    def __len__(self) -> int:
+        """Amount of idle connections.
+
+        :return: amount of idle connections (including expired and not closed yet)
+        :rtype: int
+        """
+        with self.__lock:
+            return sum(len(connections) for connections in self.__idle.values())
+
+    def __repr__(self) -> str:
+        """Representation for debug purposes.
+
+        :return: pool statistics
+        :rtype: str
+        """
+        return (
+            f"<{self.__class__.__name__}(max_per_host={self.max_per_host}, idle_timeout={self.idle_timeout}) "
+            f"idle={len(self)} hits={self.hits} misses={self.misses} evictions={self.evictions}>"
+        )
+
+    def __expired(self, now: float) -> typing.List[paramiko.SSHClient]:
+        """Pop idle connections with expired idle timeout (lock should be acquired).
+
+        :param now: current monotonic time
+        :type now: float
+        :return: connections to close
+        :rtype: typing.List[paramiko.SSHClient]
+        """
+        expired: typing.List[paramiko.SSHClient] = []
+        for key in tuple(self.__idle):
+            connections = self.__idle[key]
+            while connections and now - connections[0].released >= self.__idle_timeout:
+                expired.append(connections.popleft().client)
+            if not connections:
+                del self.__idle[key]
+        self.__evictions += len(expired)
+        return expired
+
+    def checkout(
+        self,
+        key: ConnectionKey,
+        connect: typing.Callable[[], paramiko.SSHClient],
+    ) -> paramiko.SSHClient:
+        """Get live connection from pool or open new one.
+
+        :param key: connection identity
+        :type key: ConnectionKey
+        :param connect: callable to open new connection on pool miss (called outside of lock)
+        :type connect: typing.Callable[[], paramiko.SSHClient]
+        :return: connected SSH client owned by caller until checkin
+        :rtype: paramiko.SSHClient
+        """
+        to_close: typing.List[paramiko.SSHClient] = []
+        try:
+            with self.__lock:
+                to_close.extend(self.__expired(time.monotonic()))
+                connections = self.__idle.get(key, None)
+                while connections:
+                    client: paramiko.SSHClient = connections.pop().client  # most recently used first
+                    if _is_alive(client):
+                        self.__hits += 1
+                        return client
+                    self.__evictions += 1
+                    to_close.append(client)
+                self.__idle.pop(key, None)
+                self.__misses += 1
+        finally:
+            _close(to_close)
+        return connect()
+
+    def checkin(self, key: ConnectionKey, client: paramiko.SSHClient) -> None:
+        """Return connection to pool. Dead connections are closed.
+
+        :param key: connection identity
+        :type key: ConnectionKey
+        :param client: connection received by checkout
+        :type client: paramiko.SSHClient
+        """
+        if not _is_alive(client):
+            _close((client,))
+            return
+        to_close: typing.List[paramiko.SSHClient] = []
+        with self.__lock:
+            now: float = time.monotonic()
+            to_close.extend(self.__expired(now))
+            self.__idle.setdefault(key, collections.deque()).append(_IdleConnection(client=client, released=now))
+            host_idle: typing.List[typing.Tuple[float, ConnectionKey]] = sorted(
+                (connection.released, idle_key)
+                for idle_key, connections in self.__idle.items()
+                if (idle_key.hostname, idle_key.port) == (key.hostname, key.port)
+                for connection in connections
+            )
+            for _, idle_key in host_idle[: max(len(host_idle) - self.__max_per_host, 0)]:
+                to_close.append(self.__idle[idle_key].popleft().client)
+                self.__evictions += 1
+                if not self.__idle[idle_key]:
+                    del self.__idle[idle_key]
+        _close(to_close)
+
+    def evict_idle(self) -> None:
+        """Close connections with expired idle timeout."""
+        with self.__lock:
+            expired: typing.List[paramiko.SSHClient] = self.__expired(time.monotonic())
+        _close(expired)
+
+    def clear(self) -> None:
+        """Close all idle connections. Counters are not reset."""
+        with self.__lock:
+            idle: typing.List[paramiko.SSHClient] = [
+                connection.client for connections in self.__idle.values() for connection in connections
+            ]
+            self.__idle.clear()
+        _close(idle)
+
+
+class _SharedJump:
+    """Jump host connection used by targets connected through it."""
+
+    __slots__ = ("lock", "client", "refs")
+
+    def __init__(self) -> None:
+        """Jump host connection used by targets connected through it."""
+        self.lock = threading.Lock()  # Held during connect: the only connection is opened for all waiting targets
+        self.client: typing.Optional[paramiko.SSHClient] = None
+        self.refs: int = 0
+
+
+class SharedJumpHosts:
+    """Thread-safe registry of jump host (ProxyJump) connections shared by targets behind them.
+
+    Targets with the same route to jump host (ssh configs and credentials of each hop) open `direct-tcpip` channels
+    over single jump host connection. Connection is reference counted: it is closed when the last target is closed.
+    Dead connection is replaced by new one on the next acquire (targets connected over dead one are dead too).
+
+    .. versionadded:: 7.1.0
+    """
+
+    __slots__ = ("__lock", "__hosts")
+
+    __default: typing.Optional[SharedJumpHosts] = None
+    __default_lock = threading.Lock()
+
+    def __init__(self) -> None:
+        """Thread-safe registry of jump host (ProxyJump) connections shared by targets behind them."""
+        self.__lock = threading.Lock()
+        self.__hosts: typing.Dict[typing.Hashable, _SharedJump] = {}
+
+    @classmethod
+    def default(cls) -> SharedJumpHosts:
+        """Process-wide registry instance.
+
+        :return: registry instance created on first call
+        :rtype: SharedJumpHosts
+        """
+        with cls.__default_lock:
+            if SharedJumpHosts.__default is None:
+                SharedJumpHosts.__default = SharedJumpHosts()
+            return SharedJumpHosts.__default
+
+    def __len__(self) -> int:
+        """Amount of jump hosts in use.
+
+        :return: amount of routes with at least one target
+        :rtype: int
+        """
+        with self.__lock:
+            return len(self.__hosts)
+
+    def refs(self, route: typing.Hashable) -> int:
+        """Amount of targets using jump host connection.
+
+        :param route: jump host route
+        :type route: typing.Hashable
+        :return: amount of acquired and not released references
+        :rtype: int
+        """
+        with self.__lock:
+            shared: typing.Optional[_SharedJump] = self.__hosts.get(route, None)
+            return shared.refs if shared is not None else 0
+
+    def acquire(
+        self,
+        route: typing.Hashable,
+        connect: typing.Callable[[], paramiko.SSHClient],
+    ) -> paramiko.SSHClient:
+        """Get live jump host connection: connect on first usage or if connection is dead.
+
+        :param route: jump host route (ssh configs and credentials of each hop)
+        :type route: typing.Hashable
+        :param connect: callable to open new connection (called once for all targets waiting for it)
+        :type connect: typing.Callable[[], paramiko.SSHClient]
+        :return: connected SSH client, should be released by target on close
+        :rtype: paramiko.SSHClient
+        """
+        with self.__lock:
+            shared: _SharedJump = self.__hosts.setdefault(route, _SharedJump())
+            shared.refs += 1
+        try:
+            with shared.lock:
+                if shared.client is None or not _is_alive(shared.client):
+                    if shared.client is not None:
+                        LOGGER.debug(f"Jump host connection {route!r} is dead, reconnecting")
+                        _close((shared.client,))
+                        shared.client = None
+                    shared.client = connect()
+                return shared.client
+        except BaseException:
+            self.release(route)
+            raise
+
+    def release(self, route: typing.Hashable) -> None:
+        """Release reference to jump host connection: the last reference closes connection.
+
+        :param route: jump host route
+        :type route: typing.Hashable
+        """
+        with self.__lock:
+            shared: typing.Optional[_SharedJump] = self.__hosts.get(route, None)
+            if shared is None:  # pragma: no cover
+                return
+            shared.refs -= 1
+            if shared.refs > 0:
+                return
+            del self.__hosts[route]
+        with shared.lock:
+            client, shared.client = shared.client, None
+        if client is not None:
+            _close((client,))
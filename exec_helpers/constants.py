@@ -22,3 +22,24 @@ HOUR: int = 60 * MINUTE
 
 # Default command timeout
 DEFAULT_TIMEOUT: int = 1 * HOUR
+
+# Time between SIGTERM and SIGKILL on process stop
+DEFAULT_KILL_GRACE_PERIOD: float = 1.0
+
+# Maximum time to read output after process exit (output pipes can be held open by its background children)
+DEFAULT_DRAIN_TIMEOUT: float = 0.1
+
+# Maximum size of single read of command output
+READ_CHUNK_SIZE: int = 65536
+
+# Maximum amount of simultaneously open sessions (channels) per SSH connection: OpenSSH `MaxSessions` default
+DEFAULT_SSH_MAX_SESSIONS: int = 10
+
+# Amount of SSH connection retries on connection errors (authentication errors are not retried)
+DEFAULT_SSH_CONNECT_RETRIES: int = 2
+
+# Timeout for TCP connect, SSH banner and authentication of each host in `SSHClient.connect_many`
+DEFAULT_SSH_CONNECT_TIMEOUT: int = 10
+
+# Maximum amount of threads opening channels for command execution on many remotes (channel open waits for reply)
+SSH_START_WORKERS: int = 16
@@ -21,12 +21,14 @@ from __future__ import annotations
 # Standard Library
 import contextlib
 import datetime
+import io
 import json
 import logging
 import threading
 import typing
 
 # Package Implementation
+from exec_helpers import constants
 from exec_helpers import exceptions
 from exec_helpers import proc_enums
 from exec_helpers.proc_enums import ExitCodeT
@@ -63,13 +65,14 @@ if typing.TYPE_CHECKING:
     # noinspection PyPackageRequirements
     import logwrap
 
-__all__ = ("ExecResult", "OptionalStdinT")
+__all__ = ("ExecResult", "PipelineResult", "ResourceUsage", "OptionalStdinT")
 
 LOGGER: logging.Logger = logging.getLogger(__name__)
 
 OptionalStdinT = typing.Union[bytes, str, bytearray, None]
 _OptBytesIterableT = typing.Optional[typing.Iterable[bytes]]
 _OptLoggerT = typing.Optional[logging.Logger]
+_OptChunkCallbackT = typing.Optional[typing.Callable[[bytes], typing.Any]]
 
 
 def _get_str_from_bin(src: bytearray) -> str:
@@ -94,6 +97,21 @@ def _get_bytearray_from_array(src: typing.Iterable[bytes]) -> bytearray:
     return bytearray(b"".join(src))
 
 
+def _join_raw(lines: typing.Tuple[bytes, ...], raw: bytearray) -> typing.Tuple[bytes, ...]:
+    """Split raw data to lines and append to already split lines.
+
+    :param lines: already split lines
+    :type lines: typing.Tuple[bytes, ...]
+    :param raw: raw data received after lines
+    :type raw: bytearray
+    :return: all lines
+    :rtype: typing.Tuple[bytes, ...]
+    """
+    if lines and not lines[-1].endswith(b"\n"):  # Not terminated line continues in raw data
+        return lines[:-1] + tuple(io.BytesIO(lines[-1] + raw))
+    return lines + tuple(io.BytesIO(raw))
+
+
 class LinesAccessProxy:
     """Lines access proxy."""
 
@@ -163,6 +181,60 @@ class LinesAccessProxy:
         return f"{self.__class__.__name__}(data={self._data!r})"
 
 
+class ResourceUsage(typing.NamedTuple):
+    """Resource usage of executed command.
+
+    .. versionadded:: 7.1.0
+    """
+
+    user_time: float
+    """User CPU time in seconds."""
+    system_time: float
+    """System CPU time in seconds."""
+    max_rss: int
+    """Maximum resident set size in KiB."""
+    block_input: int
+    """Block input operations."""
+    block_output: int
+    """Block output operations."""
+    voluntary_switches: int
+    """Voluntary context switches."""
+    involuntary_switches: int
+    """Involuntary context switches."""
+
+    def __str__(self) -> str:
+        """Representation for logging.
+
+        :return: brief information
+        :rtype: str
+        """
+        return (
+            f"user={self.user_time:.3f}s sys={self.system_time:.3f}s max_rss={self.max_rss}KiB "
+            f"blocks_in={self.block_input} blocks_out={self.block_output} "
+            f"ctx_switches={self.voluntary_switches}/{self.involuntary_switches}"
+        )
+
+    def __add__(self, other: typing.Any) -> ResourceUsage:  # type: ignore
+        """Combined usage of several commands (maximum RSS is maximum of both).
+
+        :param other: other ResourceUsage instance
+        :type other: typing.Any
+        :return: combined resource usage
+        :rtype: ResourceUsage
+        """
+        if not isinstance(other, ResourceUsage):
+            return NotImplemented
+        return ResourceUsage(
+            user_time=self.user_time + other.user_time,
+            system_time=self.system_time + other.system_time,
+            max_rss=max(self.max_rss, other.max_rss),
+            block_input=self.block_input + other.block_input,
+            block_output=self.block_output + other.block_output,
+            voluntary_switches=self.voluntary_switches + other.voluntary_switches,
+            involuntary_switches=self.involuntary_switches + other.involuntary_switches,
+        )
+
+
 class ExecResult:
     """Execution result."""
 
@@ -171,6 +243,8 @@ class ExecResult:
         "__stdin",
         "_stdout",
         "_stderr",
+        "_stdout_raw",
+        "_stderr_raw",
         "__exit_code",
         "__timestamp",
         "_stdout_str",
@@ -180,6 +254,7 @@ class ExecResult:
         "__stdout_lock",
         "__stderr_lock",
         "__started",
+        "__rusage",
     ]
 
     def __init__(
@@ -191,6 +266,7 @@ class ExecResult:
         exit_code: ExitCodeT = proc_enums.INVALID,
         *,
         started: typing.Optional[datetime.datetime] = None,
+        rusage: typing.Optional[ResourceUsage] = None,
     ) -> None:
         """Command execution result.
 
@@ -206,6 +282,10 @@ class ExecResult:
         :type exit_code: typing.Union[int, proc_enums.ExitCodes]
         :param started: Timestamp of command start
         :type started: typing.Optional[datetime.datetime]
+        :param rusage: Resource usage of command
+        :type rusage: typing.Optional[ResourceUsage]
+
+        .. versionchanged:: 7.1.0 rusage
         """
         self.__stdout_lock = threading.RLock()
         self.__stderr_lock = threading.RLock()
@@ -228,6 +308,11 @@ class ExecResult:
         else:
             self._stderr = ()
 
+        # Data received in bulk mode: split to lines only on lines access
+        self._stdout_raw = bytearray()
+        self._stderr_raw = bytearray()
+
+        self.__rusage: typing.Optional[ResourceUsage] = rusage
         self.__exit_code: ExitCodeT = proc_enums.INVALID
         self.__timestamp: typing.Optional[datetime.datetime] = None
         self.exit_code = exit_code
@@ -294,6 +379,34 @@ class ExecResult:
             return _get_str_from_bin(_get_bytearray_from_array(data))
         return LinesAccessProxy(data)[:3, ..., -3:]
 
+    @classmethod
+    def _get_brief_from_bin(cls, data: bytearray) -> str:
+        """Get brief output from not split data: only 3 first and 3 last lines are split.
+
+        :param data: source to process
+        :type data: bytearray
+        :return: brief from source
+        :rtype: str
+
+        .. versionadded:: 7.1.0
+        """
+        ends: typing.List[int] = []
+        pos: int = 0
+        while len(ends) < 8:
+            idx: int = data.find(b"\n", pos)
+            if idx < 0:
+                break
+            pos = idx + 1
+            ends.append(pos)
+        if len(ends) + (pos < len(data)) <= 7:
+            return _get_str_from_bin(data)
+        start: int = len(data) - 1 if data.endswith(b"\n") else len(data)
+        for _ in range(3):
+            start = data.rfind(b"\n", 0, start)
+        head: typing.List[bytes] = list(io.BytesIO(data[: ends[2]]))  # noqa: E203
+        tail: typing.List[bytes] = list(io.BytesIO(data[start + 1 :]))  # noqa: E203
+        return LinesAccessProxy(head + [b""] + tail)[:3, ..., -3:]
+
     @property
     def cmd(self) -> str:
         """Executed command.
@@ -318,8 +431,14 @@ class ExecResult:
 
         :return: STDOUT as tuple of binary strings
         :rtype: typing.Tuple[bytes, ...]
+
+        .. versionchanged:: 7.1.0 data received in bulk mode is split to lines on first access
         """
-        return self._stdout
+        with self.stdout_lock:
+            if self._stdout_raw:
+                self._stdout = _join_raw(self._stdout, self._stdout_raw)
+                self._stdout_raw = bytearray()
+            return self._stdout
 
     @property
     def stderr(self) -> typing.Tuple[bytes, ...]:
@@ -327,8 +446,14 @@ class ExecResult:
 
         :return: STDERR as tuple of binary strings
         :rtype: typing.Tuple[bytes, ...]
+
+        .. versionchanged:: 7.1.0 data received in bulk mode is split to lines on first access
         """
-        return self._stderr
+        with self.stderr_lock:
+            if self._stderr_raw:
+                self._stderr = _join_raw(self._stderr, self._stderr_raw)
+                self._stderr_raw = bytearray()
+            return self._stderr
 
     @staticmethod
     def _poll_stream(
@@ -380,7 +505,7 @@ class ExecResult:
 
         with self.stdout_lock:
             self._stdout_str = self._stdout_brief = None
-            self._stdout += tuple(self._poll_stream(src, log, verbose))
+            self._stdout = self.stdout + tuple(self._poll_stream(src, log, verbose))
 
     def read_stderr(
         self,
@@ -407,7 +532,112 @@ class ExecResult:
 
         with self.stderr_lock:
             self._stderr_str = self._stderr_brief = None
-            self._stderr += tuple(self._poll_stream(src, log, verbose))
+            self._stderr = self.stderr + tuple(self._poll_stream(src, log, verbose))
+
+    def append_stdout(self, data: typing.Union[bytes, bytearray, memoryview]) -> None:
+        """Append raw STDOUT data. Data is split to lines only if lines are accessed.
+
+        :param data: raw data
+        :type data: typing.Union[bytes, bytearray, memoryview]
+        :raises RuntimeError: Exit code is already received
+
+        .. versionadded:: 7.1.0
+        """
+        if self.timestamp:
+            raise RuntimeError("Final exit code received.")
+
+        with self.stdout_lock:
+            self._stdout_str = self._stdout_brief = None
+            self._stdout_raw += data
+
+    def append_stderr(self, data: typing.Union[bytes, bytearray, memoryview]) -> None:
+        """Append raw STDERR data. Data is split to lines only if lines are accessed.
+
+        :param data: raw data
+        :type data: typing.Union[bytes, bytearray, memoryview]
+        :raises RuntimeError: Exit code is already received
+
+        .. versionadded:: 7.1.0
+        """
+        if self.timestamp:
+            raise RuntimeError("Final exit code received.")
+
+        with self.stderr_lock:
+            self._stderr_str = self._stderr_brief = None
+            self._stderr_raw += data
+
+    @staticmethod
+    def _read_chunks(
+        src: typing.IO[bytes],
+        append: typing.Callable[[memoryview], None],
+        callback: _OptChunkCallbackT = None,
+    ) -> None:
+        """Read file-like object by fixed size chunks until EOF.
+
+        Chunks are read into the same preallocated buffer (`readinto`, if supported).
+
+        :param src: source
+        :type src: typing.IO[bytes]
+        :param append: target for data read
+        :type append: typing.Callable[[memoryview], None]
+        :param callback: callback for each chunk read
+        :type callback: typing.Optional[typing.Callable[[bytes], typing.Any]]
+        """
+        buffer: memoryview = memoryview(bytearray(constants.READ_CHUNK_SIZE))
+        readinto: typing.Optional[typing.Callable[[memoryview], typing.Optional[int]]] = getattr(src, "readinto", None)
+        with contextlib.suppress(IOError):
+            while True:
+                if readinto is not None:
+                    size: typing.Optional[int] = readinto(buffer)
+                else:
+                    chunk: bytes = src.read(constants.READ_CHUNK_SIZE)
+                    size = len(chunk)
+                    buffer[:size] = chunk
+                if not size:
+                    return
+                append(buffer[:size])
+                if callback is not None:
+                    callback(bytes(buffer[:size]))
+
+    def read_stdout_chunks(
+        self, src: typing.Optional[typing.IO[bytes]] = None, callback: _OptChunkCallbackT = None
+    ) -> None:
+        """Read STDOUT file-like object until EOF by fixed size chunks without splitting to lines.
+
+        Lines are split only on lines access, so this mode is efficient for binary and not line-oriented output.
+
+        :param src: source
+        :type src: typing.Optional[typing.IO[bytes]]
+        :param callback: callback for each chunk read
+        :type callback: typing.Optional[typing.Callable[[bytes], typing.Any]]
+        :raises RuntimeError: Exit code is already received
+
+        .. versionadded:: 7.1.0
+        """
+        if not src:
+            return
+        if self.timestamp:
+            raise RuntimeError("Final exit code received.")
+        self._read_chunks(src, self.append_stdout, callback)
+
+    def read_stderr_chunks(
+        self, src: typing.Optional[typing.IO[bytes]] = None, callback: _OptChunkCallbackT = None
+    ) -> None:
+        """Read STDERR file-like object until EOF by fixed size chunks without splitting to lines.
+
+        :param src: source
+        :type src: typing.Optional[typing.IO[bytes]]
+        :param callback: callback for each chunk read
+        :type callback: typing.Optional[typing.Callable[[bytes], typing.Any]]
+        :raises RuntimeError: Exit code is already received
+
+        .. versionadded:: 7.1.0
+        """
+        if not src:
+            return
+        if self.timestamp:
+            raise RuntimeError("Final exit code received.")
+        self._read_chunks(src, self.append_stderr, callback)
 
     @property
     def stdout_bin(self) -> bytearray:
@@ -419,7 +649,7 @@ class ExecResult:
         :rtype: bytearray
         """
         with self.stdout_lock:
-            return _get_bytearray_from_array(self.stdout)
+            return _get_bytearray_from_array(self._stdout) + self._stdout_raw
 
     @property
     def stderr_bin(self) -> bytearray:
@@ -429,7 +659,7 @@ class ExecResult:
         :rtype: bytearray
         """
         with self.stderr_lock:
-            return _get_bytearray_from_array(self.stderr)
+            return _get_bytearray_from_array(self._stderr) + self._stderr_raw
 
     @property
     def stdout_str(self) -> str:
@@ -464,7 +694,10 @@ class ExecResult:
         """
         with self.stdout_lock:
             if self._stdout_brief is None:
-                self._stdout_brief = self._get_brief(self.stdout)
+                if self._stdout_raw and not self._stdout:
+                    self._stdout_brief = self._get_brief_from_bin(self._stdout_raw)
+                else:
+                    self._stdout_brief = self._get_brief(self.stdout)
             return self._stdout_brief
 
     @property
@@ -476,7 +709,10 @@ class ExecResult:
         """
         with self.stderr_lock:
             if self._stderr_brief is None:
-                self._stderr_brief = self._get_brief(self.stderr)
+                if self._stderr_raw and not self._stderr:
+                    self._stderr_brief = self._get_brief_from_bin(self._stderr_raw)
+                else:
+                    self._stderr_brief = self._get_brief(self.stderr)
             return self._stderr_brief
 
     @property
@@ -542,6 +778,31 @@ class ExecResult:
         """
         return self.__started
 
+    @property
+    def rusage(self) -> typing.Optional[ResourceUsage]:
+        """Resource usage of command.
+
+        :return: resource usage, if collected
+        :rtype: typing.Optional[ResourceUsage]
+
+        .. versionadded:: 7.1.0
+        """
+        return self.__rusage
+
+    @rusage.setter
+    def rusage(self, new_val: typing.Optional[ResourceUsage]) -> None:
+        """Resource usage of command.
+
+        :param new_val: resource usage
+        :type new_val: typing.Optional[ResourceUsage]
+        :raises RuntimeError: Exit code is already received
+
+        .. versionadded:: 7.1.0
+        """
+        if self.timestamp:
+            raise RuntimeError("Exit code is already received.")
+        self.__rusage = new_val
+
     def __deserialize(self, fmt: str) -> typing.Any:
         """Deserialize stdout as data format.
 
@@ -656,6 +917,7 @@ class ExecResult:
             "stderr_lines",
             "stdout_json",
             "lock",
+            "rusage",
         ]
         if yaml is not None or ruamel_yaml is not None:
             content.append("stdout_yaml")
@@ -688,9 +950,11 @@ class ExecResult:
             started = f" started={self.started!r},"
         else:
             started = ""
+        rusage = f" rusage={self.rusage!r}," if self.rusage is not None else ""
         return (
             f"{self.__class__.__name__}("
-            f"cmd={self.cmd!r}, stdout={self.stdout!r}, stderr={self.stderr!r}, exit_code={self.exit_code!s},{started})"
+            f"cmd={self.cmd!r}, stdout={self.stdout!r}, stderr={self.stderr!r}, exit_code={self.exit_code!s},"
+            f"{started}{rusage})"
         )
 
     def __pretty_repr__(
@@ -712,6 +976,7 @@ class ExecResult:
         """
         next_indent = log_wrap.next_indent(indent)
         started = f"{'':<{next_indent}}started={self.started!r},\n" if self.started else ""
+        rusage = f"{'':<{next_indent}}rusage={self.rusage!s},\n" if self.rusage is not None else ""
         stdout = log_wrap.process_element(self.stdout, indent=next_indent, no_indent_start=True)
         stderr = log_wrap.process_element(self.stderr, indent=next_indent, no_indent_start=True)
         msg = (
@@ -721,6 +986,7 @@ class ExecResult:
             f"{'':<{next_indent}}stderr={stderr},\n"
             f"{'':<{next_indent}}exit_code={self.exit_code!s},\n"
             f"{started}"
+            f"{rusage}"
             f"{'':<{0 if no_indent_start else indent}})"
         )
         return msg
@@ -741,6 +1007,7 @@ class ExecResult:
         else:
             started = ""
             spent = ""
+        rusage = f"\trusage={self.rusage!s},\n" if self.rusage is not None else ""
         return (
             f"{self.__class__.__name__}(\n"
             f"\tcmd={self.cmd!r},\n"
@@ -749,7 +1016,7 @@ class ExecResult:
             f"\tstderr=\n"
             f"{self.stderr_brief!r}, \n"
             f"\texit_code={self.exit_code!s},\n"
-            f"{started}{spent})"
+            f"{started}{spent}{rusage})"
         )
 
     def __eq__(self, other: typing.Any) -> bool:
@@ -789,3 +1056,97 @@ class ExecResult:
         :rtype: int
         """
         return hash((self.__class__, self.cmd, self.stdin, self.stdout, self.stderr, self.exit_code))
+
+
+class PipelineResult(ExecResult):
+    """Execution result of processes pipeline.
+
+    STDOUT is the output of the last stage, STDERR is joined from all stages in order of stages,
+    exit code is the exit code of the last stage (as in shell without `pipefail`).
+
+    .. versionadded:: 7.1.0
+    """
+
+    __slots__ = ["__stages"]
+
+    def __init__(
+        self,
+        cmd: str,
+        stdin: OptionalStdinT = None,
+        stdout: _OptBytesIterableT = None,
+        stderr: _OptBytesIterableT = None,
+        exit_code: ExitCodeT = proc_enums.INVALID,
+        *,
+        started: typing.Optional[datetime.datetime] = None,
+        rusage: typing.Optional[ResourceUsage] = None,
+        stages: typing.Iterable[ExecResult] = (),
+    ) -> None:
+        """Execution result of processes pipeline.
+
+        :param cmd: command
+        :type cmd: str
+        :param stdin: string STDIN
+        :type stdin: typing.Union[bytes, str, bytearray, None]
+        :param stdout: binary STDOUT
+        :type stdout: typing.Optional[typing.Iterable[bytes]]
+        :param stderr: binary STDERR
+        :type stderr: typing.Optional[typing.Iterable[bytes]]
+        :param exit_code: Exit code. If integer - try to convert to BASH enum.
+        :type exit_code: typing.Union[int, proc_enums.ExitCodes]
+        :param started: Timestamp of command start
+        :type started: typing.Optional[datetime.datetime]
+        :param rusage: Resource usage of all stages
+        :type rusage: typing.Optional[ResourceUsage]
+        :param stages: results of pipeline stages
+        :type stages: typing.Iterable[ExecResult]
+        """
+        self.__stages: typing.Tuple[ExecResult, ...] = tuple(stages)
+        super().__init__(
+            cmd=cmd,
+            stdin=stdin,
+            stdout=stdout,
+            stderr=stderr,
+            exit_code=exit_code,
+            started=started,
+            rusage=rusage,
+        )
+
+    @property
+    def stages(self) -> typing.Tuple[ExecResult, ...]:
+        """Results of pipeline stages.
+
+        :return: per-stage results (stdout is available only for the last stage)
+        :rtype: typing.Tuple[ExecResult, ...]
+        """
+        return self.__stages
+
+    @property
+    def exit_codes(self) -> typing.Tuple[ExitCodeT, ...]:
+        """Exit codes of pipeline stages.
+
+        :return: per-stage exit codes
+        :rtype: typing.Tuple[typing.Union[int, proc_enums.ExitCodes], ...]
+        """
+        return tuple(stage.exit_code for stage in self.__stages)
+
+    def __dir__(self) -> typing.List[str]:
+        """Override dir for IDE and as source for getitem checks.
+
+        :return: list with public attributes and methods
+        :rtype: typing.List[str]
+        """
+        return super().__dir__() + ["stages", "exit_codes"]
+
+    def __repr__(self) -> str:
+        """Representation for debugging.
+
+        :return: full representation for debug purposes
+        :rtype: str
+        """
+        started = f" started={self.started!r}," if self.started else ""
+        rusage = f" rusage={self.rusage!r}," if self.rusage is not None else ""
+        return (
+            f"{self.__class__.__name__}("
+            f"cmd={self.cmd!r}, stdout={self.stdout!r}, stderr={self.stderr!r}, exit_code={self.exit_code!s},"
+            f"{started}{rusage} exit_codes={self.exit_codes!r},)"
+        )
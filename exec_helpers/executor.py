@@ -0,0 +1,183 @@
+#    Copyright 2018 - 2020 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Thread pool executor with saturation statistics.
+
+.. versionadded:: 7.1.0
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import concurrent.futures
+import threading
+import typing
+
+__all__ = ("HelperExecutor", "ExecutorFactoryT", "ExecutorArgT")
+
+ExecutorFactoryT = typing.Callable[[], concurrent.futures.Executor]
+ExecutorArgT = typing.Union[concurrent.futures.Executor, ExecutorFactoryT, None]
+
+
+class HelperExecutor(concurrent.futures.ThreadPoolExecutor):
+    """Thread pool executor with queue depth and active workers statistics.
+
+    :param max_workers: maximum amount of worker threads (None: ThreadPoolExecutor default)
+    :type max_workers: typing.Optional[int]
+    :param thread_name_prefix: prefix for worker threads names
+    :type thread_name_prefix: str
+
+    .. versionadded:: 7.1.0
+    """
+
+    __slots__ = ("__stat_lock", "__queue_depth", "__max_queue_depth", "__active_workers", "__completed")
+
+    def __init__(self, max_workers: typing.Optional[int] = None, thread_name_prefix: str = "") -> None:
+        """Thread pool executor with queue depth and active workers statistics."""
+        super().__init__(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self.__stat_lock = threading.Lock()
+        self.__queue_depth: int = 0
+        self.__max_queue_depth: int = 0
+        self.__active_workers: int = 0
+        self.__completed: int = 0
+
+    @property
+    def max_workers(self) -> int:
+        """Maximum amount of worker threads.
+
+        :rtype: int
+        """
+        return self._max_workers  # type: ignore
+
+    @property
+    def workers(self) -> int:
+        """Amount of started worker threads (busy and idle).
+
+        :rtype: int
+        """
+        return len(self._threads)  # type: ignore
+
+    @property
+    def active_workers(self) -> int:
+        """Amount of workers executing tasks right now.
+
+        :rtype: int
+        """
+        return self.__active_workers
+
+    @property
+    def queue_depth(self) -> int:
+        """Amount of submitted tasks waiting for free worker.
+
+        :rtype: int
+        """
+        return self.__queue_depth
+
+    @property
+    def max_queue_depth(self) -> int:
+        """Maximum observed amount of tasks waiting for free worker.
+
+        :rtype: int
+        """
+        return self.__max_queue_depth
+
+    @property
+    def completed(self) -> int:
+        """Amount of finished tasks (including failed).
+
+        :rtype: int
+        """
+        return self.__completed
+
+    @property
+    def saturated(self) -> bool:
+        """All workers are busy: new tasks will wait in queue.
+
+        :rtype: bool
+        """
+        return self.__active_workers >= self.max_workers
+
+    def __repr__(self) -> str:
+        """Representation for debug purposes.
+
+        :return: executor statistics
+        :rtype: str
+        """
+        return (
+            f"<{self.__class__.__name__}("
+            f"max_workers={self.max_workers}, "
+            f"thread_name_prefix={self._thread_name_prefix!r}"  # type: ignore
+            f") active_workers={self.active_workers} queue_depth={self.queue_depth} completed={self.completed}>"
+        )
+
+    def __run(self, fn: typing.Callable[..., typing.Any], args: typing.Any, kwargs: typing.Any) -> typing.Any:
+        """Execute task in worker thread with statistics update.
+
+        :param fn: callable to execute
+        :type fn: typing.Callable[..., typing.Any]
+        :param args: positional arguments for call
+        :type args: typing.Any
+        :param kwargs: keyword arguments for call
+        :type kwargs: typing.Any
+        :return: call result
+        :rtype: typing.Any
+        """
+        with self.__stat_lock:
+            self.__queue_depth -= 1
+            self.__active_workers += 1
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self.__stat_lock:
+                self.__active_workers -= 1
+                self.__completed += 1
+
+    def __on_done(self, future: concurrent.futures.Future[typing.Any]) -> None:
+        """Drop cancelled (never started) task from queue statistics.
+
+        :param future: finished future
+        :type future: concurrent.futures.Future[typing.Any]
+        """
+        if future.cancelled():
+            with self.__stat_lock:
+                self.__queue_depth -= 1
+
+    def submit(  # type: ignore  # pylint: disable=arguments-differ
+        self,
+        fn: typing.Callable[..., typing.Any],
+        *args: typing.Any,
+        **kwargs: typing.Any,
+    ) -> concurrent.futures.Future[typing.Any]:
+        """Submit callable for execution in worker thread.
+
+        :param fn: callable to execute
+        :type fn: typing.Callable[..., typing.Any]
+        :param args: positional arguments for call
+        :type args: typing.Any
+        :param kwargs: keyword arguments for call
+        :type kwargs: typing.Any
+        :return: future for call result
+        :rtype: concurrent.futures.Future[typing.Any]
+        """
+        with self.__stat_lock:
+            self.__queue_depth += 1
+            self.__max_queue_depth = max(self.__max_queue_depth, self.__queue_depth)
+        try:
+            future: concurrent.futures.Future[typing.Any] = super().submit(self.__run, fn, args, kwargs)
+        except BaseException:
+            with self.__stat_lock:
+                self.__queue_depth -= 1
+            raise
+        future.add_done_callback(self.__on_done)
+        return future
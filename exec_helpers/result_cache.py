@@ -0,0 +1,277 @@
+#    Copyright 2018 - 2020 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Cache of command execution results.
+
+.. versionadded:: 7.1.0
+"""
+
+from __future__ import annotations
+
+# Standard Library
+import collections
+import concurrent.futures
+import threading
+import time
+import typing
+
+# Package Implementation
+from exec_helpers import exec_result
+
+__all__ = ("ResultCache",)
+
+
+class _CacheEntry(typing.NamedTuple):
+    """Cached result with expiration time and size."""
+
+    result: exec_result.ExecResult
+    expires: float
+    size: int
+
+
+class ResultCache:
+    """Thread-safe cache of command execution results with TTL and LRU eviction.
+
+    Cache can be shared between several helpers: target identity is part of the key.
+    Also tracks running executions for single-flight mode: identical concurrent requests wait for the same result.
+
+    .. versionadded:: 7.1.0
+    """
+
+    __slots__ = (
+        "__lock",
+        "__entries",
+        "__max_entries",
+        "__max_bytes",
+        "__size",
+        "__hits",
+        "__misses",
+        "__evictions",
+        "__in_flight",
+        "__coalesced",
+    )
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = 16 * 1024 * 1024) -> None:
+        """Thread-safe cache of command execution results with TTL and LRU eviction.
+
+        :param max_entries: maximum amount of cached results
+        :type max_entries: int
+        :param max_bytes: maximum total size of cached STDOUT and STDERR
+        :type max_bytes: int
+        """
+        self.__lock = threading.Lock()
+        self.__entries: typing.OrderedDict[typing.Hashable, _CacheEntry] = collections.OrderedDict()
+        self.__max_entries: int = max_entries
+        self.__max_bytes: int = max_bytes
+        self.__size: int = 0
+        self.__hits: int = 0
+        self.__misses: int = 0
+        self.__evictions: int = 0
+        self.__in_flight: typing.Dict[typing.Hashable, concurrent.futures.Future[exec_result.ExecResult]] = {}
+        self.__coalesced: int = 0
+
+    @property
+    def max_entries(self) -> int:
+        """Maximum amount of cached results.
+
+        :rtype: int
+        """
+        return self.__max_entries
+
+    @property
+    def max_bytes(self) -> int:
+        """Maximum total size of cached STDOUT and STDERR.
+
+        :rtype: int
+        """
+        return self.__max_bytes
+
+    @property
+    def size(self) -> int:
+        """Total size of cached STDOUT and STDERR.
+
+        :rtype: int
+        """
+        return self.__size
+
+    @property
+    def hits(self) -> int:
+        """Amount of results received from cache.
+
+        :rtype: int
+        """
+        return self.__hits
+
+    @property
+    def misses(self) -> int:
+        """Amount of lookups without valid cached result.
+
+        :rtype: int
+        """
+        return self.__misses
+
+    @property
+    def evictions(self) -> int:
+        """Amount of results dropped to fit limits.
+
+        :rtype: int
+        """
+        return self.__evictions
+
+    @property
+    def coalesced(self) -> int:
+        """Amount of requests attached to already running identical execution.
+
+        :rtype: int
+        """
+        return self.__coalesced
+
+    @property
+    def in_flight(self) -> int:
+        """Amount of running executions in single-flight mode.
+
+        :rtype: int
+        """
+        return len(self.__in_flight)
+
+    def __len__(self) -> int:
+        """Amount of cached results.
+
+        :return: amount of cached results (including expired and not dropped yet)
+        :rtype: int
+        """
+        return len(self.__entries)
+
+    def __drop(self, key: typing.Hashable) -> None:
+        """Drop cached result (lock should be acquired).
+
+        :param key: cache key
+        :type key: typing.Hashable
+        """
+        self.__size -= self.__entries.pop(key).size
+
+    def get(self, key: typing.Hashable) -> typing.Optional[exec_result.ExecResult]:
+        """Get cached result.
+
+        :param key: cache key
+        :type key: typing.Hashable
+        :return: cached result if not expired
+        :rtype: typing.Optional[ExecResult]
+        """
+        with self.__lock:
+            entry: typing.Optional[_CacheEntry] = self.__entries.get(key, None)
+            if entry is not None and entry.expires <= time.monotonic():
+                self.__drop(key)
+                entry = None
+            if entry is None:
+                self.__misses += 1
+                return None
+            self.__entries.move_to_end(key)
+            self.__hits += 1
+            return entry.result
+
+    def put(self, key: typing.Hashable, result: exec_result.ExecResult, ttl: typing.Union[int, float]) -> None:
+        """Store result of finished command.
+
+        :param key: cache key
+        :type key: typing.Hashable
+        :param result: execution result with final exit code
+        :type result: ExecResult
+        :param ttl: time to keep result in seconds
+        :type ttl: typing.Union[int, float]
+        :raises ValueError: result is not final (it should be immutable)
+        """
+        if result.timestamp is None:
+            raise ValueError("Only finished (read-only) results could be cached")
+        size: int = sum(len(line) for line in result.stdout) + sum(len(line) for line in result.stderr)
+        if ttl <= 0 or size > self.__max_bytes:
+            return
+        with self.__lock:
+            if key in self.__entries:
+                self.__drop(key)
+            self.__entries[key] = _CacheEntry(result=result, expires=time.monotonic() + ttl, size=size)
+            self.__size += size
+            while len(self.__entries) > self.__max_entries or self.__size > self.__max_bytes:
+                self.__drop(next(iter(self.__entries)))
+                self.__evictions += 1
+
+    def single_flight(
+        self,
+        key: typing.Hashable,
+        execute: typing.Callable[[], exec_result.ExecResult],
+        timeout: typing.Union[int, float, None] = None,
+        on_timeout: typing.Optional[typing.Callable[[], BaseException]] = None,
+    ) -> exec_result.ExecResult:
+        """Execute or attach to running identical execution.
+
+        The first request calls `execute`, concurrent requests with the same key wait for it
+        and receive the same result (or exception).
+
+        :param key: cache key
+        :type key: typing.Hashable
+        :param execute: callable to execute command
+        :type execute: typing.Callable[[], ExecResult]
+        :param timeout: time to wait for running identical execution (own execution is limited by `execute`)
+        :type timeout: typing.Union[int, float, None]
+        :param on_timeout: factory of exception to raise on wait timeout (None: concurrent.futures.TimeoutError)
+        :type on_timeout: typing.Optional[typing.Callable[[], BaseException]]
+        :return: execution result
+        :rtype: ExecResult
+        :raises concurrent.futures.TimeoutError: Timeout exceeded waiting for identical execution (no `on_timeout`)
+        """
+        leader: bool = False
+        with self.__lock:
+            call: typing.Optional[concurrent.futures.Future[exec_result.ExecResult]] = self.__in_flight.get(key, None)
+            if call is not None:
+                self.__coalesced += 1
+            else:
+                call = self.__in_flight[key] = concurrent.futures.Future()
+                call.set_running_or_notify_cancel()
+                leader = True
+
+        if not leader:
+            try:
+                return call.result(timeout=timeout)
+            except concurrent.futures.TimeoutError:
+                if call.done() or on_timeout is None:  # Exception of identical execution or no substitution
+                    raise
+                raise on_timeout() from None
+        try:
+            result: exec_result.ExecResult = execute()
+            call.set_result(result)
+            return result
+        except BaseException as exc:
+            call.set_exception(exc)
+            raise
+        finally:
+            with self.__lock:
+                del self.__in_flight[key]
+
+    def clear(self) -> None:
+        """Drop all cached results. Counters are not reset."""
+        with self.__lock:
+            self.__entries.clear()
+            self.__size = 0
+
+    def __repr__(self) -> str:
+        """Debug string.
+
+        :return: repr for debug purposes
+        :rtype: str
+        """
+        return (
+            f"<{self.__class__.__name__}(max_entries={self.max_entries}, max_bytes={self.max_bytes}) "
+            f"entries={len(self)} size={self.size} hits={self.hits} misses={self.misses} evictions={self.evictions} "
+            f"in_flight={self.in_flight} coalesced={self.coalesced}>"
+        )
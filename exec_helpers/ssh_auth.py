@@ -157,6 +157,7 @@ class SSHAuth:
         log: bool = True,
         *,
         sock: typing.Optional[typing.Union[paramiko.ProxyCommand, paramiko.Channel, socket.socket]] = None,
+        timeout: typing.Optional[float] = None,
     ) -> None:
         """Connect SSH client object using credentials.
 
@@ -170,8 +171,12 @@ class SSHAuth:
         :type log: bool
         :param sock: socket for connection. Useful for ssh proxies support
         :type sock: typing.Optional[typing.Union[paramiko.ProxyCommand, paramiko.Channel, socket.socket]]
+        :param timeout: timeout for TCP connect, SSH banner and authentication (None: paramiko defaults)
+        :type timeout: typing.Optional[float]
         :raises PasswordRequiredException: No password has been set, but required.
         :raises AuthenticationException: Authentication failed.
+
+        .. versionchanged:: 7.1.0 timeout
         """
         kwargs: typing.Dict[str, typing.Any] = {}
 
@@ -179,6 +184,8 @@ class SSHAuth:
             kwargs["passphrase"] = self.__passphrase
         if sock is not None:
             kwargs["sock"] = sock
+        if timeout is not None:
+            kwargs.update(timeout=timeout, banner_timeout=timeout, auth_timeout=timeout)
 
         for index, key in sorted(enumerate(self.__keys), key=lambda i_k: i_k[0] != self.__key_index):
             kwargs["pkey"] = key
@@ -20,23 +20,26 @@ from __future__ import annotations
 
 # Standard Library
 import concurrent.futures
-import copy
 import datetime
 import errno
+import functools
 import logging
+import operator
 import os
 import pathlib
+import selectors
+import shlex
 import subprocess  # nosec  # Expected usage
+import time
 import typing
-
-# External Dependencies
-import threaded
+import weakref
 
 # Package Implementation
 from exec_helpers import api
 from exec_helpers import constants
 from exec_helpers import exceptions
 from exec_helpers import exec_result
+from exec_helpers import executor as executor_mod
 from exec_helpers import proc_enums
 from exec_helpers.api import CalledProcessErrorSubClassT
 from exec_helpers.api import CommandT
@@ -45,18 +48,41 @@ from exec_helpers.api import ExpectedExitCodesT
 from exec_helpers.api import LogMaskReT
 from exec_helpers.api import OptionalStdinT
 from exec_helpers.api import OptionalTimeoutT
+from exec_helpers.proc_enums import ExitCodeT
 
 # Local Implementation
 from . import _log_templates
+from . import _shell_framing
 from . import _subprocess_helpers
+from ._output_callbacks import OutputCallbacks
 
-__all__ = ("Subprocess", "SubprocessExecuteAsyncResult", "EnvT", "CwdT")
+__all__ = ("Subprocess", "SubprocessExecuteAsyncResult", "EnvT", "CwdT", "CpuAffinityT", "IoNiceT", "RLimitsT")
 
 EnvT = typing.Optional[
     typing.Union[typing.Mapping[bytes, typing.Union[bytes, str]], typing.Mapping[str, typing.Union[bytes, str]]]
 ]
 CwdT = typing.Optional[typing.Union[str, bytes, pathlib.Path]]
+CpuAffinityT = typing.Optional[typing.Iterable[int]]
+IoNiceT = typing.Optional[typing.Union[int, typing.Tuple[int, int]]]
+RLimitsT = typing.Optional[typing.Mapping[int, typing.Tuple[int, int]]]
 _OptionalIOBytes = typing.Optional[typing.IO[bytes]]
+_StageStatusT = typing.Tuple[typing.Optional[int], typing.Optional[exec_result.ResourceUsage]]
+
+# Process exit check period if it could not be polled by selector
+_EXIT_POLL_PERIOD: float = 0.01
+# Arguments requiring new process instead of persistent shell
+_NEW_PROCESS_KWARGS: typing.Tuple[str, ...] = (
+    "env",
+    "env_patch",
+    "cpu_affinity",
+    "nice",
+    "ionice",
+    "rlimits",
+    "output_callbacks",
+    "binary_output",
+)
+_OutputHandlerT = typing.Callable[[bytes, typing.Sequence[bytes]], None]
+_PipeReaderT = typing.Union[_subprocess_helpers.LineBuffer, _subprocess_helpers.ChunkReader]
 
 
 # noinspection PyTypeHints
@@ -110,24 +136,91 @@ class Subprocess(api.ExecHelper):
     :param log_mask_re: regex lookup rule to mask command for logger.
                         all MATCHED groups will be replaced by '<*masked*>'
     :type log_mask_re: typing.Optional[str]
+    :param kill_grace_period: time between SIGTERM and SIGKILL to the process group on timeout
+    :type kill_grace_period: typing.Union[int, float]
+    :param persistent_shell: execute commands by long-lived shell instead of new shell per command
+    :type persistent_shell: bool
+    :param drain_timeout: maximum time to read output after process exit if pipes are held open by its children
+    :type drain_timeout: typing.Union[int, float]
+    :param spawn_helper: spawn commands by small pre-started helper process instead of fork of current process
+    :type spawn_helper: bool
+    :param executor: executor for output reading threads or its factory (None: dedicated `HelperExecutor`)
+    :type executor: typing.Union[concurrent.futures.Executor, typing.Callable[[], concurrent.futures.Executor], None]
 
     .. versionchanged:: 1.2.0 log_mask_re regex rule for masking cmd
     .. versionchanged:: 3.1.0 Not singleton anymore. Only lock is shared between all instances.
     .. versionchanged:: 3.2.0 Logger can be enforced.
     .. versionchanged:: 4.1.0 support chroot
     .. versionchanged:: 4.3.0 Lock is not shared anymore: allow parallel call of different instances.
+    .. versionchanged:: 7.1.0 kill_grace_period
+    .. versionchanged:: 7.1.0 persistent_shell
+    .. versionchanged:: 7.1.0 drain_timeout
+    .. versionchanged:: 7.1.0 spawn_helper
+    .. versionchanged:: 7.1.0 executor
     """
 
     def __init__(
         self,
         log_mask_re: LogMaskReT = None,
+        *,
+        kill_grace_period: typing.Union[int, float] = constants.DEFAULT_KILL_GRACE_PERIOD,
+        persistent_shell: bool = False,
+        drain_timeout: typing.Union[int, float] = constants.DEFAULT_DRAIN_TIMEOUT,
+        spawn_helper: bool = False,
+        executor: executor_mod.ExecutorArgT = None,
     ) -> None:
         """Subprocess helper with timeouts and lock-free FIFO."""
         mod_name = "exec_helpers" if self.__module__.startswith("exec_helpers") else self.__module__
         super().__init__(
             logger=logging.getLogger(f"{mod_name}.{self.__class__.__name__}"),
             log_mask_re=log_mask_re,
+            executor=executor,
         )
+        self.kill_grace_period: typing.Union[int, float] = kill_grace_period
+        self.drain_timeout: typing.Union[int, float] = drain_timeout
+        self.__env_cache = _subprocess_helpers.EnvCache()
+        self.__shell_worker: typing.Optional[_subprocess_helpers.ShellWorker] = None
+        if persistent_shell:
+            self.__shell_worker = _subprocess_helpers.ShellWorker()
+            weakref.finalize(self, self.__shell_worker.close)
+        self.__spawn_helper: typing.Optional[_subprocess_helpers.SpawnHelper] = None
+        if spawn_helper:
+            self.__spawn_helper = _subprocess_helpers.SpawnHelper()
+            weakref.finalize(self, self.__spawn_helper.close)
+
+    @property
+    def persistent_shell(self) -> bool:
+        """Commands are executed by long-lived shell.
+
+        :return: persistent shell mode is enabled
+        :rtype: bool
+
+        .. versionadded:: 7.1.0
+        """
+        return self.__shell_worker is not None
+
+    @property
+    def spawn_helper(self) -> bool:
+        """Commands are spawned by pre-started helper process.
+
+        :return: spawn helper mode is enabled
+        :rtype: bool
+
+        .. versionadded:: 7.1.0
+        """
+        return self.__spawn_helper is not None
+
+    def close(self) -> None:
+        """Stop persistent shell, spawn helper and own executor if started. They will be started again on next command.
+
+        .. versionadded:: 7.1.0
+        """
+        self._close_executor()
+        if self.__shell_worker is not None:
+            with self.__shell_worker.lock:
+                self.__shell_worker.close()
+        if self.__spawn_helper is not None:
+            self.__spawn_helper.close()
 
     def __enter__(self) -> Subprocess:  # pylint: disable=useless-super-delegation
         """Get context manager.
@@ -147,6 +240,9 @@ class Subprocess(api.ExecHelper):
         verbose: bool = False,
         log_mask_re: LogMaskReT = None,
         stdin: OptionalStdinT = None,
+        output_callbacks: typing.Optional[OutputCallbacks] = None,
+        binary_output: bool = False,
+        concurrent_stdin: bool = False,
         **kwargs: typing.Any,
     ) -> exec_result.ExecResult:
         """Get exit status from channel with timeout.
@@ -164,6 +260,12 @@ class Subprocess(api.ExecHelper):
         :type log_mask_re: typing.Optional[str]
         :param stdin: pass STDIN text to the process
         :type stdin: typing.Union[bytes, str, bytearray, None]
+        :param output_callbacks: user callbacks for output
+        :type output_callbacks: typing.Optional[OutputCallbacks]
+        :param binary_output: read output by fixed size chunks without splitting to lines and logging
+        :type binary_output: bool
+        :param concurrent_stdin: STDIN pipe is left open by `_execute_async`: write STDIN data while reading output
+        :type concurrent_stdin: bool
         :param kwargs: additional parameters for call.
         :type kwargs: typing.Any
         :return: Execution result
@@ -173,17 +275,53 @@ class Subprocess(api.ExecHelper):
         :raises ExecHelperTimeoutError: Timeout exceeded
 
         .. versionadded:: 1.2.0
+        .. versionchanged:: 7.1.0 output_callbacks
+        .. versionchanged:: 7.1.0 binary_output
+        .. versionchanged:: 7.1.0 concurrent_stdin
         """
 
-        @threaded.threadpooled
         def poll_stdout() -> None:
             """Sync stdout poll."""
-            result.read_stdout(src=async_result.stdout, log=self.logger, verbose=verbose)
+            if binary_output:
+                callback = None if output_callbacks is None else output_callbacks.feed_stdout_chunk
+                result.read_stdout_chunks(src=async_result.stdout, callback=callback)
+                return
+            src = async_result.stdout if output_callbacks is None else output_callbacks.iter_stdout(async_result.stdout)
+            result.read_stdout(src=src, log=self.logger, verbose=verbose)
 
-        @threaded.threadpooled
         def poll_stderr() -> None:
             """Sync stderr poll."""
-            result.read_stderr(src=async_result.stderr, log=self.logger, verbose=verbose)
+            if binary_output:
+                callback = None if output_callbacks is None else output_callbacks.feed_stderr_chunk
+                result.read_stderr_chunks(src=async_result.stderr, callback=callback)
+                return
+            src = async_result.stderr if output_callbacks is None else output_callbacks.iter_stderr(async_result.stderr)
+            result.read_stderr(src=src, log=self.logger, verbose=verbose)
+
+        def feed_stdin() -> None:
+            """Sync STDIN write."""
+            self._write_stdin(async_result.interface, stdin)  # type: ignore
+
+        def wait_threaded() -> int:
+            """Wait for process exit while output is polled by threads.
+
+            :return: process exit code
+            :rtype: int
+            """
+            # Wait real timeout here
+            exit_code, result.rusage = _subprocess_helpers.wait_process(async_result.interface, timeout=timeout)
+            # Readers are done on EOF, deadline is reached only if pipes are held open by children of process
+            drain_deadline: float = time.monotonic() + self.drain_timeout
+            stalled: float = 0.0 if output_callbacks is None else output_callbacks.stall_time
+            while concurrent.futures.wait(futures, timeout=max(drain_deadline - time.monotonic(), 0)).not_done:
+                if output_callbacks is None or output_callbacks.stall_time == stalled:
+                    break
+                # Readers were waiting for output callbacks: it is not a drain time
+                drain_deadline += output_callbacks.stall_time - stalled
+                stalled = output_callbacks.stall_time
+            if stdin_future is not None and stdin_future.done() and stdin_future.exception() is not None:
+                raise stdin_future.exception()  # type: ignore  # Process is killed by writer
+            return exit_code
 
         def close_streams() -> None:
             """Enforce FIFO closure."""
@@ -197,27 +335,49 @@ class Subprocess(api.ExecHelper):
 
         result = exec_result.ExecResult(cmd=cmd_for_log, stdin=stdin, started=async_result.started)
 
-        # noinspection PyNoneFunctionAssignment,PyTypeChecker
-        stdout_future: concurrent.futures.Future[None] = poll_stdout()  # pylint: disable=unsubscriptable-object
-        # noinspection PyNoneFunctionAssignment,PyTypeChecker
-        stderr_future: concurrent.futures.Future[None] = poll_stderr()  # pylint: disable=unsubscriptable-object
+        stdin_data: typing.Optional[bytes] = None
+        if concurrent_stdin and stdin is not None and async_result.stdin is not None:
+            stdin_data = self._string_bytes_bytearray_as_bytes(stdin)
+
+        futures: typing.List[concurrent.futures.Future[None]] = []  # pylint: disable=unsubscriptable-object
+        stdin_future: typing.Optional[concurrent.futures.Future[None]] = None  # pylint: disable=E1136
+        wait: typing.Callable[[], int]
+        stdin_pipe: _OptionalIOBytes = None if stdin_data is None else async_result.stdin
+        if _subprocess_helpers.selectable_pipes(stdin_pipe, async_result.stdout, async_result.stderr):
+            wait = functools.partial(
+                self._poll_pipes,
+                result,
+                async_result,
+                timeout,
+                verbose=verbose,
+                output_callbacks=output_callbacks,
+                binary_output=binary_output,
+                stdin=stdin_data,
+            )
+        else:
+            # noinspection PyTypeChecker
+            futures.extend((self.executor.submit(poll_stdout), self.executor.submit(poll_stderr)))
+            if stdin_data is not None:
+                stdin_future = self.executor.submit(feed_stdin)
+                futures.append(stdin_future)
+            wait = wait_threaded
 
         try:
-            exit_code: int = async_result.interface.wait(timeout=timeout)  # Wait real timeout here
-            concurrent.futures.wait([stdout_future, stderr_future], timeout=0.1)  # Minimal timeout to complete polling
+            exit_code: int = wait()
             result.exit_code = exit_code
             return result
         except subprocess.TimeoutExpired as exc:
             # kill -9 for all subprocesses
-            _subprocess_helpers.kill_proc_tree(async_result.interface.pid)
-            exit_signal: typing.Optional[int] = async_result.interface.poll()
+            _subprocess_helpers.kill_proc_tree(async_result.interface.pid, grace_period=self.kill_grace_period)
+            exit_signal, rusage = _subprocess_helpers.poll_process(async_result.interface)
             if exit_signal is None:
                 raise exceptions.ExecHelperNoKillError(result=result, timeout=timeout) from exc  # type: ignore
+            result.rusage = rusage
             result.exit_code = exit_signal
         finally:
-            stdout_future.cancel()
-            stderr_future.cancel()
-            _, not_done = concurrent.futures.wait([stdout_future, stderr_future], timeout=1)
+            for future in futures:
+                future.cancel()
+            _, not_done = concurrent.futures.wait(futures, timeout=1)
             if not_done and async_result.interface.returncode:
                 self.logger.critical(
                     f"Process {command!s} was closed with exit code {async_result.interface.returncode!s}, "
@@ -230,6 +390,286 @@ class Subprocess(api.ExecHelper):
         self.logger.debug(wait_err_msg)
         raise exceptions.ExecHelperTimeoutError(result=result, timeout=timeout)  # type: ignore
 
+    def _read_pipes(
+        self,
+        pipes: typing.Mapping[typing.IO[bytes], _PipeReaderT],
+        processes: typing.Sequence[subprocess.Popen[bytes]],  # pylint: disable=unsubscriptable-object
+        timeout: OptionalTimeoutT,
+        deadline: typing.Optional[float],
+        *,
+        verbose: bool = False,
+        handlers: typing.Optional[typing.Mapping[typing.IO[bytes], _OutputHandlerT]] = None,
+        stdin: typing.Optional[_subprocess_helpers.StdinFeeder] = None,
+    ) -> None:
+        """Read pipes from the calling thread until EOF on all pipes.
+
+        Pipes, STDIN feeding and processes exit (pidfd, if supported) are multiplexed by selector,
+        so no pool threads are used.
+        If all processes exited, but pipes are still held open by their children,
+        reading is continued until EOF, but not longer than `drain_timeout`.
+
+        :param pipes: pipes to read with buffers for output (LineBuffer) or readers of raw chunks (ChunkReader)
+        :type pipes: typing.Mapping[typing.IO[bytes], typing.Union[LineBuffer, ChunkReader]]
+        :param processes: processes writing to the pipes
+        :type processes: typing.Sequence[subprocess.Popen[bytes]]
+        :param timeout: Timeout for command execution (for exception)
+        :type timeout: typing.Union[int, float, None]
+        :param deadline: time.monotonic() value to stop reading at
+        :type deadline: typing.Optional[float]
+        :param verbose: produce verbose log record on command call
+        :type verbose: bool
+        :param handlers: output handlers for pipes: called with chunk read and lines completed by it
+        :type handlers: typing.Optional[typing.Mapping[typing.IO[bytes], typing.Callable[..., None]]]
+        :param stdin: writer of STDIN data, data is written concurrently with reading (pipe is closed after)
+        :type stdin: typing.Optional[StdinFeeder]
+        :raises TimeoutExpired: Deadline reached (output received before deadline is stored in buffers)
+
+        .. versionadded:: 7.1.0
+        """
+        if handlers is None:
+            handlers = {}
+        pidfds: typing.List[int] = []
+        polled: typing.Sequence[subprocess.Popen[bytes]] = processes  # pylint: disable=unsubscriptable-object
+        for process in processes:
+            try:
+                pidfd: typing.Optional[int] = _subprocess_helpers.open_pidfd(process.pid)
+            except ProcessLookupError:  # pragma: no cover
+                pidfd = None
+            if pidfd is None:  # pragma: no cover
+                break
+            pidfds.append(pidfd)
+        else:
+            polled = ()  # Exit is tracked by pidfd
+
+        running: int = len(processes)
+        open_pipes: int = len(pipes)
+        drain_deadline: float = 0.0
+
+        try:
+            with selectors.DefaultSelector() as selector:
+                for stream, buffer in pipes.items():
+                    selector.register(stream, selectors.EVENT_READ, buffer)
+                if not polled:
+                    for pidfd in pidfds:
+                        selector.register(pidfd, selectors.EVENT_READ, None)
+                feeding: bool = stdin is not None and not stdin.done
+                if stdin is not None:
+                    if feeding:
+                        selector.register(stdin.stream, selectors.EVENT_WRITE, stdin)
+                    else:
+                        stdin.close()
+
+                while open_pipes or feeding:
+                    select_timeout: typing.Optional[float] = _EXIT_POLL_PERIOD if polled else None
+                    if not running:
+                        select_timeout = drain_deadline - time.monotonic()
+                        if select_timeout <= 0:
+                            break  # Processes exited, but pipes are held open by their children
+                    elif deadline is not None:
+                        remaining: float = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise subprocess.TimeoutExpired(processes[-1].args, timeout)  # type: ignore
+                        select_timeout = remaining if select_timeout is None else min(select_timeout, remaining)
+
+                    for key, _ in selector.select(select_timeout):
+                        if key.data is None:
+                            running -= 1
+                            selector.unregister(key.fileobj)
+                            if not running:
+                                drain_deadline = time.monotonic() + self.drain_timeout
+                            continue
+                        if key.data is stdin:
+                            try:
+                                feeding = not self._feed_stdin(stdin)  # type: ignore
+                            except OSError:
+                                _subprocess_helpers.kill_proc_tree(
+                                    processes[0].pid, grace_period=self.kill_grace_period
+                                )
+                                raise
+                            if not feeding:
+                                selector.unregister(key.fileobj)
+                                stdin.close()  # type: ignore
+                            continue
+                        lines: typing.List[bytes] = []
+                        if isinstance(key.data, _subprocess_helpers.ChunkReader):
+                            chunk: typing.Union[bytes, memoryview] = key.data.read(key.fd)
+                        else:
+                            chunk = os.read(key.fd, constants.READ_CHUNK_SIZE)
+                            lines = key.data.feed(chunk) if chunk else key.data.flush()
+                        if not chunk:
+                            selector.unregister(key.fileobj)
+                            open_pipes -= 1
+                        # pylint: disable=protected-access
+                        exec_result.ExecResult._poll_stream(lines, log=self.logger, verbose=verbose)
+                        # pylint: enable=protected-access
+                        handler: typing.Optional[_OutputHandlerT] = handlers.get(key.fileobj, None)  # type: ignore
+                        if handler is not None:
+                            handler_started: float = time.monotonic()
+                            handler(bytes(chunk), lines)
+                            # Pipes are not read while handler is running: it is not a drain time
+                            drain_deadline += time.monotonic() - handler_started
+
+                    if polled and running:
+                        running = sum(1 for process in polled if process.poll() is None)
+                        if not running:
+                            drain_deadline = time.monotonic() + self.drain_timeout
+        finally:
+            if stdin is not None:
+                stdin.close()
+            for pidfd in pidfds:
+                os.close(pidfd)
+            for stream, buffer in pipes.items():
+                if isinstance(buffer, _subprocess_helpers.ChunkReader):
+                    continue
+                tail: typing.List[bytes] = buffer.flush()
+                if tail and stream in handlers:
+                    handlers[stream](b"", tail)
+
+    def _poll_pipes(
+        self,
+        result: exec_result.ExecResult,
+        async_result: SubprocessExecuteAsyncResult,
+        timeout: OptionalTimeoutT,
+        *,
+        verbose: bool = False,
+        output_callbacks: typing.Optional[OutputCallbacks] = None,
+        binary_output: bool = False,
+        stdin: typing.Optional[bytes] = None,
+    ) -> int:
+        """Read STDOUT and STDERR pipes and wait for process exit from the calling thread.
+
+        :param result: execution result to store output
+        :type result: ExecResult
+        :param async_result: execute_async result
+        :type async_result: SubprocessExecuteAsyncResult
+        :param timeout: Timeout for command execution
+        :type timeout: typing.Union[int, float, None]
+        :param verbose: produce verbose log record on command call
+        :type verbose: bool
+        :param output_callbacks: user callbacks for output
+        :type output_callbacks: typing.Optional[OutputCallbacks]
+        :param binary_output: read output by fixed size chunks directly to result without splitting to lines
+        :type binary_output: bool
+        :param stdin: data to write to the opened STDIN pipe concurrently with reading
+        :type stdin: typing.Optional[bytes]
+        :return: process exit code
+        :rtype: int
+        :raises TimeoutExpired: Timeout exceeded (output received before timeout is stored in result)
+
+        .. versionadded:: 7.1.0
+        """
+        deadline: typing.Optional[float] = None if timeout is None else time.monotonic() + timeout
+        stdout = _subprocess_helpers.LineBuffer()
+        stderr = _subprocess_helpers.LineBuffer()
+        readers: typing.Tuple[_PipeReaderT, _PipeReaderT] = (stdout, stderr)
+        if binary_output:
+            readers = (
+                _subprocess_helpers.ChunkReader(result.append_stdout),
+                _subprocess_helpers.ChunkReader(result.append_stderr),
+            )
+        pipes: typing.Dict[typing.IO[bytes], _PipeReaderT] = {
+            stream: reader
+            for stream, reader in zip((async_result.stdout, async_result.stderr), readers)
+            if stream is not None
+        }
+        handlers: typing.Dict[typing.IO[bytes], _OutputHandlerT] = {}
+        if output_callbacks is not None:
+            for stream, handler in (
+                (async_result.stdout, output_callbacks.feed_stdout),
+                (async_result.stderr, output_callbacks.feed_stderr),
+            ):
+                if stream is not None:
+                    handlers[stream] = handler
+        feeder: typing.Optional[_subprocess_helpers.StdinFeeder] = None
+        if stdin is not None and async_result.stdin is not None:
+            feeder = _subprocess_helpers.StdinFeeder(async_result.stdin, stdin)
+        try:
+            self._read_pipes(
+                pipes, (async_result.interface,), timeout, deadline, verbose=verbose, handlers=handlers, stdin=feeder
+            )
+        finally:
+            result.read_stdout(src=stdout.lines)
+            result.read_stderr(src=stderr.lines)
+
+        exit_code, result.rusage = _subprocess_helpers.wait_process(
+            async_result.interface, timeout=_subprocess_helpers.remaining_time(deadline)
+        )
+        return exit_code
+
+    def _prepare_env(self, env: EnvT = None, env_patch: EnvT = None) -> EnvT:
+        """Prepare environment for the new process.
+
+        Merged environments are cached per `(env, env_patch)` and rebuilt after `os.environ` change.
+
+        :param env: Defines the environment variables for the new process.
+        :type env: typing.Optional[typing.Mapping[typing.Union[str, bytes], typing.Union[str, bytes]]]
+        :param env_patch: Defines the environment variables to ADD for the new process.
+        :type env_patch: typing.Optional[typing.Mapping[typing.Union[str, bytes], typing.Union[str, bytes]]]
+        :return: environment for the new process (None: inherit current)
+        :rtype: typing.Optional[typing.Mapping[typing.Union[str, bytes], typing.Union[str, bytes]]]
+
+        .. versionadded:: 7.1.0
+        """
+        return self.__env_cache.get(env, env_patch)  # type: ignore
+
+    def _feed_stdin(self, feeder: _subprocess_helpers.StdinFeeder) -> bool:
+        """Write next chunk of STDIN data to the pipe ready for write.
+
+        :param feeder: writer of STDIN data
+        :type feeder: StdinFeeder
+        :return: STDIN feeding is finished (all data is written or pipe is closed by process)
+        :rtype: bool
+        :raises OSError: impossible to process STDIN
+
+        .. versionadded:: 7.1.0
+        """
+        try:
+            return feeder.write()
+        except OSError as exc:
+            if exc.errno in (errno.EPIPE, errno.ESHUTDOWN, errno.EINVAL):
+                self.logger.warning("STDIN Send failed: broken PIPE")
+                return True
+            raise
+
+    def _write_stdin(
+        self,
+        process: subprocess.Popen[bytes],  # pylint: disable=unsubscriptable-object
+        stdin: typing.Union[bytes, str, bytearray],
+    ) -> None:
+        """Send data to process STDIN and close it.
+
+        :param process: process with opened STDIN pipe
+        :type process: subprocess.Popen[bytes]
+        :param stdin: STDIN text to send
+        :type stdin: typing.Union[bytes, str, bytearray]
+        :raises OSError: impossible to process STDIN
+
+        .. versionadded:: 7.1.0
+        """
+        stdin_str: bytes = self._string_bytes_bytearray_as_bytes(stdin)
+        try:
+            process.stdin.write(stdin_str)  # type: ignore
+        except OSError as exc:
+            if exc.errno == errno.EINVAL:
+                # bpo-19612, bpo-30418: On Windows, stdin.write() fails
+                # with EINVAL if the child process exited or if the child
+                # process is still running but closed the pipe.
+                self.logger.warning("STDIN Send failed: closed PIPE")
+            elif exc.errno in (errno.EPIPE, errno.ESHUTDOWN):
+                self.logger.warning("STDIN Send failed: broken PIPE")
+            else:
+                _subprocess_helpers.kill_proc_tree(process.pid, grace_period=self.kill_grace_period)
+                process.kill()
+                raise
+        try:
+            process.stdin.close()  # type: ignore
+        except OSError as exc:
+            if exc.errno in (errno.EINVAL, errno.EPIPE, errno.ESHUTDOWN):
+                pass  # PIPE already closed
+            else:
+                process.kill()
+                raise
+
     # noinspection PyMethodOverriding
     def _execute_async(  # pylint: disable=arguments-differ
         self,
@@ -242,6 +682,11 @@ class Subprocess(api.ExecHelper):
         cwd: CwdT = None,
         env: EnvT = None,
         env_patch: EnvT = None,
+        cpu_affinity: CpuAffinityT = None,
+        nice: typing.Optional[int] = None,
+        ionice: IoNiceT = None,
+        rlimits: RLimitsT = None,
+        concurrent_stdin: bool = False,
         **kwargs: typing.Any,
     ) -> SubprocessExecuteAsyncResult:
         """Execute command in async mode and return Popen with IO objects.
@@ -262,6 +707,16 @@ class Subprocess(api.ExecHelper):
         :type env: typing.Optional[typing.Mapping[typing.Union[str, bytes], typing.Union[str, bytes]]]
         :param env_patch: Defines the environment variables to ADD for the new process.
         :type env_patch: typing.Optional[typing.Mapping[typing.Union[str, bytes], typing.Union[str, bytes]]]
+        :param cpu_affinity: CPUs allowed for the process
+        :type cpu_affinity: typing.Optional[typing.Iterable[int]]
+        :param nice: niceness increment for the process
+        :type nice: typing.Optional[int]
+        :param ionice: IO scheduling class or class and priority level (psutil.IOPRIO_CLASS_* constants)
+        :type ionice: typing.Optional[typing.Union[int, typing.Tuple[int, int]]]
+        :param rlimits: resource limits for the process: resource.RLIMIT_* -> (soft, hard)
+        :type rlimits: typing.Optional[typing.Mapping[int, typing.Tuple[int, int]]]
+        :param concurrent_stdin: do not write STDIN data and keep pipe open: data is written by `_exec_command`
+        :type concurrent_stdin: bool
         :param kwargs: additional parameters for call.
         :type kwargs: typing.Any
         :return: Tuple with control interface and file-like objects for STDIN/STDERR/STDOUT
@@ -281,56 +736,61 @@ class Subprocess(api.ExecHelper):
         .. versionchanged:: 2.1.0 Use typed NamedTuple as result
         .. versionchanged:: 3.2.0 Expose cwd and env as optional keyword-only arguments
         .. versionchanged:: 4.1.0 support chroot
+        .. versionchanged:: 7.1.0 cpu_affinity, nice, ionice and rlimits
+        .. versionchanged:: 7.1.0 spawn by helper process if enabled (commands with resource limits are forked)
+        .. versionchanged:: 7.1.0 concurrent_stdin
         """
         started = datetime.datetime.utcnow()
 
-        if env_patch is not None:
-            # make mutable copy
-            env = dict(copy.deepcopy(os.environ) if env is None else copy.deepcopy(env))  # type: ignore
-            env.update(env_patch)  # type: ignore
-
-        process: subprocess.Popen[bytes] = subprocess.Popen(  # pylint: disable=unsubscriptable-object
-            args=[self._prepare_command(cmd=command, chroot_path=chroot_path)],
-            stdout=subprocess.PIPE if open_stdout else subprocess.DEVNULL,
-            stderr=subprocess.PIPE if open_stderr else subprocess.DEVNULL,
-            stdin=subprocess.PIPE,
-            shell=True,
-            cwd=cwd,
-            env=env,
-            universal_newlines=False,
-            **_subprocess_helpers.subprocess_kw,
-        )
+        env = self._prepare_env(env=env, env_patch=env_patch)
+        popen_kw: typing.Dict[str, typing.Any] = dict(_subprocess_helpers.subprocess_kw)
 
-        if stdin is None:
+        process: subprocess.Popen[bytes]  # pylint: disable=unsubscriptable-object
+        if self.__spawn_helper is not None and not rlimits:
+            # No code of this process in the child: CPU affinity and niceness are applied from parent (racy)
+            parent_controls: typing.Dict[str, typing.Any] = {"cpu_affinity": cpu_affinity, "nice": nice}
+            process = self.__spawn_helper.spawn(  # type: ignore
+                self._prepare_command(cmd=command, chroot_path=chroot_path),
+                cwd=cwd,
+                env=env,
+                open_stdout=open_stdout,
+                open_stderr=open_stderr,
+            )
+        else:
+            parent_controls = {}
+            preexec_fn: typing.Optional[typing.Callable[[], None]] = _subprocess_helpers.scheduling_preexec_fn(
+                cpu_affinity=cpu_affinity, nice=nice, rlimits=rlimits
+            )
+            if preexec_fn is not None:
+                popen_kw["preexec_fn"] = preexec_fn
+            process = subprocess.Popen(  # pylint: disable=unsubscriptable-object
+                args=[self._prepare_command(cmd=command, chroot_path=chroot_path)],
+                stdout=subprocess.PIPE if open_stdout else subprocess.DEVNULL,
+                stderr=subprocess.PIPE if open_stderr else subprocess.DEVNULL,
+                stdin=subprocess.PIPE,
+                shell=True,
+                cwd=cwd,
+                env=env,
+                universal_newlines=False,
+                **popen_kw,
+            )
+        try:
+            _subprocess_helpers.apply_scheduling(process.pid, ionice=ionice, **parent_controls)
+        except BaseException:
+            _subprocess_helpers.kill_proc_tree(process.pid, grace_period=0)
+            process.wait()
+            for stream in (process.stdin, process.stdout, process.stderr):
+                if stream is not None:
+                    stream.close()
+            raise
+
+        if stdin is None or concurrent_stdin:
             process_stdin: _OptionalIOBytes = process.stdin
         elif process.stdin is None:
             self.logger.warning("STDIN pipe is not set, but STDIN data is available to send.")
             process_stdin = None
         else:
-            stdin_str: bytes = self._string_bytes_bytearray_as_bytes(stdin)
-            try:
-                process.stdin.write(stdin_str)
-            except OSError as exc:
-                if exc.errno == errno.EINVAL:
-                    # bpo-19612, bpo-30418: On Windows, stdin.write() fails
-                    # with EINVAL if the child process exited or if the child
-                    # process is still running but closed the pipe.
-                    self.logger.warning("STDIN Send failed: closed PIPE")
-                elif exc.errno in (errno.EPIPE, errno.ESHUTDOWN):
-                    self.logger.warning("STDIN Send failed: broken PIPE")
-                else:
-                    _subprocess_helpers.kill_proc_tree(process.pid)
-                    process.kill()
-                    raise
-            try:
-                process.stdin.close()
-            except OSError as exc:
-                if exc.errno in (errno.EINVAL, errno.EPIPE, errno.ESHUTDOWN):
-                    pass  # PIPE already closed
-                else:
-                    process.kill()
-                    raise
-
+            self._write_stdin(process, stdin)
             process_stdin = None
 
         # noinspection PyArgumentList
@@ -355,6 +815,10 @@ class Subprocess(api.ExecHelper):
         cwd: CwdT = None,
         env: EnvT = None,
         env_patch: EnvT = None,
+        cpu_affinity: CpuAffinityT = None,
+        nice: typing.Optional[int] = None,
+        ionice: IoNiceT = None,
+        rlimits: RLimitsT = None,
         **kwargs: typing.Any,
     ) -> exec_result.ExecResult:
         """Execute command and wait for return code.
@@ -380,6 +844,14 @@ class Subprocess(api.ExecHelper):
         :type env: typing.Optional[typing.Mapping[typing.Union[str, bytes], typing.Union[str, bytes]]]
         :param env_patch: Defines the environment variables to ADD for the new process.
         :type env_patch: typing.Optional[typing.Mapping[typing.Union[str, bytes], typing.Union[str, bytes]]]
+        :param cpu_affinity: CPUs allowed for the process
+        :type cpu_affinity: typing.Optional[typing.Iterable[int]]
+        :param nice: niceness increment for the process
+        :type nice: typing.Optional[int]
+        :param ionice: IO scheduling class or class and priority level (psutil.IOPRIO_CLASS_* constants)
+        :type ionice: typing.Optional[typing.Union[int, typing.Tuple[int, int]]]
+        :param rlimits: resource limits for the process: resource.RLIMIT_* -> (soft, hard)
+        :type rlimits: typing.Optional[typing.Mapping[int, typing.Tuple[int, int]]]
         :param kwargs: additional parameters for call.
         :type kwargs: typing.Any
         :return: Execution result
@@ -389,6 +861,8 @@ class Subprocess(api.ExecHelper):
         .. versionchanged:: 1.2.0 default timeout 1 hour
         .. versionchanged:: 2.1.0 Allow parallel calls
         .. versionchanged:: 7.0.0 Allow command as list of arguments. Command will be joined with components escaping.
+        .. versionchanged:: 7.1.0 Use persistent shell if enabled, not busy and stdin, env and env_patch are not set.
+        .. versionchanged:: 7.1.0 cpu_affinity, nice, ionice and rlimits
         """
         return super().execute(
             command=command,
@@ -401,9 +875,211 @@ class Subprocess(api.ExecHelper):
             cwd=cwd,
             env=env,
             env_patch=env_patch,
+            cpu_affinity=cpu_affinity,
+            nice=nice,
+            ionice=ionice,
+            rlimits=rlimits,
+            **kwargs,
+        )
+
+    def _target_identity(self) -> typing.Hashable:
+        """Identity of execution target for results caching: local host.
+
+        :return: hashable identity: same for helpers executing commands in the same context
+        :rtype: typing.Hashable
+
+        .. versionadded:: 7.1.0
+        """
+        return self.__class__.__name__, "localhost"
+
+    def _result_cache_key(
+        self,
+        command: str,
+        *,
+        log_mask_re: LogMaskReT,
+        stdin: OptionalStdinT,
+        open_stdout: bool,
+        open_stderr: bool,
+        **kwargs: typing.Any,
+    ) -> typing.Hashable:
+        """Make key for results cache: inherited working directory and environment are the part of key.
+
+        :param command: Command for execution
+        :type command: str
+        :param log_mask_re: regex lookup rule to mask command for logger (affects result command)
+        :type log_mask_re: typing.Optional[str]
+        :param stdin: STDIN text for the process (digest is used)
+        :type stdin: typing.Union[bytes, str, bytearray, None]
+        :param open_stdout: open STDOUT stream for read
+        :type open_stdout: bool
+        :param open_stderr: open STDERR stream for read
+        :type open_stderr: bool
+        :param kwargs: additional parameters for call (cwd, env, etc.)
+        :type kwargs: typing.Any
+        :return: cache key
+        :rtype: typing.Hashable
+
+        .. versionadded:: 7.1.0
+        """
+        return (
+            super()._result_cache_key(
+                command,
+                log_mask_re=log_mask_re,
+                stdin=stdin,
+                open_stdout=open_stdout,
+                open_stderr=open_stderr,
+                **kwargs,
+            ),
+            os.getcwd() if kwargs.get("cwd", None) is None else None,
+            self.__env_cache.environ_snapshot() if kwargs.get("env", None) is None else None,
+        )
+
+    def _execute_uncached(
+        self,
+        command: str,
+        verbose: bool,
+        timeout: OptionalTimeoutT,
+        *,
+        log_mask_re: LogMaskReT,
+        stdin: OptionalStdinT,
+        open_stdout: bool,
+        open_stderr: bool,
+        **kwargs: typing.Any,
+    ) -> exec_result.ExecResult:
+        """Execute command by persistent shell if possible, else in new process.
+
+        :param command: Command for execution
+        :type command: str
+        :param verbose: Produce log.info records for command call and output
+        :type verbose: bool
+        :param timeout: Timeout for command execution.
+        :type timeout: typing.Union[int, float, None]
+        :param log_mask_re: regex lookup rule to mask command for logger.
+                            all MATCHED groups will be replaced by '<*masked*>'
+        :type log_mask_re: typing.Optional[str]
+        :param stdin: pass STDIN text to the process
+        :type stdin: typing.Union[bytes, str, bytearray, None]
+        :param open_stdout: open STDOUT stream for read
+        :type open_stdout: bool
+        :param open_stderr: open STDERR stream for read
+        :type open_stderr: bool
+        :param kwargs: additional parameters for call.
+        :type kwargs: typing.Any
+        :return: Execution result
+        :rtype: ExecResult
+        :raises ExecHelperTimeoutError: Timeout exceeded
+
+        .. versionadded:: 7.1.0
+        """
+        worker: typing.Optional[_subprocess_helpers.ShellWorker] = self.__shell_worker
+        if worker is not None and stdin is None and all(kwargs.get(name) is None for name in _NEW_PROCESS_KWARGS):
+            if worker.lock.acquire(blocking=False):  # Busy shell: execute in new one
+                try:
+                    return self._execute_in_shell(
+                        worker,
+                        command,
+                        verbose,
+                        timeout,
+                        log_mask_re=log_mask_re,
+                        open_stdout=open_stdout,
+                        open_stderr=open_stderr,
+                        **kwargs,
+                    )
+                finally:
+                    worker.lock.release()
+        if stdin is not None:
+            kwargs.setdefault("concurrent_stdin", True)
+        return super()._execute_uncached(
+            command,
+            verbose,
+            timeout,
+            log_mask_re=log_mask_re,
+            stdin=stdin,
+            open_stdout=open_stdout,
+            open_stderr=open_stderr,
             **kwargs,
         )
 
+    def _execute_in_shell(
+        self,
+        worker: _subprocess_helpers.ShellWorker,
+        command: CommandT,
+        verbose: bool = False,
+        timeout: OptionalTimeoutT = constants.DEFAULT_TIMEOUT,
+        *,
+        log_mask_re: LogMaskReT = None,
+        open_stdout: bool = True,
+        open_stderr: bool = True,
+        chroot_path: typing.Optional[str] = None,
+        cwd: CwdT = None,
+        **kwargs: typing.Any,
+    ) -> exec_result.ExecResult:
+        """Execute command by persistent shell and wait for return code.
+
+        :param worker: persistent shell (lock should be held by caller)
+        :type worker: ShellWorker
+        :param command: Command for execution
+        :type command: typing.Union[str, typing.Iterable[str]]
+        :param verbose: Produce log.info records for command call and output
+        :type verbose: bool
+        :param timeout: Timeout for command execution.
+        :type timeout: typing.Union[int, float, None]
+        :param log_mask_re: regex lookup rule to mask command for logger.
+                            all MATCHED groups will be replaced by '<*masked*>'
+        :type log_mask_re: typing.Optional[str]
+        :param open_stdout: open STDOUT stream for read
+        :type open_stdout: bool
+        :param open_stderr: open STDERR stream for read
+        :type open_stderr: bool
+        :param chroot_path: chroot path override
+        :type chroot_path: typing.Optional[str]
+        :param cwd: Sets the current directory before the command is executed.
+        :type cwd: typing.Optional[typing.Union[str, bytes, pathlib.Path]]
+        :param kwargs: additional parameters for call.
+        :type kwargs: typing.Any
+        :return: Execution result
+        :rtype: ExecResult
+        :raises ExecHelperNoKillError: Process not dies on SIGTERM & SIGKILL
+        :raises ExecHelperTimeoutError: Timeout exceeded
+
+        .. versionadded:: 7.1.0
+        """
+        log_level: int = logging.INFO if verbose else logging.DEBUG
+        cmd: str = self._cmd_to_string(command)
+        self._log_command_execute(
+            command=cmd,
+            log_mask_re=log_mask_re,
+            log_level=log_level,
+            chroot_path=chroot_path,
+            **kwargs,
+        )
+        frame = _shell_framing.FramedCommand(self._prepare_command(cmd=cmd, chroot_path=chroot_path))
+        result = exec_result.ExecResult(
+            cmd=self._mask_command(cmd=cmd, log_mask_re=log_mask_re),
+            started=datetime.datetime.utcnow(),
+        )
+        exit_code, timed_out = worker.run(
+            frame,
+            frame.script(
+                cwd=os.getcwd() if cwd is None else os.fsdecode(cwd),
+                open_stdout=open_stdout,
+                open_stderr=open_stderr,
+            ),
+            timeout,
+            grace_period=self.kill_grace_period,
+        )
+        result.read_stdout(src=frame.stdout_lines, log=self.logger, verbose=verbose)
+        result.read_stderr(src=frame.stderr_lines, log=self.logger, verbose=verbose)
+        if exit_code is None:
+            raise exceptions.ExecHelperNoKillError(result=result, timeout=timeout)  # type: ignore
+        result.exit_code = exit_code
+        if timed_out:
+            wait_err_msg: str = _log_templates.CMD_WAIT_ERROR.format(result=result, timeout=timeout)
+            self.logger.debug(wait_err_msg)
+            raise exceptions.ExecHelperTimeoutError(result=result, timeout=timeout)  # type: ignore
+        self.logger.log(level=log_level, msg=f"Command {result.cmd!r} exit code: {result.exit_code!s}")
+        return result
+
     def __call__(
         self,
         command: CommandT,
@@ -481,6 +1157,10 @@ class Subprocess(api.ExecHelper):
         cwd: CwdT = None,
         env: EnvT = None,
         env_patch: EnvT = None,
+        cpu_affinity: CpuAffinityT = None,
+        nice: typing.Optional[int] = None,
+        ionice: IoNiceT = None,
+        rlimits: RLimitsT = None,
         exception_class: CalledProcessErrorSubClassT = exceptions.CalledProcessError,
         **kwargs: typing.Any,
     ) -> exec_result.ExecResult:
@@ -513,6 +1193,14 @@ class Subprocess(api.ExecHelper):
         :type env: typing.Optional[typing.Mapping[typing.Union[str, bytes], typing.Union[str, bytes]]]
         :param env_patch: Defines the environment variables to ADD for the new process.
         :type env_patch: typing.Optional[typing.Mapping[typing.Union[str, bytes], typing.Union[str, bytes]]]
+        :param cpu_affinity: CPUs allowed for the process
+        :type cpu_affinity: typing.Optional[typing.Iterable[int]]
+        :param nice: niceness increment for the process
+        :type nice: typing.Optional[int]
+        :param ionice: IO scheduling class or class and priority level (psutil.IOPRIO_CLASS_* constants)
+        :type ionice: typing.Optional[typing.Union[int, typing.Tuple[int, int]]]
+        :param rlimits: resource limits for the process: resource.RLIMIT_* -> (soft, hard)
+        :type rlimits: typing.Optional[typing.Mapping[int, typing.Tuple[int, int]]]
         :param exception_class: Exception class for errors. Subclass of CalledProcessError is mandatory.
         :type exception_class: typing.Type[exceptions.CalledProcessError]
         :param kwargs: additional parameters for call.
@@ -525,6 +1213,7 @@ class Subprocess(api.ExecHelper):
         .. versionchanged:: 1.2.0 default timeout 1 hour
         .. versionchanged:: 3.2.0 Exception class can be substituted
         .. versionchanged:: 3.4.0 Expected is not optional, defaults os dependent
+        .. versionchanged:: 7.1.0 cpu_affinity, nice, ionice and rlimits
         """
         return super().check_call(
             command=command,
@@ -540,6 +1229,10 @@ class Subprocess(api.ExecHelper):
             cwd=cwd,
             env=env,
             env_patch=env_patch,
+            cpu_affinity=cpu_affinity,
+            nice=nice,
+            ionice=ionice,
+            rlimits=rlimits,
             exception_class=exception_class,
             **kwargs,
         )
@@ -622,3 +1315,361 @@ class Subprocess(api.ExecHelper):
             exception_class=exception_class,
             **kwargs,
         )
+
+    def execute_many(
+        self,
+        commands: typing.Iterable[CommandT],
+        timeout: OptionalTimeoutT = constants.DEFAULT_TIMEOUT,
+        expected: ExpectedExitCodesT = (proc_enums.EXPECTED,),
+        raise_on_err: bool = True,
+        *,
+        max_workers: typing.Optional[int] = None,
+        as_completed: bool = False,
+        verbose: bool = False,
+        log_mask_re: LogMaskReT = None,
+        stdin: OptionalStdinT = None,
+        open_stdout: bool = True,
+        open_stderr: bool = True,
+        cwd: CwdT = None,
+        env: EnvT = None,
+        env_patch: EnvT = None,
+        exception_class: typing.Type[exceptions.ParallelCallProcessError] = exceptions.ParallelCallProcessError,
+        **kwargs: typing.Any,
+    ) -> typing.Union[typing.List[exec_result.ExecResult], typing.Iterator[typing.Tuple[int, exec_result.ExecResult]]]:
+        """Execute several commands with bounded parallelism.
+
+        Each command is executed by own worker thread, process output is read by the same thread.
+
+        :param commands: Commands for execution
+        :type commands: typing.Iterable[typing.Union[str, typing.Iterable[str]]]
+        :param timeout: Timeout for each command execution.
+        :type timeout: typing.Union[int, float, None]
+        :param expected: expected return codes (0 by default)
+        :type expected: typing.Iterable[typing.Union[int, proc_enums.ExitCodes]]
+        :param raise_on_err: Raise exception on unexpected return code
+        :type raise_on_err: bool
+        :param max_workers: maximum amount of simultaneously running commands (None: ThreadPoolExecutor default)
+        :type max_workers: typing.Optional[int]
+        :param as_completed: yield tuples (command index, result) as commands complete instead of list in input order
+        :type as_completed: bool
+        :param verbose: Produce log.info records for command call and output
+        :type verbose: bool
+        :param log_mask_re: regex lookup rule to mask command for logger.
+                            all MATCHED groups will be replaced by '<*masked*>'
+        :type log_mask_re: typing.Optional[str]
+        :param stdin: pass STDIN text to each process
+        :type stdin: typing.Union[bytes, str, bytearray, None]
+        :param open_stdout: open STDOUT stream for read
+        :type open_stdout: bool
+        :param open_stderr: open STDERR stream for read
+        :type open_stderr: bool
+        :param cwd: Sets the current directory before the child is executed.
+        :type cwd: typing.Optional[typing.Union[str, bytes, pathlib.Path]]
+        :param env: Defines the environment variables for the new process.
+        :type env: typing.Optional[typing.Mapping[typing.Union[str, bytes], typing.Union[str, bytes]]]
+        :param env_patch: Defines the environment variables to ADD for the new process.
+        :type env_patch: typing.Optional[typing.Mapping[typing.Union[str, bytes], typing.Union[str, bytes]]]
+        :param exception_class: Exception to raise on error. Mandatory subclass of exceptions.ParallelCallProcessError
+        :type exception_class: typing.Type[exceptions.ParallelCallProcessError]
+        :param kwargs: additional parameters for call.
+        :type kwargs: typing.Any
+        :return: results in order of commands or iterator over (index, result) in order of completion
+        :rtype: typing.Union[typing.List[ExecResult], typing.Iterator[typing.Tuple[int, ExecResult]]]
+        :raises ParallelCallProcessError: Unexpected exit code at least on one command
+        :raises ParallelCallExceptions: At least one exception raised during execution (including timeout)
+
+        .. note:: Errors are collected in dictionaries with keys (masked command, command index).
+        .. note:: In as_completed mode all results are yielded, errors are raised after the last one.
+        .. note:: In as_completed mode commands are started on first iteration step.
+        .. versionadded:: 7.1.0
+        """
+        prep_expected: typing.Sequence[ExitCodeT] = proc_enums.exit_codes_to_enums(expected)
+        cmds: typing.List[str] = [self._cmd_to_string(command) for command in commands]
+        keys: typing.List[typing.Tuple[str, int]] = [
+            (self._mask_command(cmd=cmd, log_mask_re=log_mask_re), idx) for idx, cmd in enumerate(cmds)
+        ]
+        new_executor: typing.Callable[[], executor_mod.HelperExecutor] = functools.partial(
+            executor_mod.HelperExecutor,
+            max_workers=max_workers,
+            thread_name_prefix=f"{self.__class__.__name__}.execute_many",
+        )
+        results: typing.Dict[typing.Tuple[str, int], exec_result.ExecResult] = {}
+        errors: typing.Dict[typing.Tuple[str, int], exec_result.ExecResult] = {}
+        raised_exceptions: typing.Dict[typing.Tuple[str, int], Exception] = {}
+
+        def start(
+            executor: concurrent.futures.Executor,
+        ) -> typing.Dict[concurrent.futures.Future[exec_result.ExecResult], int]:  # pylint: disable=E1136
+            """Submit all commands.
+
+            :param executor: executor for commands
+            :type executor: concurrent.futures.Executor
+            :return: futures of commands mapped to command index
+            :rtype: typing.Dict[concurrent.futures.Future[ExecResult], int]
+            """
+            return {
+                executor.submit(
+                    self.execute,
+                    cmd,
+                    verbose,
+                    timeout,
+                    log_mask_re=log_mask_re,
+                    stdin=stdin,
+                    open_stdout=open_stdout,
+                    open_stderr=open_stderr,
+                    cwd=cwd,
+                    env=env,
+                    env_patch=env_patch,
+                    **kwargs,
+                ): idx
+                for idx, cmd in enumerate(cmds)
+            }
+
+        def collect(
+            future: concurrent.futures.Future[exec_result.ExecResult],
+            idx: int,
+        ) -> None:  # pylint: disable=unsubscriptable-object
+            """Store result or exception of finished command.
+
+            :param future: finished command future
+            :type future: concurrent.futures.Future[ExecResult]
+            :param idx: command index
+            :type idx: int
+            """
+            key: typing.Tuple[str, int] = keys[idx]
+            try:
+                result: exec_result.ExecResult = future.result()
+            except Exception as e:
+                raised_exceptions[key] = e
+                return
+            results[key] = result
+            if result.exit_code not in prep_expected:
+                errors[key] = result
+
+        def check_errors() -> None:
+            """Raise aggregated errors if any."""
+            self._raise_batch_errors(
+                keys,
+                raised_exceptions,
+                errors,
+                results,
+                expected=prep_expected,
+                raise_on_err=raise_on_err,
+                exception_class=exception_class,
+            )
+
+        def iter_completed() -> typing.Iterator[typing.Tuple[int, exec_result.ExecResult]]:
+            """Yield results as commands complete.
+
+            Commands are started on first `next()`: not started iterator does not run anything.
+
+            :return: iterator over (command index, result)
+            :rtype: typing.Iterator[typing.Tuple[int, ExecResult]]
+            """
+            executor: executor_mod.HelperExecutor = new_executor()
+            futures: typing.Dict[concurrent.futures.Future[exec_result.ExecResult], int] = {}  # pylint: disable=E1136
+            try:
+                futures = start(executor)
+                for future in concurrent.futures.as_completed(futures):
+                    collect(future, futures[future])
+                    key: typing.Tuple[str, int] = keys[futures[future]]
+                    if key in results:
+                        yield key[1], results[key]
+            finally:
+                for future in futures:
+                    future.cancel()  # Iteration is stopped: do not start pending commands
+                executor.shutdown(wait=False)
+            check_errors()
+
+        if as_completed:
+            return iter_completed()
+
+        with new_executor() as executor:
+            futures = start(executor)
+            for future in concurrent.futures.as_completed(futures):
+                collect(future, futures[future])
+        check_errors()
+        return [results[key] for key in keys]
+
+    def pipeline(
+        self,
+        commands: typing.Iterable[CommandT],
+        verbose: bool = False,
+        timeout: OptionalTimeoutT = constants.DEFAULT_TIMEOUT,
+        *,
+        log_mask_re: LogMaskReT = None,
+        stdin: OptionalStdinT = None,
+        open_stdout: bool = True,
+        open_stderr: bool = True,
+        chroot_path: typing.Optional[str] = None,
+        cwd: CwdT = None,
+        env: EnvT = None,
+        env_patch: EnvT = None,
+        **kwargs: typing.Any,
+    ) -> exec_result.PipelineResult:
+        """Execute commands connected by pipes without shell and wait for all stages.
+
+        Stages are connected by OS pipes directly: data between stages is not copied by python.
+        Each stage is started in own process group, on timeout all stages are stopped as in `execute`.
+
+        :param commands: Pipeline stages. String stages are split by shell rules, shell syntax is not supported.
+        :type commands: typing.Iterable[typing.Union[str, typing.Iterable[str]]]
+        :param verbose: Produce log.info records for command call and output
+        :type verbose: bool
+        :param timeout: Timeout for the whole pipeline execution.
+        :type timeout: typing.Union[int, float, None]
+        :param log_mask_re: regex lookup rule to mask command for logger.
+                            all MATCHED groups will be replaced by '<*masked*>'
+        :type log_mask_re: typing.Optional[str]
+        :param stdin: pass STDIN text to the first stage (if not set, STDIN is not opened)
+        :type stdin: typing.Union[bytes, str, bytearray, None]
+        :param open_stdout: open STDOUT stream of the last stage for read
+        :type open_stdout: bool
+        :param open_stderr: open STDERR streams for read
+        :type open_stderr: bool
+        :param chroot_path: chroot path override
+        :type chroot_path: typing.Optional[str]
+        :param cwd: Sets the current directory before the children are executed.
+        :type cwd: typing.Optional[typing.Union[str, bytes, pathlib.Path]]
+        :param env: Defines the environment variables for the new processes.
+        :type env: typing.Optional[typing.Mapping[typing.Union[str, bytes], typing.Union[str, bytes]]]
+        :param env_patch: Defines the environment variables to ADD for the new processes.
+        :type env_patch: typing.Optional[typing.Mapping[typing.Union[str, bytes], typing.Union[str, bytes]]]
+        :param kwargs: additional parameters for call.
+        :type kwargs: typing.Any
+        :return: Execution result with per-stage results
+        :rtype: PipelineResult
+        :raises ValueError: No commands to execute
+        :raises ExecHelperNoKillError: Process not dies on SIGTERM & SIGKILL
+        :raises ExecHelperTimeoutError: Timeout exceeded
+
+        .. versionadded:: 7.1.0
+        """
+        stages: typing.List[typing.List[str]] = [
+            shlex.split(command) if isinstance(command, str) else list(command) for command in commands
+        ]
+        if not stages:
+            raise ValueError("Pipeline should contain at least one command")
+
+        log_level: int = logging.INFO if verbose else logging.DEBUG
+        stage_cmds: typing.List[str] = [self._cmd_to_string(stage) for stage in stages]
+        cmd: str = " | ".join(stage_cmds)
+        self._log_command_execute(command=cmd, log_mask_re=log_mask_re, log_level=log_level, chroot_path=chroot_path)
+
+        target_path: typing.Optional[str] = chroot_path if chroot_path else self._chroot_path
+        prefix: typing.List[str] = ["chroot", target_path.strip()] if target_path and target_path != "/" else []
+        env = self._prepare_env(env=env, env_patch=env_patch)
+
+        started = datetime.datetime.utcnow()
+        processes: typing.List[subprocess.Popen[bytes]] = []  # pylint: disable=unsubscriptable-object
+        stdout = _subprocess_helpers.LineBuffer()
+        stderr: typing.List[_subprocess_helpers.LineBuffer] = [_subprocess_helpers.LineBuffer() for _ in stages]
+        pipes: typing.Dict[typing.IO[bytes], _subprocess_helpers.LineBuffer] = {}
+        statuses: typing.List[_StageStatusT] = []  # Collected in order of stages: reaped stage status is final
+
+        def stop() -> typing.List[_StageStatusT]:
+            """Stop running stages: statuses of stages not collected yet are collected after kill if required.
+
+            :return: stages exit codes (None if stage is still alive) and resource usage
+            :rtype: typing.List[typing.Tuple[typing.Optional[int], typing.Optional[ResourceUsage]]]
+            """
+            for process in processes[len(statuses) :]:  # noqa: E203
+                status: _StageStatusT = _subprocess_helpers.poll_process(process)
+                if status[0] is None:
+                    _subprocess_helpers.kill_proc_tree(process.pid, grace_period=self.kill_grace_period)
+                    status = _subprocess_helpers.poll_process(process)
+                statuses.append(status)
+            return statuses
+
+        def make_result(statuses: typing.Sequence[_StageStatusT]) -> exec_result.PipelineResult:
+            """Make pipeline result.
+
+            :param statuses: stages exit codes and resource usage
+            :type statuses: typing.Sequence[typing.Tuple[typing.Optional[int], typing.Optional[ResourceUsage]]]
+            :return: pipeline result
+            :rtype: PipelineResult
+            """
+            results: typing.List[exec_result.ExecResult] = [
+                exec_result.ExecResult(
+                    cmd=self._mask_command(cmd=stage_cmd, log_mask_re=log_mask_re),
+                    stdin=stdin if idx == 0 else None,
+                    stdout=stdout.lines if idx == len(stages) - 1 else None,
+                    stderr=stage_stderr.lines,
+                    exit_code=proc_enums.INVALID if exit_code is None else exit_code,
+                    started=started,
+                    rusage=rusage,
+                )
+                for idx, (stage_cmd, stage_stderr, (exit_code, rusage)) in enumerate(zip(stage_cmds, stderr, statuses))
+            ]
+            usages: typing.List[typing.Optional[exec_result.ResourceUsage]] = [result.rusage for result in results]
+            return exec_result.PipelineResult(
+                cmd=self._mask_command(cmd=cmd, log_mask_re=log_mask_re),
+                stdin=stdin,
+                stdout=stdout.lines,
+                stderr=[line for result in results for line in result.stderr],
+                exit_code=results[-1].exit_code,
+                started=started,
+                rusage=None if None in usages else functools.reduce(operator.add, usages),
+                stages=results,
+            )
+
+        deadline: typing.Optional[float] = None if timeout is None else time.monotonic() + timeout
+        try:
+            for idx, stage in enumerate(stages):
+                last: bool = idx == len(stages) - 1
+                if idx:
+                    stage_stdin: typing.Union[int, typing.IO[bytes], None] = processes[-1].stdout
+                else:
+                    stage_stdin = subprocess.DEVNULL if stdin is None else subprocess.PIPE
+                process: subprocess.Popen[bytes] = subprocess.Popen(  # pylint: disable=unsubscriptable-object
+                    args=prefix + stage,
+                    stdin=stage_stdin,
+                    stdout=subprocess.PIPE if not last or open_stdout else subprocess.DEVNULL,
+                    stderr=subprocess.PIPE if open_stderr else subprocess.DEVNULL,
+                    cwd=cwd,
+                    env=env,
+                    universal_newlines=False,
+                    **_subprocess_helpers.subprocess_kw,
+                )
+                if idx:
+                    processes[-1].stdout.close()  # type: ignore  # Only the next stage should hold the pipe
+                processes.append(process)
+                if process.stderr is not None:
+                    pipes[process.stderr] = stderr[idx]
+            if processes[-1].stdout is not None:
+                pipes[processes[-1].stdout] = stdout
+            feeder: typing.Optional[_subprocess_helpers.StdinFeeder] = None
+            if stdin is not None:
+                feeder = _subprocess_helpers.StdinFeeder(
+                    processes[0].stdin, self._string_bytes_bytearray_as_bytes(stdin)  # type: ignore
+                )
+
+            self._read_pipes(pipes, processes, timeout, deadline, verbose=verbose, stdin=feeder)
+            for process in processes:
+                statuses.append(
+                    _subprocess_helpers.wait_process(process, timeout=_subprocess_helpers.remaining_time(deadline))
+                )
+        except subprocess.TimeoutExpired as exc:
+            result: exec_result.PipelineResult = make_result(stop())
+            if any(exit_code is None for exit_code, _ in statuses):
+                raise exceptions.ExecHelperNoKillError(result=result, timeout=timeout) from exc  # type: ignore
+            result.set_timestamp()
+            wait_err_msg: str = _log_templates.CMD_WAIT_ERROR.format(result=result, timeout=timeout)
+            self.logger.debug(wait_err_msg)
+            raise exceptions.ExecHelperTimeoutError(result=result, timeout=timeout) from exc  # type: ignore
+        except BaseException:
+            stop()
+            raise
+        finally:
+            for process in processes:
+                for stream in (process.stdout, process.stderr):
+                    if stream is not None and not stream.closed:
+                        stream.close()
+
+        result = make_result(statuses)
+        stages_str: str = ", ".join(str(code) for code in result.exit_codes)
+        result_msg: str = f"Command {result.cmd!r} exit code: {result.exit_code!s} (stages: {stages_str})"
+        if verbose and result.rusage is not None:
+            result_msg += f" ({result.rusage!s})"
+        self.logger.log(level=log_level, msg=result_msg)
+        return result
@@ -156,6 +156,7 @@ def execute(monkeypatch, exec_result):
 @pytest.fixture
 def create_subprocess_shell(mocker, monkeypatch, run_parameters):
     mocker.patch("psutil.Process")
+    mocker.patch("os.killpg")
 
     def create_mock(
         ec: typing.Union[exec_helpers.ExitCodes, int] = exec_helpers.ExitCodes.EX_OK,
@@ -236,6 +236,7 @@ def create_subprocess_shell(mocker, monkeypatch, run_parameters):
     mock_parameters: MockParameters = run_parameters["mock_parameters"]
 
     mocker.patch("psutil.Process")
+    mocker.patch("os.killpg")
 
     def create_mock(
         stdout: typing.Optional[typing.Tuple] = None, **kwargs,
@@ -20,6 +20,7 @@
 
 # Standard Library
 import datetime
+import io
 import unittest
 import xml.etree.ElementTree
 from unittest import mock
@@ -328,6 +329,68 @@ class TestExecResult(unittest.TestCase):
             pretty_repr,
         )
 
+    def test_pipeline_result(self):
+        """Test pipeline result with per-stage data."""
+        stages = (
+            exec_helpers.ExecResult("zcat file", stderr=[b"warning\n"], exit_code=exec_helpers.ExitCodes.EX_SIGPIPE),
+            exec_helpers.ExecResult("head -n 1", stdout=[b"line\n"], exit_code=0),
+        )
+        result = exec_helpers.PipelineResult(
+            "zcat file | head -n 1", stdout=[b"line\n"], stderr=[b"warning\n"], exit_code=0, stages=stages
+        )
+        self.assertEqual(result.stages, stages)
+        self.assertEqual(result.exit_codes, (exec_helpers.ExitCodes.EX_SIGPIPE, exec_helpers.ExitCodes.EX_OK))
+        self.assertEqual(result["exit_codes"], result.exit_codes)
+        self.assertEqual(
+            repr(result),
+            f"PipelineResult(cmd='zcat file | head -n 1', stdout=(b'line\\n',), stderr=(b'warning\\n',), "
+            f"exit_code={result.exit_code!s}, exit_codes={result.exit_codes!r},)",
+        )
+        self.assertEqual(
+            result,
+            exec_helpers.ExecResult("zcat file | head -n 1", stdout=[b"line\n"], stderr=[b"warning\n"], exit_code=0),
+        )
+
+    def test_rusage(self):
+        """Test resource usage representation and read-only state."""
+        rusage = exec_helpers.ResourceUsage(0.5, 0.25, 1024, 1, 2, 3, 4)
+        result = exec_helpers.ExecResult(cmd, rusage=rusage)
+        self.assertIs(result.rusage, rusage)
+        self.assertIn(f" rusage={rusage!r},", repr(result))
+        self.assertIn(f"\trusage={rusage!s},\n", str(result))
+        self.assertEqual(result, exec_helpers.ExecResult(cmd))
+
+        result.exit_code = 0
+        with self.assertRaises(RuntimeError):
+            result.rusage = None
+
+        self.assertEqual(
+            rusage + exec_helpers.ResourceUsage(1, 1, 512, 1, 1, 1, 1),
+            exec_helpers.ResourceUsage(1.5, 1.25, 1024, 2, 3, 4, 5),
+        )
+        self.assertEqual(
+            str(rusage), "user=0.500s sys=0.250s max_rss=1024KiB blocks_in=1 blocks_out=2 ctx_switches=3/4"
+        )
+
+    def test_raw_output(self):
+        """Test bulk output: lines are split only on lines access."""
+        result = exec_helpers.ExecResult(cmd, stdout=[b"line 1\n", b"line"])
+        result.append_stdout(b" 2\nline 3\n")
+        result.append_stdout(memoryview(b"tail"))
+        self.assertEqual(result.stdout_bin, bytearray(b"line 1\nline 2\nline 3\ntail"))
+        self.assertEqual(result.stdout_brief, "line 1\nline 2\nline 3\ntail")
+        self.assertEqual(result.stdout, (b"line 1\n", b"line 2\n", b"line 3\n", b"tail"))
+
+        lines = [f"line {idx}\n".encode() for idx in range(10)]
+        raw = exec_helpers.ExecResult(cmd)
+        raw.read_stderr_chunks(io.BytesIO(b"".join(lines)))
+        self.assertEqual(raw.stderr_brief, exec_helpers.ExecResult(cmd, stderr=lines).stderr_brief)
+        self.assertEqual(raw, exec_helpers.ExecResult(cmd, stderr=lines))
+
+        raw.exit_code = 0
+        with self.assertRaises(RuntimeError):
+            raw.append_stdout(b"data")
+
 
 # noinspection PyTypeChecker
 class TestExecResultRuamelYaml(unittest.TestCase):
@@ -0,0 +1,88 @@
+#    Copyright 2018 - 2020 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+# Standard Library
+import concurrent.futures
+import functools
+import sys
+import threading
+
+# External Dependencies
+import pytest
+
+# Exec-Helpers Implementation
+import exec_helpers
+
+
+def test_001_statistics() -> None:
+    """Queue depth and active workers are tracked."""
+    release = threading.Event()
+    executor = exec_helpers.HelperExecutor(max_workers=2, thread_name_prefix="test")
+    try:
+        futures = [executor.submit(release.wait, 5) for _ in range(3)]
+        blocked = executor.submit(threading.current_thread)
+        assert executor.max_workers == 2
+        assert executor.workers == 2
+        assert executor.saturated
+        assert executor.queue_depth == 2
+        assert executor.max_queue_depth == 2
+        assert blocked.cancel()
+        assert executor.queue_depth == 1
+        assert "queue_depth=1" in repr(executor)
+
+        release.set()
+        concurrent.futures.wait(futures, timeout=5)
+        assert executor.submit(threading.current_thread).result(timeout=5).name.startswith("test_")
+        assert executor.queue_depth == 0
+        assert executor.active_workers == 0
+        assert executor.completed == 4
+        assert not executor.saturated
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def test_002_failed_task() -> None:
+    """Failed tasks are counted as completed, exception is delivered by future."""
+    with exec_helpers.HelperExecutor(max_workers=1) as executor:
+        future = executor.submit(functools.partial(int, "x"))
+        with pytest.raises(ValueError):
+            future.result(timeout=5)
+        assert executor.completed == 1
+        assert executor.active_workers == 0
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX shell required")
+def test_003_helper_executor() -> None:
+    """Helper creates own executor by factory, shared executor instance is not closed by helper."""
+    helper = exec_helpers.Subprocess(
+        executor=functools.partial(exec_helpers.HelperExecutor, max_workers=4, thread_name_prefix="local")
+    )
+    own = helper.executor
+    assert isinstance(own, exec_helpers.HelperExecutor)
+    assert own.max_workers == 4
+    assert helper.executor is own
+    helper.close()
+    assert helper.executor is not own
+
+    default = exec_helpers.Subprocess().executor
+    assert isinstance(default, exec_helpers.HelperExecutor)
+    assert default is not exec_helpers.Subprocess().executor
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as shared:
+        helper.executor = shared
+        assert helper.executor is shared
+        helper.close()
+        assert helper.executor is shared
+        assert shared.submit(int, "1").result(timeout=5) == 1
@@ -0,0 +1,188 @@
+#    Copyright 2018 - 2020 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+# Standard Library
+import concurrent.futures
+import sys
+import threading
+import time
+
+# External Dependencies
+import pytest
+
+# Exec-Helpers Implementation
+import exec_helpers
+
+
+def make_result(cmd: str, stdout: bytes = b"") -> exec_helpers.ExecResult:
+    return exec_helpers.ExecResult(cmd, stdout=[stdout] if stdout else None, exit_code=0)
+
+
+def test_001_get_put(mocker) -> None:
+    """Results are cached until TTL expiration."""
+    monotonic = mocker.patch("time.monotonic", return_value=100.0)
+    cache = exec_helpers.ResultCache()
+    result = make_result("uname -r", b"5.10\n")
+    assert cache.get("key") is None
+    cache.put("key", result, ttl=10)
+    assert cache.get("key") is result
+    assert len(cache) == 1
+    assert cache.size == 5
+
+    monotonic.return_value = 110.0
+    assert cache.get("key") is None
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses, cache.evictions) == (1, 2, 0)
+
+
+def test_002_lru_eviction() -> None:
+    """Least recently used results are dropped to fit limits."""
+    cache = exec_helpers.ResultCache(max_entries=2, max_bytes=10)
+    cache.put(1, make_result("1", b"1234"), ttl=60)
+    cache.put(2, make_result("2", b"1234"), ttl=60)
+    assert cache.get(1) is not None
+    cache.put(3, make_result("3", b"1234"), ttl=60)
+    assert cache.get(2) is None
+    assert cache.get(1) is not None
+
+    cache.put(4, make_result("4", b"1234567"), ttl=60)  # size limit
+    assert len(cache) == 1
+    assert cache.size == 7
+    assert cache.evictions == 3
+
+    cache.put(5, make_result("5", b"x" * 11), ttl=60)  # Too big: not cached
+    assert cache.get(5) is None
+    cache.clear()
+    assert (len(cache), cache.size) == (0, 0)
+
+
+def test_003_immutable() -> None:
+    """Only finished results are cached: they are read-only."""
+    cache = exec_helpers.ResultCache()
+    with pytest.raises(ValueError):
+        cache.put("key", exec_helpers.ExecResult("cmd"), ttl=60)
+    result = make_result("cmd")
+    cache.put("key", result, ttl=60)
+    with pytest.raises(RuntimeError):
+        cache.get("key").exit_code = 1
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX shell required")
+def test_004_execute_cached(tmp_path) -> None:
+    """Results are reused for the same command and context."""
+    runner = exec_helpers.Subprocess()
+    result = runner.execute("echo $RANDOM", cache_ttl=60)
+    assert runner.execute("echo $RANDOM", cache_ttl=60) is result
+    assert runner.execute("echo $RANDOM", cache_ttl=60, cwd=tmp_path) is not result
+    assert runner.execute("echo $RANDOM", cache_ttl=60, env_patch={"A": "1"}) is not result
+    assert runner.execute("echo $RANDOM", cache_ttl=60, stdin="data") is not result
+    assert runner.execute("echo $RANDOM") is not result
+    assert (runner.result_cache.hits, runner.result_cache.misses) == (1, 4)
+
+    other = exec_helpers.Subprocess()
+    other.result_cache = runner.result_cache
+    assert other.execute("echo $RANDOM", cache_ttl=60) is result
+    with other.chroot("/"):
+        assert other.execute("echo $RANDOM", cache_ttl=60) is not result
+
+
+def test_005_single_flight() -> None:
+    """Concurrent identical requests receive result of the single execution."""
+    cache = exec_helpers.ResultCache()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def execute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return make_result("cmd", b"data\n")
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        leader = executor.submit(cache.single_flight, "key", execute)
+        started.wait(5)
+        followers = [executor.submit(cache.single_flight, "key", execute) for _ in range(3)]
+        while cache.coalesced < 3:
+            time.sleep(0.01)
+        assert cache.in_flight == 1
+        release.set()
+        results = [future.result(timeout=5) for future in [leader, *followers]]
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert cache.in_flight == 0
+
+    def fail():
+        raise RuntimeError("failed")
+
+    with pytest.raises(RuntimeError):
+        cache.single_flight("key", fail)
+    assert cache.in_flight == 0
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX shell required")
+def test_006_execute_single_flight() -> None:
+    """Identical concurrent commands are coalesced."""
+    runner = exec_helpers.Subprocess()
+    command = "sleep 0.5; echo $RANDOM"
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(runner.execute, command, single_flight=True) for _ in range(4)]
+        results = [future.result(timeout=10) for future in futures]
+    assert all(result is results[0] for result in results)
+    assert runner.result_cache.coalesced == 3
+    assert len(runner.result_cache) == 0  # Not cached without cache_ttl
+
+
+def test_007_execute_cached_inherited_context(tmp_path, monkeypatch) -> None:
+    """Inherited working directory and environment are the part of cache key."""
+    runner = exec_helpers.Subprocess()
+    result = runner.execute("echo $RANDOM", cache_ttl=60)
+    monkeypatch.chdir(tmp_path)
+    changed_cwd = runner.execute("echo $RANDOM", cache_ttl=60)
+    assert changed_cwd is not result
+    monkeypatch.setenv("EXEC_HELPERS_TEST_VAR", "changed")
+    assert runner.execute("echo $RANDOM", cache_ttl=60) is not changed_cwd
+    monkeypatch.delenv("EXEC_HELPERS_TEST_VAR")
+    assert runner.execute("echo $RANDOM", cache_ttl=60) is changed_cwd
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX shell required")
+def test_008_single_flight_own_timeout() -> None:
+    """Attached request waits for running identical execution no longer than own timeout."""
+    runner = exec_helpers.Subprocess()
+    command = "sleep 1; echo done"
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        leader = executor.submit(runner.execute, command, timeout=10, single_flight=True)
+        while runner.result_cache.in_flight == 0:
+            time.sleep(0.01)
+        started = time.monotonic()
+        with pytest.raises(exec_helpers.ExecHelperTimeoutError) as e:
+            runner.execute(command, timeout=0.2, single_flight=True)
+        assert time.monotonic() - started < 0.9
+        assert e.value.result.cmd == command
+        assert leader.result(timeout=10).stdout == (b"done\n",)
+
+
+def test_009_cache_key_normalized(tmp_path) -> None:
+    """Equal environment and working directory in the different form produce the same key."""
+    runner = exec_helpers.Subprocess()
+    kwargs = {"log_mask_re": None, "stdin": None, "open_stdout": True, "open_stderr": True}
+    assert runner._result_cache_key(
+        "env", env={"A": "1", "B": "2"}, env_patch={"C": "3", "D": "4"}, cwd=tmp_path, **kwargs
+    ) == runner._result_cache_key(
+        "env", env={"B": "2", "A": "1"}, env_patch={"D": "4", "C": "3"}, cwd=str(tmp_path), **kwargs
+    )
+    assert runner._result_cache_key("env", env={"A": "1"}, **kwargs) != runner._result_cache_key(
+        "env", env={"A": "2"}, **kwargs
+    )
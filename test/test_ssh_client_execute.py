@@ -535,3 +535,19 @@ def test_011_call(ssh, ssh_transport_channel, exec_result, run_parameters) -> No
     assert isinstance(res, exec_helpers.ExecResult)
     assert res == exec_result
     ssh_transport_channel.assert_has_calls((mock.call.status_event.is_set(),))
+
+
+def test_012_output_callbacks(ssh, exec_result, run_parameters) -> None:
+    stdout_lines = []
+    stderr_lines = []
+    res = ssh.execute(
+        command,
+        stdin=run_parameters["stdin"],
+        open_stdout=run_parameters["open_stdout"],
+        open_stderr=run_parameters["open_stderr"],
+        on_stdout_line=stdout_lines.append,
+        on_stderr_line=stderr_lines.append,
+    )
+    assert res == exec_result
+    assert tuple(stdout_lines) == exec_result.stdout
+    assert tuple(stderr_lines) == exec_result.stderr
@@ -15,10 +15,12 @@
 # Standard Library
 import pathlib
 import shlex
+import threading
 import typing
 from unittest import mock
 
 # External Dependencies
+import paramiko
 import pytest
 
 # Exec-Helpers Implementation
@@ -284,3 +286,43 @@ def test_014_execute_async_no_chroot_root(ssh, ssh_transport_channel):
     with ssh.chroot("/"):
         ssh._execute_async(command)
     ssh_transport_channel.assert_has_calls((mock.call.makefile_stderr("rb"), mock.call.exec_command(f"{command}\n")))
+
+
+def test_015_sessions_limit(paramiko_ssh_client, ssh_transport_channel, auto_add_policy, ssh_auth_logger, get_logger):
+    """Commands wait for free session, limit is reduced on session refusal by server."""
+    ssh = exec_helpers.SSHClient(
+        host=host, port=port, auth=exec_helpers.SSHAuth(username=username, password=password), max_sessions=2
+    )
+    channels = [mock.MagicMock() for _ in range(4)]
+    refusal = paramiko.ChannelException(1, "Administratively prohibited")
+    open_session = ssh._ssh.get_transport().open_session
+    open_session.side_effect = [channels[0], channels[1], channels[2], refusal, channels[3], refusal]
+
+    ssh._execute_async(command)
+    ssh._execute_async(command)
+    assert (ssh.max_sessions, ssh.active_sessions) == (2, 2)
+
+    waiting = threading.Thread(target=ssh._execute_async, args=(command,), daemon=True)
+    waiting.start()
+    waiting.join(0.2)
+    assert waiting.is_alive()
+    ssh._close_session(channels[0])
+    waiting.join(5)
+    assert not waiting.is_alive()
+    assert ssh.active_sessions == 2
+
+    ssh._close_session(channels[1])
+    refused = threading.Thread(target=ssh._execute_async, args=(command,), daemon=True)
+    refused.start()
+    refused.join(0.2)
+    assert refused.is_alive()
+    assert (ssh.max_sessions, ssh.active_sessions) == (1, 1)
+    ssh._close_session(channels[2])
+    refused.join(5)
+    assert not refused.is_alive()
+    assert ssh.active_sessions == 1
+
+    ssh._close_session(channels[3])
+    with pytest.raises(paramiko.ChannelException):
+        ssh._execute_async(command)  # No other sessions: refusal is not caused by limit
+    assert (ssh.max_sessions, ssh.active_sessions) == (1, 0)
@@ -385,3 +385,27 @@ def test_014_sftp_repair(paramiko_ssh_client, auto_add_policy, ssh_auth_logger,
     sftp = ssh._sftp
     assert sftp == open_sftp()
     log.assert_has_calls((mock.call.debug("SFTP is not connected, try to connect..."),))
+
+
+def test_015_connect_retries(paramiko_ssh_client, auto_add_policy, ssh_auth_logger):
+    """Connection is retried on SSH errors configured amount of times."""
+    connect = mock.Mock(side_effect=paramiko.SSHException)
+    _ssh = mock.Mock()
+    _ssh.attach_mock(connect, "connect")
+    paramiko_ssh_client.return_value = _ssh
+
+    with pytest.raises(paramiko.SSHException):
+        exec_helpers.SSHClient(host=host, auth=exec_helpers.SSHAuth(password=password), connect_retries=0)
+    connect.assert_called_once()
+
+    connect.reset_mock()
+    with mock.patch("time.sleep") as sleep, pytest.raises(paramiko.SSHException):
+        exec_helpers.SSHClient(host=host, auth=exec_helpers.SSHAuth(password=password), connect_retries=1)
+    assert connect.call_count == 2
+    sleep.assert_called_once_with(3)
+
+    connect.reset_mock()
+    connect.side_effect = paramiko.AuthenticationException
+    with pytest.raises(paramiko.AuthenticationException):
+        exec_helpers.SSHClient(host=host, auth=exec_helpers.SSHAuth(password=password))
+    connect.assert_called_once()
@@ -0,0 +1,499 @@
+#    Copyright 2018 - 2020 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Execution against in-process SSH server (paramiko server mode): real channels, no mocks."""
+
+# Standard Library
+import asyncio
+import collections
+import contextlib
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+# External Dependencies
+import paramiko
+import pytest
+
+# Exec-Helpers Implementation
+import exec_helpers
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="POSIX shell required")
+
+username = "user"
+password = "pass"
+connections = collections.Counter()  # Accepted connections by server port
+
+
+class Server(paramiko.ServerInterface):
+    def check_auth_password(self, username_: str, password_: str) -> int:
+        if (username_, password_) == (username, password):
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def get_allowed_auths(self, username_: str) -> str:
+        return "password"
+
+    def check_channel_request(self, kind: str, chanid: int) -> int:
+        return paramiko.OPEN_SUCCEEDED
+
+    def __init__(self) -> None:
+        self.tunnels = {}
+
+    def check_channel_exec_request(self, channel: paramiko.Channel, command: bytes) -> bool:
+        threading.Thread(target=run_command, args=(channel, command), daemon=True).start()
+        return True
+
+    def check_channel_direct_tcpip_request(self, chanid: int, origin, destination) -> int:
+        self.tunnels[chanid] = destination
+        return paramiko.OPEN_SUCCEEDED
+
+
+def tunnel(transport: paramiko.Transport, server: Server) -> None:
+    """Forward direct-tcpip channels to destination (channels are accepted in order of open)."""
+    while transport.is_active():
+        channel = transport.accept(1)
+        if channel is None or channel.get_id() not in server.tunnels:
+            continue
+        sock = socket.create_connection(server.tunnels.pop(channel.get_id()))
+        threading.Thread(target=forward, args=(sock.fileno(), channel.sendall), daemon=True).start()
+        threading.Thread(target=pump, args=(channel, sock), daemon=True).start()
+
+
+def pump(channel: paramiko.Channel, sock: socket.socket) -> None:
+    try:
+        while True:
+            chunk = channel.recv(65536)
+            if not chunk:
+                return
+            sock.sendall(chunk)
+    finally:
+        sock.close()
+        channel.close()
+
+
+def forward(src: int, send) -> None:
+    while True:
+        try:
+            chunk = os.read(src, 65536)
+        except OSError:
+            return
+        if not chunk:
+            return
+        try:
+            send(chunk)
+        except (OSError, EOFError):  # Closed by client
+            return
+
+
+def feed_stdin(channel: paramiko.Channel, proc: subprocess.Popen) -> None:
+    try:
+        while True:
+            chunk = channel.recv(65536)
+            if not chunk:
+                break
+            proc.stdin.write(chunk)
+            proc.stdin.flush()
+    except OSError:  # Command exited
+        return
+    finally:
+        with contextlib.suppress(OSError):
+            proc.stdin.close()  # EOF from client: command continues
+    while not channel.closed and proc.poll() is None:
+        time.sleep(0.05)
+    proc.kill()  # Channel is closed by client: as sshd does on session close (SIGHUP)
+
+
+def run_command(channel: paramiko.Channel, command: bytes) -> None:
+    """Stream output as produced, then send EOF and exit status. Channel is closed by client.
+
+    If output is held open by background jobs after command exit, exit status is sent before EOF (as sshd does).
+    """
+    proc = subprocess.Popen(command, shell=True, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    threading.Thread(target=feed_stdin, args=(channel, proc), daemon=True).start()
+    readers = [
+        threading.Thread(target=forward, args=(proc.stdout.fileno(), channel.sendall), daemon=True),
+        threading.Thread(target=forward, args=(proc.stderr.fileno(), channel.sendall_stderr), daemon=True),
+    ]
+    try:
+        for reader in readers:
+            reader.start()
+        code = proc.wait()
+        for reader in readers:
+            reader.join(1)
+        held = any(reader.is_alive() for reader in readers)
+        if not held:
+            channel.shutdown_write()
+        channel.send_exit_status(code if code >= 0 else 128 - code)  # Killed by signal: as shell reports
+        if held:
+            for reader in readers:
+                reader.join()
+            channel.shutdown_write()
+    except (OSError, EOFError):  # Closed by client on timeout
+        proc.kill()
+    finally:
+        for reader in readers:
+            reader.join()
+        proc.stdout.close()
+        proc.stderr.close()
+
+
+def start_server():
+    host_key = paramiko.RSAKey.generate(1024)
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(4)
+
+    def serve() -> None:
+        while True:
+            try:
+                sock, _ = listener.accept()
+            except OSError:
+                return
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            connections[listener.getsockname()[1]] += 1
+            transport = paramiko.Transport(sock)
+            transport.add_server_key(host_key)
+            server = Server()
+            transport.start_server(server=server)
+            threading.Thread(target=tunnel, args=(transport, server), daemon=True).start()
+
+    threading.Thread(target=serve, daemon=True).start()
+    return listener
+
+
+@pytest.fixture(scope="module")
+def server_ports():
+    listeners = [start_server() for _ in range(3)]
+    yield [listener.getsockname()[1] for listener in listeners]
+    for listener in listeners:
+        listener.close()
+
+
+@pytest.fixture(scope="module")
+def server_port(server_ports):
+    return server_ports[0]
+
+
+@pytest.fixture
+def ssh(server_port, no_real_ssh_config):
+    client = exec_helpers.SSHClient(
+        host="127.0.0.1", port=server_port, auth=exec_helpers.SSHAuth(username=username, password=password)
+    )
+    yield client
+    client.close()
+
+
+def test_001_execute(ssh) -> None:
+    """Output is received from both streams, callbacks receive lines as read."""
+    lines = []
+    res = ssh.execute(
+        "echo line1; echo err >&2; printf 'tail'; exit 3",
+        expected=[3],
+        on_stdout_line=lines.append,
+        callbacks_queue_size=0,
+    )
+    assert res.exit_code == 3
+    assert res.stdout == (b"line1\n", b"tail")
+    assert res.stderr == (b"err\n",)
+    assert lines == [b"line1\n", b"tail"]
+
+
+def test_002_big_output(ssh) -> None:
+    """Output bigger than channel window is drained while command is running, including not stored output."""
+    size = 5 * 1024 * 1024
+    res = ssh.execute(f"head -c {size} /dev/zero", binary_output=True)
+    assert len(res.stdout_bin) == size
+    res = ssh.execute(f"head -c {size} /dev/zero; echo done >&2", open_stdout=False)
+    assert res.stdout == ()
+    assert res.stderr == (b"done\n",)
+
+
+def test_003_latency(ssh) -> None:
+    """Call returns on exit status: no polling period (was 0.1s)."""
+    ssh.execute("true")
+    started = time.perf_counter()
+    for _ in range(10):
+        ssh.execute("true")
+    assert (time.perf_counter() - started) / 10 < 0.08
+
+
+def test_004_timeout(ssh) -> None:
+    """Output received before timeout is kept in exception."""
+    with pytest.raises(exec_helpers.ExecHelperTimeoutError) as e:
+        ssh.execute("echo started; sleep 3", timeout=0.5)
+    assert e.value.stdout == "started"
+    assert ssh.active_sessions == 0
+    assert ssh.execute("echo ok").stdout_str == "ok"
+
+
+@pytest.fixture
+def remotes(server_ports, no_real_ssh_config):
+    clients = [
+        exec_helpers.SSHClient(
+            host="127.0.0.1", port=port, auth=exec_helpers.SSHAuth(username=username, password=password)
+        )
+        for port in server_ports
+    ]
+    yield clients
+    for client in clients:
+        client.close()
+
+
+def test_005_execute_together(remotes) -> None:
+    """Output and exit statuses of all remotes are multiplexed, output bigger than channel window is drained."""
+    size = 3 * 1024 * 1024
+    results = exec_helpers.SSHClient.execute_together(
+        remotes, f"head -c {size} /dev/zero | tr '\\0' 'x'; echo; echo err >&2; exit 2", expected=[2]
+    )
+    assert sorted(results) == sorted(("127.0.0.1", remote.port) for remote in remotes)
+    for result in results.values():
+        assert result.exit_code == 2
+        assert len(result.stdout_bin) == size + 1  # Line end
+        assert result.stderr == (b"err\n",)
+    assert all(remote.active_sessions == 0 for remote in remotes)
+
+
+def test_006_execute_together_timeout(remotes) -> None:
+    """Remotes not finished before timeout are reported by exceptions with output received."""
+    with pytest.raises(exec_helpers.ParallelCallExceptions) as e:
+        exec_helpers.SSHClient.execute_together(remotes, "echo started; sleep 3", timeout=0.5)
+    assert len(e.value.exceptions) == len(remotes)
+    for exc in e.value.exceptions.values():
+        assert isinstance(exc, exec_helpers.ExecHelperTimeoutError)
+        assert exc.stdout == "started"
+    assert all(remote.active_sessions == 0 for remote in remotes)
+
+
+def test_007_execute_on(remotes) -> None:
+    """Results are received as each remote finished, amount of running commands is limited."""
+    started = time.perf_counter()
+    with exec_helpers.SSHClient.execute_on(remotes, "sleep 0.2", max_parallel=1) as results:
+        received = [remote for remote, result in results if result.exit_code == 0]
+    assert time.perf_counter() - started >= 0.6
+    assert sorted(remote.port for remote in received) == sorted(remote.port for remote in remotes)
+
+    started = time.perf_counter()
+    assert len(list(exec_helpers.SSHClient.execute_on(remotes + remotes, "sleep 0.2"))) == len(remotes)
+    assert time.perf_counter() - started < 0.6
+
+
+def test_008_execute_on_limits(remotes) -> None:
+    """Per host timeout and fail fast: running commands are stopped, not started are skipped."""
+    results = list(exec_helpers.SSHClient.execute_on(remotes, "echo started; sleep 3", per_host_timeout=0.3))
+    assert len(results) == len(remotes)
+    for _, exc in results:
+        assert isinstance(exc, exec_helpers.ExecHelperTimeoutError)
+        assert exc.timeout == 0.3
+        assert exc.stdout == "started"
+
+    results = exec_helpers.SSHClient.execute_on(remotes, "exit 1", max_parallel=1, fail_fast=1)
+    assert len(list(results)) == 1
+    assert results.failed_fast
+    assert results.errors == 1
+    assert all(remote.active_sessions == 0 for remote in remotes)
+
+
+def test_009_execute_on_async(remotes) -> None:
+    """Results can be received from asyncio code."""
+
+    async def collect():
+        return [result.stdout_str async for _, result in exec_helpers.SSHClient.execute_on(remotes, "echo ok")]
+
+    assert asyncio.run(collect()) == ["ok"] * len(remotes)
+
+
+def test_010_execute_together_output_limit(remotes) -> None:
+    """Output over limit is drained and dropped: command is not blocked, exit code is received."""
+    size = 3 * 1024 * 1024
+    with pytest.raises(exec_helpers.ParallelCallProcessError) as e:
+        exec_helpers.SSHClient.execute_together(
+            remotes, f"head -c {size} /dev/zero | tr '\\0' 'x'; echo; exit 2", max_output=1024, timeout=10
+        )
+    assert len(e.value.errors) == len(remotes)
+    for result in e.value.errors.values():
+        assert result.exit_code == 2
+        assert result.stdout_bin == bytearray(b"x" * 1024)
+
+
+def test_011_shared_jump_host(server_ports, no_real_ssh_config) -> None:
+    """Targets behind the same jump host use single jump host connection while any of them is open."""
+    bastion_port, *target_ports = server_ports
+    ssh_config = {"bastion": {"hostname": "127.0.0.1", "port": bastion_port}}
+    for idx, port in enumerate(target_ports):
+        ssh_config[f"target{idx}"] = {"hostname": "127.0.0.1", "port": port, "proxyjump": "bastion"}
+    auth = exec_helpers.SSHAuth(username=username, password=password)
+    jump_hosts = exec_helpers.connection_pool.SharedJumpHosts.default()
+    logins = connections[bastion_port]
+
+    targets = [
+        exec_helpers.SSHClient(host=f"target{idx}", ssh_config=ssh_config, ssh_auth_map={"127.0.0.1": auth})
+        for idx in range(len(target_ports))
+    ]
+    assert connections[bastion_port] == logins + 1
+    assert len(jump_hosts) == 1
+    for target in targets:
+        assert target.execute("echo ok").stdout_str == "ok"
+
+    targets[0].reconnect()
+    assert connections[bastion_port] == logins + 1
+    for target in targets:
+        target.close()
+    assert len(jump_hosts) == 0
+
+    target = exec_helpers.SSHClient(host="target0", ssh_config=ssh_config, ssh_auth_map={"127.0.0.1": auth})
+    assert connections[bastion_port] == logins + 2  # The last target closed jump host connection
+    target.close()
+
+
+def test_012_connect_many(server_ports, no_real_ssh_config) -> None:
+    """Connections are established concurrently, unreachable hosts do not block the batch."""
+    refused = socket.socket()
+    refused.bind(("127.0.0.1", 0))
+    blackhole = socket.socket()  # Accepts TCP connection (backlog), never sends SSH banner
+    blackhole.bind(("127.0.0.1", 0))
+    blackhole.listen(4)
+    ssh_config = {f"host{idx}": {"hostname": "127.0.0.1", "port": port} for idx, port in enumerate(server_ports)}
+    ssh_config["refused"] = {"hostname": "127.0.0.1", "port": refused.getsockname()[1]}
+    ssh_config["blackhole"] = {"hostname": "127.0.0.1", "port": blackhole.getsockname()[1]}
+    refused.close()
+
+    started = time.perf_counter()
+    clients, errors = exec_helpers.SSHClient.connect_many(
+        list(ssh_config),
+        timeout=1,
+        connect_timeout=0.2,
+        ssh_config=ssh_config,
+        auth=exec_helpers.SSHAuth(username=username, password=password),
+    )
+    assert time.perf_counter() - started < 1  # Single connection attempt if connect timeout is set
+    try:
+        assert sorted(clients) == [f"host{idx}" for idx in range(len(server_ports))]
+        assert sorted(errors) == ["blackhole", "refused"]
+        assert isinstance(errors["refused"], OSError)
+        assert isinstance(errors["blackhole"], paramiko.SSHException)
+        assert all(client.execute("echo ok").stdout_str == "ok" for client in clients.values())
+
+        _, errors = exec_helpers.SSHClient.connect_many(
+            ["blackhole"], timeout=1, connect_timeout=0.2, connect_retries=1, ssh_config=ssh_config
+        )
+        assert isinstance(errors["blackhole"], TimeoutError)  # Retry is delayed
+    finally:
+        for client in clients.values():
+            client.close()
+        blackhole.close()
+
+
+def test_013_session(ssh) -> None:
+    """Commands are executed by persistent shell over single channel: separate streams and exit codes."""
+    with ssh.session() as session:
+        res = session.execute("echo out; echo err >&2; printf tail; exit 3")
+        assert res.exit_code == 3
+        assert res.stdout == (b"out\n", b"tail")
+        assert res.stderr == (b"err\n",)
+        assert session.execute("cd /; pwd").stdout_str == "/"
+        assert session.execute("pwd", cwd="/tmp").stdout_str == "/tmp"
+        assert session.execute("echo $((1+2))", open_stdout=False).stdout == ()
+        with pytest.raises(exec_helpers.CalledProcessError):
+            session.check_call("false")
+        assert ssh.active_sessions == 1
+
+        with pytest.raises(exec_helpers.ExecHelperTimeoutError) as e:
+            session.execute("echo started; sleep 3", timeout=0.3)
+        assert e.value.stdout == "started"
+        assert ssh.active_sessions == 0  # Shell is stopped
+        assert session.execute("echo restarted").stdout_str == "restarted"
+
+        assert session.execute("kill -9 $$").exit_code == 128 + 9  # Shell died: its exit status is reported
+        assert session.execute("echo restarted").stdout_str == "restarted"
+    assert ssh.active_sessions == 0
+
+
+def test_014_execute_batch(ssh) -> None:
+    """Commands are executed by single shell with separate outputs, exit codes and timings."""
+    results = ssh.execute_batch(
+        ["echo first; echo err >&2", "printf tail; exit 3", "echo $((1+2))", "echo secret=123"],
+        expected=(0, 3),
+        log_mask_re=[None, None, None, r"secret=(\d+)"],
+    )
+    assert [res.exit_code for res in results] == [0, 3, 0, 0]
+    assert results[0].stdout == (b"first\n",)
+    assert results[0].stderr == (b"err\n",)
+    assert results[1].stdout == (b"tail",)
+    assert results[2].stdout_str == "3"
+    assert results[3].cmd == "echo secret=<*masked*>"
+    assert results[0].timestamp <= results[1].started
+    assert ssh.active_sessions == 0
+
+    with pytest.raises(exec_helpers.ParallelCallProcessError) as e:
+        ssh.execute_batch(["true", "false", "echo skipped"], stop_on_error=True)
+    assert list(e.value.errors) == [("false", 1)]
+    assert len(e.value.results) == 2
+
+    with pytest.raises(exec_helpers.ParallelCallExceptions) as e:
+        ssh.execute_batch(["true", "echo started; sleep 3", "true"], timeout=0.3)
+    assert list(e.value.exceptions) == [("echo started; sleep 3", 1)]
+    assert len(e.value.results) == 1
+
+    with pytest.raises(ValueError):
+        ssh.execute_batch(["true"], log_mask_re=[None, None])
+
+
+def test_015_close_executor(ssh) -> None:
+    """Own executor is shut down on close and created again on next command."""
+    assert ssh.execute("echo 1").stdout == (b"1\n",)
+    own = ssh.executor
+    ssh.close()
+    with pytest.raises(RuntimeError):
+        own.submit(int)
+    assert ssh.execute("echo 2").stdout == (b"2\n",)
+    assert ssh.executor is not own
+
+
+def test_016_exit_status_before_eof(ssh, remotes) -> None:
+    """Background job holding output open: command is finished on exit status and limited output drain."""
+    started = time.perf_counter()
+    res = ssh.execute("echo started; sleep 3 &", timeout=10)
+    assert res.exit_code == 0
+    assert res.stdout == (b"started\n",)
+    assert time.perf_counter() - started < 2.5
+
+    started = time.perf_counter()
+    results = list(exec_helpers.SSHClient.execute_on(remotes, "echo started; sleep 3 &", timeout=10))
+    assert len(results) == len(remotes)
+    for _, result in results:
+        assert result.exit_code == 0
+        assert result.stdout == (b"started\n",)
+    assert time.perf_counter() - started < 2.5
+
+
+def test_017_execute_on_async_cancel(remotes) -> None:
+    """Iteration is closed while result is awaited by cancelled task: channels are closed after it is received."""
+
+    async def cancel_and_close() -> None:
+        results = exec_helpers.SSHClient.execute_on(remotes, "sleep 0.5")
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(results.__anext__(), timeout=0.1)
+        await results.aclose()
+        with pytest.raises(StopAsyncIteration):
+            await results.__anext__()
+
+    asyncio.run(cancel_and_close())
+    deadline = time.monotonic() + 5
+    while any(remote.active_sessions for remote in remotes) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert all(remote.active_sessions == 0 for remote in remotes)
@@ -0,0 +1,178 @@
+#    Copyright 2018 - 2020 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+# Standard Library
+from unittest import mock
+
+# External Dependencies
+import pytest
+
+# Exec-Helpers Implementation
+import exec_helpers
+from exec_helpers.connection_pool import ConnectionKey
+
+auth = exec_helpers.SSHAuth(username="user", password="password")
+host = "127.0.0.1"
+
+
+def make_client(alive: bool = True) -> mock.MagicMock:
+    client = mock.MagicMock()
+    client.get_transport.return_value.is_active.return_value = alive
+    client.get_transport.return_value.is_authenticated.return_value = alive
+
+    def close() -> None:
+        client.get_transport.return_value.is_active.return_value = False
+
+    client.close.side_effect = close
+    return client
+
+
+def make_key(hostname: str = host, port: int = 22) -> ConnectionKey:
+    return ConnectionKey(hostname=hostname, port=port, auth=auth, proxy=())
+
+
+def test_001_checkout_checkin() -> None:
+    """Live connection is reused, dead is closed on checkout."""
+    pool = exec_helpers.SSHConnectionPool()
+    key = make_key()
+    first = make_client()
+    assert pool.checkout(key, lambda: first) is first
+    assert (pool.hits, pool.misses) == (0, 1)
+    pool.checkin(key, first)
+    assert len(pool) == 1
+    assert pool.checkout(key, make_client) is first
+    assert (pool.hits, pool.misses) == (1, 1)
+    assert len(pool) == 0
+
+    first.get_transport.return_value.is_active.return_value = False
+    pool.checkin(key, first)  # Dead connection is not pooled
+    first.close.assert_called_once()
+    assert len(pool) == 0
+
+    second = make_client()
+    pool.checkin(key, second)
+    second.get_transport.return_value.is_active.return_value = False
+    third = make_client()
+    assert pool.checkout(key, lambda: third) is third
+    second.close.assert_called_once()
+    assert pool.evictions == 1
+    assert pool.checkout(make_key(port=2222), make_client) is not third
+    assert pool.misses == 3
+
+
+def test_002_limits() -> None:
+    """Idle connections are limited per host and by idle time."""
+    pool = exec_helpers.SSHConnectionPool(max_per_host=2, idle_timeout=60)
+    clients = [make_client() for _ in range(3)]
+    other = make_client()
+    with mock.patch("time.monotonic", side_effect=[0, 1, 2, 3]):
+        for idx, client in enumerate(clients):
+            pool.checkin(ConnectionKey(hostname=host, port=22, auth=auth, proxy=idx), client)
+        pool.checkin(make_key(hostname="other"), other)
+    clients[0].close.assert_called_once()
+    assert len(pool) == 3
+    assert pool.evictions == 1
+
+    with mock.patch("time.monotonic", return_value=61.5):
+        pool.evict_idle()
+    clients[1].close.assert_called_once()
+    clients[2].close.assert_not_called()
+    assert len(pool) == 2
+    assert pool.evictions == 2
+
+    pool.clear()
+    clients[2].close.assert_called_once()
+    other.close.assert_called_once()
+    assert len(pool) == 0
+    assert "evictions=2" in repr(pool)
+
+
+def test_003_default() -> None:
+    """Process-wide pool is single."""
+    assert exec_helpers.SSHConnectionPool.default() is exec_helpers.SSHConnectionPool.default()
+
+
+@pytest.mark.usefixtures("auto_add_policy")
+def test_004_ssh_client_pooled(paramiko_ssh_client) -> None:
+    """Connection is returned to pool on close and reused by the next client."""
+    paramiko_ssh_client.side_effect = make_client
+    pool = exec_helpers.SSHConnectionPool()
+    ssh = exec_helpers.SSHClient(host=host, auth=auth, connection_pool=pool)
+    assert ssh.connection_pool is pool
+    connection = ssh._ssh
+    ssh.close()
+    connection.close.assert_not_called()
+    assert len(pool) == 1
+
+    ssh = exec_helpers.SSHClient(host=host, auth=auth, connection_pool=pool)
+    assert ssh._ssh is connection
+    assert (pool.hits, pool.misses) == (1, 1)
+    connection.connect.assert_called_once()
+
+    ssh.reconnect()  # Connection is dropped
+    connection.close.assert_called_once()
+    assert pool.misses == 2
+    assert ssh._ssh is not connection
+    ssh._ssh.connect.assert_called_once()
+
+    other = exec_helpers.SSHClient(host=host, port=2222, auth=auth, connection_pool=pool)
+    other.close()
+    assert pool.misses == 3
+
+
+@pytest.mark.usefixtures("auto_add_policy")
+def test_005_proxy_to_pooled(paramiko_ssh_client) -> None:
+    """Connection through pooled proxy is pooled too: channel is not opened on pool hit."""
+    paramiko_ssh_client.side_effect = make_client
+    pool = exec_helpers.SSHConnectionPool()
+    proxy = exec_helpers.SSHClient(host=host, auth=auth, connection_pool=pool)
+    open_channel = proxy._ssh.get_transport.return_value.open_channel
+
+    with proxy.proxy_to("10.0.0.2", auth=auth, keepalive=False) as target:
+        connection = target._ssh
+        assert target.connection_pool is pool
+    open_channel.assert_called_once()
+    assert len(pool) == 1
+
+    with proxy.proxy_to("10.0.0.2", auth=auth, keepalive=False) as target:
+        assert target._ssh is connection
+    open_channel.assert_called_once()
+    assert (pool.hits, pool.misses) == (1, 2)
+
+
+def test_006_shared_jump_hosts() -> None:
+    """Jump host connection is reference counted and reconnected if dead."""
+    jump_hosts = exec_helpers.connection_pool.SharedJumpHosts()
+    route = (("bastion", auth),)
+    first = make_client()
+    assert jump_hosts.acquire(route, lambda: first) is first
+    assert jump_hosts.acquire(route, make_client) is first
+    assert jump_hosts.refs(route) == 2
+
+    first.get_transport.return_value.is_active.return_value = False
+    second = make_client()
+    assert jump_hosts.acquire(route, lambda: second) is second
+    first.close.assert_called_once()
+    assert jump_hosts.refs(route) == 3
+
+    for _ in range(2):
+        jump_hosts.release(route)
+    second.close.assert_not_called()
+    jump_hosts.release(route)
+    second.close.assert_called_once()
+    assert len(jump_hosts) == 0
+
+    with pytest.raises(OSError):
+        jump_hosts.acquire(route, mock.Mock(side_effect=OSError))
+    assert len(jump_hosts) == 0
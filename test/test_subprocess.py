@@ -13,9 +13,14 @@
 #    under the License.
 
 # Standard Library
+import io
 import logging
+import os
 import random
+import signal
 import subprocess
+import sys
+import time
 import typing
 from unittest import mock
 
@@ -146,6 +151,7 @@ def execute(mocker, exec_result):
 @pytest.fixture
 def popen(mocker, run_parameters):
     mocker.patch("psutil.Process")
+    mocker.patch("os.killpg")
 
     def create_mock(
         ec: typing.Union[exec_helpers.ExitCodes, int] = exec_helpers.ExitCodes.EX_OK,
@@ -341,3 +347,260 @@ def test_009_call(popen, subprocess_logger, exec_result, run_parameters) -> None
     assert isinstance(res, exec_helpers.ExecResult)
     assert res == exec_result
     popen().wait.assert_called_once_with(timeout=default_timeout)
+
+
+def test_010_execute_many(execute, exec_result, subprocess_logger) -> None:
+    """Test batch execution."""
+    runner = exec_helpers.Subprocess()
+    if exec_result.exit_code == exec_helpers.ExitCodes.EX_OK:
+        assert runner.execute_many([command, command], max_workers=1) == [exec_result, exec_result]
+        assert sorted(idx for idx, _ in runner.execute_many([command, command], as_completed=True)) == [0, 1]
+    else:
+        with pytest.raises(exec_helpers.ParallelCallProcessError) as e:
+            runner.execute_many([command, command])
+        exc: exec_helpers.ParallelCallProcessError = e.value
+        assert exc.errors == {(command, 0): exec_result, (command, 1): exec_result}
+        assert exc.results == exc.errors
+        assert runner.execute_many([command], raise_on_err=False) == [exec_result]
+    assert execute.call_count == 4 if exec_result.exit_code == exec_helpers.ExitCodes.EX_OK else 3
+
+
+def test_011_execute_many_exceptions(execute, exec_result, subprocess_logger) -> None:
+    """Test batch execution with exception."""
+    execute.side_effect = [exec_result, exec_helpers.ExecHelperTimeoutError(result=exec_result, timeout=1)]
+    runner = exec_helpers.Subprocess()
+    runner.execute_many([command, command], as_completed=True)  # Not iterated: nothing is started
+    execute.assert_not_called()
+    with pytest.raises(exec_helpers.ParallelCallExceptions) as e:
+        list(runner.execute_many([command, "sleep 5"], max_workers=1, as_completed=True))
+    exc: exec_helpers.ParallelCallExceptions = e.value
+    assert list(exc.exceptions) == [("sleep 5", 1)]
+    assert exc.results == {(command, 0): exec_result}
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX pipes required")
+def test_012_execute_real_pipes() -> None:
+    """Test output read from real pipes by selector."""
+    runner = exec_helpers.Subprocess()
+    res = runner.execute("seq 1 10000; echo error >&2; printf tail")
+    assert res.exit_code == exec_helpers.ExitCodes.EX_OK
+    assert len(res.stdout) == 10001
+    assert res.stdout[-2:] == (b"10000\n", b"tail")
+    assert res.stderr == (b"error\n",)
+
+    with pytest.raises(exec_helpers.ExecHelperTimeoutError) as e:
+        runner.execute("echo start; sleep 10", timeout=0.5)
+    assert e.value.result.stdout == (b"start\n",)
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX pipes required")
+def test_013_pipeline() -> None:
+    """Test processes pipeline without shell."""
+    runner = exec_helpers.Subprocess()
+    res = runner.pipeline(["seq 1 100000", ("grep", "7"), "sort -r", "head -n 2"])
+    assert isinstance(res, exec_helpers.PipelineResult)
+    assert res.cmd == "seq 1 100000 | grep 7 | sort -r | head -n 2"
+    assert res.stdout == (b"99997\n", b"99987\n")
+    assert res.exit_code == exec_helpers.ExitCodes.EX_OK
+    assert len(res.exit_codes) == 4
+
+    res = runner.pipeline(["cat", "sh -c 'cat; echo error >&2; exit 3'"], stdin="data")
+    assert res.stdout == (b"data",)
+    assert res.stderr == (b"error\n",)
+    assert res.exit_codes == (exec_helpers.ExitCodes.EX_OK, 3)
+    assert res.stages[1].stderr == (b"error\n",)
+
+    with pytest.raises(exec_helpers.ExecHelperTimeoutError) as e:
+        runner.pipeline(["sleep 10", "cat"], timeout=0.5)
+    assert e.value.result.exit_codes[0] == -signal.SIGTERM
+
+    with pytest.raises(exec_helpers.ExecHelperTimeoutError) as e:
+        runner.pipeline(["echo data", "sh -c 'cat; sleep 10'"], timeout=0.5)
+    assert e.value.result.exit_codes[0] == exec_helpers.ExitCodes.EX_OK
+    if sys.platform != "win32":
+        assert e.value.result.stages[0].rusage is not None  # Exited stage is reaped with resource usage
+
+    with pytest.raises(ValueError):
+        runner.pipeline([])
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX shell required")
+def test_014_persistent_shell(monkeypatch) -> None:
+    """Test commands execution by persistent shell."""
+    runner = exec_helpers.Subprocess(persistent_shell=True)
+    assert runner.persistent_shell
+    try:
+        res = runner.execute("echo out; echo error >&2; exit 3")
+        assert res == exec_helpers.ExecResult(
+            cmd="echo out; echo error >&2; exit 3", stdout=(b"out\n",), stderr=(b"error\n",), exit_code=3
+        )
+        assert runner.check_call("pwd", cwd="/").stdout == (b"/\n",)
+        assert runner.execute("cat", stdin="data").stdout == (b"data",)  # New process is spawned
+
+        with pytest.raises(exec_helpers.ExecHelperTimeoutError) as e:
+            runner.execute("echo start; sleep 10", timeout=0.5)
+        assert e.value.result.stdout == (b"start\n",)
+        assert e.value.result.exit_code == -signal.SIGTERM
+        assert runner.execute("echo alive").stdout == (b"alive\n",)
+
+        monkeypatch.setenv("EXEC_HELPERS_TEST_VAR", "changed")  # Shell is restarted with actual environment
+        assert runner.execute("echo $EXEC_HELPERS_TEST_VAR").stdout == (b"changed\n",)
+    finally:
+        runner.close()
+
+
+@pytest.mark.skipif(not hasattr(os, "wait4"), reason="os.wait4 required")
+def test_015_rusage(subprocess_logger) -> None:
+    """Test resource usage collection."""
+    runner = exec_helpers.Subprocess()
+    res = runner.execute("i=0; while [ $i -lt 2000 ]; do i=$((i+1)); done", verbose=True)
+    assert isinstance(res.rusage, exec_helpers.ResourceUsage)
+    assert res.rusage.user_time + res.rusage.system_time > 0
+    assert res.rusage.max_rss > 0
+    assert str(res.rusage) in subprocess_logger.mock_calls[-1][2]["msg"]
+
+    res = runner.pipeline(["seq 1 1000", "wc -l"])
+    assert all(isinstance(stage.rusage, exec_helpers.ResourceUsage) for stage in res.stages)
+    assert res.rusage.max_rss == max(stage.rusage.max_rss for stage in res.stages)
+    assert res.rusage.user_time == pytest.approx(sum(stage.rusage.user_time for stage in res.stages))
+
+    with pytest.raises(exec_helpers.ExecHelperTimeoutError) as e:
+        runner.execute("sleep 10", timeout=0.2)
+    assert e.value.result.rusage is not None
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX pipes required")
+def test_016_drain_timeout() -> None:
+    """Test output read until EOF and limited drain if pipes are held by background children."""
+    runner = exec_helpers.Subprocess(drain_timeout=2)
+    res = runner.execute("(sleep 0.2; echo late) & echo start")
+    assert res.stdout == (b"start\n", b"late\n")
+
+    runner.drain_timeout = 0.1
+    started = time.monotonic()
+    res = runner.execute("echo start; sleep 5 &")
+    assert time.monotonic() - started < 2
+    assert res.stdout == (b"start\n",)
+    assert res.exit_code == exec_helpers.ExitCodes.EX_OK
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux scheduler interfaces required")
+def test_017_scheduling() -> None:
+    """Test scheduling controls applied before command start: processes started at once by command inherit them."""
+    import resource
+
+    runner = exec_helpers.Subprocess()
+    res = runner.execute(
+        "grep Cpus_allowed_list /proc/self/status; nice; ulimit -n",
+        cpu_affinity=[0],
+        nice=5,
+        rlimits={resource.RLIMIT_NOFILE: (64, 64)},
+    )
+    assert res.exit_code == exec_helpers.ExitCodes.EX_OK
+    assert res.stdout[0].split() == [b"Cpus_allowed_list:", b"0"]
+    assert int(res.stdout[1]) == os.nice(0) + 5
+    assert res.stdout[2] == b"64\n"
+
+
+def test_018_output_callbacks(subprocess_logger) -> None:
+    """Test output delivery to callbacks while command is running."""
+    runner = exec_helpers.Subprocess()
+    stdout_lines = []
+    stderr_lines = []
+    chunks = []
+    res = runner.execute(
+        "echo line 1; echo error >&2; printf 'line 2\\ntail'",
+        on_stdout_line=stdout_lines.append,
+        on_stderr_line=stderr_lines.append,
+        on_stdout_chunk=chunks.append,
+    )
+    assert tuple(stdout_lines) == res.stdout == (b"line 1\n", b"line 2\n", b"tail")
+    assert tuple(stderr_lines) == res.stderr == (b"error\n",)
+    assert b"".join(chunks) == res.stdout_bin
+
+    # Slow consumer: output reading waits for queue, all lines are delivered before return
+    delivered = []
+
+    def slow_consumer(line: bytes) -> None:
+        time.sleep(0.001)
+        delivered.append(line)
+
+    res = runner.execute("seq 1 200", on_stdout_line=slow_consumer, callbacks_queue_size=4)
+    assert tuple(delivered) == res.stdout
+    assert len(delivered) == 200
+
+    def broken(line: bytes) -> None:
+        raise ValueError(line)
+
+    res = runner.execute("echo 1; echo 2", on_stdout_line=broken)
+    assert res.stdout == (b"1\n", b"2\n")
+    assert sum(1 for call in subprocess_logger.mock_calls if call[0] == "exception") == 2
+
+
+def test_019_binary_output() -> None:
+    """Test bulk read of not line-oriented output."""
+    runner = exec_helpers.Subprocess()
+    chunks = []
+    data = bytes(range(256)) * 1024
+    res = runner.execute(
+        f"{sys.executable} -c 'import sys; sys.stdout.buffer.write(bytes(range(256)) * 1024)'",
+        binary_output=True,
+        on_stdout_chunk=chunks.append,
+    )
+    assert res.stdout_bin == data
+    assert b"".join(chunks) == data
+    assert res.stdout == tuple(io.BytesIO(data))
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="UNIX sockets required")
+def test_020_spawn_helper() -> None:
+    """Test commands spawn by pre-started helper process."""
+    runner = exec_helpers.Subprocess(spawn_helper=True)
+    assert runner.spawn_helper
+    try:
+        res = runner.execute("echo out; echo error >&2; exit 3")
+        assert res == exec_helpers.ExecResult(
+            cmd="echo out; echo error >&2; exit 3", stdout=(b"out\n",), stderr=(b"error\n",), exit_code=3
+        )
+        assert res.rusage is not None
+        assert runner.execute("cat", stdin="data").stdout == (b"data",)
+        assert runner.check_call("echo $VAR", cwd="/", env_patch={"VAR": "value"}).stdout == (b"value\n",)
+        res = runner.execute("sleep 0.2; ps -o ni= -p $$", nice=5)  # Applied from parent after start
+        assert int(res.stdout[0]) == os.nice(0) + 5
+
+        with pytest.raises(exec_helpers.ExecHelperTimeoutError) as e:
+            runner.execute("echo start; sleep 10", timeout=0.5)
+        assert e.value.result.stdout == (b"start\n",)
+        assert e.value.result.exit_code == -signal.SIGTERM
+    finally:
+        runner.close()
+    assert runner.execute("echo restarted").stdout == (b"restarted\n",)
+    runner.close()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX pipes required")
+def test_021_concurrent_stdin() -> None:
+    """Test STDIN larger than pipe buffer is written while output is read."""
+    runner = exec_helpers.Subprocess()
+    data = b"line\n" * 256 * 1024
+    assert runner.execute("cat", stdin=data, timeout=30).stdout_bin == data
+    assert runner.pipeline([["cat"], ["cat"]], stdin=data, timeout=30).stdout_bin == data
+    with mock.patch("exec_helpers._subprocess_helpers.selectable_pipes", return_value=False):
+        assert runner.execute("cat", stdin=data, timeout=30).stdout_bin == data
+    res = runner.execute("head -c 4", stdin=data, timeout=30)
+    assert res.stdout == (b"line",)
+    assert res.exit_code == 0
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="UNIX sockets required")
+def test_022_spawn_helper_current_cwd_env(tmp_path, monkeypatch) -> None:
+    """Test commands spawned by helper get cwd and environment of the caller, not of the helper start."""
+    runner = exec_helpers.Subprocess(spawn_helper=True)
+    try:
+        assert runner.execute("pwd").stdout == (f"{os.getcwd()}\n".encode(),)
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("EXEC_HELPERS_TEST_VAR", "changed")
+        res = runner.check_call('pwd; echo "$EXEC_HELPERS_TEST_VAR"')
+        assert res.stdout == (f"{os.getcwd()}\n".encode(), b"changed\n")
+    finally:
+        runner.close()
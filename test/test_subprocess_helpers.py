@@ -0,0 +1,279 @@
+#    Copyright 2018 - 2020 Alexey Stepanov aka penguinolog.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+# Standard Library
+import os
+import platform
+import signal
+import subprocess
+import sys
+import time
+
+# External Dependencies
+import psutil
+import pytest
+
+# Exec-Helpers Implementation
+from exec_helpers import _shell_framing
+from exec_helpers import _subprocess_helpers
+from exec_helpers import proc_enums
+
+pytestmark = pytest.mark.skipif(platform.system() == "Windows", reason="POSIX process groups required")
+
+
+def spawn(command: str, **kwargs) -> subprocess.Popen:
+    return subprocess.Popen(
+        command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, start_new_session=True, **kwargs
+    )
+
+
+def is_stopped(pid: int) -> bool:
+    try:
+        return psutil.Process(pid).status() == psutil.STATUS_ZOMBIE
+    except psutil.NoSuchProcess:
+        return True
+
+
+def test_001_kill_group_with_children() -> None:
+    """Whole process group is stopped by SIGTERM."""
+    proc = spawn("sleep 30 & echo $!; wait")
+    child_pid = int(proc.stdout.readline())
+    _subprocess_helpers.kill_proc_tree(proc.pid, grace_period=5)
+    proc.stdout.close()
+    assert proc.wait(timeout=1) == -signal.SIGTERM
+    assert is_stopped(child_pid)
+
+
+def test_002_kill_group_term_ignored() -> None:
+    """SIGKILL is sent after grace period."""
+    proc = spawn("trap '' TERM; echo ready; while true; do sleep 0.1; done")
+    proc.stdout.readline()
+    started = time.monotonic()
+    _subprocess_helpers.kill_proc_tree(proc.pid, grace_period=0.5)
+    proc.stdout.close()
+    assert 0.5 <= time.monotonic() - started < 5
+    assert proc.wait(timeout=1) == -signal.SIGKILL
+
+
+def test_003_wait_pid_no_reap() -> None:
+    """Process exit is detected without reaping: exit code is still available."""
+    proc = spawn("exit 3")
+    assert _subprocess_helpers.wait_pid(proc.pid, timeout=5)
+    assert proc.wait(timeout=1) == 3
+    proc.stdout.close()
+
+
+def test_004_wait_pid_timeout() -> None:
+    """Running process is not reported as exited."""
+    proc = spawn("sleep 30")
+    assert not _subprocess_helpers.wait_pid(proc.pid, timeout=0.1)
+    _subprocess_helpers.kill_proc_tree(proc.pid, grace_period=0)
+    proc.wait(timeout=1)
+    proc.stdout.close()
+
+
+def test_005_not_group_leader(mocker) -> None:
+    """Process not leading own group is stopped using tree walk."""
+    killpg = mocker.patch("os.killpg")
+    proc = subprocess.Popen("sleep 30", shell=True)
+    _subprocess_helpers.kill_proc_tree(proc.pid, grace_period=1)
+    killpg.assert_not_called()
+    assert proc.wait(timeout=1) in {-signal.SIGTERM, 128 + signal.SIGTERM}
+
+
+def test_006_line_buffer() -> None:
+    """Chunks are split to lines same way as iteration over file."""
+    buffer = _subprocess_helpers.LineBuffer()
+    assert buffer.feed(b"line") == []
+    assert buffer.feed(b" 1\nline 2\r\nli") == [b"line 1\n", b"line 2\r\n"]
+    assert buffer.feed(b"ne 3\n") == [b"line 3\n"]
+    assert buffer.flush() == []
+    assert buffer.feed(b"tail") == []
+    assert buffer.flush() == [b"tail"]
+    assert buffer.lines == [b"line 1\n", b"line 2\r\n", b"line 3\n", b"tail"]
+
+
+def test_007_selectable_pipes() -> None:
+    """Only real pipes are polled by selector."""
+    proc = spawn("true")
+    assert _subprocess_helpers.selectable_pipes(proc.stdout, None)
+    assert not _subprocess_helpers.selectable_pipes(None, None)
+    assert not _subprocess_helpers.selectable_pipes(proc.stdout, iter(()))
+    proc.wait(timeout=5)
+    proc.stdout.close()
+
+
+def test_008_framed_command() -> None:
+    """Command output is separated by sentinels."""
+    frame = _shell_framing.FramedCommand("echo 1")
+    script = frame.script(cwd="/tmp").decode()
+    sentinel = script.split("'")[-2]
+    assert "cd -- /tmp" in script
+    assert not frame.feed_stdout(b"line 1\nline 2")
+    assert frame.feed_stdout(f"\n{sentinel} 3\n".encode()[:5]) is False
+    assert frame.feed_stdout(f"\n{sentinel} 3\n".encode()[5:])
+    assert not frame.done
+    assert frame.feed_stderr(f"error\n\n{sentinel}\n".encode())
+    assert frame.done
+    assert frame.exit_code == 3
+    assert frame.stdout_lines == [b"line 1\n", b"line 2"]
+    assert frame.stderr_lines == [b"error\n"]
+
+
+def test_009_shell_worker() -> None:
+    """Persistent shell executes commands and survives failures of commands."""
+    worker = _subprocess_helpers.ShellWorker()
+    try:
+        for command, exit_code in (("echo out; echo err >&2", 0), ("exit 3", 3), ("echo (", 2), ("cd /", 0)):
+            frame = _shell_framing.FramedCommand(command)
+            assert worker.run(frame, frame.script(), timeout=5) == (exit_code, False)
+        pid = worker.pid
+
+        frame = _shell_framing.FramedCommand("echo start; sleep 30")
+        assert worker.run(frame, frame.script(), timeout=0.2, grace_period=1) == (-signal.SIGTERM, True)
+        assert frame.stdout_lines == [b"start\n"]
+        assert worker.pid == pid
+
+        frame = _shell_framing.FramedCommand("kill -9 $$")
+        assert worker.run(frame, frame.script(), timeout=5) == (-signal.SIGKILL, False)
+        assert worker.pid is None
+
+        frame = _shell_framing.FramedCommand("pwd")
+        assert worker.run(frame, frame.script(cwd="/"), timeout=5) == (0, False)
+        assert frame.stdout_lines == [b"/\n"]
+        assert worker.pid not in (None, pid)
+    finally:
+        worker.close()
+    assert worker.pid is None
+
+
+def test_010_env_cache(monkeypatch) -> None:
+    """Merged environments are reused until os.environ change."""
+    cache = _subprocess_helpers.EnvCache(max_size=2)
+    assert cache.get(None, None) is None
+    assert cache.get({"A": "1"}, None) == {"A": "1"}
+
+    env = cache.get(None, {"EXEC_HELPERS_TEST": "1"})
+    assert env["EXEC_HELPERS_TEST"] == "1"
+    assert env["PATH"] == os.environ["PATH"]
+    with pytest.raises(TypeError):
+        env["EXEC_HELPERS_TEST"] = "2"
+    assert cache.get(None, {"EXEC_HELPERS_TEST": "1"}) is env
+
+    monkeypatch.setenv("EXEC_HELPERS_ENV", "changed")
+    new_env = cache.get(None, {"EXEC_HELPERS_TEST": "1"})
+    assert new_env is not env
+    assert new_env["EXEC_HELPERS_ENV"] == "changed"
+
+    assert cache.get({"A": "1"}, {"B": "2"}) == {"A": "1", "B": "2"}
+    assert cache.get({"A": "1"}, {"B": "3"}) == {"A": "1", "B": "3"}
+    assert len(cache) == 2
+    assert cache.get({"A": ["1"]}, {"B": "2"}) == {"A": ["1"], "B": "2"}  # not cached
+    assert len(cache) == 2
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_011_scheduling_preexec_fn() -> None:
+    """Child process hook is created only if controls are set, IO priority is applied from parent."""
+    import resource
+
+    assert _subprocess_helpers.scheduling_preexec_fn() is None
+    assert callable(_subprocess_helpers.scheduling_preexec_fn(rlimits={resource.RLIMIT_NOFILE: (64, 64)}))
+    proc = spawn("nice", preexec_fn=_subprocess_helpers.scheduling_preexec_fn(cpu_affinity=[0], nice=3))
+    assert int(proc.stdout.read()) == os.nice(0) + 3
+    proc.wait(timeout=5)
+    proc.stdout.close()
+
+    proc = spawn("sleep 30")
+    _subprocess_helpers.apply_scheduling(proc.pid, nice=3)
+    assert psutil.Process(proc.pid).nice() == os.nice(0) + 3
+    _subprocess_helpers.kill_proc_tree(proc.pid, grace_period=0)
+    proc.wait(timeout=1)
+    proc.stdout.close()
+    _subprocess_helpers.apply_scheduling(proc.pid, nice=3)  # Exited process is ignored
+
+
+def test_012_spawn_helper() -> None:
+    """Commands are spawned by helper, exit status is reported, died helper is restarted."""
+    helper = _subprocess_helpers.SpawnHelper()
+    try:
+        proc = helper.spawn("cat; echo err >&2; exit 3")
+        assert proc.pid != helper.pid
+        proc.stdin.write(b"data")
+        proc.stdin.close()
+        assert proc.stdout.read() == b"data"
+        assert proc.stderr.read() == b"err\n"
+        assert proc.wait(timeout=5) == 3
+        assert proc.rusage is not None
+        proc.stdout.close()
+        proc.stderr.close()
+
+        with pytest.raises(FileNotFoundError):
+            helper.spawn("true", cwd="/nonexistent")
+
+        proc = helper.spawn("sleep 30", open_stdout=False, open_stderr=False)
+        assert proc.stdout is None
+        with pytest.raises(subprocess.TimeoutExpired):
+            proc.wait(timeout=0.1)
+        _subprocess_helpers.kill_proc_tree(proc.pid, grace_period=5)
+        assert proc.poll() == -signal.SIGTERM
+
+        pid = helper.pid
+        proc = helper.spawn("sleep 0.2", open_stdout=False, open_stderr=False)
+        os.kill(pid, signal.SIGKILL)
+        assert proc.wait(timeout=5) == proc_enums.INVALID  # Exit status is lost with helper
+        proc = helper.spawn("echo restarted", open_stderr=False)
+        assert helper.pid not in (None, pid)
+        assert proc.stdout.read() == b"restarted\n"
+        assert proc.wait(timeout=5) == 0
+        proc.stdout.close()
+    finally:
+        helper.close()
+    assert helper.pid is None
+
+
+def test_013_kill_escaped_descendant() -> None:
+    """Descendant moved to own process group is stopped too."""
+    script = "import os, time; os.setpgid(0, 0); print(os.getpid(), flush=True); time.sleep(30)"
+    proc = spawn(f"{sys.executable} -c '{script}' & wait")
+    child_pid = int(proc.stdout.readline())
+    assert os.getpgid(child_pid) != proc.pid
+    _subprocess_helpers.kill_proc_tree(proc.pid, grace_period=5)
+    proc.stdout.close()
+    proc.wait(timeout=1)
+    assert is_stopped(child_pid)
+
+
+def test_014_group_member_grace_period(tmp_path) -> None:
+    """Group members get grace period for cleanup on SIGTERM even if group leader exits at once."""
+    marker = tmp_path / "cleaned"
+    script = (
+        "import signal, sys, time\n"
+        "def cleanup(*_):\n"
+        "    time.sleep(0.3)\n"
+        f"    open({str(marker)!r}, 'w').close()\n"
+        "    sys.exit(0)\n"
+        "signal.signal(signal.SIGTERM, cleanup)\n"
+        "print('ready', flush=True)\n"
+        "time.sleep(30)\n"
+    )
+    script_path = tmp_path / "child.py"
+    script_path.write_text(script)
+    proc = spawn(f"{sys.executable} {script_path}; true")
+    assert proc.stdout.readline() == b"ready\n"
+    _subprocess_helpers.kill_proc_tree(proc.pid, grace_period=2)
+    proc.stdout.close()
+    proc.wait(timeout=1)
+    assert marker.exists()
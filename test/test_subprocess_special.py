@@ -232,6 +232,7 @@ def create_subprocess_shell(mocker, run_parameters):
     mock_parameters: MockParameters = run_parameters["mock_parameters"]
 
     mocker.patch("psutil.Process")
+    mocker.patch("os.killpg")
     mocker.patch("psutil.wait_procs", return_value=([], []))
 
     def create_mock(stdout: typing.Optional[typing.Tuple] = None, **kwargs):